@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Approximate Nearest Neighbour (HNSW) Index สำหรับค้นหา embeddings เมื่อ corpus ใหญ่
+
+- ใช้ hnswlib ถ้าติดตั้งไว้ มิฉะนั้นใช้ HNSW ที่เขียนด้วย NumPy (graph แบบเดียวกันแต่ช้ากว่า)
+- M (จำนวน links ต่อ node) และ ef_construction กำหนดคุณภาพของ graph ตอนสร้าง
+  ef ตอนค้นหาแลก recall กับความเร็ว (ef มาก = recall สูงขึ้นแต่ช้าลง)
+- เพิ่ม vectors ทีละชุดได้ (incremental) และบันทึก/โหลดเป็นโฟลเดอร์
+- ค้นหาด้วย interface เดียวกับ VectorIndex: search(query, k, document_ids) -> [(cosine similarity, payload), ...]
+- วัด recall@k เทียบกับ exact search: python app/ann_index.py benchmark [จำนวน vectors] [dimension]
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import shutil
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from bson import json_util
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# fields ของเอกสารที่เก็บไว้กับ vector (ไม่เก็บ embeddings ซ้ำใน payload)
+PAYLOAD_FIELDS = ("_id", "doc_id", "document_id", "text", "summary", "page", "chunk_id", "type", "embedding_model")
+
+# ค้นหาแบบกรอง document_ids: ถ้าเอกสารที่เลือกมีสัดส่วนน้อยกว่านี้ คำนวณ exact เฉพาะเอกสารเหล่านั้นแทน graph
+EXACT_FILTER_FRACTION = 0.1
+
+
+def payload_key(payload: dict) -> str:
+    """id ของ vector ใน index (ใช้ตรวจ vectors ที่เพิ่มแล้ว)"""
+    return str(payload.get("_id", payload.get("doc_id")))
+
+
+def normalize(vectors) -> np.ndarray:
+    """แปลงเป็น matrix float32 ที่แต่ละแถวมีความยาว 1 (inner product = cosine similarity)"""
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class _Graph:
+    """ส่วนที่ใช้ร่วมกันของ HNSW graph: vectors ที่ normalize แล้ว (ขยายขนาดแบบ doubling)"""
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.count = 0
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self.count]
+
+    def _append_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """เก็บ vectors ต่อท้าย และคืนค่า labels ของ vectors เหล่านั้น"""
+        needed = self.count + len(vectors)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors), 1024), self.dimension), dtype=np.float32)
+            grown[:self.count] = self.vectors
+            self._vectors = grown
+        self._vectors[self.count:needed] = vectors
+        labels = np.arange(self.count, needed)
+        self.count = needed
+        return labels
+
+
+class _NumpyHNSW(_Graph):
+    """HNSW (Malkov & Yashunin) บน inner product ของ vectors ที่ normalize แล้ว เขียนด้วย NumPy"""
+
+    backend = "numpy"
+
+    def __init__(self, dimension: int, M: int = 16, ef_construction: int = 200, seed: int = 100):
+        super().__init__(dimension)
+        self.M = M
+        self.max_M0 = 2 * M
+        self.ef_construction = ef_construction
+        self._level_mult = 1.0 / np.log(max(M, 2))
+        self._rng = np.random.default_rng(seed)
+        self.levels: List[int] = []
+        self.links: List[Dict[int, np.ndarray]] = [{}]
+        self.entry_point = -1
+        self.max_level = -1
+
+    def add_items(self, vectors: np.ndarray) -> None:
+        for label in self._append_vectors(vectors):
+            self._insert(int(label))
+
+    def _insert(self, node: int) -> None:
+        vector = self._vectors[node]
+        level = int(-np.log(1.0 - self._rng.random()) * self._level_mult)
+        self.levels.append(level)
+        while len(self.links) <= level:
+            self.links.append({})
+        for layer in range(level + 1):
+            self.links[layer][node] = np.empty(0, dtype=np.int32)
+        if self.entry_point < 0:
+            self.entry_point, self.max_level = node, level
+            return
+
+        entry = [self.entry_point]
+        for layer in range(self.max_level, level, -1):
+            entry = [self._search_layer(vector, entry, 1, layer)[0][0]]
+        for layer in range(min(level, self.max_level), -1, -1):
+            candidates = self._search_layer(vector, entry, self.ef_construction, layer)
+            neighbors = self._select_neighbors(candidates, self.M)
+            self.links[layer][node] = np.asarray(neighbors, dtype=np.int32)
+            max_links = self.max_M0 if layer == 0 else self.M
+            for neighbor in neighbors:
+                links = np.append(self.links[layer][neighbor], np.int32(node))
+                if len(links) > max_links:
+                    # ตัด links ของ neighbor ให้เหลือ max_links ด้วย heuristic เดียวกัน
+                    similarities = self._vectors[links] @ self._vectors[neighbor]
+                    order = np.argsort(-similarities)
+                    kept = self._select_neighbors(list(zip(links[order].tolist(), similarities[order].tolist())), max_links)
+                    links = np.asarray(kept, dtype=np.int32)
+                self.links[layer][neighbor] = links
+            entry = [candidate for candidate, _ in candidates]
+        if level > self.max_level:
+            self.entry_point, self.max_level = node, level
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[int], ef: int, layer: int) -> List[Tuple[int, float]]:
+        """best-first search ใน layer เดียว คืนค่า [(node, similarity), ...] ไม่เกิน ef ตัว เรียงจากมากไปน้อย"""
+        links = self.links[layer]
+        visited = set(entry_points)
+        similarities = (self._vectors[entry_points] @ query).tolist()
+        candidates = [(-similarity, node) for node, similarity in zip(entry_points, similarities)]
+        results = [(similarity, node) for node, similarity in zip(entry_points, similarities)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+        while candidates:
+            negative_similarity, node = heapq.heappop(candidates)
+            if len(results) >= ef and -negative_similarity < results[0][0]:
+                break
+            new_nodes = [neighbor for neighbor in links[node].tolist() if neighbor not in visited]
+            if not new_nodes:
+                continue
+            visited.update(new_nodes)
+            for neighbor, similarity in zip(new_nodes, (self._vectors[new_nodes] @ query).tolist()):
+                if len(results) < ef or similarity > results[0][0]:
+                    heapq.heappush(candidates, (-similarity, neighbor))
+                    heapq.heappush(results, (similarity, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return [(node, similarity) for similarity, node in sorted(results, reverse=True)]
+
+    def _select_neighbors(self, candidates: List[Tuple[int, float]], M: int) -> List[int]:
+        """
+        เลือก neighbors ด้วย heuristic ของ HNSW: ข้าม candidate ที่ใกล้ neighbor ที่เลือกแล้วมากกว่าใกล้ node
+        (กระจาย links ไปหลายทิศทาง) แล้วเติมด้วย candidates ที่ถูกข้ามจนครบ M
+        """
+        selected: List[int] = []
+        pruned: List[int] = []
+        for candidate, similarity in candidates:
+            if len(selected) >= M:
+                break
+            if selected and float((self._vectors[selected] @ self._vectors[candidate]).max()) > similarity:
+                pruned.append(candidate)
+            else:
+                selected.append(candidate)
+        return selected + pruned[:M - len(selected)]
+
+    def knn(self, query: np.ndarray, k: int, ef: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.count:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        entry = self.entry_point
+        for layer in range(self.max_level, 0, -1):
+            entry = self._search_layer(query, [entry], 1, layer)[0][0]
+        results = self._search_layer(query, [entry], max(ef, k), 0)[:k]
+        return (np.array([node for node, _ in results], dtype=np.int64),
+                np.array([similarity for _, similarity in results], dtype=np.float32))
+
+    def save(self, path: str) -> None:
+        np.save(os.path.join(path, "vectors.npy"), self.vectors)
+        arrays = {"levels": np.asarray(self.levels, dtype=np.int32)}
+        for layer, links in enumerate(self.links):
+            nodes = np.fromiter(links.keys(), dtype=np.int32, count=len(links))
+            arrays[f"nodes_{layer}"] = nodes
+            arrays[f"offsets_{layer}"] = np.concatenate([[0], np.cumsum([len(links[node]) for node in nodes.tolist()])]).astype(np.int64)
+            arrays[f"neighbors_{layer}"] = (np.concatenate([links[node] for node in nodes.tolist()]) if len(nodes)
+                                            else np.empty(0, dtype=np.int32))
+        np.savez(os.path.join(path, "graph.npz"), **arrays)
+
+    @classmethod
+    def load(cls, path: str, meta: dict) -> "_NumpyHNSW":
+        graph = cls(meta["dimension"], M=meta["M"], ef_construction=meta["ef_construction"])
+        graph._append_vectors(np.load(os.path.join(path, "vectors.npy")))
+        with np.load(os.path.join(path, "graph.npz")) as arrays:
+            graph.levels = arrays["levels"].tolist()
+            graph.links = []
+            for layer in range(max(graph.levels, default=0) + 1):
+                nodes, offsets, neighbors = arrays[f"nodes_{layer}"], arrays[f"offsets_{layer}"], arrays[f"neighbors_{layer}"]
+                graph.links.append({int(node): neighbors[offsets[i]:offsets[i + 1]].copy() for i, node in enumerate(nodes)})
+        graph.entry_point, graph.max_level = meta["entry_point"], meta["max_level"]
+        return graph
+
+    def state(self) -> dict:
+        return {"entry_point": self.entry_point, "max_level": self.max_level}
+
+
+class _HnswlibGraph(_Graph):
+    """HNSW graph ของ hnswlib (space 'ip' บน vectors ที่ normalize แล้ว)"""
+
+    backend = "hnswlib"
+
+    def __init__(self, dimension: int, M: int = 16, ef_construction: int = 200, seed: int = 100):
+        super().__init__(dimension)
+        self.M = M
+        self.ef_construction = ef_construction
+        self.index = hnswlib.Index(space="ip", dim=dimension)
+        self.index.init_index(max_elements=1024, ef_construction=ef_construction, M=M, random_seed=seed)
+
+    def add_items(self, vectors: np.ndarray) -> None:
+        labels = self._append_vectors(vectors)
+        if self.count > self.index.get_max_elements():
+            self.index.resize_index(max(self.count, 2 * self.index.get_max_elements()))
+        self.index.add_items(vectors, labels)
+
+    def knn(self, query: np.ndarray, k: int, ef: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.count:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        self.index.set_ef(max(ef, k))
+        labels, distances = self.index.knn_query(query, k=min(k, self.count))
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def save(self, path: str) -> None:
+        np.save(os.path.join(path, "vectors.npy"), self.vectors)
+        self.index.save_index(os.path.join(path, "hnsw.bin"))
+
+    @classmethod
+    def load(cls, path: str, meta: dict) -> "_HnswlibGraph":
+        graph = cls.__new__(cls)
+        _Graph.__init__(graph, meta["dimension"])
+        graph.M, graph.ef_construction = meta["M"], meta["ef_construction"]
+        graph._append_vectors(np.load(os.path.join(path, "vectors.npy")))
+        graph.index = hnswlib.Index(space="ip", dim=meta["dimension"])
+        graph.index.load_index(os.path.join(path, "hnsw.bin"), max_elements=max(graph.count, 1024))
+        return graph
+
+    def state(self) -> dict:
+        return {}
+
+
+_GRAPH_BACKENDS = {"numpy": _NumpyHNSW, "hnswlib": _HnswlibGraph}
+
+
+def _resolve_backend(backend: str) -> str:
+    """'auto' = hnswlib ถ้าติดตั้งไว้ มิฉะนั้น numpy"""
+    if backend == "auto":
+        return "hnswlib" if HNSWLIB_AVAILABLE else "numpy"
+    if backend == "hnswlib" and not HNSWLIB_AVAILABLE:
+        logger.warning("⚠️ hnswlib ไม่ได้ติดตั้ง ใช้ HNSW แบบ NumPy แทน")
+        return "numpy"
+    if backend not in _GRAPH_BACKENDS:
+        raise ValueError(f"ANN backend ไม่รองรับ: {backend}")
+    return backend
+
+
+class ANNIndex:
+    """HNSW index ของ vectors ใน field หนึ่ง สำหรับค้นหาด้วย cosine similarity แบบประมาณ"""
+
+    def __init__(self, field: str, dimension: int, M: int = 16, ef_construction: int = 200, ef: int = 64,
+                 backend: str = "auto"):
+        """
+        Args:
+            field (str): ชื่อ field ที่เก็บ vector (เช่น 'embeddings')
+            dimension (int): ขนาด vector
+            M (int): จำนวน links ต่อ node (มาก = recall สูงขึ้น ใช้หน่วยความจำและเวลาสร้างมากขึ้น)
+            ef_construction (int): ขนาด candidate list ตอนสร้าง graph
+            ef (int): ขนาด candidate list ตอนค้นหา (ปรับได้ภายหลัง)
+            backend (str): 'auto' | 'hnswlib' | 'numpy'
+        """
+        self.field = field
+        self.ef = ef
+        self.graph = _GRAPH_BACKENDS[_resolve_backend(backend)](dimension, M=M, ef_construction=ef_construction)
+        self.payloads: List[dict] = []
+        self.positions: Dict[str, int] = {}
+        self.document_ids = np.array([], dtype=object)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    @property
+    def dimension(self) -> int:
+        return self.graph.dimension
+
+    @property
+    def backend(self) -> str:
+        return self.graph.backend
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """vectors ที่ normalize แล้ว เรียงตามลำดับ payloads"""
+        return self.graph.vectors
+
+    def add(self, docs: Iterable[dict]) -> int:
+        """
+        เพิ่มเอกสารลง graph (incremental) เอกสารที่มีอยู่แล้วอัปเดตเฉพาะ payload
+
+        Args:
+            docs: เอกสารจาก collection (เอกสารที่ไม่มี field หรือขนาด vector ไม่ตรงกับ index จะถูกข้าม)
+
+        Returns:
+            int: จำนวน vectors ที่เพิ่ม
+        """
+        new_payloads: Dict[str, dict] = {}
+        vectors = []
+        for doc in docs:
+            vector = doc.get(self.field)
+            if vector is None or len(vector) != self.dimension:
+                continue
+            payload = {key: doc[key] for key in PAYLOAD_FIELDS if key in doc}
+            key = payload_key(payload)
+            if key in self.positions:
+                self.payloads[self.positions[key]] = payload
+            elif key not in new_payloads:
+                new_payloads[key] = payload
+                vectors.append(vector)
+        if not new_payloads:
+            return 0
+        with self._lock:
+            self.graph.add_items(normalize(vectors))
+            for key, payload in new_payloads.items():
+                self.positions[key] = len(self.payloads)
+                self.payloads.append(payload)
+            self.document_ids = np.array([payload.get("document_id") for payload in self.payloads], dtype=object)
+        return len(new_payloads)
+
+    def search(self, query, k: int = 2, document_ids: Optional[Sequence[str]] = None) -> List[Tuple[float, dict]]:
+        """
+        ค้นหาเอกสารที่ใกล้กับ query มากที่สุด (ผลเหมือน VectorIndex.search แต่เป็นค่าประมาณ)
+
+        Args:
+            query: query vector (ขนาดเดียวกับ vectors ใน index)
+            k (int): จำนวนผลลัพธ์
+            document_ids: ค้นหาเฉพาะเอกสารเหล่านี้ (None = ทั้งหมด)
+
+        Returns:
+            List[Tuple[float, dict]]: [(cosine similarity, payload), ...] เรียงจากมากไปน้อย
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        if not len(self) or k <= 0 or query.shape[0] != self.dimension:
+            return []
+        query = normalize(query)[0]
+        with self._lock:
+            if document_ids is None:
+                labels, scores = self.graph.knn(query, min(k, len(self)), self.ef)
+                return [(float(score), self.payloads[label]) for label, score in zip(labels, scores)]
+
+            allowed = np.isin(self.document_ids, list(document_ids))
+            allowed_count = int(allowed.sum())
+            if not allowed_count:
+                return []
+            if allowed_count >= EXACT_FILTER_FRACTION * len(self):
+                # ค้นหาใน graph มากกว่า k ตามสัดส่วนเอกสารที่เลือก แล้วกรองเอกสาร
+                oversampled = min(len(self), int(np.ceil(2 * k * len(self) / allowed_count)))
+                labels, scores = self.graph.knn(query, oversampled, max(self.ef, oversampled))
+                hits = [(float(score), self.payloads[label]) for label, score in zip(labels, scores) if allowed[label]]
+                if len(hits) >= min(k, allowed_count):
+                    return hits[:k]
+            # เอกสารที่เลือกมีน้อย: คำนวณ exact เฉพาะเอกสารเหล่านั้น
+            positions = np.flatnonzero(allowed)
+            scores = self.matrix[positions] @ query
+            top = np.argsort(-scores)[:k]
+            return [(float(scores[i]), self.payloads[positions[i]]) for i in top]
+
+    def save(self, path: str) -> str:
+        """
+        บันทึก index เป็นโฟลเดอร์ (เขียนโฟลเดอร์ใหม่ก่อนแล้วสลับ ผู้ที่เปิด index เดิมอยู่ยังอ่านต่อได้)
+
+        Args:
+            path (str): โฟลเดอร์ของ index
+
+        Returns:
+            str: path
+        """
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        with self._lock:
+            self.graph.save(tmp_path)
+            with open(os.path.join(tmp_path, "payloads.json"), "w", encoding="utf-8") as f:
+                f.write(json_util.dumps(self.payloads, ensure_ascii=False))
+            with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "format_version": FORMAT_VERSION,
+                    "backend": self.backend,
+                    "field": self.field,
+                    "dimension": self.dimension,
+                    "M": self.graph.M,
+                    "ef_construction": self.graph.ef_construction,
+                    "ef": self.ef,
+                    "count": len(self),
+                    **self.graph.state()
+                }, f)
+
+        old_path = f"{path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return path
+
+    @classmethod
+    def load(cls, path: str, ef: Optional[int] = None) -> "ANNIndex":
+        """
+        โหลด index ที่บันทึกด้วย save
+
+        Args:
+            path (str): โฟลเดอร์ของ index
+            ef (int): ขนาด candidate list ตอนค้นหา (None = ค่าที่บันทึกไว้)
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"ANN index format ไม่รองรับ: {meta.get('format_version')}")
+        backend = meta["backend"]
+        if backend == "hnswlib" and not HNSWLIB_AVAILABLE:
+            raise ValueError("ANN index นี้สร้างด้วย hnswlib แต่ hnswlib ไม่ได้ติดตั้ง")
+        index = cls.__new__(cls)
+        index.field = meta["field"]
+        index.ef = ef or meta["ef"]
+        index.graph = _GRAPH_BACKENDS[backend].load(path, meta)
+        with open(os.path.join(path, "payloads.json"), encoding="utf-8") as f:
+            index.payloads = json_util.loads(f.read())
+        index.positions = {payload_key(payload): position for position, payload in enumerate(index.payloads)}
+        index.document_ids = np.array([payload.get("document_id") for payload in index.payloads], dtype=object)
+        index._lock = threading.RLock()
+        return index
+
+    @staticmethod
+    def version(path: str) -> Optional[float]:
+        """mtime ของ index หรือ None ถ้ายังไม่มี index"""
+        try:
+            return os.path.getmtime(os.path.join(path, "meta.json"))
+        except OSError:
+            return None
+
+
+def ann_index_path(root: str, collection_name: str, field: str, space: str) -> str:
+    """โฟลเดอร์ของ ANN index ของ (collection, field, embedding space)"""
+    return os.path.join(root, f"{collection_name}.{field}.{space.replace('/', '__')}")
+
+
+def sync_ann_index(index: Optional[ANNIndex], field: str, docs: Sequence[dict], **params) -> Tuple[ANNIndex, int]:
+    """
+    ทำให้ ANN index ตรงกับเอกสารปัจจุบัน: เพิ่มเฉพาะ vectors ใหม่ (incremental)
+    หรือสร้าง graph ใหม่ถ้ามี vectors ถูกลบหรือเปลี่ยน (HNSW ลบ node ออกจาก graph ไม่ได้)
+
+    Args:
+        index: ANN index เดิม (None = สร้างใหม่)
+        field (str): field ที่เก็บ vector
+        docs: เอกสารทั้งหมดของ embedding space นี้
+        **params: M, ef_construction, ef, backend ของ ANNIndex (ใช้ตอนสร้างใหม่)
+
+    Returns:
+        Tuple[ANNIndex, int]: (index, จำนวน vectors ที่เพิ่ม)
+    """
+    docs = [doc for doc in docs if doc.get(field) is not None and len(doc[field])]
+    if not docs:
+        return index or ANNIndex(field, 0, **params), 0
+    dimension = len(docs[0][field])
+    if index is not None and index.field == field and index.dimension == dimension:
+        current = {payload_key({key: doc[key] for key in ("_id", "doc_id") if key in doc}): doc for doc in docs}
+        existing = [key for key in index.positions if key in current]
+        if len(existing) == len(index):
+            positions = [index.positions[key] for key in existing]
+            vectors = normalize([current[key][field] for key in existing]) if existing else None
+            if not existing or np.abs(index.matrix[positions] - vectors).max() < 1e-4:
+                return index, index.add(docs)
+    index = ANNIndex(field, dimension, **params)
+    return index, index.add(docs)
+
+
+def recall_at_k(index: ANNIndex, queries, k: int = 10) -> float:
+    """
+    recall@k ของ ANN index เทียบกับ exact search (สัดส่วนผลลัพธ์ k อันดับแรกที่ตรงกัน)
+
+    Args:
+        index (ANNIndex): index ที่ต้องการวัด
+        queries: query vectors
+        k (int): จำนวนผลลัพธ์ต่อคำถาม
+
+    Returns:
+        float: ค่าเฉลี่ย recall@k (0-1)
+    """
+    queries = normalize(queries)
+    exact = np.argsort(-(queries @ index.matrix.T), axis=1)[:, :k]
+    found = 0
+    for query, expected in zip(queries, exact):
+        hits = {payload_key(payload) for _, payload in index.search(query, k)}
+        found += len(hits & {payload_key(index.payloads[i]) for i in expected})
+    return found / (len(queries) * min(k, len(index)))
+
+
+def benchmark(num_vectors: int = 20000, dimension: int = 256, num_queries: int = 200, k: int = 10,
+              ef_values: Sequence[int] = (16, 32, 64, 128, 256), M: int = 16, ef_construction: int = 200,
+              backend: str = "auto", seed: int = 0) -> List[dict]:
+    """
+    วัด recall@k และเวลาค้นหาต่อคำถามของ ANN index เทียบกับ exact search (matrix-vector product)
+    ใช้ vectors สุ่มแบบเป็นกลุ่ม (คล้าย embeddings จริงที่จับกลุ่มตามหัวข้อ)
+
+    Returns:
+        List[dict]: ผลของแต่ละค่า ef: {'ef', 'recall', 'ms_per_query', 'speedup'}
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(num_vectors // 100, 1), dimension))
+    vectors = centers[rng.integers(len(centers), size=num_vectors)] + 0.5 * rng.normal(size=(num_vectors, dimension))
+    queries = normalize(centers[rng.integers(len(centers), size=num_queries)] + 0.5 * rng.normal(size=(num_queries, dimension)))
+    docs = [{"_id": f"v{i}", "embeddings": vector} for i, vector in enumerate(vectors.astype(np.float32))]
+
+    started = time.perf_counter()
+    index = ANNIndex("embeddings", dimension, M=M, ef_construction=ef_construction, backend=backend)
+    index.add(docs)
+    build_seconds = time.perf_counter() - started
+    print(f"📇 HNSW ({index.backend}) {num_vectors} vectors x {dimension} dim, M={M}, "
+          f"ef_construction={ef_construction}: สร้างใน {build_seconds:.1f} วินาที")
+
+    matrix = index.matrix
+    started = time.perf_counter()
+    for query in queries:
+        scores = matrix @ query
+        np.argpartition(-scores, k - 1)[:k]
+    exact_ms = (time.perf_counter() - started) * 1000 / num_queries
+    print(f"   exact search: {exact_ms:.3f} ms/query")
+
+    results = []
+    for ef in ef_values:
+        index.ef = ef
+        started = time.perf_counter()
+        for query in queries:
+            index.search(query, k)
+        ms_per_query = (time.perf_counter() - started) * 1000 / num_queries
+        recall = recall_at_k(index, queries, k)
+        results.append({"ef": ef, "recall": recall, "ms_per_query": ms_per_query, "speedup": exact_ms / ms_per_query})
+        print(f"   ef={ef:<4} recall@{k}={recall:.3f}  {ms_per_query:.3f} ms/query  ({exact_ms / ms_per_query:.1f}x exact)")
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "benchmark":
+        benchmark(num_vectors=int(sys.argv[2]) if len(sys.argv) > 2 else 20000,
+                  dimension=int(sys.argv[3]) if len(sys.argv) > 3 else 256)
+    else:
+        print("usage: python app/ann_index.py benchmark [num_vectors] [dimension]")
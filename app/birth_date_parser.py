@@ -5,6 +5,8 @@ import os
 from pymongo import MongoClient
 from dotenv import load_dotenv
 from .astronomical_calculator import AstronomicalCalculator
+from .knowledge_store import knowledge_store
+from .chart_cache import chart_cache
 
 
 # ตั้งค่า logger
@@ -443,15 +445,19 @@ class BirthDateParser:
         logger.warning(f"No zodiac match found for day={day}, month={month}")
         return None
 
-    def generate_birth_chart_info(self, birth_date: str, birth_time: str = None, latitude: float = 13.7563, longitude: float = 100.5018) -> dict:
+    def generate_birth_chart_info(self, birth_date: str, birth_time: str = None, latitude: float = 13.7563, longitude: float = 100.5018,
+                                  house_system: str = "equal", user_id: str = None) -> dict:
         """
         สร้างข้อมูลดวงชะตาพื้นฐาน รวมถึงการคำนวณ Ascendant
+        (ใช้ผลจาก chart cache ถ้าเคยคำนวณวันเกิด/เวลา/สถานที่นี้แล้ว)
         
         Args:
             birth_date (str): วันเกิดในรูปแบบ dd/mm/yyyy
             birth_time (str): เวลาเกิดในรูปแบบ HH:MM (ไม่บังคับ)
             latitude (float): ละติจูดของสถานที่เกิด (default: กรุงเทพฯ)
             longitude (float): ลองจิจูดของสถานที่เกิด (default: กรุงเทพฯ)
+            house_system (str): ระบบบ้าน (ปัจจุบันรองรับ 'equal')
+            user_id (str): ID ของผู้ใช้ (ใช้บันทึก chart ลง user profile ถ้าเปิด persistence)
             
         Returns:
             dict: ข้อมูลดวงชะตาพื้นฐาน
@@ -459,6 +465,19 @@ class BirthDateParser:
         if not birth_date:
             return None
         
+        key = chart_cache.make_key(birth_date, birth_time, latitude, longitude, house_system)
+        chart_info = chart_cache.get_or_compute(
+            key,
+            lambda: self._compute_birth_chart_info(birth_date, birth_time, latitude, longitude),
+            user_id=user_id
+        )
+        if chart_info:
+            # อายุขึ้นกับปีปัจจุบัน จึงคำนวณใหม่ทุกครั้ง
+            chart_info['age'] = datetime.now().year - int(birth_date.split('/')[2])
+        return chart_info
+
+    def _compute_birth_chart_info(self, birth_date: str, birth_time: str, latitude: float, longitude: float) -> dict:
+        """คำนวณข้อมูลดวงชะตาจริง (ไม่ผ่าน cache) - ใช้ระบบบ้านแบบ Equal House"""
         try:
             # แปลงวันเกิด
             day, month, year = map(int, birth_date.split('/'))
@@ -611,6 +630,12 @@ class BirthDateParser:
                                 print(f"       บ้านที่ {house_num}: ราศี{house_data['sign']} {house_data['degree']:.1f}°")
                 print()
 
+def get_birth_date_parser() -> BirthDateParser:
+    """ใช้ BirthDateParser ร่วมกันทั้งระบบแบบ lazy loading (ไม่ต้องสร้าง AstronomicalCalculator ใหม่ทุกข้อความ)"""
+    if not hasattr(get_birth_date_parser, 'parser'):
+        get_birth_date_parser.parser = BirthDateParser()
+    return get_birth_date_parser.parser
+
 # ฟังก์ชันหลักสำหรับใช้ใน response_message.py
 def extract_birth_date_from_message(message: str) -> str:
     """
@@ -622,7 +647,7 @@ def extract_birth_date_from_message(message: str) -> str:
     Returns:
         str: วันเกิดในรูปแบบ dd/mm/yyyy หรือ None
     """
-    parser = BirthDateParser()
+    parser = get_birth_date_parser()
     return parser.extract_birth_date(message)
 
 def extract_birth_info_from_message(message: str) -> dict:
@@ -635,7 +660,7 @@ def extract_birth_info_from_message(message: str) -> dict:
     Returns:
         dict: ข้อมูลวันเกิด เวลาเกิด และสถานที่เกิด
     """
-    parser = BirthDateParser()
+    parser = get_birth_date_parser()
     return parser.extract_birth_info(message)
 
 def get_zodiac_data_from_mongodb(zodiac_sign: str) -> dict:
@@ -700,7 +725,7 @@ def generate_astrology_reading(message: str) -> dict:
     Returns:
         dict: ข้อมูลดวงชะตาพร้อมการทำนาย
     """
-    parser = BirthDateParser()
+    parser = get_birth_date_parser()
     birth_info = parser.extract_birth_info(message)
     
     if not birth_info or not birth_info['date']:
@@ -715,7 +740,8 @@ def generate_astrology_reading(message: str) -> dict:
     return chart_info
 
 
-def generate_detailed_astrology_reading(message: str, latitude: float = None, longitude: float = None) -> dict:
+def generate_detailed_astrology_reading(message: str, latitude: float = None, longitude: float = None,
+                                        birth_info: dict = None) -> dict:
     """
     ฟังก์ชันสำหรับสร้างการทำนายดวงชะตารายละเอียดในด้านการงาน การเงิน และความรัก
     
@@ -723,15 +749,14 @@ def generate_detailed_astrology_reading(message: str, latitude: float = None, lo
         message (str): ข้อความจากผู้ใช้
         latitude (float): ละติจูดของสถานที่เกิด (ถ้าไม่ระบุจะใช้จากข้อความ)
         longitude (float): ลองจิจูดของสถานที่เกิด (ถ้าไม่ระบุจะใช้จากข้อความ)
+        birth_info (dict): ข้อมูลวันเกิดที่แยกจากข้อความแล้ว (ถ้าไม่ระบุจะแยกจาก message)
         
     Returns:
         dict: ข้อมูลดวงชะตาพร้อมการทำนายรายละเอียด
     """
-    import json
-    import os
-    
-    parser = BirthDateParser()
-    birth_info = parser.extract_birth_info(message)
+    parser = get_birth_date_parser()
+    if birth_info is None:
+        birth_info = parser.extract_birth_info(message)
     
     if not birth_info or not birth_info['date']:
         return None
@@ -754,38 +779,13 @@ def generate_detailed_astrology_reading(message: str, latitude: float = None, lo
     # โหลดข้อมูลโหราศาสตร์รายละเอียด
     zodiac_sign = chart_info['zodiac_sign']
     
-    # ดึงข้อมูลราศีจาก MongoDB
-    zodiac_data = get_zodiac_data_from_mongodb(zodiac_sign)
+    # ดึงข้อมูลราศีจาก knowledge store (โหลดจาก MongoDB/JSON ไว้ในหน่วยความจำแล้ว)
+    zodiac_data = knowledge_store.get_zodiac_reading(zodiac_sign)
     if zodiac_data:
         chart_info['detailed_reading'] = zodiac_data
-        logger.info(f"✅ Loaded zodiac data from MongoDB for {zodiac_sign}")
+        logger.info(f"✅ Loaded zodiac data from knowledge store for {zodiac_sign}")
     else:
-        logger.warning(f"⚠️ No MongoDB data found for {zodiac_sign}, falling back to JSON")
-        # Fallback to JSON if MongoDB fails
-        try:
-            zodiac_data_path = os.path.join(os.path.dirname(__file__), "..", "data", "zodiacData.json")
-            with open(zodiac_data_path, 'r', encoding='utf-8') as f:
-                json_zodiac_data = json.load(f)
-            if zodiac_sign in json_zodiac_data:
-                chart_info['detailed_reading'] = json_zodiac_data[zodiac_sign]
-        except Exception as e:
-            logger.error(f"Error loading fallback JSON data: {e}")
-    
-    # โหลดข้อมูลสีมงคล (ยังใช้ JSON)
-    try:
-        lucky_color_path = os.path.join(os.path.dirname(__file__), "..", "data", "luckyColorData.json")
-        with open(lucky_color_path, 'r', encoding='utf-8') as f:
-            lucky_color_data = json.load(f)
-        
-        # โหลดข้อมูลโชคลาภ (ยังใช้ JSON)
-        omen_path = os.path.join(os.path.dirname(__file__), "..", "data", "omenData.json")
-        with open(omen_path, 'r', encoding='utf-8') as f:
-            omen_data = json.load(f)
-            
-    except Exception as e:
-        logger.error(f"Error loading color/omen data: {e}")
-        lucky_color_data = {}
-        omen_data = {}
+        logger.warning(f"⚠️ No zodiac data found for {zodiac_sign}")
     
     # ข้อมูลสีมงคล (ใช้ราศีเป็นหลัก)
     chart_info['lucky_colors'] = []
@@ -799,9 +799,10 @@ def generate_detailed_astrology_reading(message: str, latitude: float = None, lo
     }
     
     ruling_planet = color_mapping.get(zodiac_sign, 'อาทิตย์')
-    if ruling_planet in lucky_color_data:
-        chart_info['lucky_colors'] = lucky_color_data[ruling_planet].get('luckyColors', [])
-        chart_info['bad_colors'] = lucky_color_data[ruling_planet].get('badColors', [])
+    lucky_color_data = knowledge_store.get_lucky_colors(ruling_planet)
+    if lucky_color_data:
+        chart_info['lucky_colors'] = lucky_color_data.get('luckyColors', [])
+        chart_info['bad_colors'] = lucky_color_data.get('badColors', [])
     
     # ข้อมูลโชคลาภ (ใช้ปีเกิด)
     try:
@@ -815,28 +816,29 @@ def generate_detailed_astrology_reading(message: str, latitude: float = None, lo
         animal_year = animal_years[animal_index]
         
         # หาข้อมูลโชคลาภจากราศีและปีนักษัตร
-        ruling_planet_omens = omen_data.get(ruling_planet, {})
-        if animal_year in ruling_planet_omens:
-            chart_info['omen_info'] = ruling_planet_omens[animal_year]
+        omen_info = knowledge_store.get_omen(ruling_planet, animal_year)
+        if omen_info is not None:
+            chart_info['omen_info'] = omen_info
             
     except Exception as e:
         logger.error(f"Error calculating omen info: {e}")
     
     return chart_info
 
-def generate_birth_chart_prediction(message: str, user_id: str = "unknown") -> str:
+def generate_birth_chart_prediction(message: str, user_id: str = "unknown", analysis=None) -> str:
     """
     สร้างคำทำนายดวงกำเนิดแบบละเอียดโดยใช้ RAG system (ใช้เฉพาะวันเกิด)
     
     Args:
         message (str): ข้อความจากผู้ใช้ที่มีข้อมูลวันเกิด
         user_id (str): ID ของผู้ใช้
+        analysis (MessageAnalysis): ผลวิเคราะห์ข้อความที่คำนวณแล้ว (ไม่บังคับ)
         
     Returns:
         str: คำทำนายดวงกำเนิดแบบละเอียดจาก RAG
     """
-    parser = BirthDateParser()
-    birth_info = parser.extract_birth_info(message)
+    parser = get_birth_date_parser()
+    birth_info = analysis.birth_info if analysis is not None else parser.extract_birth_info(message)
     
     if not birth_info or not birth_info['date']:
         return "ไม่สามารถแยกข้อมูลวันเกิดได้ กรุณาระบุวันเกิดในรูปแบบที่ชัดเจน"
@@ -846,7 +848,8 @@ def generate_birth_chart_prediction(message: str, user_id: str = "unknown") -> s
         birth_info['date'], 
         birth_info.get('time'), 
         birth_info.get('latitude', 13.7563), 
-        birth_info.get('longitude', 100.5018)
+        birth_info.get('longitude', 100.5018),
+        user_id=user_id
     )
     
     if not chart_info:
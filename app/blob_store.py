@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Blob Store สำหรับเก็บไฟล์รูปภาพแยกจาก chunk documents
+
+chunk เก็บเฉพาะ image_ref (store, sha256, ขนาดไฟล์, ความกว้าง/สูง, format) แทน image_base64
+ไฟล์ระบุด้วย sha256 ของเนื้อหา (content-addressed): รูปเดียวกันเก็บครั้งเดียว และเขียนซ้ำได้อย่างปลอดภัย
+เก็บใน MongoDB GridFS หรือโฟลเดอร์บนเครื่อง (กรณีไม่มี network)
+"""
+
+import os
+import hashlib
+import tempfile
+import threading
+from typing import Optional
+
+import gridfs
+from pymongo.errors import DuplicateKeyError
+
+
+def blob_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class LocalBlobStore:
+    """เก็บ blob เป็นไฟล์ในโฟลเดอร์ แยกโฟลเดอร์ย่อยตาม 2 ตัวแรกของ sha256"""
+
+    name = "local"
+
+    def __init__(self, directory: str = "output/blobs"):
+        self.directory = directory
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.directory, sha256[:2], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self._path(sha256))
+
+    def put(self, data: bytes, sha256: str = None, content_type: str = None) -> str:
+        sha256 = sha256 or blob_sha256(data)
+        path = self._path(sha256)
+        if os.path.exists(path):
+            return sha256
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # เขียนไฟล์ชั่วคราวแล้ว rename (เนื้อหาเดียวกันเสมอ จึงเขียนพร้อมกันหลาย process ได้)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha256
+
+    def get(self, sha256: str) -> bytes:
+        with open(self._path(sha256), "rb") as f:
+            return f.read()
+
+
+class GridFSBlobStore:
+    """เก็บ blob ใน MongoDB GridFS โดยใช้ sha256 เป็น _id ของไฟล์"""
+
+    name = "gridfs"
+
+    def __init__(self, database, bucket_name: str = "image_blobs"):
+        """
+        Args:
+            database: MongoDB database
+            bucket_name (str): ชื่อ GridFS bucket ({bucket_name}.files / {bucket_name}.chunks)
+        """
+        self.bucket = gridfs.GridFSBucket(database, bucket_name=bucket_name)
+        self.files = database[f"{bucket_name}.files"]
+        # กัน thread ในเครื่องเดียวกัน upload รูปเดียวกันซ้อนกัน (upload ที่ล้มเหลวจะลบ chunks ของ _id นั้น)
+        self._lock = threading.Lock()
+
+    def exists(self, sha256: str) -> bool:
+        return self.files.find_one({"_id": sha256}, {"_id": 1}) is not None
+
+    def put(self, data: bytes, sha256: str = None, content_type: str = None) -> str:
+        sha256 = sha256 or blob_sha256(data)
+        with self._lock:
+            if self.exists(sha256):
+                return sha256
+            try:
+                self.bucket.upload_from_stream_with_id(
+                    sha256, sha256, data, metadata={"content_type": content_type} if content_type else None
+                )
+            except DuplicateKeyError:
+                # process อื่นเขียนไฟล์เดียวกันไปแล้ว
+                pass
+        return sha256
+
+    def get(self, sha256: str) -> bytes:
+        return self.bucket.open_download_stream(sha256).read()
+
+
+def image_ref(data: bytes, width: int, height: int, image_format: Optional[str] = None) -> dict:
+    """
+    สร้าง reference ของรูปภาพสำหรับเก็บใน chunk (ยังไม่เขียนไฟล์ ดู store_image)
+
+    Returns:
+        dict: {'store' (None จนกว่าจะเขียนลง blob store), 'sha256', 'size', 'width', 'height', 'format'}
+    """
+    return {
+        "store": None,
+        "sha256": blob_sha256(data),
+        "size": len(data),
+        "width": width,
+        "height": height,
+        "format": image_format
+    }
+
+
+def store_image(store, data: bytes, ref: dict) -> dict:
+    """เขียนรูปภาพลง blob store ตาม ref (ซ้ำได้: รูปที่มีอยู่แล้วจะไม่ถูกเขียนใหม่)"""
+    store.put(data, ref["sha256"], content_type=f"image/{ref['format']}" if ref.get("format") else None)
+    ref["store"] = store.name
+    return ref
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+BM25 Index สำหรับค้นหา processed chunks ด้วยคำ (lexical) ภาษาไทย
+
+- แบ่งคำด้วย PyThaiNLP (newmm) ตัด stopwords และเครื่องหมาย
+- สร้างตอน ingest จาก summary + ข้อความต้นฉบับของทุก chunk แล้วบันทึกเป็นโฟลเดอร์ของไฟล์ .npy
+  (postings/term frequencies/offsets เป็น array แบบ CSR) ขนาดเล็กและเปิดแบบ memory-mapped ได้
+- ค้นหาเฉพาะ postings ของคำในคำถาม (ไม่ต้องคำนวณกับทุก chunk)
+"""
+
+import os
+import re
+import json
+import shutil
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from pythainlp import word_tokenize
+    from pythainlp.corpus import thai_stopwords
+    PYTHAINLP_AVAILABLE = True
+except ImportError:
+    PYTHAINLP_AVAILABLE = False
+
+FORMAT_VERSION = 1
+
+# ใช้เมื่อไม่มี PyThaiNLP: แยกตามช่องว่างและเครื่องหมาย (ภาษาไทยที่เขียนติดกันจะเป็น token เดียว)
+_FALLBACK_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_TERM_PATTERN = re.compile(r"\w", re.UNICODE)
+
+_STOPWORDS = frozenset(thai_stopwords()) if PYTHAINLP_AVAILABLE else frozenset()
+
+
+def analyze(text: str) -> List[str]:
+    """
+    แบ่งข้อความเป็นคำสำหรับ index/ค้นหา (ตัวพิมพ์เล็ก ไม่รวมเครื่องหมายและ stopwords)
+
+    Args:
+        text (str): ข้อความ
+
+    Returns:
+        List[str]: รายการคำ
+    """
+    if not text:
+        return []
+    if PYTHAINLP_AVAILABLE:
+        tokens = word_tokenize(text, engine="newmm", keep_whitespace=False)
+    else:
+        tokens = _FALLBACK_TOKEN_PATTERN.findall(text)
+    terms = []
+    for token in tokens:
+        token = token.strip().lower()
+        if token and token not in _STOPWORDS and _TERM_PATTERN.search(token):
+            terms.append(token)
+    return terms
+
+
+class BM25IndexBuilder:
+    """รวบรวม term frequencies ของเอกสารแล้วบันทึกเป็น BM25 index"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, analyzer: Callable[[str], List[str]] = analyze):
+        """
+        Args:
+            k1 (float): ค่า saturation ของ term frequency
+            b (float): น้ำหนักการปรับตามความยาวเอกสาร
+            analyzer: ฟังก์ชันแบ่งคำ (ต้องเป็นตัวเดียวกับตอนค้นหา)
+        """
+        self.k1 = k1
+        self.b = b
+        self.analyzer = analyzer
+        self.docs: List[dict] = []
+        self.doc_lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+
+    def add(self, doc: dict, text: str) -> None:
+        """
+        เพิ่มเอกสาร
+
+        Args:
+            doc (dict): ข้อมูลที่คืนกลับตอนค้นหา (เช่น collection, _id, document_id, page)
+            text (str): ข้อความที่ใช้ index
+        """
+        doc_index = len(self.docs)
+        counts = Counter(self.analyzer(text))
+        self.docs.append(doc)
+        self.doc_lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, []).append((doc_index, min(tf, np.iinfo(np.uint16).max)))
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def save(self, path: str) -> str:
+        """
+        บันทึก index เป็นโฟลเดอร์ (เขียนโฟลเดอร์ใหม่ก่อนแล้วสลับ ผู้ที่เปิด index เดิมอยู่ยังอ่านต่อได้)
+
+        Args:
+            path (str): โฟลเดอร์ของ index
+
+        Returns:
+            str: path
+        """
+        terms = sorted(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for term_id, term in enumerate(terms):
+            offsets[term_id + 1] = offsets[term_id] + len(self._postings[term])
+        postings = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.uint16)
+        for term_id, term in enumerate(terms):
+            entries = np.asarray(self._postings[term], dtype=np.int64).reshape(-1, 2)
+            postings[offsets[term_id]:offsets[term_id + 1]] = entries[:, 0]
+            tfs[offsets[term_id]:offsets[term_id + 1]] = entries[:, 1]
+        num_docs = len(self.docs)
+        df = np.diff(offsets).astype(np.float64)
+        idf = np.log(1.0 + (num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        doc_lengths = np.asarray(self.doc_lengths, dtype=np.int32)
+
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+        np.save(os.path.join(tmp_path, "postings.npy"), postings)
+        np.save(os.path.join(tmp_path, "tfs.npy"), tfs)
+        np.save(os.path.join(tmp_path, "idf.npy"), idf)
+        np.save(os.path.join(tmp_path, "doc_lengths.npy"), doc_lengths)
+        with open(os.path.join(tmp_path, "terms.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(terms))
+        with open(os.path.join(tmp_path, "docs.json"), "w", encoding="utf-8") as f:
+            json.dump(self.docs, f, ensure_ascii=False, default=str)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "k1": self.k1,
+                "b": self.b,
+                "num_docs": num_docs,
+                "num_terms": len(terms),
+                "avg_doc_length": float(doc_lengths.mean()) if num_docs else 0.0,
+                "pythainlp": PYTHAINLP_AVAILABLE
+            }, f)
+
+        old_path = f"{path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return path
+
+
+class BM25Index:
+    """BM25 index ที่โหลดจากไฟล์ (arrays เปิดแบบ memory-mapped)"""
+
+    def __init__(self, path: str, analyzer: Callable[[str], List[str]] = analyze):
+        """
+        Args:
+            path (str): โฟลเดอร์ที่บันทึกด้วย BM25IndexBuilder.save
+            analyzer: ฟังก์ชันแบ่งคำ (ต้องเป็นตัวเดียวกับตอนสร้าง)
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"BM25 index format ไม่รองรับ: {meta.get('format_version')}")
+        self.path = path
+        self.analyzer = analyzer
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.postings = np.load(os.path.join(path, "postings.npy"), mmap_mode="r")
+        self.tfs = np.load(os.path.join(path, "tfs.npy"), mmap_mode="r")
+        self.idf = np.load(os.path.join(path, "idf.npy"), mmap_mode="r")
+        doc_lengths = np.load(os.path.join(path, "doc_lengths.npy"))
+        avg_doc_length = meta["avg_doc_length"] or 1.0
+        # ส่วน k1 * (1 - b + b * dl / avgdl) ของแต่ละเอกสารคำนวณครั้งเดียวตอนโหลด
+        self.doc_norms = (self.k1 * (1 - self.b + self.b * doc_lengths / avg_doc_length)).astype(np.float32)
+        with open(os.path.join(path, "terms.txt"), encoding="utf-8") as f:
+            content = f.read()
+        self.term_ids = {term: term_id for term_id, term in enumerate(content.split("\n"))} if content else {}
+        with open(os.path.join(path, "docs.json"), encoding="utf-8") as f:
+            self.docs: List[dict] = json.load(f)
+        self.document_ids = np.array([doc.get("document_id") for doc in self.docs], dtype=object)
+
+    @staticmethod
+    def version(path: str) -> Optional[float]:
+        """mtime ของ index (ใช้ตรวจว่า index ถูกสร้างใหม่หรือไม่) หรือ None ถ้ายังไม่มี index"""
+        try:
+            return os.path.getmtime(os.path.join(path, "meta.json"))
+        except OSError:
+            return None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query: str, k: int = 4, document_ids: Optional[Sequence[str]] = None) -> List[Tuple[float, dict]]:
+        """
+        ค้นหาเอกสารด้วย BM25
+
+        Args:
+            query (str): คำถาม
+            k (int): จำนวนผลลัพธ์
+            document_ids: ค้นหาเฉพาะเอกสารเหล่านี้ (None = ทั้งหมด)
+
+        Returns:
+            List[Tuple[float, dict]]: [(BM25 score, doc), ...] เรียงจากมากไปน้อย
+        """
+        term_ids = sorted({self.term_ids[term] for term in self.analyzer(query) if term in self.term_ids})
+        if not term_ids or k <= 0:
+            return []
+        ranges = [(self.offsets[term_id], self.offsets[term_id + 1]) for term_id in term_ids]
+        docs = np.concatenate([self.postings[start:end] for start, end in ranges])
+        tfs = np.concatenate([self.tfs[start:end] for start, end in ranges]).astype(np.float32)
+        idf = np.repeat(self.idf[term_ids], [end - start for start, end in ranges])
+        contributions = idf * tfs * (self.k1 + 1) / (tfs + self.doc_norms[docs])
+
+        scores = np.bincount(docs, weights=contributions, minlength=len(self.docs))
+        candidates = np.flatnonzero(scores)
+        if document_ids is not None:
+            candidates = candidates[np.isin(self.document_ids[candidates], list(document_ids))]
+        if not len(candidates):
+            return []
+        scores = scores[candidates]
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.docs[candidates[i]]) for i in top]
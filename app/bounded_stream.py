@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Bounded Stream สำหรับต่อ stage ของ pipeline (extract → summary/embedding → store) ด้วยคิวขนาดจำกัด
+
+prefetch() รัน generator ของ stage ก่อนหน้าใน thread แยก และส่งผลผ่าน queue.Queue(maxsize)
+stage ถัดไปจึงทำงานพร้อมกันได้ แต่มีผลลัพธ์ค้างในคิวไม่เกิน maxsize รายการ
+(memory ขึ้นกับขนาดคิว ไม่ขึ้นกับจำนวนหน้าของเอกสาร)
+"""
+
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failure:
+    """exception จาก producer thread (ส่งต่อให้ผู้อ่านคิว raise)"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(iterable: Iterable[T], maxsize: int = 2, name: str = "stage") -> Iterator[T]:
+    """
+    อ่าน iterable ล่วงหน้าใน thread แยกผ่านคิวขนาดจำกัด
+
+    Args:
+        iterable: generator ของ stage ก่อนหน้า (ถูกอ่านใน thread แยกเท่านั้น)
+        maxsize (int): จำนวนรายการที่อ่านล่วงหน้าได้สูงสุด
+        name (str): ชื่อของ thread (ใช้ debug)
+
+    Returns:
+        Iterator: รายการตามลำดับเดิม (exception ของ stage ก่อนหน้าถูก raise ตอนอ่านถึง)
+    """
+    items: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # รอจนคิวว่างหรือผู้อ่านหยุดอ่าน (ไม่ค้างตลอดไปเมื่อผู้อ่านเลิกกลางทาง)
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+            return
+        finally:
+            # ปิด generator ของ stage ก่อนหน้า (เช่น prefetch ที่ซ้อนกันจะหยุด thread ของตัวเอง)
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name=f"prefetch-{name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Bulk Writer สำหรับเขียน chunks ลง MongoDB เป็นชุด (แทนการ insert ทีละเอกสาร)
+
+รวม operation เป็น batch แล้วส่งด้วย bulk_write แบบ ordered=False (หนึ่ง round trip ต่อ batch)
+ลองใหม่เฉพาะ operation ที่ล้มเหลวด้วย error ชั่วคราว (เช่น เปลี่ยน primary, network timeout) พร้อม backoff
+insert ใช้ _id ที่สร้างฝั่ง client เพื่อให้การลองใหม่ไม่สร้างเอกสารซ้ำ
+"""
+
+import time
+from typing import Callable, List
+
+from bson import ObjectId
+from pymongo import InsertOne, ReplaceOne
+from pymongo.errors import AutoReconnect, BulkWriteError, OperationFailure
+
+# error code ที่ลองใหม่ได้ (ตาม retryable writes spec ของ MongoDB)
+RETRYABLE_ERROR_CODES = {6, 7, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436}
+DUPLICATE_KEY_ERROR = 11000
+
+
+class BulkWriter:
+    """สะสม write operations ของหนึ่ง collection แล้วเขียนเป็นชุด"""
+
+    def __init__(self, collection, batch_size: int = 500, max_retries: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 10.0, session=None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            collection: MongoDB collection
+            batch_size (int): จำนวน operation ต่อ bulk_write
+            max_retries (int): จำนวนครั้งที่ลองใหม่สูงสุดเมื่อเจอ error ชั่วคราว
+            base_delay (float), max_delay (float): ช่วงเวลา backoff (วินาที)
+            session: MongoDB session (ใน transaction จะไม่ลองใหม่เอง ให้ with_transaction จัดการ)
+        """
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.session = session
+        self._sleep = sleep
+        self.pending: List = []
+        self.stats = {"inserted": 0, "upserted": 0, "modified": 0, "batches": 0, "retries": 0}
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+
+    def insert(self, document: dict) -> None:
+        """เพิ่มเอกสารที่จะ insert (กำหนด _id ให้ถ้ายังไม่มี)"""
+        document.setdefault("_id", ObjectId())
+        self.add(InsertOne(document))
+
+    def replace(self, filter: dict, document: dict, upsert: bool = True) -> None:
+        """เพิ่มการแทนที่เอกสารตาม filter (upsert เป็นค่าเริ่มต้น)"""
+        self.add(ReplaceOne(filter, document, upsert=upsert))
+
+    def add(self, operation) -> None:
+        """เพิ่ม write operation (InsertOne, ReplaceOne, UpdateOne, ...) และเขียนเมื่อครบ batch"""
+        self.pending.append(operation)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> dict:
+        """เขียน operation ที่ค้างอยู่ทั้งหมด"""
+        operations, self.pending = self.pending, []
+        if operations:
+            self._write(operations)
+        return self.stats
+
+    def _record(self, inserted: int = 0, upserted: int = 0, modified: int = 0) -> None:
+        self.stats["inserted"] += inserted
+        self.stats["upserted"] += upserted
+        self.stats["modified"] += modified
+
+    def _write(self, operations: List) -> None:
+        in_transaction = self.session is not None and self.session.in_transaction
+        max_retries = 0 if in_transaction else self.max_retries
+        self.stats["batches"] += 1
+
+        for attempt in range(max_retries + 1):
+            try:
+                result = self.collection.bulk_write(operations, ordered=False, session=self.session)
+                self._record(result.inserted_count, result.upserted_count, result.modified_count)
+                return
+            except BulkWriteError as e:
+                details = e.details or {}
+                self._record(details.get("nInserted", 0), details.get("nUpserted", 0), details.get("nModified", 0))
+                retryable = []
+                for error in details.get("writeErrors", []):
+                    operation = operations[error["index"]]
+                    if error.get("code") == DUPLICATE_KEY_ERROR and attempt > 0 and isinstance(operation, InsertOne):
+                        # ถูกเขียนไปแล้วใน attempt ก่อน (ไม่ได้รับผลตอบกลับ)
+                        continue
+                    if error.get("code") not in RETRYABLE_ERROR_CODES or attempt == max_retries:
+                        raise
+                    retryable.append(operation)
+                if details.get("writeConcernErrors") and not retryable:
+                    raise
+                if not retryable:
+                    return
+                operations = retryable
+            except (AutoReconnect, OperationFailure) as e:
+                retryable = isinstance(e, AutoReconnect) or e.code in RETRYABLE_ERROR_CODES \
+                    or e.has_error_label("RetryableWriteError")
+                if not retryable or attempt == max_retries:
+                    raise
+
+            delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+            self.stats["retries"] += 1
+            print(f"   ⚠️ Bulk write ล้มเหลวชั่วคราว ({len(operations)} operations) รอ {delay:.1f} วินาที แล้วลองใหม่...")
+            self._sleep(delay)
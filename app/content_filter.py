@@ -3,16 +3,26 @@
 Content Filter สำหรับกรองคำหยาบและเนื้อหาที่ไม่เหมาะสม
 """
 
-import re
 import logging
-from typing import List, Tuple
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from config import CONTENT_FILTER_WORDS_PATH, CONTENT_FILTER_MODE
+from .filter_engine import FilterEngine, load_category_words
+from .thai_tokenizer import thai_tokenizer
 
 logger = logging.getLogger(__name__)
 
 class ContentFilter:
     """คลาสสำหรับกรองเนื้อหา"""
     
-    def __init__(self):
+    def __init__(self, words_path: str = None, mode: str = CONTENT_FILTER_MODE):
+        """
+        Args:
+            words_path (str): ไฟล์ JSON รายการคำแยกตามหมวด (ไม่บังคับ)
+            mode (str): 'automaton' (สแกนตัวอักษร) หรือ 'tokens' (เทียบคำที่แบ่งด้วย PyThaiNLP)
+                ไม่ระบุ = CONTENT_FILTER_MODE
+        """
         # รายการคำหยาบภาษาไทย (ตัวอย่าง) - ปรับปรุงให้เฉพาะคำหยาบจริงๆ
         self.thai_profanity = [
             "ไอ้", "อี", "มึง", "กู", "ควาย", "โง่", "บ้า", "เหี้ย", "ห่า", "เย็ด",
@@ -33,6 +43,44 @@ class ContentFilter:
         self.drug_words = [
             "ยาเสพติด", "เฮโรอีน", "โคเคน", "กัญชา", "ยาบ้า", "ไอซ์", "แอมเฟตามีน"
         ]
+        
+        # ลำดับหมวดคือลำดับความสำคัญในการแจ้งเตือน (คำหยาบ > ความรุนแรง > ยาเสพติด)
+        categories = OrderedDict([
+            ("profanity", self.thai_profanity + self.english_profanity),
+            ("violence", self.violence_words),
+            ("drugs", self.drug_words)
+        ])
+        # รายการคำจากไฟล์ config ใช้แทนรายการเริ่มต้นของหมวดเดียวกัน (แก้คำได้โดยไม่ต้องแก้โค้ด)
+        categories.update(load_category_words(words_path))
+        
+        if mode == "tokens" and not thai_tokenizer.available:
+            logger.warning("⚠️ PyThaiNLP not available, content filter falls back to automaton mode")
+            mode = "automaton"
+        self.mode = mode
+        
+        # โหมด automaton: คำหยาบต้องตรงทั้งคำ ส่วนหมวดอื่นตรวจแบบ substring
+        # โหมด tokens: ทุกหมวดต้องตรงกับคำที่แบ่งได้ (ไม่จับ 'กู' ใน 'กูเกิล' หรือ 'ก้น' ใน 'ก้นหอย')
+        self.engine = FilterEngine(
+            categories,
+            word_boundary_categories=["profanity"],
+            tokenize=thai_tokenizer.tokenize if mode == "tokens" else None
+        )
+        logger.info(f"✅ Content filter engine ready: {len(categories)} categories, mode={mode}")
+    
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """
+        สแกนข้อความครั้งเดียวเพื่อหาคำที่ไม่เหมาะสมของทุกหมวด
+        
+        Args:
+            text (str): ข้อความที่ต้องการตรวจสอบ
+            
+        Returns:
+            Dict[str, List[str]]: หมวด -> รายการคำที่พบ (เรียงตามลำดับความสำคัญของหมวด)
+        """
+        if self.mode == "tokens":
+            # ผลการแบ่งคำถูก cache ตาม hash ของข้อความ ส่วนอื่นเรียก thai_tokenizer.tokenize ซ้ำได้โดยไม่แบ่งใหม่
+            return self.engine.scan_tokens(thai_tokenizer.tokenize(text))
+        return self.engine.scan(text)
     
     def contains_profanity(self, text: str) -> Tuple[bool, List[str]]:
         """
@@ -44,22 +92,7 @@ class ContentFilter:
         Returns:
             Tuple[bool, List[str]]: (มีคำหยาบหรือไม่, รายการคำที่พบ)
         """
-        found_words = []
-        text_lower = text.lower()
-        
-        # ตรวจสอบคำหยาบภาษาไทย (ใช้ word boundary)
-        for word in self.thai_profanity:
-            # ใช้ regex เพื่อตรวจสอบคำเต็มๆ
-            pattern = r'\b' + re.escape(word) + r'\b'
-            if re.search(pattern, text_lower):
-                found_words.append(word)
-        
-        # ตรวจสอบคำหยาบภาษาอังกฤษ (ใช้ word boundary)
-        for word in self.english_profanity:
-            pattern = r'\b' + re.escape(word) + r'\b'
-            if re.search(pattern, text_lower):
-                found_words.append(word)
-        
+        found_words = self.scan(text).get("profanity", [])
         return len(found_words) > 0, found_words
     
     def contains_violence(self, text: str) -> Tuple[bool, List[str]]:
@@ -72,13 +105,7 @@ class ContentFilter:
         Returns:
             Tuple[bool, List[str]]: (มีเนื้อหาความรุนแรงหรือไม่, รายการคำที่พบ)
         """
-        found_words = []
-        text_lower = text.lower()
-        
-        for word in self.violence_words:
-            if word in text_lower:
-                found_words.append(word)
-        
+        found_words = self.scan(text).get("violence", [])
         return len(found_words) > 0, found_words
     
     def contains_drug_content(self, text: str) -> Tuple[bool, List[str]]:
@@ -91,13 +118,7 @@ class ContentFilter:
         Returns:
             Tuple[bool, List[str]]: (มีเนื้อหายาเสพติดหรือไม่, รายการคำที่พบ)
         """
-        found_words = []
-        text_lower = text.lower()
-        
-        for word in self.drug_words:
-            if word in text_lower:
-                found_words.append(word)
-        
+        found_words = self.scan(text).get("drugs", [])
         return len(found_words) > 0, found_words
     
     def is_inappropriate(self, text: str) -> Tuple[bool, str, List[str]]:
@@ -110,20 +131,9 @@ class ContentFilter:
         Returns:
             Tuple[bool, str, List[str]]: (ไม่เหมาะสมหรือไม่, ประเภทปัญหา, รายการคำที่พบ)
         """
-        # ตรวจสอบคำหยาบ
-        has_profanity, profanity_words = self.contains_profanity(text)
-        if has_profanity:
-            return True, "profanity", profanity_words
-        
-        # ตรวจสอบความรุนแรง
-        has_violence, violence_words = self.contains_violence(text)
-        if has_violence:
-            return True, "violence", violence_words
-        
-        # ตรวจสอบยาเสพติด
-        has_drugs, drug_words = self.contains_drug_content(text)
-        if has_drugs:
-            return True, "drugs", drug_words
+        # สแกนครั้งเดียว แล้วเลือกหมวดที่สำคัญที่สุดที่พบ
+        for issue_type, found_words in self.scan(text).items():
+            return True, issue_type, found_words
         
         return False, "", []
     
@@ -148,11 +158,13 @@ class ContentFilter:
                 return False, "ขออภัยครับ ข้อความของคุณมีเนื้อหาที่เกี่ยวข้องกับความรุนแรง กรุณาใช้ข้อความที่เหมาะสมครับ 🌟"
             elif issue_type == "drugs":
                 return False, "ขออภัยครับ ข้อความของคุณมีเนื้อหาที่เกี่ยวข้องกับยาเสพติด กรุณาใช้ข้อความที่เหมาะสมครับ 🌟"
+            else:
+                return False, "ขออภัยครับ ข้อความของคุณมีเนื้อหาที่ไม่เหมาะสม กรุณาใช้ข้อความที่เหมาะสมครับ 🌟"
         
         return True, text
 
 # สร้าง instance สำหรับใช้งาน
-content_filter = ContentFilter()
+content_filter = ContentFilter(words_path=CONTENT_FILTER_WORDS_PATH, mode=CONTENT_FILTER_MODE)
 
 def check_content_safety(text: str) -> Tuple[bool, str]:
     """
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Corpus Manifest สำหรับกำหนดรายการเอกสาร (PDF) ที่ต้อง ingest
+
+รับได้ทั้งโฟลเดอร์ของ PDF (ค้นหาทุกโฟลเดอร์ย่อย) หรือไฟล์ manifest:
+- .json: [{"path": "books/a.pdf", "id": "thai_astrology", "title": "...", ...}, ...]
+  หรือ {"documents": [...]}
+- .jsonl: หนึ่งเอกสารต่อบรรทัด
+path ใน manifest เป็น path สัมพัทธ์กับโฟลเดอร์ของ manifest ได้, field อื่นนอกจาก path/id/title
+จะถูกเก็บเป็น metadata ของแหล่งที่มาในทุก chunk
+"""
+
+import os
+import re
+import json
+import hashlib
+from functools import cached_property
+from typing import List, Optional
+
+
+def file_sha256(path: str) -> str:
+    """hash ของไฟล์ (อ่านทีละส่วนเพื่อไม่ให้ใช้ memory มาก)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_id_for_path(path: str, root: str = None) -> str:
+    """
+    สร้าง document id ที่คงที่จาก path ของไฟล์ (ไม่เปลี่ยนเมื่อแก้เนื้อหาไฟล์)
+
+    Args:
+        path (str): ตำแหน่งไฟล์
+        root (str): โฟลเดอร์ของ corpus (ใช้ path สัมพัทธ์เพื่อไม่ให้ id ขึ้นกับตำแหน่งที่รัน)
+
+    Returns:
+        str: id เช่น "books_thai_astrology" สำหรับ books/thai_astrology.pdf
+    """
+    relative = os.path.relpath(path, root) if root else os.path.basename(path)
+    stem = os.path.splitext(relative)[0]
+    slug = re.sub(r"[^\w]+", "_", stem.lower(), flags=re.UNICODE).strip("_")
+    return slug or hashlib.sha1(relative.encode("utf-8")).hexdigest()[:12]
+
+
+class CorpusDocument:
+    """เอกสารหนึ่งไฟล์ใน corpus พร้อม id และ metadata ของแหล่งที่มา"""
+
+    def __init__(self, document_id: str, path: str, title: Optional[str] = None, metadata: Optional[dict] = None):
+        """
+        Args:
+            document_id (str): id ของเอกสาร (ใช้เป็น prefix ของ doc_id ของทุก chunk)
+            path (str): ตำแหน่งไฟล์ PDF
+            title (str): ชื่อเอกสาร (ไม่ระบุ = ชื่อไฟล์)
+            metadata (dict): ข้อมูลเพิ่มเติมจาก manifest เช่น author, language
+        """
+        self.id = document_id
+        self.path = path
+        self.title = title or os.path.splitext(os.path.basename(path))[0]
+        self.metadata = dict(metadata or {})
+
+    @classmethod
+    def from_path(cls, path: str, root: str = None) -> "CorpusDocument":
+        return cls(document_id_for_path(path, root), path)
+
+    @cached_property
+    def sha256(self) -> str:
+        return file_sha256(self.path)
+
+    @property
+    def source(self) -> dict:
+        """metadata ของแหล่งที่มาที่บันทึกในทุก chunk ของเอกสาร"""
+        return {"path": self.path, "title": self.title, "sha256": self.sha256, **self.metadata}
+
+    def __repr__(self) -> str:
+        return f"CorpusDocument(id={self.id!r}, path={self.path!r})"
+
+
+def _documents_from_manifest(manifest_path: str) -> List[CorpusDocument]:
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        if manifest_path.endswith(".jsonl"):
+            entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+            entries = data.get("documents", []) if isinstance(data, dict) else data
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    documents = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        entry = dict(entry)
+        path = entry.pop("path")
+        if not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        document_id = entry.pop("id", None) or document_id_for_path(path, base_dir)
+        documents.append(CorpusDocument(document_id, path, entry.pop("title", None), entry))
+    return documents
+
+
+def load_corpus(path: str) -> List[CorpusDocument]:
+    """
+    โหลดรายการเอกสารจากโฟลเดอร์, ไฟล์ manifest (.json/.jsonl) หรือไฟล์ PDF เดียว
+
+    Args:
+        path (str): ตำแหน่งโฟลเดอร์หรือไฟล์
+
+    Returns:
+        List[CorpusDocument]: เอกสารที่มีไฟล์อยู่จริง เรียงตามลำดับใน manifest (โฟลเดอร์เรียงตาม path)
+
+    Raises:
+        FileNotFoundError: ถ้าไม่พบ path
+        ValueError: ถ้ามี document id ซ้ำกัน
+    """
+    if os.path.isdir(path):
+        pdf_paths = sorted(
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(path)
+            for name in names
+            if name.lower().endswith(".pdf")
+        )
+        documents = [CorpusDocument.from_path(pdf_path, path) for pdf_path in pdf_paths]
+    elif path.endswith((".json", ".jsonl")):
+        documents = _documents_from_manifest(path)
+    elif os.path.exists(path):
+        documents = [CorpusDocument.from_path(path)]
+    else:
+        raise FileNotFoundError(f"Corpus path not found: {path}")
+
+    existing = []
+    for document in documents:
+        if os.path.exists(document.path):
+            existing.append(document)
+        else:
+            print(f"⚠️ ไม่พบไฟล์ {document.path} (document {document.id}) - ข้าม")
+
+    seen = set()
+    for document in existing:
+        if document.id in seen:
+            raise ValueError(f"Duplicate document id in corpus: {document.id}")
+        seen.add(document.id)
+    return existing
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Embedding Models สำหรับ text embeddings แบบมีเวอร์ชัน
+
+- ทุก vector ที่บันทึกมี embedding_model (model id) และ embedding_dim กำกับ
+- model id เป็นเวอร์ชันของ vector space: เปลี่ยนโมเดลหรือ revision = model id ใหม่ (cache key ใหม่)
+- เปลี่ยนโมเดลได้โดยไม่ต้อง reindex ทั้งหมดในครั้งเดียว: chunks ที่ยังเป็นโมเดลเดิมถูก re-embed ทีละ batch
+  (python app/multimodel_rag.py --migrate-embeddings) และ retrieval ค้นหาแยกตาม embedding space ระหว่าง migration
+"""
+
+from typing import Dict, List, Optional
+
+
+class EmbeddingModelSpec:
+    """ข้อมูลของ text embedding model หนึ่งเวอร์ชัน"""
+
+    def __init__(self, model_id: str, name: str, dimension: Optional[int] = None, description: str = ""):
+        """
+        Args:
+            model_id (str): id ที่บันทึกกับทุก vector
+            name (str): ชื่อโมเดลของ sentence-transformers
+            dimension (int): ขนาด vector (None = ไม่ทราบ ใช้ขนาดจริงตอน encode)
+            description (str): คำอธิบาย
+        """
+        self.model_id = model_id
+        self.name = name
+        self.dimension = dimension
+        self.description = description
+
+    def stamp(self, vector: List[float]) -> dict:
+        """
+        fields ที่บันทึกใน processed chunk (vector พร้อม model id และขนาด)
+
+        Returns:
+            dict: {'embeddings', 'embedding_model', 'embedding_dim'}
+        """
+        return {"embeddings": vector, "embedding_model": self.model_id, "embedding_dim": len(vector)}
+
+    def fallback_vector(self) -> List[float]:
+        """vector ศูนย์ขนาดเดียวกับโมเดล (ใช้เมื่อ encode ไม่สำเร็จ)"""
+        return [0.0] * (self.dimension or 0)
+
+    def __repr__(self) -> str:
+        return f"EmbeddingModelSpec(model_id={self.model_id!r}, name={self.name!r}, dimension={self.dimension})"
+
+
+EMBEDDING_MODELS: Dict[str, EmbeddingModelSpec] = {
+    spec.model_id: spec for spec in (
+        EmbeddingModelSpec("all-MiniLM-L6-v2", "all-MiniLM-L6-v2", 384,
+                           "transformer ภาษาอังกฤษ (โมเดลเดิม)"),
+        EmbeddingModelSpec("potion-multilingual-128M", "minishlab/potion-multilingual-128M", 256,
+                           "static embeddings หลายภาษา (รวมภาษาไทย) เร็วกว่า transformer หลายเท่าบน CPU"),
+    )
+}
+
+# vectors ที่บันทึกก่อนมี embedding_model ถูกสร้างด้วยโมเดลนี้
+LEGACY_EMBEDDING_MODEL_ID = "all-MiniLM-L6-v2"
+
+
+def get_embedding_spec(model_id: str) -> EmbeddingModelSpec:
+    """
+    ดึงข้อมูลโมเดลจาก model id (model id ที่ไม่อยู่ในรายการถือเป็นชื่อโมเดลของ sentence-transformers)
+
+    Args:
+        model_id (str): model id หรือชื่อโมเดล
+
+    Returns:
+        EmbeddingModelSpec
+    """
+    spec = EMBEDDING_MODELS.get(model_id)
+    if spec is None:
+        spec = next((known for known in EMBEDDING_MODELS.values() if known.name == model_id), None)
+    return spec or EmbeddingModelSpec(model_id, model_id)
+
+
+def embedding_model_of(doc: dict) -> str:
+    """model id ของ vector ใน processed chunk (chunks เก่าที่ไม่มี embedding_model เป็นโมเดลเดิม)"""
+    return doc.get("embedding_model") or LEGACY_EMBEDDING_MODEL_ID
+
+
+def embedding_space_of(doc: dict, field: str = "embeddings") -> str:
+    """
+    embedding space ของ vector ใน field ของ processed chunk
+
+    Args:
+        doc (dict): processed chunk
+        field (str): field ที่เก็บ vector (มีเวอร์ชันเฉพาะ 'embeddings' ส่วน field อื่นเช่น 'image_embeddings' เป็น space เดียว)
+
+    Returns:
+        str: model id สำหรับ 'embeddings' หรือชื่อ field
+    """
+    return embedding_model_of(doc) if field == "embeddings" else field
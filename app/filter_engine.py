@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Filter Engine สำหรับตรวจหาคำต้องห้ามทุกหมวดในการสแกนข้อความเพียงครั้งเดียว
+
+รองรับ 2 โหมด:
+- automaton: สร้าง Aho-Corasick automaton จากคำของทุกหมวดครั้งเดียวตอนเริ่มระบบ
+  แล้วสแกนข้อความรอบเดียวเพื่อหาคำที่พบทั้งหมด (รวมถึงคำที่ซ้อนกัน เช่น 'ฆ่า' ใน 'ฆ่าตัวตาย')
+- tokens: เทียบรายการคำที่แบ่งแล้ว (เช่นจาก PyThaiNLP) กับ index ของคำต้องห้ามใน O(จำนวนคำ)
+  เหมาะกับภาษาไทยที่ \\b ใช้ไม่ได้ (ไม่จับ 'ก้น' ใน 'ก้นหอย')
+"""
+
+import os
+import json
+import logging
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _is_word_char(ch: Optional[str]) -> bool:
+    """ตรวจว่าเป็นตัวอักษรของคำหรือไม่ (ความหมายเดียวกับ \\w ของ re)"""
+    return ch is not None and (ch.isalnum() or ch == "_")
+
+
+def load_category_words(path: str) -> "OrderedDict[str, List[str]]":
+    """
+    โหลดรายการคำแยกตามหมวดจากไฟล์ JSON
+
+    รูปแบบไฟล์: {"profanity": ["...", ...], "violence": [...], "drugs": [...]}
+
+    Args:
+        path (str): ตำแหน่งไฟล์ JSON
+
+    Returns:
+        OrderedDict: หมวด -> รายการคำ (ว่างถ้าไม่พบไฟล์หรืออ่านไม่ได้)
+    """
+    if not path or not os.path.exists(path):
+        return OrderedDict()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f, object_pairs_hook=OrderedDict)
+        categories = OrderedDict()
+        for category, words in data.items():
+            if isinstance(words, list):
+                categories[category] = [str(word) for word in words if word]
+            else:
+                logger.warning(f"Ignoring content filter category '{category}': expected a list of words")
+        logger.info(f"📚 Loaded content filter words for {len(categories)} categories from {path}")
+        return categories
+    except Exception as e:
+        logger.error(f"Error loading content filter words from {path}: {e}")
+        return OrderedDict()
+
+
+class FilterEngine:
+    """Aho-Corasick automaton สำหรับหลายหมวดคำ สแกนข้อความครั้งเดียวได้ผลทุกหมวด"""
+
+    def __init__(self, categories: "OrderedDict[str, List[str]]", word_boundary_categories: Iterable[str] = (),
+                 tokenize: Callable[[str], Sequence[str]] = None):
+        """
+        Args:
+            categories (OrderedDict): หมวด -> รายการคำ (ลำดับหมวดคือลำดับความสำคัญ)
+            word_boundary_categories (Iterable[str]): หมวดที่ต้องตรงทั้งคำ (เทียบเท่า \\bคำ\\b)
+            tokenize (callable): ตัวแบ่งคำสำหรับสร้าง index ของโหมด tokens (ไม่บังคับ)
+        """
+        self.categories = list(categories.keys())
+        self.word_boundary_categories = set(word_boundary_categories)
+        self._words: Dict[str, List[str]] = {category: list(words) for category, words in categories.items()}
+
+        # โครงสร้าง automaton: transitions[state][ตัวอักษร] -> state ถัดไป
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # outputs[state] = [(หมวด, ลำดับคำในหมวด, ความยาวคำ), ...]
+        self._outputs: List[List[Tuple[str, int, int]]] = [[]]
+        self._build()
+
+        # index ของโหมด tokens: คำเดี่ยว -> [(หมวด, ลำดับคำ)], คำแรกของวลี -> [(วลี, หมวด, ลำดับคำ)]
+        self._single_tokens: Dict[str, List[Tuple[str, int]]] = {}
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], str, int]]] = {}
+        if tokenize is not None:
+            self._build_token_index(tokenize)
+
+    def _build(self) -> None:
+        """สร้าง trie จากคำทั้งหมด แล้วคำนวณ failure link แบบ BFS"""
+        for category, words in self._words.items():
+            for index, word in enumerate(words):
+                pattern = word.lower()
+                if not pattern:
+                    continue
+                state = 0
+                for ch in pattern:
+                    next_state = self._transitions[state].get(ch)
+                    if next_state is None:
+                        next_state = len(self._transitions)
+                        self._transitions[state][ch] = next_state
+                        self._transitions.append({})
+                        self._fail.append(0)
+                        self._outputs.append([])
+                    state = next_state
+                self._outputs[state].append((category, index, len(pattern)))
+
+        queue = deque(self._transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._transitions[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._transitions[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._transitions[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state].extend(self._outputs[self._fail[next_state]])
+
+    def _build_token_index(self, tokenize: Callable[[str], Sequence[str]]) -> None:
+        """แบ่งคำต้องห้ามด้วยตัวแบ่งคำเดียวกับข้อความ (คำที่แบ่งได้หลาย token จะเทียบแบบวลี)"""
+        for category, words in self._words.items():
+            for index, word in enumerate(words):
+                tokens = tuple(token.lower() for token in tokenize(word) if token.strip())
+                if len(tokens) == 1:
+                    self._single_tokens.setdefault(tokens[0], []).append((category, index))
+                elif tokens:
+                    self._phrases.setdefault(tokens[0], []).append((tokens, category, index))
+
+    def _at_boundary(self, text: str, position: int) -> bool:
+        before = text[position - 1] if position > 0 else None
+        after = text[position] if position < len(text) else None
+        return _is_word_char(before) != _is_word_char(after)
+
+    def scan(self, text: str) -> "OrderedDict[str, List[str]]":
+        """
+        สแกนข้อความครั้งเดียวและคืนค่าคำที่พบของทุกหมวด
+
+        Args:
+            text (str): ข้อความที่ต้องการตรวจสอบ
+
+        Returns:
+            OrderedDict: หมวด -> รายการคำที่พบ (เรียงตามลำดับคำในหมวด, เฉพาะหมวดที่พบ)
+        """
+        text_lower = text.lower()
+        found: Dict[str, set] = {}
+        transitions = self._transitions
+        fail = self._fail
+        outputs = self._outputs
+        state = 0
+
+        for position, ch in enumerate(text_lower):
+            while state and ch not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(ch, 0)
+            for category, index, length in outputs[state]:
+                if category in self.word_boundary_categories:
+                    start = position - length + 1
+                    if not (self._at_boundary(text_lower, start) and self._at_boundary(text_lower, position + 1)):
+                        continue
+                found.setdefault(category, set()).add(index)
+
+        return self._collect(found)
+
+    def scan_tokens(self, tokens: Sequence[str]) -> "OrderedDict[str, List[str]]":
+        """
+        เทียบรายการคำที่แบ่งแล้วกับคำต้องห้ามของทุกหมวด (ต้องสร้าง engine พร้อม tokenize)
+
+        Args:
+            tokens (Sequence[str]): รายการคำของข้อความ
+
+        Returns:
+            OrderedDict: หมวด -> รายการคำที่พบ (เรียงตามลำดับคำในหมวด, เฉพาะหมวดที่พบ)
+        """
+        lowered = [token.lower() for token in tokens]
+        found: Dict[str, set] = {}
+        for position, token in enumerate(lowered):
+            for category, index in self._single_tokens.get(token, ()):
+                found.setdefault(category, set()).add(index)
+            for phrase, category, index in self._phrases.get(token, ()):
+                if tuple(lowered[position:position + len(phrase)]) == phrase:
+                    found.setdefault(category, set()).add(index)
+        return self._collect(found)
+
+    def _collect(self, found: Dict[str, set]) -> "OrderedDict[str, List[str]]":
+        results = OrderedDict()
+        for category in self.categories:
+            if category in found:
+                results[category] = [self._words[category][index] for index in sorted(found[category])]
+        return results
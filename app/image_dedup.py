@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Image Dedup สำหรับไม่ต้อง OCR / CLIP / สรุปรูปภาพที่ซ้ำกัน (เช่น สัญลักษณ์ราศี กรอบ โลโก้ ที่อยู่หลายหน้า)
+
+ตรวจรูปซ้ำ 3 ระดับ:
+- xref ในเอกสารเดียวกัน: รูปเดียวกันที่ถูกอ้างหลายหน้า ไม่ต้อง extract ใหม่
+- sha256 ของไฟล์รูป: รูปเดียวกันทุกเอกสาร (ผลลัพธ์ OCR เก็บใน ingestion cache ใช้ข้ามรอบได้)
+- perceptual hash (dHash): รูปที่หน้าตาเหมือนกันแต่ไฟล์ต่างกัน (เช่น encode ใหม่หรือย่อขนาด)
+รูปที่ซ้ำใช้ข้อความ OCR ของรูปต้นแบบ จึงได้ summary จาก cache เดียวกัน และ image embedding ของรูปต้นแบบ
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+HASH_BITS = 64
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    difference hash: ย่อรูปเป็น grayscale (hash_size+1)xhash_size แล้วเทียบความสว่างของ pixel ที่ติดกัน
+
+    Returns:
+        int: hash ขนาด hash_size*hash_size bits
+    """
+    gray = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | int(left > right)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ImageDeduplicator:
+    """จำผล OCR ของรูปที่เคยประมวลผลแล้ว ตาม xref, sha256 และ perceptual hash"""
+
+    def __init__(self, cache=None, ocr_version: str = "", max_distance: int = 4,
+                 min_hash_bits: int = 4, max_xrefs: int = 256):
+        """
+        Args:
+            cache: cache แบบ key-value ที่มี get/put (เช่น IngestionCache) สำหรับใช้ผล OCR ข้าม process/รอบ
+            ocr_version (str): hash ของค่าตั้ง OCR (ภาษา, threshold, การปรับข้อความ) เปลี่ยนแล้ว cache เดิมไม่ถูกใช้
+            max_distance (int): hamming distance สูงสุดที่ถือว่าเป็นรูปเดียวกัน
+            min_hash_bits (int): รูปที่ hash มี bit ต่างจากทั้งหมด 0 หรือ 1 น้อยกว่านี้ (เช่น รูปสีพื้น) ไม่ใช้ perceptual match
+            max_xrefs (int): จำนวนรูป (xref) ที่จำไว้ต่อ process
+        """
+        self.cache = cache
+        self.ocr_version = ocr_version
+        self.max_distance = max_distance
+        self.min_hash_bits = min_hash_bits
+        self.max_xrefs = max_xrefs
+        # แบ่ง hash เป็น max_distance+1 ส่วน: รูปที่ต่างกันไม่เกิน max_distance bits ต้องมีอย่างน้อยหนึ่งส่วนที่เหมือนกัน
+        band_count = max_distance + 1
+        self._bands = [(HASH_BITS * i // band_count, HASH_BITS * (i + 1) // band_count) for i in range(band_count)]
+        self._buckets: Dict[tuple, list] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._xrefs: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"xref_hits": 0, "exact_hits": 0, "perceptual_hits": 0, "ocr_runs": 0}
+
+    # ------------------------
+    # xref ในเอกสารเดียวกัน
+    # ------------------------
+    def lookup_xref(self, document_id: str, xref: int) -> Optional[dict]:
+        """record ของรูป (xref) ที่ประมวลผลแล้วในเอกสารนี้ หรือ None"""
+        with self._lock:
+            record = self._xrefs.get((document_id, xref))
+            if record is not None:
+                self._xrefs.move_to_end((document_id, xref))
+                self.stats["xref_hits"] += 1
+            return record
+
+    def remember_xref(self, document_id: str, xref: int, record: dict) -> None:
+        with self._lock:
+            self._xrefs[(document_id, xref)] = record
+            while len(self._xrefs) > self.max_xrefs:
+                self._xrefs.popitem(last=False)
+
+    # ------------------------
+    # sha256 / perceptual hash
+    # ------------------------
+    def _ocr_key(self, sha256: str) -> str:
+        return f"image_ocr:{self.ocr_version}:{sha256}"
+
+    def _phash_key(self, phash: int, aspect: float) -> str:
+        return f"image_phash:{self.ocr_version}:{phash:016x}:{aspect:.1f}"
+
+    def _informative(self, phash: int) -> bool:
+        ones = bin(phash).count("1")
+        return self.min_hash_bits <= ones <= HASH_BITS - self.min_hash_bits
+
+    def _band_keys(self, phash: int):
+        for index, (start, end) in enumerate(self._bands):
+            yield index, (phash >> start) & ((1 << (end - start)) - 1)
+
+    def _result(self, sha256: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._results.get(sha256)
+        if result is None and self.cache is not None:
+            result = self.cache.get(self._ocr_key(sha256))
+        return result
+
+    def _find_similar(self, phash: int, aspect: float) -> Optional[str]:
+        """sha256 ของรูปต้นแบบที่ perceptual hash ใกล้เคียงและสัดส่วนภาพเท่ากัน (ในความจำของ process นี้)"""
+        best = None
+        with self._lock:
+            for band in self._band_keys(phash):
+                for candidate_hash, candidate_aspect, sha256 in self._buckets.get(band, ()):
+                    if abs(candidate_aspect - aspect) > 0.05 * max(aspect, candidate_aspect):
+                        continue
+                    distance = hamming_distance(phash, candidate_hash)
+                    if distance <= self.max_distance and (best is None or distance < best[0]):
+                        best = (distance, sha256)
+        return best[1] if best else None
+
+    def find(self, sha256: str, phash: int, aspect: float) -> Optional[Dict[str, Any]]:
+        """
+        หาผล OCR ของรูปนี้หรือรูปที่หน้าตาเหมือนกัน
+
+        Args:
+            sha256 (str): hash ของไฟล์รูป
+            phash (int): perceptual hash (dhash)
+            aspect (float): สัดส่วนกว้าง/สูง (กันรูปที่ hash บังเอิญตรงกันแต่รูปทรงต่างกัน)
+
+        Returns:
+            dict: {'original_text', 'text', 'sha256' (รูปต้นแบบ)} หรือ None ถ้าต้อง OCR ใหม่
+        """
+        result = self._result(sha256)
+        if result is not None:
+            with self._lock:
+                self.stats["exact_hits"] += 1
+            return result
+
+        if not self._informative(phash):
+            return None
+        canonical = self._find_similar(phash, aspect)
+        if canonical is None and self.cache is not None:
+            canonical = self.cache.get(self._phash_key(phash, aspect))
+        if canonical and canonical != sha256:
+            result = self._result(canonical)
+            if result is not None:
+                with self._lock:
+                    self.stats["perceptual_hits"] += 1
+                return result
+        return None
+
+    def remember(self, sha256: str, phash: int, aspect: float, original_text: str, text: str,
+                 ocr_skipped: Optional[str] = None) -> Dict[str, Any]:
+        """
+        บันทึกผล OCR ของรูปต้นแบบ (ใช้ได้ทั้ง process นี้, process อื่น และรอบถัดไปผ่าน cache)
+
+        Args:
+            ocr_skipped (str): เหตุผลที่ไม่ได้ OCR รูปนี้ (OCR triage) - จำไว้ใน process นี้เท่านั้น ไม่เก็บลง cache
+                               เพื่อให้การเปลี่ยนค่าตั้ง triage มีผลในรอบถัดไป
+        """
+        result = {"original_text": original_text, "text": text, "sha256": sha256}
+        if ocr_skipped:
+            result["ocr_skipped"] = ocr_skipped
+        with self._lock:
+            if not ocr_skipped:
+                self.stats["ocr_runs"] += 1
+            self._results[sha256] = result
+        if self.cache is not None and not ocr_skipped:
+            values = {self._ocr_key(sha256): result}
+            if self._informative(phash):
+                values[self._phash_key(phash, aspect)] = sha256
+            self.cache.put_many(values)
+        if self._informative(phash):
+            with self._lock:
+                for band in self._band_keys(phash):
+                    self._buckets.setdefault(band, []).append((phash, aspect, sha256))
+        return result
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Image Embedder สำหรับสร้าง CLIP image embeddings แบบ batch
+
+- decode และย่อรูป (ด้านสั้น 224 px) ใน thread pool ก่อนเข้าโมเดล
+- รวมหลายรูปเป็น batch ใน forward pass เดียว และรูปเดียวกัน (hash เดียวกัน) encode ครั้งเดียว
+- backend: "sentence_transformers" (SentenceTransformer CLIP) หรือ "onnx" (ONNX Runtime บน CPU)
+ไฟล์ ONNX ของ CLIP vision tower สร้างได้ด้วย: python app/image_embedder.py export [path]
+"""
+
+import io
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+BACKENDS = ("sentence_transformers", "onnx")
+
+# ค่าการเตรียมรูปของ CLIP (ViT-B/32)
+CLIP_IMAGE_SIZE = 224
+CLIP_MEAN = np.array([0.48145466, 0.4578275, 0.40821073], dtype=np.float32)
+CLIP_STD = np.array([0.26862954, 0.26130258, 0.27577711], dtype=np.float32)
+
+
+def load_clip_image(image_bytes: bytes, size: int = CLIP_IMAGE_SIZE) -> Image.Image:
+    """decode รูปเป็น RGB แล้วย่อให้ด้านสั้นเท่ากับ size (แบบเดียวกับ CLIP processor)"""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = image.convert("RGB")
+    scale = size / min(image.size)
+    if scale < 1:
+        image = image.resize((max(size, round(image.width * scale)), max(size, round(image.height * scale))), Image.BICUBIC)
+    return image
+
+
+def clip_pixel_values(image: Image.Image, size: int = CLIP_IMAGE_SIZE) -> np.ndarray:
+    """
+    แปลงรูปเป็น input ของ CLIP vision tower: resize ด้านสั้น, center crop, normalize
+
+    Returns:
+        np.ndarray: float32 ขนาด (3, size, size)
+    """
+    scale = size / min(image.size)
+    if min(image.size) != size:
+        image = image.resize((max(size, round(image.width * scale)), max(size, round(image.height * scale))), Image.BICUBIC)
+    left = (image.width - size) // 2
+    top = (image.height - size) // 2
+    image = image.crop((left, top, left + size, top + size))
+    pixels = np.asarray(image, dtype=np.float32) / 255.0
+    return ((pixels - CLIP_MEAN) / CLIP_STD).transpose(2, 0, 1)
+
+
+class ONNXClipImageEncoder:
+    """CLIP vision tower บน ONNX Runtime (encode รับ list ของ PIL Image เหมือน SentenceTransformer)"""
+
+    def __init__(self, path: str, threads: int = 0):
+        """
+        Args:
+            path (str): ไฟล์ .onnx ของ vision tower (input: pixel_values (batch, 3, 224, 224))
+            threads (int): จำนวน intra-op threads (0 = ค่าเริ่มต้นของ ONNX Runtime)
+        """
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def encode(self, images: Sequence[Image.Image], batch_size: int = 32, **kwargs) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(images), batch_size):
+            batch = np.stack([clip_pixel_values(image) for image in images[start:start + batch_size]])
+            outputs.append(self.session.run(None, {self.input_name: batch})[0])
+        return np.concatenate(outputs) if outputs else np.zeros((0, 0), dtype=np.float32)
+
+
+def export_clip_vision_onnx(model_name: str, path: str, opset: int = 17) -> str:
+    """export CLIP vision tower ของ SentenceTransformer เป็น ONNX (ต้องมี torch)"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    clip = SentenceTransformer(model_name, device="cpu")[0].model
+
+    class VisionTower(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, pixel_values):
+            return self.model.get_image_features(pixel_values=pixel_values)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    dummy = torch.zeros(1, 3, CLIP_IMAGE_SIZE, CLIP_IMAGE_SIZE)
+    torch.onnx.export(
+        VisionTower(clip).eval(), dummy, path,
+        input_names=["pixel_values"], output_names=["image_embeds"],
+        dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+        opset_version=opset
+    )
+    return path
+
+
+class ImageEmbedder:
+    """สร้าง image embeddings หลายรูปพร้อมกัน (decode ขนานกัน แล้ว encode เป็น batch)"""
+
+    def __init__(self, encoder, backend: str = "sentence_transformers", batch_size: int = 32, decode_workers: int = 4):
+        """
+        Args:
+            encoder: object ที่มี encode(list ของ PIL Image, batch_size=...) เช่น SentenceTransformer หรือ ONNXClipImageEncoder
+            backend (str): ชื่อ backend (ใช้แสดงผล - ONNX ที่ export แบบ float32 ให้ vector เดียวกับ SentenceTransformer)
+            batch_size (int): จำนวนรูปต่อ forward pass
+            decode_workers (int): จำนวน threads สำหรับ decode/ย่อรูป
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"backend ต้องเป็นหนึ่งใน {BACKENDS}: {backend}")
+        self.encoder = encoder
+        self.backend = backend
+        self.batch_size = batch_size
+        self._decoder = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="image-decode")
+        self._lock = threading.Lock()
+        self.stats = {"images": 0, "batches": 0, "decode_seconds": 0.0, "encode_seconds": 0.0}
+
+    def _decode(self, image_bytes: bytes) -> Optional[Image.Image]:
+        try:
+            return load_clip_image(image_bytes)
+        except Exception as e:
+            print(f"   ⚠️ Error decoding image: {e}")
+            return None
+
+    def embed_many(self, images: Sequence[Tuple[str, bytes]]) -> Dict[str, Optional[List[float]]]:
+        """
+        สร้าง embeddings ของหลายรูป
+
+        Args:
+            images: [(hash ของรูป, bytes ของรูป), ...] (hash เดียวกัน encode ครั้งเดียว)
+
+        Returns:
+            dict: {hash: embedding (list) หรือ None ถ้า decode/encode ไม่สำเร็จ}
+        """
+        unique = dict(images)
+        if not unique:
+            return {}
+        keys = list(unique)
+
+        started = time.perf_counter()
+        decoded = list(self._decoder.map(self._decode, [unique[key] for key in keys]))
+        decoded_at = time.perf_counter()
+
+        results: Dict[str, Optional[List[float]]] = {key: None for key in keys}
+        ready = [(key, image) for key, image in zip(keys, decoded) if image is not None]
+        batches = 0
+        for start in range(0, len(ready), self.batch_size):
+            batch = ready[start:start + self.batch_size]
+            try:
+                vectors = self.encoder.encode([image for _, image in batch], batch_size=self.batch_size)
+            except Exception as e:
+                print(f"   ⚠️ Error creating image embeddings: {e}")
+                continue
+            batches += 1
+            for (key, _), vector in zip(batch, vectors):
+                results[key] = np.asarray(vector, dtype=np.float32).tolist()
+
+        with self._lock:
+            self.stats["images"] += len(ready)
+            self.stats["batches"] += batches
+            self.stats["decode_seconds"] += decoded_at - started
+            self.stats["encode_seconds"] += time.perf_counter() - decoded_at
+        return results
+
+    def throughput(self) -> dict:
+        """
+        สถิติการทำงาน
+
+        Returns:
+            dict: stats ทั้งหมดและ 'images_per_second'
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        seconds = stats["decode_seconds"] + stats["encode_seconds"]
+        stats["images_per_second"] = stats["images"] / seconds if seconds else 0.0
+        return stats
+
+    def shutdown(self) -> None:
+        self._decoder.shutdown()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "export":
+        output_path = sys.argv[2] if len(sys.argv) > 2 else "models/clip-vit-b-32-vision.onnx"
+        print(f"✅ export ONNX: {export_clip_vision_onnx('clip-ViT-B-32', output_path)}")
+    else:
+        print("usage: python app/image_embedder.py export [path]")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Ingestion Cache สำหรับเก็บ summary และ embeddings ที่สร้างแล้ว ตาม fingerprint ของเนื้อหา
+
+key คือ hash ของเนื้อหา + ชื่อโมเดล + version ของ prompt
+ถ้าเนื้อหาไม่เปลี่ยน การ ingest ซ้ำจะใช้ค่าจาก cache โดยไม่เรียก OpenAI หรือ encode ใหม่
+เก็บใน MongoDB collection (ใช้ร่วมกันได้หลายเครื่อง) หรือไฟล์ SQLite บนเครื่องเป็น fallback
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from pymongo import UpdateOne
+
+
+def fingerprint(*parts: Any) -> str:
+    """สร้าง hash (sha256) จากหลายส่วน เช่น ประเภท, เนื้อหา, ชื่อโมเดล, version ของ prompt"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class IngestionCache:
+    """cache แบบ key-value (ค่าต้องแปลงเป็น JSON ได้) สำหรับ summary และ embeddings"""
+
+    def __init__(self, collection=None, path: str = "output/ingestion_cache.sqlite3"):
+        """
+        Args:
+            collection: MongoDB collection ที่ใช้เก็บ cache (ถ้าไม่ระบุจะใช้ไฟล์ SQLite)
+            path (str): ตำแหน่งไฟล์ SQLite
+        """
+        self.collection = collection
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+
+        if collection is None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._connection.commit()
+
+    @property
+    def backend(self) -> str:
+        return "mongodb" if self.collection is not None else "sqlite"
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        อ่านหลาย key ในครั้งเดียว
+
+        Returns:
+            dict: {key: value} เฉพาะ key ที่มีใน cache
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        found = {}
+        if self.collection is not None:
+            for doc in self.collection.find({"_id": {"$in": keys}}, {"value": 1}):
+                found[doc["_id"]] = doc["value"]
+        else:
+            with self._lock:
+                # SQLite จำกัดจำนวนตัวแปรต่อ query จึงแบ่งเป็นชุด
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._connection.execute(
+                        f"SELECT key, value FROM cache WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+                    found.update((key, json.loads(value)) for key, value in rows)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, values: Dict[str, Any]) -> None:
+        """บันทึกหลาย key ในครั้งเดียว (เขียนทับค่าเดิม)"""
+        if not values:
+            return
+        if self.collection is not None:
+            now = datetime.now()
+            self.collection.bulk_write([
+                UpdateOne({"_id": key}, {"$set": {"value": value, "updated_at": now}}, upsert=True)
+                for key, value in values.items()
+            ], ordered=False)
+        else:
+            with self._lock:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()]
+                )
+                self._connection.commit()
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many({key: value})
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
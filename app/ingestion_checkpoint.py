@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Ingestion Checkpoint สำหรับบันทึกสถานะการ ingest ทีละหน้า เพื่อให้รันต่อจากจุดที่ค้างได้
+
+manifest ของแต่ละรอบระบุด้วย run key (hash ของไฟล์ PDF + โมเดลที่ใช้)
+เก็บหน้าที่บันทึกเสร็จแล้วพร้อม doc_id ของ chunks ในหน้านั้น (ใช้ตอนลบ chunks เก่าหลังรันครบ)
+เก็บเป็นไฟล์ JSON บนเครื่อง (เขียนแบบ atomic) หรือ MongoDB collection
+"""
+
+import os
+import json
+import tempfile
+import threading
+from datetime import datetime
+from typing import Iterable, Optional, Set
+
+
+class IngestionCheckpoint:
+    """manifest สถานะรายหน้าของการ ingest หนึ่งรอบ"""
+
+    def __init__(self, run_key: str, collection=None, directory: str = "output/checkpoints"):
+        """
+        Args:
+            run_key (str): key ของรอบการ ingest (เปลี่ยนเมื่อไฟล์หรือโมเดลเปลี่ยน)
+            collection: MongoDB collection ที่ใช้เก็บ manifest (ถ้าไม่ระบุจะใช้ไฟล์ JSON)
+            directory (str): โฟลเดอร์ของไฟล์ manifest
+        """
+        self.run_key = run_key
+        self.collection = collection
+        self.path = os.path.join(directory, f"{run_key}.json")
+        self._lock = threading.Lock()
+        self.state = self._load() or {}
+
+    @property
+    def backend(self) -> str:
+        return "mongodb" if self.collection is not None else "file"
+
+    def _load(self) -> Optional[dict]:
+        if self.collection is not None:
+            doc = self.collection.find_one({"_id": self.run_key})
+            if doc:
+                doc.pop("_id", None)
+            return doc
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ อ่าน checkpoint {self.path} ไม่ได้ ({e}) เริ่มรอบใหม่")
+            return None
+
+    def _save(self) -> None:
+        self.state["updated_at"] = datetime.now().isoformat()
+        if self.collection is not None:
+            self.collection.replace_one({"_id": self.run_key}, self.state, upsert=True)
+            return
+
+        # เขียนลงไฟล์ชั่วคราวในโฟลเดอร์เดียวกันแล้ว rename ทับ (ไฟล์ไม่เสียถ้า process ตายระหว่างเขียน)
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.state)
+
+    @property
+    def finished(self) -> bool:
+        return bool(self.state.get("finished"))
+
+    def start(self, total_pages: int, source: str, resume: bool = False) -> Set[int]:
+        """
+        เริ่มรอบการ ingest
+
+        Args:
+            total_pages (int): จำนวนหน้าทั้งหมด
+            source (str): ตำแหน่งไฟล์ต้นฉบับ
+            resume (bool): รันต่อจาก manifest เดิม (ถ้ามีและยังไม่เสร็จ)
+
+        Returns:
+            Set[int]: หน้าที่บันทึกเสร็จแล้ว (ข้ามได้)
+        """
+        with self._lock:
+            if resume and self.exists and not self.finished:
+                completed = self.completed_pages
+                print(f"⏯️ รันต่อจาก checkpoint: เสร็จแล้ว {len(completed)}/{total_pages} หน้า")
+                return completed
+            if resume and self.finished:
+                print("ℹ️ checkpoint ของรอบก่อนเสร็จครบแล้ว เริ่มรอบใหม่")
+            self.state = {
+                "run_key": self.run_key,
+                "source": source,
+                "total_pages": total_pages,
+                "pages": {},
+                "finished": False,
+                "started_at": datetime.now().isoformat()
+            }
+            self._save()
+            return set()
+
+    @property
+    def completed_pages(self) -> Set[int]:
+        return {int(page_num) for page_num in self.state.get("pages", {})}
+
+    def is_completed(self, page_num: int) -> bool:
+        return str(page_num) in self.state.get("pages", {})
+
+    def mark_page_done(self, page_num: int, doc_ids: Iterable[str]) -> None:
+        """บันทึกว่าหน้านี้ถูกเขียนลงฐานข้อมูลครบแล้ว พร้อม doc_id ของ chunks ในหน้า"""
+        with self._lock:
+            self.state.setdefault("pages", {})[str(page_num)] = {
+                "doc_ids": sorted(doc_ids),
+                "completed_at": datetime.now().isoformat()
+            }
+            self._save()
+
+    def all_doc_ids(self) -> Set[str]:
+        """doc_id ของทุกหน้าที่เสร็จแล้ว (รวมหน้าที่เสร็จในรอบก่อนที่ถูก resume)"""
+        return {doc_id for page in self.state.get("pages", {}).values() for doc_id in page["doc_ids"]}
+
+    def mark_finished(self) -> None:
+        with self._lock:
+            self.state["finished"] = True
+            self._save()
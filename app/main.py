@@ -4,6 +4,7 @@ import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, HTTPException, Header
 from pydantic import BaseModel
+from typing import List, Optional
 
 from linebot.v3 import WebhookHandler
 from linebot.v3.exceptions import InvalidSignatureError
@@ -19,7 +20,8 @@ from linebot.v3.messaging import (
 
 from .response_message import generate_reply_message
 from .retrieval_utils import ask_question_to_rag, store_user_response, store_user_question, check_and_update_question_limit
-from .content_filter import check_content_safety
+from .message_analysis import MessageAnalysis
+from .knowledge_store import knowledge_store
 
 app = FastAPI()
 
@@ -39,6 +41,11 @@ print(f"LINE_CHANNEL_SECRET: {get_channel_secret}")
 configuration = Configuration(access_token=get_access_token)
 handler = WebhookHandler(channel_secret=get_channel_secret)
 
+@app.on_event("startup")
+def load_knowledge_store():
+    # โหลดข้อมูลโหราศาสตร์แบบคงที่ (ราศี สีมงคล โชคลาภ) เข้าหน่วยความจำครั้งเดียวตอนเริ่มระบบ
+    knowledge_store.load()
+
 @app.post("/callback")
 async def callback(request: Request, x_line_signature: str = Header(None)):
     body = await request.body()
@@ -97,11 +104,16 @@ def on_message_event(event: MessageEvent):
 class AskRequest(BaseModel):
     user_id: str
     question: str
+    document_ids: Optional[List[str]] = None  # จำกัดการค้นหาเฉพาะเอกสารใน corpus ที่ระบุ
+    retrieval_mode: Optional[str] = None  # "dense" หรือ "hybrid" (ไม่ระบุ = RETRIEVAL_MODE)
 
 @app.post("/ask")
 async def ask_route(req: AskRequest):
+    # วิเคราะห์ข้อความครั้งเดียว แล้วส่งต่อให้ RAG
+    analysis = MessageAnalysis(req.question)
+    
     # 🛡️ ตรวจสอบความปลอดภัยของเนื้อหาก่อน
-    is_safe, safety_message = check_content_safety(req.question)
+    is_safe, safety_message = analysis.safety
     if not is_safe:
         print(f"🚫 Content filtered for user {req.user_id}: {safety_message}")
         
@@ -153,7 +165,8 @@ async def ask_route(req: AskRequest):
         context_data={"endpoint": "/ask"}
     )
     
-    answer = ask_question_to_rag(req.question, req.user_id)
+    answer = ask_question_to_rag(req.question, req.user_id, analysis=analysis, document_ids=req.document_ids,
+                                 retrieval_mode=req.retrieval_mode)
     
     # บันทึกคำตอบใน collection astrobot (ask_question_to_rag จะบันทึกเองแล้ว แต่เพิ่มข้อมูล endpoint)
     store_user_response(
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Message Analysis สำหรับวิเคราะห์ข้อความของผู้ใช้ครั้งเดียวต่อข้อความ
+
+แต่ละส่วน (ข้อความที่ normalize แล้ว, คำที่แบ่งแล้ว, ข้อมูลวันเกิด, เจตนา, ผลการกรองเนื้อหา)
+คำนวณแบบ lazy เมื่อถูกใช้ครั้งแรก แล้วเก็บไว้ให้ handler ถัดไปใช้ต่อโดยไม่ต้องวิเคราะห์ซ้ำ
+"""
+
+from functools import cached_property
+from typing import Optional, Tuple
+
+from .birth_date_parser import get_birth_date_parser
+from .content_filter import check_content_safety
+from .thai_tokenizer import thai_tokenizer
+
+# คำที่แสดงว่าผู้ใช้ถามเรื่องดวง/ราศี (ใช้ตอนบันทึกวันเกิดใหม่)
+HOROSCOPE_KEYWORDS = ['ทำนายดวงกำเนิด', 'ดวงกำเนิด', 'ทำนายดวง', 'ดูดวงกำเนิด', 'ราศีอะไร', 'ราศี', 'ดวงชะตา']
+
+# คำที่แสดงว่าผู้ใช้ขอคำทำนายดวงกำเนิดโดยตรง
+BIRTH_CHART_KEYWORDS = ['ทำนายดวงกำเนิด', 'ดวงกำเนิด', 'ทำนายดวง', 'ดูดวงกำเนิด']
+
+
+class MessageAnalysis:
+    """ผลการวิเคราะห์ข้อความหนึ่งข้อความ (แต่ละ field คำนวณครั้งเดียวเมื่อถูกใช้)"""
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text (str): ข้อความจากผู้ใช้
+        """
+        self.text = text
+
+    @classmethod
+    def for_text(cls, text: str, analysis: "MessageAnalysis" = None) -> "MessageAnalysis":
+        """
+        คืนค่า analysis เดิมถ้าเป็นของข้อความเดียวกัน มิฉะนั้นสร้างใหม่
+
+        Args:
+            text (str): ข้อความที่ต้องการวิเคราะห์
+            analysis (MessageAnalysis): analysis ที่ส่งต่อมาจาก handler ก่อนหน้า (ไม่บังคับ)
+        """
+        if analysis is not None and analysis.text == text:
+            return analysis
+        return cls(text)
+
+    @cached_property
+    def normalized(self) -> str:
+        """ข้อความตัวพิมพ์เล็กสำหรับเทียบ keyword"""
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> Tuple[str, ...]:
+        """คำที่แบ่งด้วย PyThaiNLP (ใช้ cache เดียวกับ content filter)"""
+        return thai_tokenizer.tokenize(self.text)
+
+    @cached_property
+    def birth_info(self) -> dict:
+        """ข้อมูลวันเกิด เวลาเกิด และสถานที่เกิดที่แยกจากข้อความ"""
+        return get_birth_date_parser().extract_birth_info(self.text)
+
+    @property
+    def birth_date(self) -> Optional[str]:
+        """วันเกิดในรูปแบบ dd/mm/yyyy หรือ None"""
+        return self.birth_info.get('date') if self.birth_info else None
+
+    @cached_property
+    def intent(self) -> dict:
+        """เจตนาของคำถาม (ผลจาก analyze_question_intent)"""
+        from .retrieval_utils import analyze_question_intent
+        return analyze_question_intent(self.text)
+
+    @cached_property
+    def safety(self) -> Tuple[bool, str]:
+        """ผลการกรองเนื้อหา (ปลอดภัยหรือไม่, ข้อความตอบกลับ)"""
+        return check_content_safety(self.text)
+
+    @cached_property
+    def mentions_horoscope(self) -> bool:
+        """ข้อความพูดถึงดวง/ราศีหรือไม่"""
+        return any(keyword in self.normalized for keyword in HOROSCOPE_KEYWORDS)
+
+    @cached_property
+    def is_birth_chart_request(self) -> bool:
+        """ข้อความขอคำทำนายดวงกำเนิดหรือไม่"""
+        return any(keyword in self.normalized for keyword in BIRTH_CHART_KEYWORDS)
@@ -1,11 +1,10 @@
 import os
 import io
-import base64
+import sys
 import fitz  # PyMuPDF
-import pdfplumber
 from PIL import Image
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from langchain.schema import Document
 from sentence_transformers import SentenceTransformer
 import torch
@@ -16,16 +15,34 @@ import json
 import gc
 import psutil
 import re
+import time
+import asyncio
+import argparse
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from summarization_service import SummarizationService, SUMMARY_PROMPT_VERSION, fallback_summary
+from ingestion_cache import IngestionCache, fingerprint
+from ingestion_checkpoint import IngestionCheckpoint
+from corpus_manifest import CorpusDocument, load_corpus
+from bulk_writer import BulkWriter
+from blob_store import GridFSBlobStore, LocalBlobStore, image_ref, store_image
+from image_dedup import ImageDeduplicator, dhash
+from ocr_pool import OCRPool, prepare_ocr_image
 
-# 🆕 เพิ่ม PyThaiNLP สำหรับปรับปรุง OCR
-try:
-    from pythainlp import word_tokenize
-    from pythainlp.spell import correct
-    from pythainlp.util import normalize
-    PYTHAINLP_AVAILABLE = True
+from ocr_text_normalizer import OCRTextNormalizer, PYTHAINLP_AVAILABLE
+from semantic_chunker import SemanticChunker
+from bounded_stream import prefetch
+from page_context import LazyPdfplumber, PageContext
+from ocr_triage import OCRTriage, OCR, text_coverage, text_features
+from image_embedder import ImageEmbedder, ONNXClipImageEncoder
+from bm25_index import BM25Index, BM25IndexBuilder
+from embedding_models import LEGACY_EMBEDDING_MODEL_ID, embedding_space_of, get_embedding_spec
+from ann_index import PAYLOAD_FIELDS, ANNIndex, ann_index_path, sync_ann_index
+
+# 🆕 PyThaiNLP สำหรับปรับปรุง OCR (ใช้ผ่าน OCRTextNormalizer)
+if PYTHAINLP_AVAILABLE:
     print("✅ PyThaiNLP loaded successfully")
-except ImportError:
-    PYTHAINLP_AVAILABLE = False
+else:
     print("⚠️ PyThaiNLP not available, using basic text processing")
 
 # ✅ แก้ไขปัญหา MPS device, PIL.ANTIALIAS และ tokenizers parallelism
@@ -39,7 +56,7 @@ dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".en
 load_dotenv(dotenv_path)
 
 # ✅ ตัวแปรระบบ
-PDF_PATH = "data/attention.pdf"
+PDF_PATH = os.getenv("PDF_PATH", "data/attention.pdf")  # เอกสารเริ่มต้นเมื่อไม่ได้ระบุ --corpus
 MONGO_URL = os.getenv("MONGO_URL")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SUMMARY_DB_NAME = "astrobot_summary"  # สำหรับเก็บข้อมูลที่ summary และ summary embedding แล้ว
@@ -56,6 +73,77 @@ PROCESSED_TEXT_COLLECTION = "processed_text_chunks"
 PROCESSED_IMAGE_COLLECTION = "processed_image_chunks"
 PROCESSED_TABLE_COLLECTION = "processed_table_chunks"
 
+# ✅ ตัวแปรระบบ - Summarization
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # ใช้ชี้ไป server ที่ compatible กับ OpenAI (เช่น fake server ตอนทดสอบ)
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "8"))  # จำนวน request สรุปพร้อมกันสูงสุด
+SUMMARY_RPM = int(os.getenv("SUMMARY_RPM", "500"))  # งบ requests-per-minute
+SUMMARY_TPM = int(os.getenv("SUMMARY_TPM", "200000"))  # งบ tokens-per-minute
+SUMMARY_BATCH_POLL_INTERVAL = float(os.getenv("SUMMARY_BATCH_POLL_INTERVAL", "30"))  # วินาทีระหว่างการ poll Batch API
+
+# ✅ ตัวแปรระบบ - Embeddings
+EMBEDDING_MODEL = get_embedding_spec(os.getenv("EMBEDDING_MODEL", LEGACY_EMBEDDING_MODEL_ID))  # text embeddings จาก summary (ดู embedding_models.EMBEDDING_MODELS)
+EMBEDDING_MODEL_NAME = EMBEDDING_MODEL.model_id  # model id ที่บันทึกกับทุก vector และใช้ใน cache key
+SEMANTIC_MODEL = get_embedding_spec("potion-multilingual-128M")  # ใช้ตัดข้อความตามความหมาย (semantic chunking)
+IMAGE_EMBEDDING_MODEL_NAME = "clip-ViT-B-32"  # image embeddings ของรูปภาพ
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # จำนวนข้อความต่อ batch ของ SentenceTransformer.encode
+EMBEDDING_MIGRATION_BATCH_SIZE = 256  # จำนวน chunks ต่อรอบของ --migrate-embeddings
+IMAGE_EMBEDDING_BACKEND = os.getenv("IMAGE_EMBEDDING_BACKEND", "sentence_transformers")  # "sentence_transformers" หรือ "onnx"
+IMAGE_EMBEDDING_ONNX_PATH = os.getenv("IMAGE_EMBEDDING_ONNX_PATH", "models/clip-vit-b-32-vision.onnx")  # สร้างด้วย python app/image_embedder.py export
+IMAGE_EMBEDDING_BATCH_SIZE = int(os.getenv("IMAGE_EMBEDDING_BATCH_SIZE", "32"))  # จำนวนรูปต่อ forward pass ของ CLIP
+IMAGE_DECODE_WORKERS = 4  # จำนวน threads สำหรับ decode/ย่อรูปก่อนสร้าง image embeddings
+
+# ✅ ตัวแปรระบบ - MongoDB bulk writes
+MONGO_BULK_BATCH_SIZE = int(os.getenv("MONGO_BULK_BATCH_SIZE", "500"))  # จำนวนเอกสารต่อ bulk_write
+MONGO_BULK_MAX_RETRIES = int(os.getenv("MONGO_BULK_MAX_RETRIES", "3"))  # ลองใหม่เมื่อเจอ error ชั่วคราว (เช่น เปลี่ยน primary)
+
+# ✅ ตัวแปรระบบ - Incremental ingestion cache (summary/embeddings ตาม hash ของเนื้อหา)
+INGESTION_CACHE_COLLECTION = "ingestion_cache"  # อยู่ใน SUMMARY_DB_NAME
+INGESTION_CACHE_PATH = os.getenv("INGESTION_CACHE_PATH", "output/ingestion_cache.sqlite3")  # fallback เมื่อเชื่อมต่อ MongoDB ไม่ได้
+
+# ✅ ตัวแปรระบบ - Checkpoint ของการ ingest (สำหรับ --resume)
+INGESTION_CHECKPOINT_BACKEND = os.getenv("INGESTION_CHECKPOINT_BACKEND", "file")  # "file" หรือ "mongodb"
+INGESTION_CHECKPOINT_DIR = os.getenv("INGESTION_CHECKPOINT_DIR", "output/checkpoints")
+INGESTION_CHECKPOINT_COLLECTION = "ingestion_checkpoints"  # อยู่ใน SUMMARY_DB_NAME
+
+# ✅ ตัวแปรระบบ - Corpus (ingest หลายเอกสาร)
+MAX_CONCURRENT_DOCUMENTS = int(os.getenv("MAX_CONCURRENT_DOCUMENTS", "1"))  # จำนวนเอกสารที่ ingest พร้อมกัน (ใช้ worker pool ร่วมกัน)
+WORKER_OPEN_PDFS = 4  # จำนวนไฟล์ PDF ที่ worker process เปิดค้างไว้ใช้ซ้ำ
+
+# ✅ ตัวแปรระบบ - Blob store ของรูปภาพ (chunk เก็บเฉพาะ image_ref)
+IMAGE_BLOB_STORE = os.getenv("IMAGE_BLOB_STORE", "gridfs")  # "gridfs" หรือ "local"
+IMAGE_BLOB_BUCKET = "image_blobs"  # GridFS bucket ใน ORIGINAL_DB_NAME
+IMAGE_BLOB_DIR = os.getenv("IMAGE_BLOB_DIR", "output/blobs")  # โฟลเดอร์ของ local blob store
+
+# ✅ ตัวแปรระบบ - OCR และการตรวจรูปซ้ำ
+OCR_LANGUAGES = ['en', 'th']
+OCR_MIN_CONFIDENCE = 0.3  # ใช้เฉพาะข้อความที่ confidence มากกว่านี้
+IMAGE_DEDUP_MAX_DISTANCE = int(os.getenv("IMAGE_DEDUP_MAX_DISTANCE", "4"))  # hamming distance ของ dHash ที่ถือว่าเป็นรูปเดียวกัน
+IMAGE_DEDUP_XREF_CACHE = 64  # จำนวนรูป (xref) ที่จำไว้ต่อ process (เก็บไฟล์รูปไว้ใน memory)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))  # จำนวน OCR worker processes ในโหมดทีละหน้า (0 = OCR ใน process หลัก)
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "0")) or None  # ย่อรูปให้ด้านที่ยาวที่สุดไม่เกินนี้ก่อน OCR
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "false").lower() == "true"  # แปลงเป็น grayscale ก่อน OCR
+OCR_TEXT_MODE = os.getenv("OCR_TEXT_MODE", "full")  # "full" (แก้เว้นวรรค + คำผิด) หรือ "fast" (แก้เฉพาะเว้นวรรค)
+OCR_CORRECTION_CACHE_SIZE = 20000  # จำนวนคำที่จำผลการแก้คำผิดไว้ต่อ process
+OCR_TRIAGE = os.getenv("OCR_TRIAGE", "true").lower() == "true"  # OCR เฉพาะรูปที่น่าจะมีข้อความ (รูปอื่นสร้างเฉพาะ image embedding)
+OCR_TRIAGE_MAX_TEXT_COVERAGE = 0.6  # รูปที่ text blocks ทับมากกว่านี้มีข้อความใน text layer แล้ว
+OCR_TRIAGE_MIN_EDGE_DENSITY = float(os.getenv("OCR_TRIAGE_MIN_EDGE_DENSITY", "0.04"))  # รูปที่ขอบคมน้อยกว่านี้ไม่น่ามีข้อความ
+TABLE_EXTRACTOR = os.getenv("TABLE_EXTRACTOR", "auto")  # "auto" (PyMuPDF ก่อน แล้วค่อย pdfplumber), "pymupdf" หรือ "pdfplumber"
+
+# ✅ ตัวแปรระบบ - Semantic chunking
+SEMANTIC_CHUNK_MIN_CHARS = 200  # ขนาดต่ำสุดของ chunk ก่อนตัดตามความหมาย
+SEMANTIC_CHUNK_MAX_CHARS = 1000  # ขนาดสูงสุดของ chunk
+SEMANTIC_CHUNK_WINDOW = 256  # จำนวนประโยคที่ encode ต่อครั้ง
+SEMANTIC_BREAKPOINT_PERCENTILE = 80  # distance ที่สูงกว่า percentile นี้ถือเป็นจุดเปลี่ยนเรื่อง
+
+# ✅ ตัวแปรระบบ - BM25 index (hybrid retrieval) และ HNSW (ANN) indexes ของ embedding spaces ขนาดใหญ่
+# สร้าง/เพิ่ม vectors ตอนจบการ ingest ใช้ค่าเดียวกับ retrieval จาก config.py (ที่ root ของโปรเจกต์)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config import (
+    BM25_INDEX_PATH, VECTOR_INDEX_BACKEND, ANN_INDEX_PATH, ANN_MIN_VECTORS,
+    HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH
+)
+
 # ✅ ฟังก์ชันแปลง bbox เป็น format ที่ MongoDB สามารถ encode ได้
 def convert_bbox_to_mongodb_format(bbox):
     """
@@ -96,71 +184,40 @@ def check_memory():
 # 🆕 ฟังก์ชันปรับปรุงข้อความไทยจาก OCR ด้วย PyThaiNLP
 def improve_thai_ocr_text(ocr_text):
     """
-    ปรับปรุงข้อความไทยจาก OCR ด้วย PyThaiNLP
+    ปรับปรุงข้อความไทยจาก OCR ด้วย PyThaiNLP (ผ่าน OCRTextNormalizer ที่จำผลการแก้คำไว้)
     """
-    if not PYTHAINLP_AVAILABLE or not ocr_text.strip():
+    if not ocr_text.strip():
         return ocr_text
-    
+
     try:
-        # ทำความสะอาดข้อความ
-        text = ocr_text.strip()
-        
-        # แก้ไขการเว้นวรรคที่ผิด
-        text = re.sub(r'([ก-๙])([A-Za-z])', r'\1 \2', text)  # เว้นวรรคระหว่างไทย-อังกฤษ
-        text = re.sub(r'([A-Za-z])([ก-๙])', r'\1 \2', text)  # เว้นวรรคระหว่างอังกฤษ-ไทย
-        text = re.sub(r'([ก-๙])([0-9])', r'\1 \2', text)    # เว้นวรรคระหว่างไทย-ตัวเลข
-        text = re.sub(r'([0-9])([ก-๙])', r'\1 \2', text)    # เว้นวรรคระหว่างตัวเลข-ไทย
-        
-        # แก้ไขการเว้นวรรคที่ซ้ำ
-        text = re.sub(r'\s+', ' ', text)
-        
-        # แบ่งคำด้วย PyThaiNLP
-        words = word_tokenize(text, engine='newmm')
-        
-        # แก้ไขคำผิดด้วย PyThaiNLP
-        corrected_words = []
-        for word in words:
-            if len(word) > 2 and word.isalpha():  # แก้ไขเฉพาะคำที่มีความยาวมากกว่า 2 ตัวอักษร
-                try:
-                    corrected = correct(word)
-                    corrected_words.append(corrected if corrected else word)
-                except:
-                    corrected_words.append(word)
-            else:
-                corrected_words.append(word)
-        
-        # รวมคำกลับเป็นประโยค
-        improved_text = ' '.join(corrected_words)
-        
-        # ทำความสะอาดอีกครั้ง
-        improved_text = re.sub(r'\s+', ' ', improved_text).strip()
-        
-        return improved_text
-        
+        return get_ocr_text_normalizer().normalize(ocr_text)
     except Exception as e:
         print(f"⚠️ Error in Thai text improvement: {e}")
         return ocr_text
 
 # ✅ โหลดโมเดลแบบ lazy loading
+def get_text_embedding_model(spec):
+    """โหลด text embedding model ตาม EmbeddingModelSpec แบบ lazy loading (โมเดลเดียวกันโหลดครั้งเดียว)"""
+    if not hasattr(get_text_embedding_model, 'models'):
+        get_text_embedding_model.models = {}
+    if spec.name not in get_text_embedding_model.models:
+        print(f"🔄 Loading embedding model {spec.model_id}...")
+        get_text_embedding_model.models[spec.name] = SentenceTransformer(spec.name, device="cpu")
+    return get_text_embedding_model.models[spec.name]
+
 def get_embedding_model():
-    """โหลด embedding model แบบ lazy loading"""
-    if not hasattr(get_embedding_model, 'model'):
-        print("🔄 Loading embedding model...")
-        get_embedding_model.model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
-    return get_embedding_model.model
+    """โหลด embedding model (EMBEDDING_MODEL) แบบ lazy loading"""
+    return get_text_embedding_model(EMBEDDING_MODEL)
 
 def get_semantic_model():
-    """โหลด semantic model แบบ lazy loading"""
-    if not hasattr(get_semantic_model, 'model'):
-        print("🔄 Loading semantic model...")
-        get_semantic_model.model = SentenceTransformer("minishlab/potion-multilingual-128M", device="cpu")
-    return get_semantic_model.model
+    """โหลด semantic model แบบ lazy loading (ใช้ instance เดียวกับ embedding model ถ้าเป็นโมเดลเดียวกัน)"""
+    return get_text_embedding_model(SEMANTIC_MODEL)
 
 def get_ocr_reader():
     """โหลด OCR reader แบบ lazy loading"""
     if not hasattr(get_ocr_reader, 'reader'):
         print(" Loading OCR reader...")
-        get_ocr_reader.reader = easyocr.Reader(['en', 'th'], gpu=False, verbose=False)
+        get_ocr_reader.reader = easyocr.Reader(OCR_LANGUAGES, gpu=False, verbose=False)
     return get_ocr_reader.reader
 
 # 🆕 โหลด Image Embedding Model (CLIP) แบบ lazy loading
@@ -170,7 +227,7 @@ def get_image_embedding_model():
         try:
             print("🔄 Loading CLIP image embedding model...")
             # ใช้ CLIP model จาก sentence-transformers
-            get_image_embedding_model.model = SentenceTransformer('clip-ViT-B-32', device="cpu")
+            get_image_embedding_model.model = SentenceTransformer(IMAGE_EMBEDDING_MODEL_NAME, device="cpu")
             print("✅ CLIP model loaded successfully")
         except Exception as e:
             print(f"⚠️ Failed to load CLIP model: {e}")
@@ -178,213 +235,406 @@ def get_image_embedding_model():
             get_image_embedding_model.model = None
     return get_image_embedding_model.model
 
+# 🆕 โหลด Image Embedder (CLIP แบบ batch) แบบ lazy loading
+def get_image_embedder():
+    """image embedder ตาม IMAGE_EMBEDDING_BACKEND (ONNX โหลดไม่ได้จะใช้ SentenceTransformer แทน) หรือ None ถ้าไม่มีโมเดล"""
+    if not hasattr(get_image_embedder, 'embedder'):
+        encoder, backend = None, "sentence_transformers"
+        if IMAGE_EMBEDDING_BACKEND == "onnx":
+            try:
+                encoder, backend = ONNXClipImageEncoder(IMAGE_EMBEDDING_ONNX_PATH), "onnx"
+                print(f"✅ CLIP ONNX model loaded: {IMAGE_EMBEDDING_ONNX_PATH}")
+            except Exception as e:
+                print(f"⚠️ Failed to load CLIP ONNX model ({e}), using SentenceTransformer")
+        if encoder is None:
+            encoder = get_image_embedding_model()
+        get_image_embedder.embedder = ImageEmbedder(
+            encoder, backend=backend, batch_size=IMAGE_EMBEDDING_BATCH_SIZE, decode_workers=IMAGE_DECODE_WORKERS
+        ) if encoder is not None else None
+    return get_image_embedder.embedder
+
 # OpenAI client
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
 
-# ✅ อ่านข้อความจาก PDF ด้วย PyMuPDF
-def extract_text_with_pymupdf(path):
+# 🆕 โหลด Ingestion Cache แบบ lazy loading
+def get_ingestion_cache():
+    """เปิด cache ของ summary/embeddings (MongoDB ถ้าเชื่อมต่อได้ มิฉะนั้นใช้ไฟล์ SQLite)"""
+    if not hasattr(get_ingestion_cache, 'cache'):
+        try:
+            cache_client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
+            cache_client.admin.command('ping')
+            get_ingestion_cache.cache = IngestionCache(collection=cache_client[SUMMARY_DB_NAME][INGESTION_CACHE_COLLECTION])
+        except Exception as e:
+            print(f"⚠️ ใช้ ingestion cache ใน MongoDB ไม่ได้ ({e}) ใช้ไฟล์ {INGESTION_CACHE_PATH} แทน")
+            get_ingestion_cache.cache = IngestionCache(path=INGESTION_CACHE_PATH)
+        print(f"🗃️ Ingestion cache: {get_ingestion_cache.cache.backend}")
+    return get_ingestion_cache.cache
+
+# 🆕 สร้าง OCR Text Normalizer แบบ lazy loading
+def get_ocr_text_normalizer():
+    """ตัวปรับปรุงข้อความ OCR (หนึ่ง instance ต่อ process จำผลการแก้คำร่วมกันทุกหน้า/เอกสาร)"""
+    if not hasattr(get_ocr_text_normalizer, 'normalizer'):
+        get_ocr_text_normalizer.normalizer = OCRTextNormalizer(mode=OCR_TEXT_MODE, cache_size=OCR_CORRECTION_CACHE_SIZE)
+    return get_ocr_text_normalizer.normalizer
+
+# 🆕 สร้าง OCR Triage แบบ lazy loading
+def get_ocr_triage():
+    """ตัวคัดรูปก่อน OCR (หนึ่ง instance ต่อ process นับจำนวนรูปที่ข้าม OCR)"""
+    if not hasattr(get_ocr_triage, 'triage'):
+        get_ocr_triage.triage = OCRTriage(
+            enabled=OCR_TRIAGE,
+            max_text_coverage=OCR_TRIAGE_MAX_TEXT_COVERAGE,
+            min_edge_density=OCR_TRIAGE_MIN_EDGE_DENSITY
+        )
+    return get_ocr_triage.triage
+
+# 🆕 สร้าง Image Deduplicator แบบ lazy loading
+def get_image_deduplicator():
+    """ตัวตรวจรูปซ้ำ (หนึ่ง instance ต่อ process ใช้ผล OCR ร่วมกันทุก process ผ่าน ingestion cache)"""
+    if not hasattr(get_image_deduplicator, 'dedup'):
+        get_image_deduplicator.dedup = ImageDeduplicator(
+            cache=get_ingestion_cache(),
+            ocr_version=ocr_cache_version(),
+            max_distance=IMAGE_DEDUP_MAX_DISTANCE,
+            max_xrefs=IMAGE_DEDUP_XREF_CACHE
+        )
+    return get_image_deduplicator.dedup
+
+# 🆕 โหลด Blob Store ของรูปภาพแบบ lazy loading
+def get_blob_store():
+    """เปิด blob store ของรูปภาพ (GridFS ถ้าเชื่อมต่อ MongoDB ได้ มิฉะนั้นใช้โฟลเดอร์บนเครื่อง)"""
+    if not hasattr(get_blob_store, 'store'):
+        get_blob_store.store = None
+        if IMAGE_BLOB_STORE == "gridfs":
+            try:
+                blob_client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
+                blob_client.admin.command('ping')
+                get_blob_store.store = GridFSBlobStore(blob_client[ORIGINAL_DB_NAME], bucket_name=IMAGE_BLOB_BUCKET)
+            except Exception as e:
+                print(f"⚠️ ใช้ GridFS ไม่ได้ ({e}) เก็บรูปภาพในโฟลเดอร์ {IMAGE_BLOB_DIR} แทน")
+        if get_blob_store.store is None:
+            get_blob_store.store = LocalBlobStore(IMAGE_BLOB_DIR)
+        print(f"🗄️ Image blob store: {get_blob_store.store.name}")
+    return get_blob_store.store
+
+def store_page_images(page_results):
     """
-    อ่านข้อความจาก PDF ด้วย PyMuPDF
+    เขียนรูปภาพของหน้าลง blob store แล้วลบ image_bytes ออกจาก chunks (เหลือเฉพาะ image_ref)
+    ทำก่อนบันทึก chunks เพื่อไม่ให้มี chunk ที่อ้างถึงรูปที่ยังไม่ถูกเขียน
     """
-    print(f"📖 กำลังอ่านข้อความจาก: {path}")
-    text_output = ""
-    doc = fitz.open(path)
+    for key in ('image_chunks', 'image_processed_chunks'):
+        for chunk in page_results[key]:
+            image_bytes = chunk.pop('image_bytes', None)
+            if image_bytes is not None:
+                store_image(get_blob_store(), image_bytes, chunk['image_ref'])
+
+# 🆕 fingerprint ของเนื้อหาและผลลัพธ์ที่ได้จากโมเดล
+def chunk_content_hash(chunk):
+    """hash ของเนื้อหา original chunk (ประเภท + ข้อความ + sha256 ของรูปภาพ)"""
+    return fingerprint(chunk["type"], chunk["text"], chunk.get("image_ref", {}).get("sha256", ""))
+
+def processed_content_hash(chunk):
+    """
+    hash ของ processed chunk: เนื้อหา + โมเดล/prompt ที่ใช้สร้าง summary และ image embeddings
+    (ไม่รวม text embedding model: vectors มี embedding_model กำกับและย้ายไปโมเดลใหม่ด้วย migrate_embeddings)
+    """
+    return fingerprint(chunk_content_hash(chunk), SUMMARY_MODEL, SUMMARY_PROMPT_VERSION, IMAGE_EMBEDDING_MODEL_NAME)
+
+def summary_cache_key(text, content_type):
+    return fingerprint("summary", content_type, text, SUMMARY_MODEL, SUMMARY_PROMPT_VERSION)
+
+def embedding_cache_key(text, model_id=None):
+    return fingerprint("embedding", text, model_id or EMBEDDING_MODEL_NAME)
+
+def ocr_cache_version():
+    """hash ของค่าตั้ง OCR และการปรับข้อความ (ผล OCR ใน cache ใช้ได้เมื่อค่าตั้งเหมือนเดิม)"""
+    return fingerprint(",".join(OCR_LANGUAGES), OCR_MIN_CONFIDENCE, OCR_MAX_SIDE, OCR_GRAYSCALE, OCR_TEXT_MODE,
+                       PYTHAINLP_AVAILABLE)[:16]
+
+def image_embedding_cache_key(image_sha256):
+    return fingerprint("image_embedding", image_sha256, IMAGE_EMBEDDING_MODEL_NAME)
+
+def ingestion_run_key(document):
+    """key ของรอบการ ingest เอกสาร: เปลี่ยนเมื่อไฟล์ PDF หรือโมเดล/prompt เปลี่ยน (checkpoint เดิมจะไม่ถูก resume)"""
+    return fingerprint(document.id, document.sha256, SUMMARY_MODEL, SUMMARY_PROMPT_VERSION,
+                       EMBEDDING_MODEL_NAME, IMAGE_EMBEDDING_MODEL_NAME)
+
+# 🆕 เปิด PDF ครั้งเดียวและ parse ทีละหน้า (ใช้ร่วมกันทุก extractor)
+def iter_page_contexts(path):
+    """
+    เปิด PDF ครั้งเดียวแล้วคืน PageContext ทีละหน้า (pdfplumber เปิดเมื่อต้องใช้หาตารางเท่านั้น)
     
+    Returns:
+        Iterator[PageContext]
+    """
+    doc = fitz.open(path)
+    pdfplumber_pdf = LazyPdfplumber(path)
     try:
         for page_num, page in enumerate(doc):
-            page_text = page.get_text("text")
-            if page_text.strip():
-                text_output += f"\n--- หน้า {page_num + 1} ---\n{page_text}"
-            
-            # ตรวจสอบ memory ทุก 20 หน้า
-            if page_num % 20 == 0:
-                check_memory()
-                
+            yield PageContext(page_num, page, pdfplumber_pdf, table_extractor=TABLE_EXTRACTOR)
     finally:
+        pdfplumber_pdf.close()
         doc.close()
+
+def _page_text(page_context):
+    page_text = page_context.pymupdf_page.get_text("text")
+    if page_text.strip():
+        yield {"page": page_context.page_num + 1, "text": page_text}
+
+def _page_images_with_ocr(page_context, ocr_reader, document_id):
+    """
+    OCR รูปภาพของหน้า ผ่าน OCR triage และ image dedup เดียวกับ extract_page_chunks (resolve_page_images)
+    คืนเฉพาะรูปที่มีข้อความ (รูปถูกเก็บใน blob store, record มีเฉพาะ image_ref)
+    """
+    page_num = page_context.page_num
+    images = page_context.images
+    print(f"หน้า {page_num + 1}: {len(images)} รูป")
+    
+    image_elements = []
+    for img_index, img in enumerate(images):
+        try:
+            image_rects = page_context.image_rects(img[0])
+        except Exception:
+            image_rects = []
+        image_elements.append({'xref': img[0], 'image_index': img_index, 'bbox': image_rects[0] if image_rects else None})
+    text_rects = [tuple(block[:4]) for block in page_context.text_blocks if block[6] == 0 and block[4].strip()]
     
-    return text_output
+    records = resolve_page_images(page_context.pymupdf_page, image_elements, ocr_reader, document_id, text_rects)
+    for img_index, record in sorted(records.items()):
+        if record is None or not record['text'].strip():
+            continue
+        yield {
+            "page": page_num + 1,
+            "image_index": img_index + 1,
+            "original_text": record['original_text'],
+            "improved_text": record['text'],
+            "text": record['text'],  # ใช้ข้อความที่ปรับปรุงแล้ว
+            "image_ref": store_image(get_blob_store(), record['image_bytes'], dict(record['image_ref']))
+        }
+        print(f"✅ รูป {img_index + 1}: {len(record['text'])} ตัวอักษร")
+
+def _page_tables(page_context):
+    for table in page_context.tables():
+        yield {"page": page_context.page_num + 1, "table_index": table['table_index'] + 1, "text": table['text']}
+
+# ✅ อ่านข้อความจาก PDF ด้วย PyMuPDF
+def iter_text_with_pymupdf(path):
+    """
+    อ่านข้อความจาก PDF ด้วย PyMuPDF ทีละหน้า
+    
+    Returns:
+        Iterator[dict]: {'page', 'text'} ของหน้าที่มีข้อความ
+    """
+    print(f"📖 กำลังอ่านข้อความจาก: {path}")
+    for page_context in iter_page_contexts(path):
+        yield from _page_text(page_context)
+        
+        # ตรวจสอบ memory ทุก 20 หน้า
+        if page_context.page_num % 20 == 0:
+            check_memory()
+
+def extract_text_with_pymupdf(path):
+    """
+    อ่านข้อความจาก PDF ด้วย PyMuPDF (รวมทุกหน้าเป็นข้อความเดียว)
+    """
+    return "".join(f"\n--- หน้า {page['page']} ---\n{page['text']}" for page in iter_text_with_pymupdf(path))
 
 # ✅ แปลงรูปภาพเป็นข้อความด้วย OCR + PyThaiNLP (ปรับปรุง memory management)
-def extract_images_with_ocr(path):
+def iter_images_with_ocr(path):
     """
-    แปลงรูปภาพใน PDF เป็นข้อความด้วย OCR + PyThaiNLP
+    แปลงรูปภาพใน PDF เป็นข้อความด้วย OCR + PyThaiNLP ทีละรูป
+    (ผ่าน OCR triage และ image dedup เหมือนตอน ingest โดยใช้ path เป็น document_id ของ xref)
+    
+    Returns:
+        Iterator[dict]: ข้อมูลของรูปที่มีข้อความ (รูปถูกเก็บใน blob store, record มีเฉพาะ image_ref)
     """
     print(f"กำลังแปลงรูปภาพเป็นข้อความจาก: {path}")
-    images_data = []
-    doc = fitz.open(path)
-    
-    try:
-        ocr_reader = get_ocr_reader()
+    ocr_reader = get_ocr_reader()
+    for page_context in iter_page_contexts(path):
+        yield from _page_images_with_ocr(page_context, ocr_reader, path)
         
-        for page_num, page in enumerate(doc):
-            images = page.get_images(full=True)
-            print(f"หน้า {page_num + 1}: {len(images)} รูป")
-            
-            for img_index, img in enumerate(images):
-                try:
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    
-                    # ตรวจสอบขนาดรูปภาพ
-                    image = Image.open(io.BytesIO(image_bytes))
-                    width, height = image.size
-                    
-                    # ข้ามรูปที่ใหญ่เกินไป
-                    if width * height > 1500000:  # 1.5M pixels
-                        print(f"⚠️ ข้ามรูปใหญ่ {img_index + 1} ({width}x{height})")
-                        continue
-                    
-                    # ข้ามรูปที่เล็กเกินไป
-                    if width < 50 or height < 50:
-                        print(f"⚠️ ข้ามรูปเล็ก {img_index + 1} ({width}x{height})")
-                        continue
-                    
-                    # OCR
-                    ocr_results = ocr_reader.readtext(image_bytes)
-                    ocr_text = " ".join([result[1] for result in ocr_results if result[2] > 0.3])  # ลด confidence threshold
-                    
-                    if ocr_text.strip():
-                        # 🆕 ปรับปรุงข้อความด้วย PyThaiNLP
-                        improved_text = improve_thai_ocr_text(ocr_text)
-                        
-                        image_info = {
-                            "page": page_num + 1,
-                            "image_index": img_index + 1,
-                            "original_text": ocr_text.strip(),
-                            "improved_text": improved_text,
-                            "text": improved_text,  # ใช้ข้อความที่ปรับปรุงแล้ว
-                            "image_base64": base64.b64encode(image_bytes).decode("utf-8")
-                        }
-                        images_data.append(image_info)
-                        
-                        print(f"✅ รูป {img_index + 1}: {len(improved_text)} ตัวอักษร")
-                    
-                    # ล้าง memory
-                    del image, image_bytes, ocr_results
-                    
-                except Exception as e:
-                    print(f"❗ Error processing image {img_index + 1} on page {page_num + 1}: {e}")
-                    continue
-            
-            # ตรวจสอบ memory หลังจากประมวลผลแต่ละหน้า
-            if page_num % 5 == 0:
-                check_memory()
-            
-            # จำกัดจำนวนรูปต่อหน้า
-            if len(images_data) > 50:  # จำกัดไม่เกิน 50 รูป
-                print("⚠️ จำกัดจำนวนรูปที่ 50 รูป")
-                break
-                
-    finally:
-        doc.close()
-    
+        # ตรวจสอบ memory หลังจากประมวลผลแต่ละหน้า
+        if page_context.page_num % 5 == 0:
+            check_memory()
+
+def extract_images_with_ocr(path, max_images=50):
+    """
+    แปลงรูปภาพใน PDF เป็นข้อความด้วย OCR + PyThaiNLP (ไม่เกิน max_images รูป)
+    """
+    images_data = []
+    for image_info in iter_images_with_ocr(path):
+        images_data.append(image_info)
+        if len(images_data) >= max_images:
+            print(f"⚠️ จำกัดจำนวนรูปที่ {max_images} รูป")
+            break
     return images_data
 
-# ✅ แปลงตารางเป็นข้อความด้วย pdfplumber
-def extract_tables_with_pdfplumber(path):
+# ✅ แปลงตารางเป็นข้อความ (PyMuPDF find_tables ก่อน, pdfplumber เมื่อ PyMuPDF ทำไม่ได้)
+def iter_tables_with_pdfplumber(path):
     """
-    แปลงตารางใน PDF เป็นข้อความด้วย pdfplumber
+    แปลงตารางใน PDF เป็นข้อความทีละตาราง
+    
+    Returns:
+        Iterator[dict]: {'page', 'table_index', 'text'}
     """
     print(f" กำลังแปลงตารางเป็นข้อความจาก: {path}")
-    tables_data = []
     
     try:
-        with pdfplumber.open(path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                tables = page.extract_tables()
-                for table_index, table in enumerate(tables):
-                    if table:
-                        # แปลงตารางเป็นข้อความ
-                        table_text = ""
-                        for row in table:
-                            if row:
-                                row_text = " | ".join([cell if cell else "" for cell in row])
-                                table_text += row_text + "\n"
-                        
-                        if table_text.strip():
-                            table_info = {
-                                "page": page_num + 1,
-                                "table_index": table_index + 1,
-                                "text": table_text.strip()
-                            }
-                            tables_data.append(table_info)
-                
-                # ตรวจสอบ memory ทุก 10 หน้า
-                if page_num % 10 == 0:
-                    check_memory()
+        for page_context in iter_page_contexts(path):
+            yield from _page_tables(page_context)
+            
+            # ตรวจสอบ memory ทุก 10 หน้า
+            if page_context.page_num % 10 == 0:
+                check_memory()
                     
     except Exception as e:
         print(f"❗ Error extracting tables: {e}")
-    
-    return tables_data
 
-# ✅ Semantic Chunking ด้วย Potion Model
-def semantic_chunking_with_potion(text, content_type, chunk_size=1000, overlap=200):
+def extract_tables_with_pdfplumber(path):
     """
-    แบ่งข้อความด้วย Semantic Chunking โดยใช้ Potion Model
+    แปลงตารางใน PDF เป็นข้อความ
     """
-    print(f"🧠 เริ่ม Semantic Chunking สำหรับ {content_type.upper()}")
+    return list(iter_tables_with_pdfplumber(path))
+
+# 🆕 ดึงข้อความ รูปภาพ และตารางในรอบเดียว (เปิดไฟล์และ parse แต่ละหน้าครั้งเดียว)
+def iter_pdf_content(path, ocr=True):
+    """
+    ดึงข้อความ รูปภาพ (OCR) และตารางของ PDF ทีละหน้า
     
-    try:
-        semantic_model = get_semantic_model()
-        
-        # แบ่งข้อความเป็นประโยค
-        sentences = text.split('. ')
-        if len(sentences) <= 1:
-            return [{"text": text, "type": content_type, "chunk_id": 0}]
-        
-        # จำกัดจำนวนประโยคเพื่อประหยัด memory
-        if len(sentences) > 500:
-            sentences = sentences[:500]
-            print(f"⚠️ จำกัดที่ 500 ประโยคเพื่อประหยัด memory")
-        
-        # สร้าง embeddings สำหรับประโยค
-        sentence_embeddings = semantic_model.encode(sentences)
-        
-        # คำนวณความคล้ายคลึงระหว่างประโยค
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for i, sentence in enumerate(sentences):
-            current_chunk.append(sentence)
-            current_length += len(sentence)
-            
-            # ตรวจสอบว่าควรแบ่ง chunk หรือไม่
-            if current_length >= chunk_size or i == len(sentences) - 1:
-                chunk_text = '. '.join(current_chunk)
-                chunks.append({
-                    "text": chunk_text,
-                    "type": content_type,
-                    "chunk_id": len(chunks)
-                })
-                current_chunk = []
-                current_length = 0
-        
-        # ล้าง memory
-        del sentence_embeddings, sentences
-        check_memory()
+    Args:
+        path: ไฟล์ PDF
+        ocr: OCR รูปภาพด้วยหรือไม่
         
-        return chunks
+    Returns:
+        Iterator[dict]: {'page', 'text': [...], 'images': [...], 'tables': [...]}
+    """
+    print(f"📖 กำลังอ่านข้อความ รูปภาพ และตารางจาก: {path}")
+    ocr_reader = get_ocr_reader() if ocr else None
+    for page_context in iter_page_contexts(path):
+        yield {
+            "page": page_context.page_num + 1,
+            "text": list(_page_text(page_context)),
+            "images": list(_page_images_with_ocr(page_context, ocr_reader, path)) if ocr else [],
+            "tables": list(_page_tables(page_context))
+        }
         
+        # ตรวจสอบ memory ทุก 5 หน้า
+        if page_context.page_num % 5 == 0:
+            check_memory()
+
+# ✅ Semantic Chunking ด้วย Potion Model
+def iter_semantic_chunks(text, content_type, chunk_size=SEMANTIC_CHUNK_MAX_CHARS, min_chunk_size=SEMANTIC_CHUNK_MIN_CHARS):
+    """
+    แบ่งข้อความด้วย Semantic Chunking โดยใช้ Potion Model (encode ทีละ window และ yield ทีละ chunk)
+
+    Args:
+        text (str): ข้อความ (ยาวเท่าใดก็ได้)
+        content_type (str): ประเภทของเนื้อหา
+        chunk_size (int): ขนาดสูงสุดของ chunk (ตัวอักษร)
+        min_chunk_size (int): ขนาดต่ำสุดก่อนตัดตามความหมาย
+
+    Returns:
+        Iterator[dict]: {'text', 'type', 'chunk_id'}
+    """
+    try:
+        encode = get_semantic_model().encode
     except Exception as e:
-        print(f"❗ Error in semantic chunking: {e}")
-        # Fallback: แบ่งแบบธรรมดา
-        return [{"text": text, "type": content_type, "chunk_id": 0}]
+        # แบ่งตามขนาดและขอบเขตประโยคอย่างเดียว (ไม่ทิ้งข้อความ)
+        print(f"⚠️ ไม่สามารถโหลด semantic model ได้: {e}, แบ่งตามขนาดแทน")
+        encode = None
+
+    chunker = SemanticChunker(
+        encode=encode,
+        min_chars=min_chunk_size,
+        max_chars=chunk_size,
+        window=SEMANTIC_CHUNK_WINDOW,
+        breakpoint_percentile=SEMANTIC_BREAKPOINT_PERCENTILE
+    )
+    for chunk_id, chunk_text in enumerate(chunker.chunk(text)):
+        yield {"text": chunk_text, "type": content_type, "chunk_id": chunk_id}
+
+def semantic_chunking_with_potion(text, content_type, chunk_size=SEMANTIC_CHUNK_MAX_CHARS, min_chunk_size=SEMANTIC_CHUNK_MIN_CHARS):
+    """
+    แบ่งข้อความด้วย Semantic Chunking โดยใช้ Potion Model
+    """
+    print(f"🧠 เริ่ม Semantic Chunking สำหรับ {content_type.upper()}")
+    chunks = list(iter_semantic_chunks(text, content_type, chunk_size, min_chunk_size))
+    check_memory()
+    return chunks
 
 # ✅ สร้าง Embeddings
-def create_embeddings(text):
+def create_embeddings(text, spec=None):
     """
-    สร้าง embeddings สำหรับข้อความ
+    สร้าง embeddings สำหรับข้อความ (spec = EmbeddingModelSpec, ไม่ระบุ = EMBEDDING_MODEL)
     """
+    spec = spec or EMBEDDING_MODEL
     try:
-        embedding_model = get_embedding_model()
+        embedding_model = get_text_embedding_model(spec)
         return embedding_model.encode(text).tolist()
     except Exception as e:
         print(f"❗ Error creating embeddings: {e}")
-        return [0.0] * 384  # fallback vector
+        return spec.fallback_vector()
+
+# 🆕 สร้าง Embeddings แบบ batch (encode หลายข้อความในครั้งเดียว)
+def create_embeddings_batch(texts, batch_size=EMBEDDING_BATCH_SIZE, spec=None):
+    """
+    สร้าง embeddings ของหลายข้อความด้วย encode ครั้งเดียว (เร็วกว่าทีละข้อความหลายเท่าบน CPU)
+    
+    Args:
+        texts: รายการข้อความ
+        batch_size: จำนวนข้อความต่อ batch ภายใน encode
+        spec: EmbeddingModelSpec ของโมเดล (ไม่ระบุ = EMBEDDING_MODEL)
+        
+    Returns:
+        list: รายการ embedding vectors ตามลำดับเดียวกับ texts
+    """
+    if not texts:
+        return []
+    spec = spec or EMBEDDING_MODEL
+    try:
+        embedding_model = get_text_embedding_model(spec)
+        vectors = embedding_model.encode(list(texts), batch_size=batch_size)
+        return [vector.tolist() for vector in vectors]
+    except Exception as e:
+        print(f"❗ Error creating batch embeddings: {e}, สร้างทีละข้อความแทน")
+        return [create_embeddings(text, spec) for text in texts]
+
+# 🆕 เติม embeddings ให้ processed chunks หลายตัวในครั้งเดียว
+def embed_processed_chunks(processed_chunks, batch_size=EMBEDDING_BATCH_SIZE, spec=None):
+    """
+    สร้าง embeddings จาก summary ของ processed chunks ทั้งหมดด้วย batched encode แล้วใส่กลับให้แต่ละ chunk
+    (พร้อม embedding_model และ embedding_dim)
+    
+    Args:
+        processed_chunks: รายการ processed chunks (ต้องมี "summary")
+        batch_size: จำนวนข้อความต่อ batch
+        spec: EmbeddingModelSpec ของโมเดล (ไม่ระบุ = EMBEDDING_MODEL)
+    """
+    spec = spec or EMBEDDING_MODEL
+    # chunks ที่ไม่มี summary (รูปที่ไม่มีข้อความ) ไม่มี text embeddings (ค้นด้วย image_embeddings แทน)
+    processed_chunks = [chunk for chunk in processed_chunks if chunk["summary"].strip()]
+    
+    # ใช้ embeddings จาก cache ถ้า summary เดิมเคย encode ด้วยโมเดลเดียวกันแล้ว
+    cache = get_ingestion_cache()
+    keys = [embedding_cache_key(chunk["summary"], spec.model_id) for chunk in processed_chunks]
+    cached = cache.get_many(keys)
+    missing = list(dict.fromkeys(key for key in keys if key not in cached))
+    if missing:
+        summary_by_key = {key: chunk["summary"] for key, chunk in zip(keys, processed_chunks)}
+        vectors = create_embeddings_batch([summary_by_key[key] for key in missing], batch_size=batch_size, spec=spec)
+        fresh = dict(zip(missing, vectors))
+        # ไม่เก็บ fallback vector (ศูนย์ทั้งหมด) ที่ได้ตอน encode ไม่สำเร็จ
+        cache.put_many({key: vector for key, vector in fresh.items() if vector and any(vector)})
+        cached.update(fresh)
+    if len(missing) < len(keys):
+        print(f"   🗃️ ใช้ embeddings จาก cache {len(keys) - len(missing)}/{len(keys)} chunks")
+    
+    for chunk, key in zip(processed_chunks, keys):
+        chunk.update(spec.stamp(cached[key]))
+        if not any(cached[key]):
+            # fallback vector (encode ไม่สำเร็จ): ให้รอบถัดไปเขียน chunk นี้ใหม่แม้ content_hash ไม่เปลี่ยน
+            chunk["degraded"] = True
+    return processed_chunks
 
 # 🆕 สร้าง Image Embeddings
 def create_image_embeddings(image_bytes):
@@ -398,70 +648,169 @@ def create_image_embeddings(image_bytes):
         list: image embedding vector หรือ None ถ้าไม่สามารถสร้างได้
     """
     try:
-        image_model = get_image_embedding_model()
-        if image_model is None:
+        image_embedder = get_image_embedder()
+        if image_embedder is None:
             print("   ⚠️ Image embedding model not available, skipping...")
             return None
-        
-        # แปลง image bytes เป็น PIL Image
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # สร้าง embedding ด้วย CLIP
-        embedding = image_model.encode(image)
-        return embedding.tolist()
+        return image_embedder.embed_many([("image", image_bytes)])["image"]
         
     except Exception as e:
         print(f"   ⚠️ Error creating image embeddings: {e}")
         return None
 
+# 🆕 สร้าง Image Embeddings ของหลายรูปใน batch เดียว
+def embed_image_chunks(image_chunks):
+    """
+    สร้าง image embeddings ของ image chunks ทั้งหมดด้วย CLIP แบบ batch (ใช้จาก cache ถ้ารูปเดิม)
+    รูปที่หน้าตาเหมือนรูปต้นแบบ (duplicate_of) ใช้ embedding ของรูปต้นแบบ
+    
+    Args:
+        image_chunks: original image chunks (ต้องมี image_ref และ image_bytes)
+        
+    Returns:
+        dict: {doc_id: image embedding หรือ None}
+    """
+    image_chunks = [chunk for chunk in image_chunks if chunk.get("image_bytes")]
+    if not image_chunks:
+        return {}
+    cache = get_ingestion_cache()
+    keys = [image_embedding_cache_key(chunk["image_ref"].get("duplicate_of") or chunk["image_ref"]["sha256"]) for chunk in image_chunks]
+    cached = cache.get_many(keys)
+    missing = {key: chunk["image_bytes"] for key, chunk in zip(keys, image_chunks) if key not in cached}
+    if missing:
+        image_embedder = get_image_embedder()
+        if image_embedder is None:
+            print("   ⚠️ Image embedding model not available, skipping...")
+        else:
+            fresh = image_embedder.embed_many(list(missing.items()))
+            cache.put_many({key: vector for key, vector in fresh.items() if vector is not None})
+            cached.update(fresh)
+    return {chunk["doc_id"]: cached.get(key) for key, chunk in zip(keys, image_chunks)}
+
+# 🆕 โหลด Summarization Service แบบ lazy loading
+def get_summarization_service(max_concurrency=SUMMARY_CONCURRENCY):
+    """
+    สร้าง SummarizationService (rate limit + retry + Batch API) แบบ lazy loading
+    ใช้ instance เดียวทั้ง process เพื่อให้งบ rate limit และจำนวน request พร้อมกันรวมทุกเอกสาร
+    (max_concurrency มีผลตอนสร้างครั้งแรกเท่านั้น)
+    """
+    if not hasattr(get_summarization_service, 'service'):
+        get_summarization_service.service = SummarizationService(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            model=SUMMARY_MODEL,
+            max_concurrency=max_concurrency,
+            requests_per_minute=SUMMARY_RPM,
+            tokens_per_minute=SUMMARY_TPM
+        )
+    return get_summarization_service.service
+
 # ✅ สรุปข้อความด้วย OpenAI
-def summarize_with_openai(text, content_type, timeout=30, max_retries=3):
+def summarize_with_openai(text, content_type):
     """
-    สรุปข้อความด้วย OpenAI GPT
+    สรุปข้อความด้วย OpenAI GPT (ผ่าน SummarizationService: rate limit และ backoff ตาม Retry-After)
     
     Args:
         text: ข้อความที่ต้องการสรุป
         content_type: ประเภทเนื้อหา (text/image/table)
-        timeout: ระยะเวลารอสูงสุด (วินาที)
-        max_retries: จำนวนครั้งที่ลองใหม่ถ้าเกิด error
     """
-    for attempt in range(max_retries):
-        try:
-            prompt = f"""
-            สรุปเนื้อหาต่อไปนี้ให้กระชับและเข้าใจง่าย (ภาษาไทย):
-            
-            ประเภทเนื้อหา: {content_type}
-            เนื้อหา: {text[:2000]}...
-            
-            กรุณาสรุปให้ไม่เกิน 3 ประโยค
-            """
-            
-            # เพิ่ม timeout และ error handling
-            response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_completion_tokens=150,
-                temperature=0.7,
-                timeout=timeout  # เพิ่ม timeout
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            error_msg = str(e)
-            if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 2  # Exponential backoff: 2s, 4s, 6s
-                print(f"   ⚠️ Error in summarization (attempt {attempt + 1}/{max_retries}): {error_msg[:100]}")
-                print(f"   ⏳ รอ {wait_time} วินาที แล้วลองใหม่...")
-                import time
-                time.sleep(wait_time)
-            else:
-                print(f"   ❗ Error in summarization after {max_retries} attempts: {error_msg[:100]}")
-                # Fallback: ใช้ข้อความต้นฉบับที่ตัดแล้ว
-                return text[:200] + "..." if len(text) > 200 else text
+    return get_summarization_service().summarize(text, content_type)
+
+# 🆕 สรุปหลายรายการโดยใช้ cache (เรียก OpenAI เฉพาะเนื้อหาที่ยังไม่เคยสรุป)
+def _split_cached_summaries(items):
+    """แยก items เป็น summary ที่มีใน cache แล้ว และรายการที่ต้องสรุปใหม่"""
+    keys = {custom_id: summary_cache_key(text, content_type) for custom_id, text, content_type in items}
+    cached = get_ingestion_cache().get_many(keys.values())
+    summaries = {custom_id: cached[key] for custom_id, key in keys.items() if key in cached}
+    misses = [item for item in items if item[0] not in summaries]
+    if summaries:
+        print(f"   🗃️ ใช้ summary จาก cache {len(summaries)}/{len(items)} chunks")
+    return summaries, misses, keys
+
+def _remember_summaries(misses, fresh, keys):
+    """บันทึก summary ใหม่ลง cache (ไม่เก็บ fallback ที่ได้ตอนสรุปไม่สำเร็จ)"""
+    get_ingestion_cache().put_many({
+        keys[custom_id]: fresh[custom_id]
+        for custom_id, text, _ in misses
+        if fresh.get(custom_id) and fresh[custom_id] != fallback_summary(text)
+    })
+
+async def summarize_items_async(items, semaphore=None):
+    """
+    สรุปหลายรายการพร้อมกัน โดยใช้ summary จาก cache เมื่อเนื้อหา/โมเดล/prompt ไม่เปลี่ยน
+    
+    Args:
+        items: [(custom_id, text, content_type), ...]
+        semaphore: asyncio.Semaphore สำหรับจำกัด request พร้อมกัน (ไม่บังคับ)
+        
+    Returns:
+        dict: {custom_id: summary}
+    """
+    summaries, misses, keys = await asyncio.to_thread(_split_cached_summaries, items)
+    if misses:
+        fresh = await get_summarization_service().summarize_many(misses, semaphore)
+        await asyncio.to_thread(_remember_summaries, misses, fresh, keys)
+        summaries.update(fresh)
+    return summaries
+
+def summarize_items_batch(items, poll_interval=SUMMARY_BATCH_POLL_INTERVAL):
+    """เหมือน summarize_items_async แต่ส่งรายการที่ไม่มีใน cache เป็น Batch API job เดียว"""
+    summaries, misses, keys = _split_cached_summaries(items)
+    if misses:
+        fresh = get_summarization_service().summarize_batch(misses, poll_interval=poll_interval)
+        _remember_summaries(misses, fresh, keys)
+        summaries.update(fresh)
+    return summaries
+
+# 🆕 สรุปหลาย chunks พร้อมกัน
+def summarize_chunks(chunks):
+    """
+    สรุปทุก chunk พร้อมกัน (จำนวน request พร้อมกันและงบ rate limit ตาม SummarizationService)
+    
+    Args:
+        chunks: รายการ chunks (ต้องมี "text" และ "type")
+        
+    Returns:
+        list: summary ตามลำดับของ chunks
+    """
+    items = [(str(i), chunk["text"], chunk["type"]) for i, chunk in enumerate(chunks)]
+    summaries = asyncio.run(summarize_items_async(items))
+    return [summaries[str(i)] for i in range(len(chunks))]
+
+# 🆕 ตัวเขียนข้อมูลเป็นชุด (MongoDB bulk write / ไฟล์ JSON)
+def get_bulk_writer(collection, session=None):
+    """สร้าง BulkWriter ตาม batch size และจำนวนครั้งที่ลองใหม่ของระบบ"""
+    return BulkWriter(collection, batch_size=MONGO_BULK_BATCH_SIZE, max_retries=MONGO_BULK_MAX_RETRIES, session=session)
+
+def write_chunks_to_json(chunks, filename):
+    """
+    เขียน chunks ลงไฟล์ JSON (array) ทีละชุดตาม MONGO_BULK_BATCH_SIZE โดยไม่ต้องสร้างข้อความของทั้งไฟล์ใน memory
+    เขียนลงไฟล์ชั่วคราวก่อนแล้ว rename ทับ (ไฟล์เดิมไม่เสียถ้าล้มเหลวระหว่างเขียน)
     
-    # Fallback ถ้า retry ทั้งหมดล้มเหลว
-    return text[:200] + "..." if len(text) > 200 else text
+    Args:
+        chunks: iterable ของ chunks (dict ที่แปลงเป็น JSON ได้)
+        filename: ตำแหน่งไฟล์
+        
+    Returns:
+        int: จำนวน chunks ที่เขียน
+    """
+    tmp_filename = f"{filename}.tmp"
+    count = 0
+    batch = []
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for chunk in chunks:
+            batch.append(json.dumps(chunk, ensure_ascii=False, indent=2, default=str))
+            if len(batch) >= MONGO_BULK_BATCH_SIZE:
+                f.write(("," if count else "") + "\n" + ",\n".join(batch))
+                count += len(batch)
+                batch = []
+        if batch:
+            f.write(("," if count else "") + "\n" + ",\n".join(batch))
+            count += len(batch)
+        f.write("\n]\n")
+    os.replace(tmp_filename, filename)
+    return count
 
 # ✅ บันทึกข้อมูลต้นฉบับลง MongoDB (ไม่มี embeddings และ summary)
 def store_original_data_in_mongodb(chunks, collection_name):
@@ -487,22 +836,16 @@ def store_original_data_in_mongodb(chunks, collection_name):
         # ลบข้อมูลเก่า
         collection.delete_many({})
         
-        # บันทึกข้อมูลต้นฉบับ (ไม่มี embeddings และ summary)
-        for i, chunk in enumerate(chunks):
-            print(f"📝 กำลังบันทึกข้อมูลต้นฉบับ chunk {i+1}/{len(chunks)}...")
-            
-            # สร้างสำเนาของ chunk และเพิ่ม created_at
-            original_chunk = chunk.copy()
-            original_chunk["created_at"] = datetime.now()
-            
-            # ไม่เพิ่ม embeddings และ summary
-            collection.insert_one(original_chunk)
-            
-            # ตรวจสอบ memory ทุก 5 chunks
-            if i % 5 == 0:
-                check_memory()
+        # บันทึกข้อมูลต้นฉบับ (ไม่มี embeddings และ summary) เป็นชุดด้วย bulk write
+        print(f"📝 กำลังบันทึกข้อมูลต้นฉบับ {len(chunks)} chunks...")
+        now = datetime.now()
+        with get_bulk_writer(collection) as writer:
+            for chunk in chunks:
+                # สร้างสำเนาของ chunk และเพิ่ม created_at
+                writer.insert({**chunk, "created_at": now})
+        check_memory()
         
-        print(f"✅ บันทึกข้อมูลต้นฉบับ {len(chunks)} chunks ลง {collection_name}")
+        print(f"✅ บันทึกข้อมูลต้นฉบับ {writer.stats['inserted']} chunks ลง {collection_name} ({writer.stats['batches']} batches)")
         client.close()
         
     except Exception as e:
@@ -536,28 +879,27 @@ def store_processed_data_in_mongodb(chunks, collection_name):
         # ลบข้อมูลเก่า
         collection.delete_many({})
         
-        # บันทึกข้อมูลที่ประมวลผลแล้ว (มี summary embeddings และ summary)
-        for i, chunk in enumerate(chunks):
-            print(f"📝 กำลังประมวลผล chunk {i+1}/{len(chunks)}...")
-            
+        # สร้าง summary ของทุก chunk ก่อน
+        print(f"📝 กำลังสร้าง summary ของ {len(chunks)} chunks...")
+        summaries = summarize_chunks(chunks)
+        processed_chunks = []
+        for chunk, summary in zip(chunks, summaries):
             # สร้างสำเนาของ chunk และเพิ่มข้อมูลที่ประมวลผลแล้ว
             processed_chunk = chunk.copy()
             processed_chunk["created_at"] = datetime.now()
-            
-            # สร้าง summary ก่อน
-            summary_text = summarize_with_openai(chunk["text"], chunk["type"])
-            processed_chunk["summary"] = summary_text
-            
-            # สร้าง embeddings จาก summary แทน text ต้นฉบับ
-            processed_chunk["embeddings"] = create_embeddings(summary_text)
-            
-            collection.insert_one(processed_chunk)
-            
-            # ตรวจสอบ memory ทุก 3 chunks
-            if i % 3 == 0:
-                check_memory()
+            processed_chunk["summary"] = summary
+            processed_chunks.append(processed_chunk)
+        check_memory()
+        
+        # สร้าง embeddings จาก summary แทน text ต้นฉบับ (batch เดียว)
+        embed_processed_chunks(processed_chunks)
         
-        print(f"✅ บันทึกข้อมูลที่ประมวลผลแล้ว {len(chunks)} chunks ลง {collection_name}")
+        # บันทึกข้อมูลที่ประมวลผลแล้ว (มี summary embeddings และ summary) เป็นชุดด้วย bulk write
+        with get_bulk_writer(collection) as writer:
+            for processed_chunk in processed_chunks:
+                writer.insert(processed_chunk)
+        
+        print(f"✅ บันทึกข้อมูลที่ประมวลผลแล้ว {writer.stats['inserted']} chunks ลง {collection_name} ({writer.stats['batches']} batches)")
         client.close()
         
     except Exception as e:
@@ -578,28 +920,16 @@ def store_original_to_json(chunks, collection_name):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        # บันทึกข้อมูลต้นฉบับ (ไม่มี embeddings และ summary)
-        original_chunks = []
-        for i, chunk in enumerate(chunks):
-            print(f"📝 กำลังบันทึกข้อมูลต้นฉบับ chunk {i+1}/{len(chunks)}...")
-            
-            # สร้างสำเนาของ chunk และเพิ่ม created_at
-            original_chunk = chunk.copy()
-            original_chunk["created_at"] = datetime.now().isoformat()
-            
-            # ไม่เพิ่ม embeddings และ summary
-            original_chunks.append(original_chunk)
-            
-            # ตรวจสอบ memory ทุก 5 chunks
-            if i % 5 == 0:
-                check_memory()
+        # บันทึกข้อมูลต้นฉบับ (ไม่มี embeddings และ summary) พร้อม created_at
+        print(f"📝 กำลังบันทึกข้อมูลต้นฉบับ {len(chunks)} chunks...")
+        now = datetime.now().isoformat()
         
-        # บันทึกลงไฟล์
+        # บันทึกลงไฟล์ (เขียนไฟล์ชั่วคราวแล้ว rename ทับ)
         filename = f"{output_dir}/{collection_name}_original.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(original_chunks, f, ensure_ascii=False, indent=2)
+        write_chunks_to_json(({**chunk, "created_at": now} for chunk in chunks), filename)
+        check_memory()
         
-        print(f"✅ บันทึกข้อมูลต้นฉบับ {len(original_chunks)} chunks ลง {filename}")
+        print(f"✅ บันทึกข้อมูลต้นฉบับ {len(chunks)} chunks ลง {filename}")
         
     except Exception as e:
         print(f"❗ Error saving original data to JSON: {e}")
@@ -616,61 +946,200 @@ def store_processed_to_json(chunks, collection_name):
             os.makedirs(output_dir)
         
         # ประมวลผล chunks
+        print(f"📝 กำลังสร้าง summary ของ {len(chunks)} chunks...")
+        summaries = summarize_chunks(chunks)
         processed_chunks = []
-        for i, chunk in enumerate(chunks):
-            print(f"📝 กำลังประมวลผล chunk {i+1}/{len(chunks)}...")
-            
+        for chunk, summary in zip(chunks, summaries):
             # สร้างสำเนาของ chunk และเพิ่มข้อมูลที่ประมวลผลแล้ว
             processed_chunk = chunk.copy()
             processed_chunk["created_at"] = datetime.now().isoformat()
-            
-            # สร้าง summary ก่อน
-            summary_text = summarize_with_openai(chunk["text"], chunk["type"])
-            processed_chunk["summary"] = summary_text
-            
-            # สร้าง embeddings จาก summary แทน text ต้นฉบับ
-            processed_chunk["embeddings"] = create_embeddings(summary_text)
+            processed_chunk["summary"] = summary
             processed_chunks.append(processed_chunk)
-            
-            # ตรวจสอบ memory ทุก 3 chunks
-            if i % 3 == 0:
-                check_memory()
+        check_memory()
+        
+        # สร้าง embeddings จาก summary แทน text ต้นฉบับ (batch เดียว)
+        embed_processed_chunks(processed_chunks)
         
-        # บันทึกลงไฟล์
+        # บันทึกลงไฟล์ (เขียนไฟล์ชั่วคราวแล้ว rename ทับ)
         filename = f"{output_dir}/{collection_name}_processed.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(processed_chunks, f, ensure_ascii=False, indent=2)
+        write_chunks_to_json(processed_chunks, filename)
         
         print(f"✅ บันทึกข้อมูลที่ประมวลผลแล้ว {len(processed_chunks)} chunks ลง {filename}")
         
     except Exception as e:
         print(f"❗ Error saving processed data to JSON: {e}")
 
-# ✅ ฟังก์ชันประมวลผลหน้าเดียว (ตาม flow ที่ออกแบบ - เจออะไรก่อนทำอันนั้น)
-def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_id_counter):
+# 🆕 ดึงรูปภาพและ OCR (ใช้ผลเดิมถ้าเป็นรูปซ้ำ)
+def prepare_image_record(pymupdf_page, xref, document_id, image_rect=None, text_rects=()):
     """
-    ประมวลผลหน้าเดียว: Extract → Summary → Embedding → Store
-    🆕 แก้ไขให้ทำงานตามลำดับที่เจอในหน้า (เจออะไรก่อนทำอันนั้นก่อน) - เรียงตาม y-coordinate
+    ดึงรูปภาพจาก xref และหาผล OCR เดิมถ้ารูปซ้ำ
+    (xref เดียวกันในเอกสาร, ไฟล์รูปเดียวกัน หรือ perceptual hash ใกล้เคียงกันจากเอกสารใดก็ได้)
+    รูปที่ยังไม่เคยเห็นผ่าน OCR triage ก่อน: รูปที่ไม่น่ามีข้อความได้ record ที่ไม่มีข้อความ (ใช้สร้าง image embedding)
     
     Args:
-        page_num: หมายเลขหน้าที่กำลังประมวลผล (0-based)
-        pymupdf_page: หน้า PDF จาก PyMuPDF
-        pdfplumber_pdf: PDF object จาก pdfplumber
-        ocr_reader: OCR reader สำหรับประมวลผลรูปภาพ
-        doc_id_counter: counter สำหรับสร้าง doc_id
-        
+        image_rect: ตำแหน่งของรูปในหน้า (None = ไม่ทราบ)
+        text_rects: ตำแหน่งของ text blocks ในหน้า (ใช้ตรวจว่า text layer ครอบคลุมรูปแล้วหรือไม่)
+    
     Returns:
-        dict: {
-            'has_content': bool,  # มีเนื้อหาหรือไม่ (สำหรับตรวจสอบหน้าเปล่า)
-            'text_chunks': list,
-            'image_chunks': list,
+        dict: {'record': record หรือ None ถ้าข้ามรูปนี้} เมื่อได้ผลแล้ว
+              หรือ {'pending': ข้อมูลรูปที่ต้อง OCR} (ส่งต่อให้ finish_image_record)
+    """
+    dedup = get_image_deduplicator()
+    record = dedup.lookup_xref(document_id, xref)
+    if record is not None:
+        print(f"   ♻️ รูปภาพซ้ำกับ xref {xref} ที่ประมวลผลแล้วในเอกสารนี้")
+        return {'record': None if record.get('skipped') else record}
+    
+    base_image = pymupdf_page.parent.extract_image(xref)
+    image_bytes = base_image["image"]
+    
+    # ตรวจสอบขนาดรูปภาพ
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        width, height = image.size
+        print(f"   📏 ขนาดรูปภาพ: {width}x{height} pixels")
+        
+        if width * height > 1500000:
+            # ข้ามรูปที่ใหญ่เกินไป
+            print(f"   ⚠️ ข้ามรูปใหญ่ ({width}x{height}, {width*height:,} pixels > 1,500,000)")
+            dedup.remember_xref(document_id, xref, {"skipped": True})
+            return {'record': None}
+        if width < 50 or height < 50:
+            # ข้ามรูปที่เล็กเกินไป
+            print(f"   ⚠️ ข้ามรูปเล็ก ({width}x{height} < 50x50)")
+            dedup.remember_xref(document_id, xref, {"skipped": True})
+            return {'record': None}
+        phash = dhash(image)
+        features = text_features(image)
+    
+    ref = image_ref(image_bytes, width, height, base_image.get("ext"))
+    aspect = width / height
+    ref["phash"] = f"{phash:016x}"
+    pending = {'xref': xref, 'image_bytes': image_bytes, 'image_ref': ref, 'phash': phash, 'aspect': aspect}
+    
+    ocr = dedup.find(ref["sha256"], phash, aspect)
+    if ocr is None:
+        # 🆕 OCR triage: OCR เฉพาะรูปที่น่าจะมีข้อความ
+        decision = get_ocr_triage().classify(features, text_coverage(image_rect, text_rects))
+        if decision != OCR:
+            print(f"   ⏭️ ข้าม OCR ({decision}) - ใช้รูปสำหรับ image embedding เท่านั้น")
+            ocr = dedup.remember(ref["sha256"], phash, aspect, "", "", ocr_skipped=decision)
+            return {'record': _remember_image_record(pending, ocr, document_id)}
+        return {'pending': pending}
+    print(f"   ♻️ ใช้ผล OCR ของรูปที่ซ้ำกัน ({ocr['sha256'][:12]})")
+    if ocr["sha256"] != ref["sha256"]:
+        # หน้าตาเหมือนรูปต้นแบบ: ใช้ image embedding ของรูปต้นแบบด้วย
+        ref["duplicate_of"] = ocr["sha256"]
+    return {'record': _remember_image_record(pending, ocr, document_id)}
+
+def _remember_image_record(pending, ocr, document_id):
+    record = {
+        "image_bytes": pending['image_bytes'],
+        "image_ref": pending['image_ref'],
+        "original_text": ocr["original_text"],
+        "text": ocr["text"]
+    }
+    if ocr.get("ocr_skipped"):
+        record["ocr_skipped"] = ocr["ocr_skipped"]
+    get_image_deduplicator().remember_xref(document_id, pending['xref'], record)
+    return record
+
+def finish_image_record(pending, ocr_results, document_id):
+    """สร้าง record จากผล OCR ของรูปที่ยังไม่เคยเห็น (บันทึกไว้ใช้กับรูปซ้ำครั้งถัดไป)"""
+    ocr_text = " ".join([result[1] for result in ocr_results if result[2] > OCR_MIN_CONFIDENCE])
+    # ปรับปรุงข้อความด้วย PyThaiNLP
+    improved_text = improve_thai_ocr_text(ocr_text) if ocr_text.strip() else ""
+    ocr = get_image_deduplicator().remember(
+        pending['image_ref']['sha256'], pending['phash'], pending['aspect'], ocr_text.strip(), improved_text
+    )
+    return _remember_image_record(pending, ocr, document_id)
+
+def submit_ocr(ocr_reader, image_bytes):
+    """ส่ง OCR ให้ OCRPool (คืน Future ทันที) หรือทำทันทีด้วย easyocr.Reader ใน process นี้"""
+    if isinstance(ocr_reader, OCRPool):
+        return ocr_reader.submit(image_bytes)
+    future = Future()
+    try:
+        future.set_result(ocr_reader.readtext(prepare_ocr_image(image_bytes, OCR_MAX_SIDE, OCR_GRAYSCALE)))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def resolve_page_images(pymupdf_page, image_elements, ocr_reader, document_id, text_rects=()):
+    """
+    ดึงรูปภาพทั้งหน้า แล้วส่ง OCR ของทุกรูปที่ยังไม่เคยเห็นพร้อมกัน (OCRPool ทำหลายรูปขนานกัน)
+    
+    Args:
+        image_elements: data ของ image elements ({'xref', 'image_index', 'bbox'})
+        ocr_reader: easyocr.Reader หรือ OCRPool
+        text_rects: ตำแหน่งของ text blocks ในหน้า (สำหรับ OCR triage)
+        
+    Returns:
+        dict: {image_index: record หรือ None ถ้าข้ามรูปหรือประมวลผลไม่สำเร็จ}
+    """
+    records = {}
+    pending = {}
+    for data in image_elements:
+        img_index = data['image_index']
+        try:
+            print(f"   🖼️ กำลังประมวลผลรูปภาพ {img_index + 1}...")
+            state = prepare_image_record(pymupdf_page, data['xref'], document_id, data['bbox'], text_rects)
+            if 'pending' in state:
+                pending[img_index] = state['pending']
+            else:
+                records[img_index] = state['record']
+        except Exception as e:
+            print(f"   ❗ Error processing image {img_index + 1}: {e}")
+            import traceback
+            traceback.print_exc()
+            records[img_index] = None
+    
+    # ส่ง OCR ทุกรูปของหน้าเข้าคิวก่อน แล้วค่อยรอผล (รูปเดียวกันในหน้าส่งครั้งเดียว)
+    if pending:
+        print(f"   🔍 กำลังทำ OCR {len(pending)} รูป...")
+    futures = {}
+    for state in pending.values():
+        sha256 = state['image_ref']['sha256']
+        if sha256 not in futures:
+            futures[sha256] = submit_ocr(ocr_reader, state['image_bytes'])
+    for img_index, state in pending.items():
+        try:
+            records[img_index] = finish_image_record(state, futures[state['image_ref']['sha256']].result(), document_id)
+        except Exception as e:
+            print(f"   ❗ Error processing image {img_index + 1}: {e}")
+            import traceback
+            traceback.print_exc()
+            records[img_index] = None
+    return records
+
+# ✅ ฟังก์ชันดึง chunks จากหน้าเดียว (ตาม flow ที่ออกแบบ - เจออะไรก่อนทำอันนั้น)
+def extract_page_chunks(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, document_id):
+    """
+    ดึง original chunks จากหน้าเดียว (Text blocks, OCR รูปภาพ, ตาราง) - งานที่ใช้ CPU ทั้งหมดของหน้า
+    ยังไม่สร้าง summary และ embeddings (ดู summarize_page_chunks / build_processed_chunks)
+    🆕 แก้ไขให้ทำงานตามลำดับที่เจอในหน้า (เจออะไรก่อนทำอันนั้นก่อน) - เรียงตาม y-coordinate
+    
+    Args:
+        page_num: หมายเลขหน้าที่กำลังประมวลผล (0-based)
+        pymupdf_page: หน้า PDF จาก PyMuPDF
+        pdfplumber_pdf: PDF object จาก pdfplumber หรือ LazyPdfplumber (ใช้เฉพาะเมื่อ PyMuPDF หาตารางไม่ได้)
+        ocr_reader: OCR reader สำหรับประมวลผลรูปภาพ
+        document_id: id ของเอกสาร (prefix ของ doc_id ของทุก chunk)
+        
+    Returns:
+        dict: {
+            'page_num': int,
+            'has_content': bool,  # มีเนื้อหาหรือไม่ (สำหรับตรวจสอบหน้าเปล่า)
+            'failed': True,  # มีเฉพาะเมื่อเกิด error ระหว่างประมวลผลหน้า (ผลลัพธ์ไม่ครบ)
+            'text_chunks': list,
+            'image_chunks': list,
             'table_chunks': list,
-            'text_processed_chunks': list,
+            'text_processed_chunks': list,  # ว่าง (เติมโดย build_processed_chunks)
             'image_processed_chunks': list,
             'table_processed_chunks': list
         }
     """
     page_results = {
+        'page_num': page_num,
         'has_content': False,
         'text_chunks': [],
         'image_chunks': [],
@@ -687,9 +1156,11 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
         
         # === STEP 1: รวบรวม elements ทั้งหมดพร้อมตำแหน่ง ===
         elements = []  # เก็บ elements ทั้งหมดพร้อมตำแหน่ง y-coordinate
+        # 🆕 parse หน้านี้ครั้งเดียวต่อ backend (text blocks, รูป, ตาราง ใช้ข้อมูลที่ cache ไว้ใน context)
+        page_context = PageContext(page_num, pymupdf_page, pdfplumber_pdf, table_extractor=TABLE_EXTRACTOR)
         
         # 1.1 ดึง Text Blocks พร้อมตำแหน่ง
-        text_blocks = pymupdf_page.get_text("blocks")  # Returns: [(x0, y0, x1, y1, text, block_no, block_type), ...]
+        text_blocks = page_context.text_blocks  # [(x0, y0, x1, y1, text, block_no, block_type), ...]
         for block in text_blocks:
             if block[6] == 0:  # block_type = 0 คือ text block
                 x0, y0, x1, y1, text, block_no, block_type = block
@@ -705,7 +1176,7 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
                     })
         
         # 1.2 ดึง Images พร้อมตำแหน่ง
-        images = pymupdf_page.get_images(full=True)
+        images = page_context.images
         if images:
             print(f"   🖼️ พบ {len(images)} รูปภาพในหน้านี้")
         
@@ -716,8 +1187,7 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
                 y_pos = 0  # ค่าเริ่มต้น
                 bbox = None
                 try:
-                    from pymupdf.utils import get_image_rects
-                    image_rects = get_image_rects(pymupdf_page, xref)
+                    image_rects = page_context.image_rects(xref)
                     if image_rects:
                         bbox = image_rects[0]  # ใช้ rect แรก
                         if hasattr(bbox, 'y0'):
@@ -751,71 +1221,20 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
                     }
                 })
         
-        # 1.3 ดึง Tables พร้อมตำแหน่ง (จาก pdfplumber)
-        if page_num < len(pdfplumber_pdf.pages):
-            pdfplumber_page = pdfplumber_pdf.pages[page_num]
-            
-            # พยายามหา bbox ของตาราง
-            try:
-                # ใช้ find_tables เพื่อได้ bbox (ถ้ามี)
-                if hasattr(pdfplumber_page, 'find_tables'):
-                    table_objects = pdfplumber_page.find_tables()
-                    
-                    for table_index, table_obj in enumerate(table_objects):
-                        if table_obj and hasattr(table_obj, 'bbox'):
-                            bbox = table_obj.bbox
-                            y_pos = bbox[1] if isinstance(bbox, (list, tuple)) else getattr(bbox, 'y0', bbox[1])
-                            
-                            # แปลงตารางเป็นข้อความ
-                            table = table_obj.extract() if hasattr(table_obj, 'extract') else None
-                            table_text = ""
-                            if table:
-                                for row in table:
-                                    if row:
-                                        row_text = " | ".join([cell if cell else "" for cell in row])
-                                        table_text += row_text + "\n"
-                            
-                            if table_text.strip():
-                                elements.append({
-                                    'type': 'table',
-                                    'y_pos': y_pos,
-                                    'data': {
-                                        'table_index': table_index,
-                                        'text': table_text.strip(),
-                                        'bbox': bbox
-                                    }
-                                })
-                else:
-                    raise AttributeError("find_tables not available")
-            except Exception as e:
-                # Fallback: ถ้า find_tables ไม่ได้ ให้ใช้ extract_tables แบบเดิม
-                print(f"⚠️ ไม่สามารถใช้ find_tables ได้: {e}, ใช้ extract_tables แทน")
-                tables = pdfplumber_page.extract_tables()
-                
-                # ประมาณตำแหน่งตารางจากตำแหน่งของ text และ image elements ที่มีอยู่
-                existing_y_positions = [e['y_pos'] for e in elements]
-                base_y_pos = max(existing_y_positions) if existing_y_positions else 500  # เริ่มที่ 500 ถ้าไม่มี elements อื่น
-                
-                for table_index, table in enumerate(tables):
-                    if table:
-                        table_text = ""
-                        for row in table:
-                            if row:
-                                row_text = " | ".join([cell if cell else "" for cell in row])
-                                table_text += row_text + "\n"
-                        
-                        if table_text.strip():
-                            # ประมาณตำแหน่งตาราง (ถัดจาก elements อื่นๆ)
-                            table_y_pos = base_y_pos + (table_index * 150)
-                            elements.append({
-                                'type': 'table',
-                                'y_pos': table_y_pos,
-                                'data': {
-                                    'table_index': table_index,
-                                    'text': table_text.strip(),
-                                    'bbox': None
-                                }
-                            })
+        # 1.3 ดึง Tables พร้อมตำแหน่ง (PyMuPDF find_tables ก่อน, pdfplumber เมื่อ PyMuPDF ทำไม่ได้)
+        try:
+            for table in page_context.tables():
+                elements.append({
+                    'type': 'table',
+                    'y_pos': table['y_pos'],
+                    'data': {
+                        'table_index': table['table_index'],
+                        'text': table['text'],
+                        'bbox': table['bbox']
+                    }
+                })
+        except Exception as e:
+            print(f"⚠️ ไม่สามารถดึงตารางได้: {e}")
         
         # === STEP 2: เรียงลำดับ elements ตาม y-coordinate (จากบนลงล่าง) ===
         elements.sort(key=lambda x: x['y_pos'])
@@ -824,6 +1243,12 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
               f"{len([e for e in elements if e['type']=='image'])} images, "
               f"{len([e for e in elements if e['type']=='table'])} tables")
         
+        # === STEP 2.5: ดึงรูปภาพและ OCR ทุกรูปของหน้า (ส่งเข้าคิว OCR พร้อมกัน) ===
+        image_records = resolve_page_images(
+            pymupdf_page, [e['data'] for e in elements if e['type'] == 'image'], ocr_reader, document_id,
+            text_rects=[e['data']['bbox'] for e in elements if e['type'] == 'text']
+        )
+        
         # === STEP 3: ประมวลผลตามลำดับที่เรียงแล้ว (เจออะไรก่อนทำอันนั้นก่อน) ===
         text_chunk_counter = 0
         image_chunk_counter = 0
@@ -847,110 +1272,50 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
                     "type": "text",
                     "chunk_id": text_chunk_counter,
                     "page": page_num + 1,
-                    "doc_id": f"doc_{doc_id_counter}_{page_num + 1}_text_{text_chunk_counter}",
+                    "doc_id": f"{document_id}_{page_num + 1}_text_{text_chunk_counter}",
                     "bbox": convert_bbox_to_mongodb_format(data['bbox'])
                 }
                 # ✅ Original chunk: ไม่มี embeddings (เก็บต้นฉบับเท่านั้น)
                 page_results['text_chunks'].append(text_chunk)
                 text_chunk_counter += 1
-                
-                # สร้าง summary และ embeddings สำหรับ processed chunk
-                print(f"   🔄 กำลังสร้าง summary...")
-                summary_text = summarize_with_openai(text_chunk["text"], "text")
-                print(f"   🔄 กำลังสร้าง embeddings...")
-                text_processed_chunk = text_chunk.copy()
-                text_processed_chunk["summary"] = summary_text
-                text_processed_chunk["embeddings"] = create_embeddings(summary_text)  # embeddings จาก summary
-                text_processed_chunk["created_at"] = datetime.now()
-                page_results['text_processed_chunks'].append(text_processed_chunk)
-                print(f"   ✅ สร้าง summary และ embeddings แล้ว")
             
             elif element_type == 'image':
-                # ประมวลผล Image
-                xref = data['xref']
+                # ประมวลผล Image (ผล OCR จาก STEP 2.5)
                 img_index = data['image_index']
                 
                 try:
-                    print(f"   🖼️ กำลังประมวลผลรูปภาพ {img_index + 1}...")
-                    base_image = pymupdf_page.parent.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    
-                    # ตรวจสอบขนาดรูปภาพ
-                    image = Image.open(io.BytesIO(image_bytes))
-                    width, height = image.size
-                    print(f"   📏 ขนาดรูปภาพ: {width}x{height} pixels")
-                    
-                    # ข้ามรูปที่ใหญ่เกินไป
-                    if width * height > 1500000:
-                        print(f"   ⚠️ ข้ามรูปใหญ่ ({width}x{height}, {width*height:,} pixels > 1,500,000)")
-                        del image, image_bytes
+                    record = image_records.get(img_index)
+                    if record is None:
                         continue
                     
-                    # ข้ามรูปที่เล็กเกินไป
-                    if width < 50 or height < 50:
-                        print(f"   ⚠️ ข้ามรูปเล็ก ({width}x{height} < 50x50)")
-                        del image, image_bytes
-                        continue
-                    
-                    # OCR
-                    print(f"   🔍 กำลังทำ OCR...")
-                    ocr_results = ocr_reader.readtext(image_bytes)
-                    ocr_text = " ".join([result[1] for result in ocr_results if result[2] > 0.3])
-                    
-                    if ocr_text.strip():
+                    improved_text = record['text']
+                    if improved_text.strip():
                         page_results['has_content'] = True
-                        # ปรับปรุงข้อความด้วย PyThaiNLP
-                        improved_text = improve_thai_ocr_text(ocr_text)
-                        
-                        print(f"   🖼️ Image {img_index + 1}: {len(improved_text)} ตัวอักษร (OCR: {len(ocr_text)} ตัวอักษร)")
-                        
-                        # 🆕 สร้าง image embedding (ก่อนที่จะลบ image_bytes)
-                        print(f"   🔄 กำลังสร้าง image embedding...")
-                        image_embedding = create_image_embeddings(image_bytes)
-                        
-                        # Create image chunk
-                        image_chunk = {
-                            "text": improved_text,
-                            "type": "image",
-                            "chunk_id": image_chunk_counter,
-                            "page": page_num + 1,
-                            "image_index": img_index + 1,
-                            "original_text": ocr_text.strip(),
-                            "improved_text": improved_text,
-                            "image_base64": base64.b64encode(image_bytes).decode("utf-8"),
-                            "doc_id": f"doc_{doc_id_counter}_{page_num + 1}_img_{img_index + 1}",
-                            "bbox": convert_bbox_to_mongodb_format(data['bbox'])
-                        }
-                        # ✅ Original chunk: ไม่มี embeddings (เก็บต้นฉบับเท่านั้น)
-                        page_results['image_chunks'].append(image_chunk)
-                        image_chunk_counter += 1
-                        
-                        # สร้าง summary และ embeddings สำหรับ processed chunk
-                        print(f"   🔄 กำลังสร้าง summary...")
-                        summary_text = summarize_with_openai(image_chunk["text"], "image")
-                        print(f"   🔄 กำลังสร้าง embeddings...")
-                        text_embedding = create_embeddings(summary_text)
-                        
-                        # สร้าง image embedding สำหรับ processed chunk
-                        if image_embedding is not None:
-                            print(f"   ✅ สร้าง image embedding สำเร็จ ({len(image_embedding)} dimensions)")
-                        
-                        image_processed_chunk = image_chunk.copy()
-                        image_processed_chunk["summary"] = summary_text
-                        image_processed_chunk["embeddings"] = text_embedding  # text embedding จาก summary
-                        image_processed_chunk["created_at"] = datetime.now()
-                        
-                        # เพิ่ม image embedding ใน processed chunk ด้วย
-                        if image_embedding is not None:
-                            image_processed_chunk["image_embeddings"] = image_embedding
-                        
-                        page_results['image_processed_chunks'].append(image_processed_chunk)
-                        print(f"   ✅ สร้าง summary, text embeddings และ image embeddings แล้ว")
+                        print(f"   🖼️ Image {img_index + 1}: {len(improved_text)} ตัวอักษร (OCR: {len(record['original_text'])} ตัวอักษร)")
                     else:
-                        print(f"   ⚠️ ไม่พบข้อความในรูปภาพ {img_index + 1} (OCR ไม่เจอข้อความ) - ข้าม")
+                        # รูปที่ไม่มีข้อความ (ข้าม OCR หรือ OCR ไม่เจอ) เก็บไว้สำหรับค้นด้วย image embedding เท่านั้น
+                        print(f"   🖼️ Image {img_index + 1}: ไม่มีข้อความ ({record.get('ocr_skipped', 'ocr_empty')}) - เก็บเฉพาะ image embedding")
                     
-                    # ล้าง memory
-                    del image, image_bytes, ocr_results
+                    # Create image chunk
+                    image_chunk = {
+                        "text": improved_text,
+                        "type": "image",
+                        "chunk_id": image_chunk_counter,
+                        "page": page_num + 1,
+                        "image_index": img_index + 1,
+                        "original_text": record['original_text'],
+                        "improved_text": improved_text,
+                        # รูปภาพเก็บใน blob store ตอนบันทึก (store_page_images) chunk เก็บเฉพาะ image_ref
+                        "image_ref": dict(record['image_ref']),
+                        "image_bytes": record['image_bytes'],
+                        "doc_id": f"{document_id}_{page_num + 1}_img_{img_index + 1}",
+                        "bbox": convert_bbox_to_mongodb_format(data['bbox'])
+                    }
+                    if record.get('ocr_skipped'):
+                        image_chunk["ocr_skipped"] = record['ocr_skipped']
+                    # ✅ Original chunk: ไม่มี embeddings (เก็บต้นฉบับเท่านั้น)
+                    page_results['image_chunks'].append(image_chunk)
+                    image_chunk_counter += 1
                     
                 except Exception as e:
                     print(f"   ❗ Error processing image {img_index + 1}: {e}")
@@ -974,23 +1339,12 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
                         "chunk_id": table_chunk_counter,
                         "page": page_num + 1,
                         "table_index": table_index + 1,
-                        "doc_id": f"doc_{doc_id_counter}_{page_num + 1}_table_{table_index + 1}",
+                        "doc_id": f"{document_id}_{page_num + 1}_table_{table_index + 1}",
                         "bbox": convert_bbox_to_mongodb_format(data['bbox'])
                     }
                     # ✅ Original chunk: ไม่มี embeddings (เก็บต้นฉบับเท่านั้น)
                     page_results['table_chunks'].append(table_chunk)
                     table_chunk_counter += 1
-                    
-                    # สร้าง summary และ embeddings สำหรับ processed chunk
-                    print(f"   🔄 กำลังสร้าง summary...")
-                    summary_text = summarize_with_openai(table_chunk["text"], "table")
-                    print(f"   🔄 กำลังสร้าง embeddings...")
-                    table_processed_chunk = table_chunk.copy()
-                    table_processed_chunk["summary"] = summary_text
-                    table_processed_chunk["embeddings"] = create_embeddings(summary_text)  # embeddings จาก summary
-                    table_processed_chunk["created_at"] = datetime.now()
-                    page_results['table_processed_chunks'].append(table_processed_chunk)
-                    print(f"   ✅ สร้าง summary และ embeddings แล้ว")
         
         # สรุปผลการประมวลผลหน้า
         if not page_results['has_content']:
@@ -999,7 +1353,7 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
             total_chunks = (len(page_results['text_chunks']) + 
                           len(page_results['image_chunks']) + 
                           len(page_results['table_chunks']))
-            print(f"\n✅ ประมวลผลหน้า {page_num + 1} เสร็จ: {total_chunks} chunks")
+            print(f"\n✅ ดึงข้อมูลหน้า {page_num + 1} เสร็จ: {total_chunks} chunks")
             print(f"   📝 Text: {len(page_results['text_chunks'])} chunks")
             print(f"   🖼️ Image: {len(page_results['image_chunks'])} chunks")
             print(f"   📊 Table: {len(page_results['table_chunks'])} chunks")
@@ -1010,86 +1364,562 @@ def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, doc_
         print(f"❗ Error processing page {page_num + 1}: {e}")
         import traceback
         traceback.print_exc()
+        # ผลลัพธ์ไม่ครบทั้งหน้า: ไม่บันทึก checkpoint และไม่ลบ chunks เก่าของหน้านี้ (ประมวลผลใหม่ตอน --resume)
+        page_results['failed'] = True
         return page_results
 
-# ✅ ฟังก์ชันช่วยบันทึกข้อมูลทีละหน้า
-def store_page_results_to_mongodb(page_results, client, is_first_page=False):
+# ✅ ประเภท chunk ในผลลัพธ์ของหน้า: (key ของ original chunks, key ของ processed chunks, ประเภทเนื้อหา)
+PAGE_CHUNK_KINDS = [
+    ('text_chunks', 'text_processed_chunks', 'text'),
+    ('image_chunks', 'image_processed_chunks', 'image'),
+    ('table_chunks', 'table_processed_chunks', 'table')
+]
+
+# ✅ collection ของ chunks แต่ละประเภท: (key ในผลลัพธ์ของหน้า, database, collection, ประเภทเนื้อหา, ชนิดข้อมูล)
+PAGE_CHUNK_COLLECTIONS = [
+    ('text_chunks', ORIGINAL_DB_NAME, ORIGINAL_TEXT_COLLECTION, 'text', 'original'),
+    ('image_chunks', ORIGINAL_DB_NAME, ORIGINAL_IMAGE_COLLECTION, 'image', 'original'),
+    ('table_chunks', ORIGINAL_DB_NAME, ORIGINAL_TABLE_COLLECTION, 'table', 'original'),
+    ('text_processed_chunks', SUMMARY_DB_NAME, PROCESSED_TEXT_COLLECTION, 'text', 'processed'),
+    ('image_processed_chunks', SUMMARY_DB_NAME, PROCESSED_IMAGE_COLLECTION, 'image', 'processed'),
+    ('table_processed_chunks', SUMMARY_DB_NAME, PROCESSED_TABLE_COLLECTION, 'table', 'processed')
+]
+
+def iter_page_chunks(page_results):
+    """วนทุก original chunk ของหน้า: yield (ประเภทเนื้อหา, chunk)"""
+    for original_key, _, content_type in PAGE_CHUNK_KINDS:
+        for chunk in page_results[original_key]:
+            yield content_type, chunk
+
+def iter_processed_chunks(page_results):
+    """วนทุก processed chunk ของหน้า"""
+    for _, processed_key, _ in PAGE_CHUNK_KINDS:
+        yield from page_results[processed_key]
+
+# ✅ สร้าง summary ของทุก chunk ในหน้า
+def summarize_page_chunks(page_results):
     """
-    บันทึกผลลัพธ์จากหนึ่งหน้าลง MongoDB ทันที
+    สร้าง summary ของทุก original chunk ในหน้า (ส่ง request พร้อมกันภายใต้งบ rate limit)
+    
+    Returns:
+        dict: {doc_id: summary}
+    """
+    print(f"   🔄 กำลังสร้าง summary ({sum(1 for _ in iter_page_chunks(page_results))} chunks)...")
+    return asyncio.run(summarize_page_chunks_async(page_results))
+
+# 🆕 สร้าง summary ของทุก chunk ในหน้าพร้อมกัน (จำกัดจำนวน request ด้วย semaphore)
+async def summarize_page_chunks_async(page_results, semaphore=None):
+    """
+    สร้าง summary ของทุก original chunk ในหน้าแบบ concurrent
     
     Args:
-        page_results: ผลลัพธ์จาก process_single_page()
-        client: MongoDB client (เปิดไว้แล้ว)
-        is_first_page: เป็นหน้าแรกหรือไม่ (ถ้าใช่จะลบข้อมูลเก่าก่อน)
+        page_results: ผลลัพธ์จาก extract_page_chunks()
+        semaphore: asyncio.Semaphore ที่ใช้ร่วมกันทุกหน้า (ไม่ระบุ = ใช้ SUMMARY_CONCURRENCY)
+        
+    Returns:
+        dict: {doc_id: summary}
     """
-    try:
-        # เตรียม databases และ collections
-        db_original = client[ORIGINAL_DB_NAME]
-        db_summary = client[SUMMARY_DB_NAME]
-        
-        orig_text_col = db_original[ORIGINAL_TEXT_COLLECTION]
-        orig_image_col = db_original[ORIGINAL_IMAGE_COLLECTION]
-        orig_table_col = db_original[ORIGINAL_TABLE_COLLECTION]
-        
-        proc_text_col = db_summary[PROCESSED_TEXT_COLLECTION]
-        proc_image_col = db_summary[PROCESSED_IMAGE_COLLECTION]
-        proc_table_col = db_summary[PROCESSED_TABLE_COLLECTION]
-        
-        # ลบข้อมูลเก่าครั้งเดียวตอนหน้าแรก
-        if is_first_page:
-            print("🗑️ ลบข้อมูลเก่าใน MongoDB...")
-            orig_text_col.delete_many({})
-            orig_image_col.delete_many({})
-            orig_table_col.delete_many({})
-            proc_text_col.delete_many({})
-            proc_image_col.delete_many({})
-            proc_table_col.delete_many({})
-            print("✅ ลบข้อมูลเก่าเสร็จสิ้น")
-        
-        # เพิ่ม created_at ให้ทุก chunk
-        now = datetime.now()
+    items = [
+        (chunk['doc_id'], chunk["text"], content_type)
+        for content_type, chunk in iter_page_chunks(page_results)
+        if chunk["text"].strip()  # รูปที่ไม่มีข้อความไม่ต้องสรุป
+    ]
+    return await summarize_items_async(items, semaphore)
+
+def is_degraded_chunk(chunk, summary, image_embedding):
+    """
+    ตรวจว่า processed chunk ได้ผลสำรองจากความล้มเหลวชั่วคราวหรือไม่
+    (summary เป็น fallback ของข้อความต้นฉบับ หรือรูปภาพไม่มี image embeddings)
+    """
+    if chunk["text"].strip() and (not summary or summary == fallback_summary(chunk["text"])):
+        return True
+    return chunk["type"] == "image" and bool(chunk.get("image_bytes")) and image_embedding is None
+
+# ✅ สร้าง processed chunks (summary + embeddings) จาก original chunks
+def build_processed_chunks(page_results, summaries, embed=True):
+    """
+    สร้าง processed chunks ของหน้า: สำเนา original chunk + summary + embeddings จาก summary
+    (รูปภาพมี image_embeddings จาก CLIP ด้วย)
+    
+    Args:
+        page_results: ผลลัพธ์จาก extract_page_chunks() (จะเติม *_processed_chunks ให้)
+        summaries: dict {doc_id: summary}
+        embed: สร้าง text embeddings ทันที (False = ให้ผู้เรียกรวมหลายหน้าแล้วเรียก embed_processed_chunks เอง)
+    """
+    # 🆕 image embeddings (CLIP) ของทุกรูปในหน้าด้วย forward pass เดียว
+    image_embeddings = embed_image_chunks(page_results['image_chunks'])
+    
+    for original_key, processed_key, content_type in PAGE_CHUNK_KINDS:
+        for chunk in page_results[original_key]:
+            summary_text = summaries.get(chunk['doc_id']) or chunk["text"][:200]
+            processed_chunk = {k: v for k, v in chunk.items() if k != "image_bytes"}
+            processed_chunk["summary"] = summary_text
+            processed_chunk["created_at"] = datetime.now()
+            
+            processed_chunk["content_hash"] = processed_content_hash(chunk)
+            
+            if image_embeddings.get(chunk['doc_id']) is not None:
+                processed_chunk["image_embeddings"] = image_embeddings[chunk['doc_id']]
+            
+            # chunk ที่ได้ผลสำรอง (สรุปไม่สำเร็จ หรือสร้าง image embeddings ไม่ได้) ถูกเขียนใหม่ในรอบถัดไปแม้ content_hash ไม่เปลี่ยน
+            if is_degraded_chunk(chunk, summaries.get(chunk['doc_id']), image_embeddings.get(chunk['doc_id'])):
+                processed_chunk["degraded"] = True
+            
+            page_results[processed_key].append(processed_chunk)
+    
+    if embed:
+        # embeddings จาก summary ของทุก chunk ในหน้าด้วย encode ครั้งเดียว
+        embed_processed_chunks(list(iter_processed_chunks(page_results)))
+    return page_results
+
+# ✅ ฟังก์ชันประมวลผลหน้าเดียว: Extract → Summary → Embedding (โหมดทีละหน้า)
+def process_single_page(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, document_id):
+    """
+    ประมวลผลหน้าเดียว: Extract → Summary → Embedding (บันทึกด้วย store_page_results_to_mongodb)
+    
+    Returns:
+        dict: ผลลัพธ์แบบเดียวกับ extract_page_chunks() พร้อม *_processed_chunks
+    """
+    page_results = extract_page_chunks(page_num, pymupdf_page, pdfplumber_pdf, ocr_reader, document_id)
+    summaries = summarize_page_chunks(page_results)
+    print(f"   🔄 กำลังสร้าง embeddings...")
+    return build_processed_chunks(page_results, summaries)
+
+# ------------------------
+# 🆕 โหมดประมวลผลแบบขนาน (--workers)
+# ------------------------
+def _init_page_worker():
+    """initializer ของ worker process: โหลด OCR reader ครั้งเดียวต่อ process (ใช้ร่วมกันทุกเอกสาร)"""
+    # ไม่ใช้ connection ของ cache/blob store ที่ติดมาจาก process หลักตอน fork (แต่ละ process เปิดเอง)
+    for loader, attr in ((get_ingestion_cache, 'cache'), (get_image_deduplicator, 'dedup'), (get_blob_store, 'store'),
+                         (get_ocr_text_normalizer, 'normalizer'), (get_ocr_triage, 'triage')):
+        if hasattr(loader, attr):
+            delattr(loader, attr)
+    _init_page_worker.ocr_reader = get_ocr_reader()
+    _init_page_worker.open_pdfs = OrderedDict()
+
+def _open_pdf_in_worker(pdf_path):
+    """เปิด PDF ใน worker process แล้วเก็บไว้ใช้ซ้ำ (ปิดไฟล์ที่ไม่ได้ใช้นานที่สุดเมื่อเกิน WORKER_OPEN_PDFS)"""
+    open_pdfs = _init_page_worker.open_pdfs
+    if pdf_path not in open_pdfs:
+        open_pdfs[pdf_path] = (fitz.open(pdf_path), LazyPdfplumber(pdf_path))
+        while len(open_pdfs) > WORKER_OPEN_PDFS:
+            _, (old_pymupdf_doc, old_pdfplumber_pdf) = open_pdfs.popitem(last=False)
+            old_pymupdf_doc.close()
+            old_pdfplumber_pdf.close()
+    open_pdfs.move_to_end(pdf_path)
+    return open_pdfs[pdf_path]
+
+def _extract_page_in_worker(pdf_path, page_num, document_id):
+    """ดึง chunks ของหน้าใน worker process (PyMuPDF, pdfplumber, EasyOCR)"""
+    pymupdf_doc, pdfplumber_pdf = _open_pdf_in_worker(pdf_path)
+    return extract_page_chunks(
+        page_num=page_num,
+        pymupdf_page=pymupdf_doc[page_num],
+        pdfplumber_pdf=pdfplumber_pdf,
+        ocr_reader=_init_page_worker.ocr_reader,
+        document_id=document_id
+    )
+
+async def _process_pages_parallel(pool, document, page_nums, total_pages, store_page, summary_concurrency, max_pages_in_flight,
+                                  failed_pages=None):
+    """
+    ประมวลผลทุกหน้าแบบขนาน: Extract ใน process pool → Summary แบบ async → Embedding
+    แล้วเรียงผลลัพธ์กลับตามลำดับหน้าก่อนบันทึก
+    text embeddings ของทุกหน้าที่พร้อมบันทึกต่อเนื่องกันจะถูกสร้างใน batch เดียว
+    
+    Args:
+        pool: ProcessPoolExecutor ที่ init ด้วย _init_page_worker (ใช้ร่วมกันได้หลายเอกสาร)
+        document: CorpusDocument ที่กำลัง ingest
+        page_nums: หน้าที่ต้องประมวลผล (เรียงจากน้อยไปมาก, ไม่รวมหน้าที่เสร็จแล้วตอน resume)
+        total_pages: จำนวนหน้าทั้งหมด (ใช้แสดงผล)
+        store_page: ฟังก์ชันบันทึกผลลัพธ์หนึ่งหน้า store_page(page_results)
+        summary_concurrency: จำนวน request สรุปพร้อมกันสูงสุด
+        max_pages_in_flight: จำนวนหน้าที่ประมวลผลค้างอยู่สูงสุด (จำกัด memory)
+        failed_pages: list ที่เพิ่มหน้าที่สร้าง embeddings หรือบันทึกไม่สำเร็จ (ไม่ระบุ = แสดงผลอย่างเดียว)
+    """
+    if failed_pages is None:
+        failed_pages = []
+    loop = asyncio.get_running_loop()
+    summary_semaphore = asyncio.Semaphore(summary_concurrency)
+    page_slots = asyncio.Semaphore(max_pages_in_flight)
+    embedding_lock = asyncio.Lock()
+    flush_lock = asyncio.Lock()
+    
+    completed = {}  # ลำดับใน page_nums -> page_results ที่รอบันทึกตามลำดับ
+    next_page_to_store = 0
+    
+    async def process_page(position, page_num):
+        nonlocal next_page_to_store
+        try:
+            page_results = await loop.run_in_executor(pool, _extract_page_in_worker, document.path, page_num, document.id)
+            summaries = await summarize_page_chunks_async(page_results, summary_semaphore)
+            # image embeddings (CLIP) อยู่ใน process หลัก ใช้ทีละหน้า, text embeddings สร้างตอนบันทึก
+            async with embedding_lock:
+                await asyncio.to_thread(build_processed_chunks, page_results, summaries, False)
+        except Exception as e:
+            print(f"❗ Error processing page {page_num + 1}: {e}")
+            page_results = {
+                'page_num': page_num, 'has_content': False, 'failed': True,
+                'text_chunks': [], 'image_chunks': [], 'table_chunks': [],
+                'text_processed_chunks': [], 'image_processed_chunks': [], 'table_processed_chunks': []
+            }
+        
+        completed[position] = page_results
+        # บันทึกหน้าที่พร้อมแล้วตามลำดับหน้า
+        async with flush_lock:
+            ready_pages = []
+            while next_page_to_store + len(ready_pages) in completed:
+                ready_pages.append(completed.pop(next_page_to_store + len(ready_pages)))
+            if not ready_pages:
+                return
+            
+            # 🆕 text embeddings ของทุกหน้าที่พร้อมใน encode ครั้งเดียว
+            try:
+                window_chunks = [chunk for ready in ready_pages for chunk in iter_processed_chunks(ready)]
+                await asyncio.to_thread(embed_processed_chunks, window_chunks)
+                embedded = True
+            except Exception as e:
+                print(f"❗ Error creating embeddings for pages {[ready['page_num'] + 1 for ready in ready_pages]}: {e}")
+                embedded = False
+            
+            for ready in ready_pages:
+                # เลื่อนลำดับและคืน slot เสมอ (หน้าที่ล้มเหลวต้องไม่ทำให้หน้าถัดไปรอตลอดไป)
+                try:
+                    if not embedded:
+                        # ไม่บันทึก processed chunks ที่ไม่มี embeddings ทับของเดิม (ประมวลผลใหม่ตอน --resume)
+                        failed_pages.append(ready['page_num'])
+                        continue
+                    print(f"\n💾 บันทึกผลลัพธ์จากหน้า {ready['page_num'] + 1}/{total_pages} ลง MongoDB...")
+                    store_page(ready)
+                except Exception as e:
+                    print(f"❗ Error storing page {ready['page_num'] + 1}: {e}")
+                    if ready['page_num'] not in failed_pages:
+                        failed_pages.append(ready['page_num'])
+                finally:
+                    next_page_to_store += 1
+                    page_slots.release()
+    
+    tasks = []
+    for position, page_num in enumerate(page_nums):
+        await page_slots.acquire()
+        tasks.append(asyncio.create_task(process_page(position, page_num)))
+    await asyncio.gather(*tasks)
+
+# 🆕 โหมด Batch API (--summary-mode batch)
+def _process_pages_batch(page_nums, extract_page, store_page, failed_pages=None, poll_interval=SUMMARY_BATCH_POLL_INTERVAL):
+    """
+    ประมวลผลแบบ offline: Extract ทุกหน้า → ส่ง summary ของทุก chunk เป็น Batch API job เดียว
+    → poll จนได้ผลลัพธ์ → Embedding → บันทึกตามลำดับหน้า
+    (เก็บ chunks ของทั้งเอกสารไว้ใน memory จนกว่า batch จะเสร็จ)
+    หน้าที่ extract หรือบันทึกไม่สำเร็จถูกเพิ่มใน failed_pages แล้วทำหน้าถัดไปต่อ (ไม่ทิ้งผลของ batch ทั้งเอกสาร)
+    
+    Args:
+        page_nums: หน้าที่ต้องประมวลผล (เรียงจากน้อยไปมาก)
+        extract_page: ฟังก์ชันดึง chunks ของหนึ่งหน้า extract_page(page_num) -> ผลลัพธ์แบบ extract_page_chunks()
+        store_page: ฟังก์ชันบันทึกผลลัพธ์หนึ่งหน้า store_page(page_results)
+        failed_pages: list ที่เพิ่มหน้าที่ extract หรือบันทึกไม่สำเร็จ (ไม่ระบุ = แสดงผลอย่างเดียว)
+        poll_interval: วินาทีระหว่างการ poll สถานะ batch
+    """
+    if failed_pages is None:
+        failed_pages = []
+    all_pages = []
+    for page_num in page_nums:
+        try:
+            page_results = extract_page(page_num)
+        except Exception as e:
+            print(f"❗ Error extracting page {page_num + 1}: {e}")
+            failed_pages.append(page_num)
+            continue
+        print(f"📄 Extract หน้า {page_num + 1} เสร็จ")
+        all_pages.append(page_results)
+    
+    items = [
+        (chunk['doc_id'], chunk["text"], content_type)
+        for page_results in all_pages
+        for content_type, chunk in iter_page_chunks(page_results)
+        if chunk["text"].strip()
+    ]
+    print(f"\n📦 ส่ง {len(items)} chunks ไปสรุปผ่าน Batch API...")
+    summaries = summarize_items_batch(items, poll_interval=poll_interval)
+    
+    for page_results in all_pages:
+        page_num = page_results['page_num']
+        try:
+            build_processed_chunks(page_results, summaries)
+            print(f"\n💾 บันทึกผลลัพธ์จากหน้า {page_num + 1} ลง MongoDB...")
+            store_page(page_results)
+        except Exception as e:
+            print(f"❗ Error storing page {page_num + 1}: {e}")
+            if page_num not in failed_pages:
+                failed_pages.append(page_num)
+
+# 🆕 upsert เฉพาะ chunks ที่ใหม่หรือเปลี่ยน (แทนการลบข้อมูลเก่าทั้งหมดแล้วบันทึกใหม่)
+def upsert_changed_chunks(collection, chunks, session=None):
+    """
+    upsert chunks ตาม doc_id เฉพาะตัวที่ยังไม่มีใน collection, content_hash เปลี่ยน
+    หรือตัวที่บันทึกไว้เป็นผลสำรอง (degraded: summary/embeddings ที่ได้ตอนโมเดลล้มเหลว)
+    
+    Args:
+        collection: MongoDB collection
+        chunks: รายการ chunks (ต้องมี "doc_id" และ "content_hash")
+        session: MongoDB session (เมื่อเขียนใน transaction)
         
-        # บันทึก Original Data
-        if page_results['text_chunks']:
-            for chunk in page_results['text_chunks']:
-                chunk['created_at'] = now
-            orig_text_col.insert_many(page_results['text_chunks'])
-            print(f"   ✅ บันทึก {len(page_results['text_chunks'])} text chunks (original)")
+    Returns:
+        tuple: (จำนวนที่เขียน, จำนวนที่ไม่เปลี่ยน)
+    """
+    if not chunks:
+        return 0, 0
+    existing = {
+        doc["doc_id"]: None if doc.get("degraded") else doc.get("content_hash")
+        for doc in collection.find({"doc_id": {"$in": [chunk["doc_id"] for chunk in chunks]}},
+                                   {"doc_id": 1, "content_hash": 1, "degraded": 1}, session=session)
+    }
+    changed = [chunk for chunk in chunks if existing.get(chunk["doc_id"]) != chunk["content_hash"]]
+    with get_bulk_writer(collection, session=session) as writer:
+        for chunk in changed:
+            writer.replace({"doc_id": chunk["doc_id"]}, {k: v for k, v in chunk.items() if k != "_id"})
+    return len(changed), len(chunks) - len(changed)
+
+def ensure_chunk_indexes(client):
+    """
+    สร้าง index ของ doc_id และ document_id ในทุก collection ของ chunks (ใช้ตอน upsert, ลบ chunks เก่า และกรองตามเอกสาร)
+    และ image_ref.sha256 / image_ref.duplicate_of ของ image chunks (หาทุกตำแหน่งที่รูปเดียวกันปรากฏ)
+    """
+    for _, db_name, collection_name, content_type, _ in PAGE_CHUNK_COLLECTIONS:
+        client[db_name][collection_name].create_index("doc_id")
+        client[db_name][collection_name].create_index("document_id")
+        if content_type == 'image':
+            client[db_name][collection_name].create_index("image_ref.sha256")
+            client[db_name][collection_name].create_index("image_ref.duplicate_of", sparse=True)
+
+# 🆕 ลบ chunks ที่ไม่มีในเอกสารแล้ว
+def remove_stale_chunks(client, document_id, seen_doc_ids):
+    """
+    ลบ chunks ของเอกสารที่ไม่ได้ถูกสร้างในการ ingest รอบนี้ (เช่น หน้าที่ถูกลบ หรือจำนวน chunk ในหน้าลดลง)
+    
+    Args:
+        client: MongoDB client
+        document_id: id ของเอกสาร (ไม่กระทบ chunks ของเอกสารอื่น)
+        seen_doc_ids: doc_id ของทุก chunk ของเอกสารที่สร้างในรอบนี้
         
-        if page_results['image_chunks']:
-            for chunk in page_results['image_chunks']:
-                chunk['created_at'] = now
-            orig_image_col.insert_many(page_results['image_chunks'])
-            print(f"   ✅ บันทึก {len(page_results['image_chunks'])} image chunks (original)")
+    Returns:
+        int: จำนวน chunks ที่ลบ
+    """
+    seen = list(seen_doc_ids)
+    removed = 0
+    for _, db_name, collection_name, _, _ in PAGE_CHUNK_COLLECTIONS:
+        removed += client[db_name][collection_name].delete_many(
+            {"document_id": document_id, "doc_id": {"$nin": seen}}
+        ).deleted_count
+    print(f"🧹 [{document_id}] ลบ chunks ที่ไม่มีในเอกสารแล้ว {removed} รายการ")
+    return removed
+
+# 🆕 สร้าง BM25 index จาก processed chunks ทั้งหมด
+def build_bm25_index(client, path=BM25_INDEX_PATH):
+    """
+    สร้าง BM25 index (คำที่แบ่งด้วย PyThaiNLP) จาก summary และข้อความต้นฉบับของ processed chunks ทุก collection
+    
+    Args:
+        client: MongoDB client
+        path: โฟลเดอร์ของ index (ใช้ร่วมกับ BM25_INDEX_PATH ของ retrieval)
         
-        if page_results['table_chunks']:
-            for chunk in page_results['table_chunks']:
-                chunk['created_at'] = now
-            orig_table_col.insert_many(page_results['table_chunks'])
-            print(f"   ✅ บันทึก {len(page_results['table_chunks'])} table chunks (original)")
-        
-        # บันทึก Processed Data (มี summary และ embeddings แล้ว)
-        if page_results['text_processed_chunks']:
-            for chunk in page_results['text_processed_chunks']:
-                if 'created_at' not in chunk:
-                    chunk['created_at'] = now
-            proc_text_col.insert_many(page_results['text_processed_chunks'])
-            print(f"   ✅ บันทึก {len(page_results['text_processed_chunks'])} text chunks (processed)")
-        
-        if page_results['image_processed_chunks']:
-            for chunk in page_results['image_processed_chunks']:
-                if 'created_at' not in chunk:
-                    chunk['created_at'] = now
-            proc_image_col.insert_many(page_results['image_processed_chunks'])
-            print(f"   ✅ บันทึก {len(page_results['image_processed_chunks'])} image chunks (processed)")
-        
-        if page_results['table_processed_chunks']:
-            for chunk in page_results['table_processed_chunks']:
-                if 'created_at' not in chunk:
-                    chunk['created_at'] = now
-            proc_table_col.insert_many(page_results['table_processed_chunks'])
-            print(f"   ✅ บันทึก {len(page_results['table_processed_chunks'])} table chunks (processed)")
+    Returns:
+        int: จำนวน chunks ใน index
+    """
+    builder = BM25IndexBuilder()
+    projection = {"_id": 0, "doc_id": 1, "document_id": 1, "page": 1, "chunk_id": 1, "type": 1, "summary": 1, "text": 1}
+    for collection_name in (PROCESSED_TEXT_COLLECTION, PROCESSED_IMAGE_COLLECTION, PROCESSED_TABLE_COLLECTION):
+        for doc in client[SUMMARY_DB_NAME][collection_name].find({}, projection):
+            summary, text = doc.pop("summary", "") or "", doc.pop("text", "") or ""
+            doc["collection"] = collection_name
+            # summary ที่เป็น fallback (ข้อความต้นฉบับตัดสั้น) ไม่ต้อง index ซ้ำ
+            builder.add(doc, text if text.startswith(summary) else f"{summary}\n{text}")
+    builder.save(path)
+    return len(builder)
+
+# 🆕 เพิ่ม vectors ใหม่ลง HNSW indexes ที่บันทึกไว้ (incremental)
+def update_ann_indexes(client, path=ANN_INDEX_PATH, min_vectors=ANN_MIN_VECTORS):
+    """
+    อัปเดต HNSW index ของทุก embedding space ที่มี vectors ถึง min_vectors: เพิ่มเฉพาะ vectors ที่ยังไม่อยู่ใน index
+    (สร้างใหม่ถ้ามี chunks ถูกลบหรือ vectors เปลี่ยน) แล้วบันทึกให้ retrieval โหลดโดยไม่ต้องสร้าง graph เอง
+    
+    Args:
+        client: MongoDB client
+        path: โฟลเดอร์ของ indexes (ใช้ร่วมกับ ANN_INDEX_PATH ของ retrieval)
+        min_vectors: จำนวน vectors ขั้นต่ำของ space ที่สร้าง index
+        
+    Returns:
+        dict: {index path: จำนวน vectors ที่เพิ่ม}
+    """
+    added = {}
+    projection = {name: 1 for name in PAYLOAD_FIELDS}
+    ann_params = {"M": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION, "ef": HNSW_EF_SEARCH}
+    for collection_name, field in ((PROCESSED_TEXT_COLLECTION, "embeddings"), (PROCESSED_IMAGE_COLLECTION, "embeddings"),
+                                   (PROCESSED_TABLE_COLLECTION, "embeddings"), (PROCESSED_IMAGE_COLLECTION, "image_embeddings")):
+        docs_by_space = {}
+        for doc in client[SUMMARY_DB_NAME][collection_name].find({field: {"$exists": True}}, dict(projection, **{field: 1})):
+            docs_by_space.setdefault(embedding_space_of(doc, field), []).append(doc)
+        for space, docs in docs_by_space.items():
+            if len(docs) < min_vectors:
+                continue
+            space_path = ann_index_path(path, collection_name, field, space)
+            index = None
+            if ANNIndex.version(space_path) is not None:
+                try:
+                    index = ANNIndex.load(space_path)
+                except Exception as e:
+                    print(f"⚠️ โหลด ANN index {space_path} ไม่ได้ สร้างใหม่: {e}")
+            index, added[space_path] = sync_ann_index(index, field, docs, **ann_params)
+            index.save(space_path)
+            print(f"   🧭 {collection_name}.{field} ({space}): {len(index)} vectors, เพิ่มใหม่ {added[space_path]}")
+    return added
+
+# 🆕 ย้าย text embeddings ไปโมเดลใหม่ทีละ batch (--migrate-embeddings)
+def migrate_embeddings(client, spec=None, batch_size=EMBEDDING_MIGRATION_BATCH_SIZE, pause=0.0):
+    """
+    re-embed summary ของ processed chunks ที่ยังเป็นโมเดลอื่นด้วย spec ทีละ batch (batched encode + embedding cache)
+    รันได้ระหว่างที่ระบบตอบคำถามอยู่: retrieval ค้นหาแยกตาม embedding space จนกว่า migration จะเสร็จ
+    รันซ้ำได้ (ทำต่อจาก chunks ที่ยังไม่ได้ย้าย)
+    
+    Args:
+        client: MongoDB client
+        spec: EmbeddingModelSpec ของโมเดลใหม่ (ไม่ระบุ = EMBEDDING_MODEL)
+        batch_size: จำนวน chunks ต่อรอบ
+        pause: เวลาพัก (วินาที) ระหว่างรอบ เพื่อลดภาระ CPU/MongoDB ของระบบที่ใช้งานอยู่
         
+    Returns:
+        dict: {collection_name: จำนวน chunks ที่ย้ายแล้ว}
+    """
+    spec = spec or EMBEDDING_MODEL
+    migrated = {}
+    for collection_name in (PROCESSED_TEXT_COLLECTION, PROCESSED_IMAGE_COLLECTION, PROCESSED_TABLE_COLLECTION):
+        collection = client[SUMMARY_DB_NAME][collection_name]
+        query = {"embedding_model": {"$ne": spec.model_id}, "summary": {"$nin": ["", None]}}
+        migrated[collection_name] = 0
+        last_id = None
+        while True:
+            batch_query = dict(query, _id={"$gt": last_id}) if last_id is not None else query
+            docs = list(collection.find(batch_query, {"summary": 1, "embedding_model": 1}, sort=[("_id", 1)], limit=batch_size))
+            if not docs:
+                break
+            last_id = docs[-1]["_id"]
+            embed_processed_chunks(docs, spec=spec)
+            embedded_at = datetime.now()
+            with get_bulk_writer(collection) as writer:
+                for doc in docs:
+                    if not any(doc.get("embeddings") or ()):
+                        continue
+                    # เขียนเฉพาะเมื่อ summary ยังเหมือนเดิม (ไม่ทับ chunk ที่ถูก ingest ใหม่ระหว่าง migration)
+                    writer.add(UpdateOne(
+                        {"_id": doc["_id"], "summary": doc["summary"]},
+                        {"$set": {**spec.stamp(doc["embeddings"]), "embedded_at": embedded_at}}
+                    ))
+                    migrated[collection_name] += 1
+            print(f"   🔁 {collection_name}: ย้ายไป {spec.model_id} แล้ว {migrated[collection_name]} chunks")
+            if pause:
+                time.sleep(pause)
+    return migrated
+
+def run_embedding_migration(batch_size=EMBEDDING_MIGRATION_BATCH_SIZE, pause=0.0):
+    """เชื่อมต่อ MongoDB แล้วย้าย text embeddings ของทุก processed chunk ไป EMBEDDING_MODEL"""
+    print(f"🔁 เริ่มย้าย text embeddings ไป {EMBEDDING_MODEL.model_id} ({EMBEDDING_MODEL.name})")
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
+    try:
+        client.admin.command('ping')
+        migrated = migrate_embeddings(client, EMBEDDING_MODEL, batch_size=batch_size, pause=pause)
+        cache = get_ingestion_cache()
+        print(f"✅ ย้าย embeddings เสร็จ {sum(migrated.values())} chunks "
+              f"(ใช้จาก cache {cache.hits}, encode ใหม่ {cache.misses})")
+        if VECTOR_INDEX_BACKEND == "hnsw" and any(migrated.values()):
+            print("🧭 กำลังอัปเดต HNSW indexes...")
+            update_ann_indexes(client, ANN_INDEX_PATH)
+    finally:
+        client.close()
+
+# 🆕 ลบ chunks ของเอกสารที่ไม่อยู่ใน corpus แล้ว (--prune)
+def remove_documents_not_in_corpus(client, document_ids):
+    """
+    ลบ chunks ของเอกสารที่ไม่อยู่ใน corpus (รวมถึง chunks รุ่นเก่าที่ไม่มี document_id)
+    
+    Args:
+        client: MongoDB client
+        document_ids: id ของทุกเอกสารใน corpus
+        
+    Returns:
+        int: จำนวน chunks ที่ลบ
+    """
+    keep = list(document_ids)
+    removed = 0
+    for _, db_name, collection_name, _, _ in PAGE_CHUNK_COLLECTIONS:
+        removed += client[db_name][collection_name].delete_many({"document_id": {"$nin": keep}}).deleted_count
+    print(f"🧹 ลบ chunks ของเอกสารที่ไม่อยู่ใน corpus แล้ว {removed} รายการ")
+    return removed
+
+# 🆕 ใส่ข้อมูลเอกสารต้นฉบับให้ทุก chunk ของหน้า
+def annotate_page_chunks(page_results, document):
+    """
+    เพิ่ม document_id และ source (path, title, sha256 และ metadata จาก manifest) ให้ทุก chunk ของหน้า
+    content_hash รวม source ด้วย เพื่อให้ chunk ถูกเขียนใหม่เมื่อ metadata ของเอกสารเปลี่ยน
+    """
+    source = document.source
+    source_hash = fingerprint(json.dumps(source, sort_keys=True, ensure_ascii=False))
+    for key, _, _, _, _ in PAGE_CHUNK_COLLECTIONS:
+        for chunk in page_results[key]:
+            chunk['document_id'] = document.id
+            chunk['source'] = source
+            chunk['content_hash'] = fingerprint(chunk.get('content_hash') or chunk_content_hash(chunk), source_hash)
+    return page_results
+
+# 🆕 ตรวจว่า MongoDB รองรับ transaction หรือไม่ (replica set หรือ sharded cluster เช่น Atlas)
+def supports_transactions(client):
+    """ตรวจครั้งเดียวต่อ client ว่าเขียนแบบ transaction ได้หรือไม่"""
+    if not hasattr(supports_transactions, 'results'):
+        supports_transactions.results = {}
+    if id(client) not in supports_transactions.results:
+        try:
+            hello = client.admin.command('hello')
+            supported = bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+        except Exception:
+            supported = False
+        if not supported:
+            print("⚠️ MongoDB ไม่รองรับ transaction บันทึกทีละ collection แทน (upsert ซ้ำได้อย่างปลอดภัยตอน resume)")
+        supports_transactions.results[id(client)] = supported
+    return supports_transactions.results[id(client)]
+
+def write_page_results(page_results, client, session=None):
+    """เขียน chunks ทุกประเภทของหน้าลง MongoDB (raise ถ้าล้มเหลว เพื่อให้ transaction ถูก abort)"""
+    now = datetime.now()
+    for key, db_name, collection_name, content_type, label in PAGE_CHUNK_COLLECTIONS:
+        chunks = page_results[key]
+        if not chunks:
+            continue
+        for chunk in chunks:
+            # original chunks ใช้ hash ของเนื้อหา (processed chunks มี content_hash จาก build_processed_chunks แล้ว)
+            if 'content_hash' not in chunk:
+                chunk['content_hash'] = chunk_content_hash(chunk)
+            if 'created_at' not in chunk:
+                chunk['created_at'] = now
+        written, unchanged = upsert_changed_chunks(client[db_name][collection_name], chunks, session=session)
+        print(f"   ✅ บันทึก {written} {content_type} chunks ({label}), ไม่เปลี่ยน {unchanged}")
+
+# ✅ ฟังก์ชันช่วยบันทึกข้อมูลทีละหน้า
+def store_page_results_to_mongodb(page_results, client):
+    """
+    บันทึกผลลัพธ์จากหนึ่งหน้าลง MongoDB ทันที (upsert ตาม doc_id เฉพาะ chunks ที่ใหม่หรือเปลี่ยน)
+    รูปภาพถูกเขียนลง blob store ก่อน แล้ว chunks ทั้งหน้าถูกเขียนใน transaction เดียว: สำเร็จทั้งหน้าหรือไม่มีอะไรถูกเขียน
+    
+    Args:
+        page_results: ผลลัพธ์จาก process_single_page()
+        client: MongoDB client (เปิดไว้แล้ว)
+    """
+    try:
+        store_page_images(page_results)
+        if supports_transactions(client):
+            with client.start_session() as session:
+                session.with_transaction(lambda s: write_page_results(page_results, client, session=s))
+        else:
+            write_page_results(page_results, client)
         return True
         
     except Exception as e:
@@ -1098,107 +1928,303 @@ def store_page_results_to_mongodb(page_results, client, is_first_page=False):
         traceback.print_exc()
         return False
 
-# ✅ ฟังก์ชันหลัก (ประมวลผลหนึ่งหน้า → บันทึก → loop ต่อ)
-def main():
+# 🆕 ingest เอกสารหนึ่งไฟล์ (ประมวลผลหนึ่งหน้า → บันทึก → loop ต่อ)
+def ingest_document(document, client, pool=None, summary_concurrency=SUMMARY_CONCURRENCY, summary_mode="online",
+                    resume=False, max_pages_in_flight=2, ocr_pool=None):
+    """
+    ingest เอกสารหนึ่งไฟล์ลง MongoDB พร้อม checkpoint รายหน้า
+    
+    Args:
+        document: CorpusDocument ที่ต้อง ingest
+        client: MongoDB client (เปิดไว้แล้ว)
+        pool: ProcessPoolExecutor สำหรับ extract/OCR (None = ประมวลผลทีละหน้าใน process นี้)
+        summary_concurrency: จำนวน request สรุปพร้อมกันสูงสุดของเอกสารนี้ (โหมดขนาน)
+        summary_mode: "online" หรือ "batch"
+        resume: ข้ามหน้าที่บันทึกเสร็จแล้วตาม checkpoint ของรอบก่อน
+        max_pages_in_flight: จำนวนหน้าที่ประมวลผลค้างอยู่สูงสุดของเอกสารนี้ (โหมดขนาน) หรือขนาดคิวระหว่าง stage (โหมดทีละหน้า)
+        ocr_pool: OCRPool สำหรับ OCR ในโหมดที่ extract ใน process นี้ (None = easyocr.Reader ใน process นี้)
+        
+    Returns:
+        dict: {'totals': จำนวน chunks แต่ละประเภท, 'failed_pages': หน้าที่ประมวลผลหรือบันทึกไม่สำเร็จ}
+    """
+    print(f"\n{'#'*60}")
+    print(f"📘 [{document.id}] {document.path}")
+    print(f"{'#'*60}")
+    
+    totals = {key: 0 for key, _, _, _, _ in PAGE_CHUNK_COLLECTIONS}
+    failed_pages = []
+    
+    # เปิดไฟล์ PDF ด้วย PyMuPDF (pdfplumber เปิดเมื่อต้องใช้หาตารางเท่านั้น, โหมดขนาน worker แต่ละตัวเปิดเอง)
+    pymupdf_doc = fitz.open(document.path)
+    pdfplumber_pdf = LazyPdfplumber(document.path) if pool is None else None
+    try:
+        total_pages = len(pymupdf_doc)
+        print(f"📚 [{document.id}] จำนวนหน้าทั้งหมด: {total_pages} หน้า")
+        
+        # checkpoint ของเอกสารนี้ (หน้าที่บันทึกเสร็จแล้วจะถูกข้ามเมื่อ resume)
+        checkpoint = IngestionCheckpoint(
+            ingestion_run_key(document),
+            collection=client[SUMMARY_DB_NAME][INGESTION_CHECKPOINT_COLLECTION] if INGESTION_CHECKPOINT_BACKEND == "mongodb" else None,
+            directory=INGESTION_CHECKPOINT_DIR
+        )
+        completed_pages = checkpoint.start(total_pages, document.path, resume=resume)
+        pending_pages = [page_num for page_num in range(total_pages) if page_num not in completed_pages]
+        print(f"🧾 [{document.id}] Checkpoint ({checkpoint.backend}): ต้องประมวลผล {len(pending_pages)}/{total_pages} หน้า")
+        
+        def store_page(page_results):
+            """บันทึกผลลัพธ์หนึ่งหน้าลง MongoDB (upsert เฉพาะ chunks ที่เปลี่ยน) นับจำนวน chunks และบันทึก checkpoint"""
+            page_num = page_results['page_num']
+            annotate_page_chunks(page_results, document)
+            success = store_page_results_to_mongodb(page_results, client)
+            
+            if page_results.get('failed') or not success:
+                failed_pages.append(page_num)
+            else:
+                # หน้านี้ถูกเขียนครบแล้ว: resume ครั้งต่อไปจะข้ามหน้านี้
+                checkpoint.mark_page_done(page_num, (chunk['doc_id'] for _, chunk in iter_page_chunks(page_results)))
+            if success:
+                # นับจำนวน chunks
+                for key in totals:
+                    totals[key] += len(page_results[key])
+                print(f"✅ [{document.id}] บันทึกหน้า {page_num + 1} เสร็จสิ้น")
+            else:
+                print(f"⚠️ [{document.id}] มีปัญหาในการบันทึกหน้า {page_num + 1} แต่จะดำเนินการต่อ...")
+            
+            # ตรวจสอบ memory ทุก 5 หน้า
+            if (page_num + 1) % 5 == 0:
+                check_memory()
+        
+        # === LOOP: More Pages (ประมวลผลและบันทึกทีละหน้า) ===
+        if summary_mode == "batch":
+            if pool is not None:
+                # ส่งทุกหน้าเข้า pool พร้อมกัน แล้วรับผลทีละหน้า (หน้าที่ล้มเหลวไม่ทำให้หน้าอื่นหายไป)
+                extract_futures = {
+                    page_num: pool.submit(_extract_page_in_worker, document.path, page_num, document.id)
+                    for page_num in pending_pages
+                }
+                extract_page = lambda page_num: extract_futures[page_num].result()
+            else:
+                ocr_reader = ocr_pool or get_ocr_reader()
+                extract_page = lambda page_num: extract_page_chunks(
+                    page_num, pymupdf_doc[page_num], pdfplumber_pdf, ocr_reader, document.id
+                )
+            _process_pages_batch(pending_pages, extract_page, store_page, failed_pages=failed_pages)
+        elif pool is not None:
+            # 🆕 Extract/OCR ใน process pool, Summary แบบ async, บันทึกเรียงตามหน้า
+            asyncio.run(_process_pages_parallel(
+                pool,
+                document=document,
+                page_nums=pending_pages,
+                total_pages=total_pages,
+                store_page=store_page,
+                summary_concurrency=summary_concurrency,
+                max_pages_in_flight=max_pages_in_flight,
+                failed_pages=failed_pages
+            ))
+        else:
+            ocr_reader = ocr_pool or get_ocr_reader()
+            
+            def extract_pages():
+                for page_num in pending_pages:
+                    print(f"\n{'='*60}")
+                    print(f"📄 [{document.id}] กำลังประมวลผลหน้า {page_num + 1}/{total_pages}")
+                    print(f"{'='*60}")
+                    yield extract_page_chunks(page_num, pymupdf_doc[page_num], pdfplumber_pdf, ocr_reader, document.id)
+            
+            def process_pages(extracted_pages):
+                for page_results in extracted_pages:
+                    summaries = summarize_page_chunks(page_results)
+                    print(f"   🔄 กำลังสร้าง embeddings...")
+                    yield build_processed_chunks(page_results, summaries)
+            
+            # 🆕 Extract → Summary/Embedding → บันทึก ต่อกันด้วยคิวขนาดจำกัด
+            # (extract หน้าถัดไประหว่างสรุป/บันทึกหน้าปัจจุบัน และมีหน้าค้างในคิวไม่เกิน max_pages_in_flight ต่อ stage)
+            extracted_pages = prefetch(extract_pages(), maxsize=max_pages_in_flight, name=f"{document.id}-extract")
+            processed_pages = prefetch(process_pages(extracted_pages), maxsize=max_pages_in_flight, name=f"{document.id}-process")
+            for index, page_results in enumerate(processed_pages):
+                # บันทึกลง MongoDB ทันที
+                print(f"\n💾 บันทึกผลลัพธ์จากหน้า {page_results['page_num'] + 1} ลง MongoDB...")
+                store_page(page_results)
+                
+                # ตรวจสอบว่ามีหน้าอื่นอีกไหม (More Pages Decision)
+                if index < len(pending_pages) - 1:
+                    print(f"➡️ มีหน้าอื่นอีก {len(pending_pages) - index - 1} หน้า")
+        print(f"✅ [{document.id}] ประมวลผลและบันทึกครบทุกหน้าแล้ว ({total_pages} หน้า)")
+        
+        # ลบ chunks ที่ไม่มีในเอกสารแล้ว (ทำเมื่อทุกหน้าสำเร็จเท่านั้น เพื่อไม่ให้ข้อมูลของหน้าที่ล้มเหลวหายไป)
+        # doc_id ของทุกหน้ามาจาก checkpoint (รวมหน้าที่เสร็จตั้งแต่รอบก่อนเมื่อ resume)
+        if failed_pages:
+            print(f"⚠️ [{document.id}] ข้ามการลบ chunks เก่า เพราะมี {len(failed_pages)} หน้าที่ประมวลผลหรือบันทึกไม่สำเร็จ (รันอีกครั้งด้วย --resume)")
+        else:
+            remove_stale_chunks(client, document.id, checkpoint.all_doc_ids())
+            checkpoint.mark_finished()
+    finally:
+        # ปิดไฟล์ PDF
+        pymupdf_doc.close()
+        if pdfplumber_pdf:
+            pdfplumber_pdf.close()
+    
+    return {'totals': totals, 'failed_pages': failed_pages}
+
+# ✅ ฟังก์ชันหลัก (ingest ทุกเอกสารใน corpus)
+def main(workers=1, summary_concurrency=SUMMARY_CONCURRENCY, summary_mode="online", resume=False,
+         corpus=None, max_documents=MAX_CONCURRENT_DOCUMENTS, prune=False, ocr_workers=OCR_WORKERS):
+    """
+    รัน ingestion pipeline ของทุกเอกสารใน corpus (หรือ PDF_PATH ถ้าไม่ระบุ corpus)
+    
+    Args:
+        workers: จำนวน worker process สำหรับ extract/OCR (1 = ประมวลผลทีละหน้าแบบเดิม)
+        summary_concurrency: จำนวน request สรุปพร้อมกันสูงสุด (รวมทุกเอกสาร)
+        summary_mode: "online" (สรุปทีละหน้าพร้อมกันหลาย request) หรือ "batch" (Batch API job เดียวต่อเอกสาร)
+        resume: ข้ามหน้าที่บันทึกเสร็จแล้วตาม checkpoint ของรอบก่อน (ถ้าไฟล์และโมเดลไม่เปลี่ยน)
+        corpus: โฟลเดอร์ของ PDF หรือไฟล์ manifest (.json/.jsonl) ดู corpus_manifest.load_corpus
+        max_documents: จำนวนเอกสารที่ ingest พร้อมกัน (ต้องใช้ workers > 1)
+            worker pool, งบ rate limit และจำนวน request สรุปพร้อมกันใช้ร่วมกันทุกเอกสาร
+        prune: ลบ chunks ของเอกสารที่ไม่อยู่ใน corpus แล้ว (ทำเมื่อทุกเอกสารสำเร็จเท่านั้น)
+        ocr_workers: จำนวน OCR worker processes เมื่อ workers = 1 (OCR รูปของแต่ละหน้าพร้อมกัน)
+    """
     print("🚀 เริ่ม Pipeline: Extract → OCR + PyThaiNLP → Summary → Embedding → Store")
-    print("📄 ประมวลผลหนึ่งหน้า → บันทึก MongoDB → loop ต่อ")
+    if summary_mode == "batch":
+        print(f"📦 โหมด Batch API: extract ทุกหน้าก่อน แล้วสรุปทั้งหมดใน batch เดียวต่อเอกสาร ({max(workers, 1)} workers)")
+    elif workers > 1:
+        print(f"⚡ โหมดขนาน: {workers} workers, summary พร้อมกันสูงสุด {summary_concurrency} requests")
+    else:
+        print("📄 ประมวลผลหนึ่งหน้า → บันทึก MongoDB → loop ต่อ")
     print()
     
     client = None
-    pymupdf_doc = None
-    pdfplumber_pdf = None
+    pool = None
+    ocr_pool = None
     
     try:
         # === INITIALIZATION ===
         print("=== INITIALIZATION ===")
         check_memory()
         
-        # เปิดไฟล์ PDF ทั้ง PyMuPDF และ pdfplumber
-        pymupdf_doc = fitz.open(PDF_PATH)
-        pdfplumber_pdf = pdfplumber.open(PDF_PATH)
-        ocr_reader = get_ocr_reader()
+        documents = load_corpus(corpus) if corpus else [CorpusDocument.from_path(PDF_PATH)]
+        print(f"📚 จำนวนเอกสาร: {len(documents)}")
         
-        total_pages = len(pymupdf_doc)
-        print(f"📚 จำนวนหน้าทั้งหมด: {total_pages} หน้า")
+        # งบจำนวน request สรุปพร้อมกันรวมทุกเอกสาร
+        get_summarization_service(max_concurrency=summary_concurrency)
         
         # เปิด MongoDB connection ครั้งเดียว (ใช้ตลอดทั้ง pipeline)
         print(f"🔗 กำลังเชื่อมต่อ MongoDB Atlas...")
         client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
         client.admin.command('ping')
         print(f"✅ เชื่อมต่อ MongoDB Atlas สำเร็จ")
-        
-        # ตัวแปรสำหรับนับจำนวน chunks ทั้งหมด
-        total_text_chunks = 0
-        total_image_chunks = 0
-        total_table_chunks = 0
-        total_text_processed = 0
-        total_image_processed = 0
-        total_table_processed = 0
-        
-        doc_id_counter = 1  # สำหรับสร้าง doc_id
-        
-        # === LOOP: More Pages (ประมวลผลและบันทึกทีละหน้า) ===
-        print("\n=== STEP 1: PAGE-BY-PAGE PROCESSING & STORING ===")
-        for page_num in range(total_pages):
-            print(f"\n{'='*60}")
-            print(f"📄 กำลังประมวลผลหน้า {page_num + 1}/{total_pages}")
-            print(f"{'='*60}")
-            
-            # ประมวลผลหน้าเดียว (Extract → Summary → Embedding)
-            page_results = process_single_page(
-                page_num=page_num,
-                pymupdf_page=pymupdf_doc[page_num],
-                pdfplumber_pdf=pdfplumber_pdf,
-                ocr_reader=ocr_reader,
-                doc_id_counter=doc_id_counter
-            )
-            
-            # บันทึกลง MongoDB ทันที (หน้าแรกจะลบข้อมูลเก่าก่อน)
-            is_first_page = (page_num == 0)
-            print(f"\n💾 บันทึกผลลัพธ์จากหน้า {page_num + 1} ลง MongoDB...")
-            
-            success = store_page_results_to_mongodb(page_results, client, is_first_page=is_first_page)
-            
-            if success:
-                # นับจำนวน chunks
-                total_text_chunks += len(page_results['text_chunks'])
-                total_image_chunks += len(page_results['image_chunks'])
-                total_table_chunks += len(page_results['table_chunks'])
-                total_text_processed += len(page_results['text_processed_chunks'])
-                total_image_processed += len(page_results['image_processed_chunks'])
-                total_table_processed += len(page_results['table_processed_chunks'])
-                
-                print(f"✅ บันทึกหน้า {page_num + 1} เสร็จสิ้น")
-            else:
-                print(f"⚠️ มีปัญหาในการบันทึกหน้า {page_num + 1} แต่จะดำเนินการต่อ...")
-            
-            # ตรวจสอบ memory ทุก 5 หน้า
-            if (page_num + 1) % 5 == 0:
-                check_memory()
-            
-            # ตรวจสอบว่ามีหน้าอื่นอีกไหม (More Pages Decision)
-            if page_num < total_pages - 1:
-                print(f"➡️ มีหน้าอื่นอีก {total_pages - page_num - 1} หน้า")
+        ensure_chunk_indexes(client)
+        
+        # worker pool เดียวสำหรับทุกเอกสาร (จำกัดจำนวน process ที่ทำ OCR พร้อมกันทั้งระบบ)
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_page_worker)
+            if ocr_workers > 1:
+                print("ℹ️ โหมดขนานทำ OCR ใน page workers อยู่แล้ว ไม่ใช้ --ocr-workers")
+        elif ocr_workers > 1:
+            # OCR pool: OCR รูปของหน้าพร้อมกันหลาย process (extract/summary/store ยังทำทีละหน้า)
+            print(f"🔍 OCR pool: {ocr_workers} workers")
+            ocr_pool = OCRPool(workers=ocr_workers, languages=OCR_LANGUAGES, max_side=OCR_MAX_SIDE, grayscale=OCR_GRAYSCALE)
+        concurrent_documents = max(1, min(max_documents, len(documents))) if pool is not None else 1
+        if max_documents > 1 and pool is None:
+            print("⚠️ การ ingest หลายเอกสารพร้อมกันต้องใช้ --workers > 1 จะประมวลผลทีละเอกสาร")
+        # แบ่งจำนวนหน้าที่ค้างในระบบ (memory) ให้เอกสารที่ทำพร้อมกัน
+        max_pages_in_flight = max(1, workers * 2 // concurrent_documents)
+        
+        def run_document(document):
+            try:
+                return ingest_document(
+                    document, client,
+                    pool=pool,
+                    summary_concurrency=summary_concurrency,
+                    summary_mode=summary_mode,
+                    resume=resume,
+                    max_pages_in_flight=max_pages_in_flight,
+                    ocr_pool=ocr_pool
+                )
+            except Exception as e:
+                print(f"❗ [{document.id}] Error ingesting document: {e}")
+                import traceback
+                traceback.print_exc()
+                return None
+        
+        print("\n=== STEP 1: DOCUMENT-BY-DOCUMENT, PAGE-BY-PAGE PROCESSING & STORING ===")
+        if concurrent_documents > 1:
+            print(f"📚 ingest พร้อมกันสูงสุด {concurrent_documents} เอกสาร")
+            with ThreadPoolExecutor(max_workers=concurrent_documents) as document_pool:
+                results = list(document_pool.map(run_document, documents))
+        else:
+            results = [run_document(document) for document in documents]
+        
+        failed_documents = [
+            document.id for document, result in zip(documents, results)
+            if result is None or result['failed_pages']
+        ]
+        totals = {key: 0 for key, _, _, _, _ in PAGE_CHUNK_COLLECTIONS}
+        for result in results:
+            if result:
+                for key in totals:
+                    totals[key] += result['totals'][key]
+        
+        if prune:
+            if failed_documents:
+                print(f"⚠️ ข้ามการลบเอกสารที่ไม่อยู่ใน corpus เพราะมี {len(failed_documents)} เอกสารที่ไม่สำเร็จ")
             else:
-                print(f"✅ ประมวลผลและบันทึกครบทุกหน้าแล้ว ({total_pages} หน้า)")
+                remove_documents_not_in_corpus(client, [document.id for document in documents])
         
-        # ปิดไฟล์ PDF
-        pymupdf_doc.close()
-        pdfplumber_pdf.close()
-        pymupdf_doc = None
-        pdfplumber_pdf = None
+        # BM25 index ต้องครอบคลุมทุก chunk ใน database (สร้างใหม่เมื่อมี chunk เปลี่ยนหรือยังไม่มี index)
+        if any(totals.values()) or prune or BM25Index.version(BM25_INDEX_PATH) is None:
+            print("\n🔤 กำลังสร้าง BM25 index...")
+            try:
+                print(f"✅ BM25 index: {build_bm25_index(client, BM25_INDEX_PATH)} chunks → {BM25_INDEX_PATH}")
+            except Exception as e:
+                print(f"⚠️ สร้าง BM25 index ไม่สำเร็จ: {e}")
+        
+        # HNSW indexes: เพิ่ม vectors ของ chunks ใหม่ (retrieval โหลด index ที่บันทึกไว้แทนการสร้าง graph เอง)
+        if VECTOR_INDEX_BACKEND == "hnsw" and (any(totals.values()) or prune):
+            print("\n🧭 กำลังอัปเดต HNSW indexes...")
+            try:
+                update_ann_indexes(client, ANN_INDEX_PATH)
+            except Exception as e:
+                print(f"⚠️ อัปเดต HNSW indexes ไม่สำเร็จ: {e}")
         
         # === สรุปผลการประมวลผล ===
         print("\n" + "="*60)
         print("📊 สรุปผลการประมวลผลทั้งหมด")
         print("="*60)
-        print(f"   📝 Text chunks (original): {total_text_chunks}")
-        print(f"   🖼️ Image chunks (original): {total_image_chunks}")
-        print(f"   📊 Table chunks (original): {total_table_chunks}")
-        print(f"   📝 Text chunks (processed): {total_text_processed}")
-        print(f"   🖼️ Image chunks (processed): {total_image_processed}")
-        print(f"   📊 Table chunks (processed): {total_table_processed}")
-        print(f"   📊 Total processed chunks: {total_text_processed + total_image_processed + total_table_processed}")
+        print(f"   📚 Documents: {len(documents) - len(failed_documents)}/{len(documents)} สำเร็จ")
+        if failed_documents:
+            print(f"   ⚠️ เอกสารที่ไม่สำเร็จ: {', '.join(failed_documents)}")
+        print(f"   📝 Text chunks (original): {totals['text_chunks']}")
+        print(f"   🖼️ Image chunks (original): {totals['image_chunks']}")
+        print(f"   📊 Table chunks (original): {totals['table_chunks']}")
+        print(f"   📝 Text chunks (processed): {totals['text_processed_chunks']}")
+        print(f"   🖼️ Image chunks (processed): {totals['image_processed_chunks']}")
+        print(f"   📊 Table chunks (processed): {totals['table_processed_chunks']}")
+        print(f"   📊 Total processed chunks: {totals['text_processed_chunks'] + totals['image_processed_chunks'] + totals['table_processed_chunks']}")
+        cache = get_ingestion_cache()
+        print(f"   🗃️ Ingestion cache ({cache.backend}): ใช้ซ้ำ {cache.hits}, สร้างใหม่ {cache.misses}")
+        if ocr_pool:
+            ocr_stats = ocr_pool.stats()
+            print(f"   🔍 OCR pool: {ocr_stats['images']} รูป, {ocr_stats['images_per_second']:.2f} รูป/วินาที")
+            for pid, worker_stats in sorted(ocr_stats['workers'].items()):
+                print(f"      - worker {pid}: {worker_stats['images']} รูป, {worker_stats['images_per_second']:.2f} รูป/วินาที")
+        if hasattr(get_image_deduplicator, 'dedup'):
+            # นับเฉพาะรูปที่ประมวลผลใน process นี้ (โหมดขนานนับใน worker แต่ละตัว)
+            dedup_stats = get_image_deduplicator.dedup.stats
+            print(f"   ♻️ รูปซ้ำ: xref {dedup_stats['xref_hits']}, ไฟล์เดียวกัน {dedup_stats['exact_hits']}, "
+                  f"หน้าตาเหมือนกัน {dedup_stats['perceptual_hits']} (OCR ใหม่ {dedup_stats['ocr_runs']} รูป)")
+        if hasattr(get_ocr_triage, 'triage'):
+            triage_stats = get_ocr_triage.triage.stats
+            print(f"   ⏭️ OCR triage: OCR {triage_stats['ocr']} รูป, ข้าม {get_ocr_triage.triage.skipped} รูป "
+                  f"(ข้อความอยู่ใน text layer {triage_stats['text_layer']}, ไม่มีข้อความ {triage_stats['no_text']})")
+        if getattr(get_image_embedder, 'embedder', None):
+            image_stats = get_image_embedder.embedder.throughput()
+            print(f"   🖼️ Image embeddings ({get_image_embedder.embedder.backend}): {image_stats['images']} รูป, "
+                  f"{image_stats['batches']} batches, {image_stats['images_per_second']:.1f} รูป/วินาที")
+        if hasattr(get_ocr_text_normalizer, 'normalizer'):
+            text_stats = get_ocr_text_normalizer.normalizer.throughput()
+            print(f"   🔤 ปรับปรุงข้อความ OCR ({OCR_TEXT_MODE}): {text_stats['tokens']} tokens, "
+                  f"{text_stats['tokens_per_second']:.0f} tokens/วินาที (แก้คำใหม่ {text_stats['corrections']}, "
+                  f"จาก cache {text_stats['cache_hits']}, อยู่ในพจนานุกรม {text_stats['dictionary_hits']})")
         
         print("\n✅ Pipeline เสร็จสิ้น!")
         print(f"✅ ข้อมูลทั้งหมดถูกบันทึกใน MongoDB:")
@@ -1229,6 +2255,12 @@ def main():
                 pass
         
     finally:
+        # ปิด worker pool
+        if pool:
+            pool.shutdown()
+        if ocr_pool:
+            ocr_pool.shutdown()
+        
         # ปิด MongoDB connection
         if client:
             try:
@@ -1236,18 +2268,33 @@ def main():
                 print("🔌 ปิด MongoDB connection")
             except:
                 pass
-        
-        # ปิดไฟล์ PDF (ถ้ายังไม่ได้ปิด)
-        if pymupdf_doc:
-            try:
-                pymupdf_doc.close()
-            except:
-                pass
-        if pdfplumber_pdf:
-            try:
-                pdfplumber_pdf.close()
-            except:
-                pass
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="AstroBot PDF ingestion pipeline")
+    arg_parser.add_argument("--workers", type=int, default=int(os.getenv("INGEST_WORKERS", "1")),
+                            help="จำนวน worker process สำหรับ extract/OCR (1 = ทีละหน้า)")
+    arg_parser.add_argument("--summary-concurrency", type=int, default=SUMMARY_CONCURRENCY,
+                            help="จำนวน request สรุปพร้อมกันสูงสุดในโหมดขนาน")
+    arg_parser.add_argument("--summary-mode", choices=["online", "batch"], default=os.getenv("SUMMARY_MODE", "online"),
+                            help="online = สรุปพร้อมกันตามงบ rate limit, batch = ส่งทุก chunk เป็น Batch API job เดียว")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="รันต่อจาก checkpoint ของรอบก่อน (ข้ามหน้าที่บันทึกเสร็จแล้ว)")
+    arg_parser.add_argument("--corpus", default=os.getenv("CORPUS_PATH"),
+                            help="โฟลเดอร์ของ PDF หรือไฟล์ manifest (.json/.jsonl) ของเอกสารที่ต้อง ingest (ไม่ระบุ = PDF_PATH)")
+    arg_parser.add_argument("--max-documents", type=int, default=MAX_CONCURRENT_DOCUMENTS,
+                            help="จำนวนเอกสารที่ ingest พร้อมกัน (ใช้ worker pool ร่วมกัน ต้องใช้ --workers > 1)")
+    arg_parser.add_argument("--prune", action="store_true",
+                            help="ลบ chunks ของเอกสารที่ไม่อยู่ใน corpus แล้ว")
+    arg_parser.add_argument("--ocr-workers", type=int, default=OCR_WORKERS,
+                            help="จำนวน OCR worker processes เมื่อ --workers 1 (OCR หลายรูปของหน้าพร้อมกัน)")
+    arg_parser.add_argument("--migrate-embeddings", action="store_true",
+                            help="re-embed processed chunks ที่ยังเป็นโมเดลอื่นด้วย EMBEDDING_MODEL ทีละ batch (ไม่ ingest)")
+    arg_parser.add_argument("--migrate-pause", type=float, default=0.0,
+                            help="เวลาพัก (วินาที) ระหว่างรอบของ --migrate-embeddings")
+    args = arg_parser.parse_args()
+    if args.migrate_embeddings:
+        run_embedding_migration(pause=args.migrate_pause)
+        raise SystemExit(0)
+    main(workers=args.workers, summary_concurrency=args.summary_concurrency, summary_mode=args.summary_mode,
+         resume=args.resume, corpus=args.corpus, max_documents=args.max_documents, prune=args.prune,
+         ocr_workers=args.ocr_workers)
\ No newline at end of file
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+OCR Pool สำหรับทำ OCR หลายรูปพร้อมกันด้วย worker processes
+
+แต่ละ worker โหลด easyocr.Reader ครั้งเดียวแล้วใช้ซ้ำ (warm reader)
+รูปถูกย่อ/แปลงเป็น grayscale ใน worker ก่อน OCR (ถ้าตั้งค่าไว้) เพื่อไม่ให้ process หลักเป็นคอขวด
+submit() คืน Future ทันที ผู้เรียกส่ง OCR ของทุกรูปในหน้าแล้วค่อยรอผลตอนประกอบ chunks
+เก็บสถิติต่อ worker (จำนวนรูป เวลาที่ใช้ และ throughput)
+"""
+
+import io
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+
+def create_easyocr_reader(languages: Sequence[str]):
+    """สร้าง easyocr.Reader (import ใน worker เท่านั้น)"""
+    import easyocr
+    return easyocr.Reader(list(languages), gpu=False, verbose=False)
+
+
+def prepare_ocr_image(image_bytes: bytes, max_side: Optional[int] = None, grayscale: bool = False):
+    """
+    เตรียมรูปก่อน OCR: ย่อด้านที่ยาวที่สุดไม่เกิน max_side และแปลงเป็น grayscale
+
+    Returns:
+        bytes หรือ numpy array (easyocr รับได้ทั้งสองแบบ) - คืน bytes เดิมถ้าไม่ต้องแปลง
+    """
+    if not max_side and not grayscale:
+        return image_bytes
+    image = Image.open(io.BytesIO(image_bytes))
+    if grayscale:
+        image = image.convert("L")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if max_side and max(image.size) > max_side:
+        scale = max_side / max(image.size)
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+    return np.array(image)
+
+
+# state ของ worker process (ตั้งค่าใน _init_ocr_worker)
+_worker_state = {}
+
+
+def _init_ocr_worker(reader_factory: Callable, languages: List[str], threads_per_worker: int) -> None:
+    if threads_per_worker:
+        # จำกัด thread ของ torch ต่อ process ไม่ให้แย่ง CPU กันเอง
+        try:
+            import torch
+            torch.set_num_threads(threads_per_worker)
+        except ImportError:
+            pass
+    _worker_state["reader"] = reader_factory(languages)
+
+
+def _recognize(image_bytes: bytes, max_side: Optional[int], grayscale: bool):
+    started = time.perf_counter()
+    results = _worker_state["reader"].readtext(prepare_ocr_image(image_bytes, max_side, grayscale))
+    return results, os.getpid(), time.perf_counter() - started
+
+
+class OCRPool:
+    """pool ของ OCR worker processes ที่มี interface readtext เหมือน easyocr.Reader และ submit แบบ async"""
+
+    def __init__(self, workers: int = 2, languages: Sequence[str] = ("en", "th"), max_side: Optional[int] = None,
+                 grayscale: bool = False, threads_per_worker: int = 1,
+                 reader_factory: Callable = create_easyocr_reader):
+        """
+        Args:
+            workers (int): จำนวน worker processes
+            languages: ภาษาของ OCR
+            max_side (int): ย่อรูปให้ด้านที่ยาวที่สุดไม่เกินนี้ก่อน OCR (None = ไม่ย่อ)
+            grayscale (bool): แปลงเป็น grayscale ก่อน OCR
+            threads_per_worker (int): จำนวน torch threads ต่อ worker (0 = ค่าเริ่มต้นของ torch)
+            reader_factory: ฟังก์ชันสร้าง reader ใน worker (ต้อง pickle ได้)
+        """
+        self.workers = workers
+        self.max_side = max_side
+        self.grayscale = grayscale
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_ocr_worker,
+            initargs=(reader_factory, list(languages), threads_per_worker)
+        )
+        self._lock = threading.Lock()
+        self._started_at = time.perf_counter()
+        self.worker_stats: Dict[int, Dict[str, float]] = {}
+
+    def __enter__(self) -> "OCRPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+    def _record(self, pid: int, seconds: float) -> None:
+        with self._lock:
+            stats = self.worker_stats.setdefault(pid, {"images": 0, "seconds": 0.0})
+            stats["images"] += 1
+            stats["seconds"] += seconds
+
+    def submit(self, image_bytes: bytes) -> Future:
+        """
+        ส่งรูปเข้าคิว OCR
+
+        Returns:
+            Future: ผลลัพธ์แบบเดียวกับ easyocr.Reader.readtext ([(bbox, text, confidence), ...])
+        """
+        result = Future()
+        task = self._executor.submit(_recognize, image_bytes, self.max_side, self.grayscale)
+
+        def done(task_future):
+            try:
+                ocr_results, pid, seconds = task_future.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            self._record(pid, seconds)
+            result.set_result(ocr_results)
+
+        task.add_done_callback(done)
+        return result
+
+    def readtext(self, image_bytes: bytes):
+        """OCR แบบ blocking (ใช้แทน easyocr.Reader.readtext ได้)"""
+        return self.submit(image_bytes).result()
+
+    async def recognize(self, image_bytes: bytes):
+        """OCR แบบ async สำหรับใช้ใน event loop"""
+        return await asyncio.wrap_future(self.submit(image_bytes))
+
+    def stats(self) -> dict:
+        """
+        สถิติการทำงาน
+
+        Returns:
+            dict: {'images', 'elapsed', 'images_per_second', 'workers': {pid: {'images', 'seconds', 'images_per_second'}}}
+        """
+        with self._lock:
+            workers = {
+                pid: {**stats, "images_per_second": stats["images"] / stats["seconds"] if stats["seconds"] else 0.0}
+                for pid, stats in self.worker_stats.items()
+            }
+        images = sum(stats["images"] for stats in workers.values())
+        elapsed = time.perf_counter() - self._started_at
+        return {
+            "images": images,
+            "elapsed": elapsed,
+            "images_per_second": images / elapsed if elapsed else 0.0,
+            "workers": workers
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+OCR Triage สำหรับคัดรูปก่อน OCR (OCR เฉพาะรูปที่น่าจะมีข้อความ)
+
+- รูปที่ text layer ของ PDF ครอบคลุมพื้นที่อยู่แล้ว (text blocks ทับรูป) ไม่ต้อง OCR ซ้ำ
+- รูปที่ไม่น่ามีข้อความ (ภาพประกอบ, ภาพถ่าย) ตรวจด้วย heuristic ราคาถูก:
+  ความหนาแน่นของขอบคม (edge density) และสัดส่วนพื้นหลังสีเดียว (ตัวอักษรคือเส้นคมบนพื้นเรียบ)
+รูปที่ไม่ได้ OCR ยังเป็น image chunk สำหรับสร้าง image embedding (CLIP) ตามปกติ
+"""
+
+import threading
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+OCR = "ocr"
+TEXT_LAYER = "text_layer"
+NO_TEXT = "no_text"
+
+
+def _rect_tuple(rect) -> Optional[Tuple[float, float, float, float]]:
+    if rect is None:
+        return None
+    if hasattr(rect, "x0"):
+        return (rect.x0, rect.y0, rect.x1, rect.y1)
+    if isinstance(rect, (list, tuple)) and len(rect) >= 4:
+        return tuple(rect[:4])
+    return None
+
+
+def text_coverage(image_rect, text_rects: Iterable) -> float:
+    """
+    สัดส่วนพื้นที่ของรูปที่ถูก text blocks ทับ
+
+    Args:
+        image_rect: ตำแหน่งของรูปในหน้า (fitz.Rect หรือ (x0, y0, x1, y1))
+        text_rects: ตำแหน่งของ text blocks ในหน้า
+
+    Returns:
+        float: 0.0 - 1.0 (0.0 ถ้าไม่รู้ตำแหน่งของรูป)
+    """
+    image_rect = _rect_tuple(image_rect)
+    if image_rect is None:
+        return 0.0
+    x0, y0, x1, y1 = image_rect
+    area = (x1 - x0) * (y1 - y0)
+    if area <= 0:
+        return 0.0
+    covered = 0.0
+    for rect in text_rects:
+        rect = _rect_tuple(rect)
+        if rect is None:
+            continue
+        width = min(x1, rect[2]) - max(x0, rect[0])
+        height = min(y1, rect[3]) - max(y0, rect[1])
+        if width > 0 and height > 0:
+            covered += width * height
+    return min(covered / area, 1.0)
+
+
+def text_features(image: Image.Image, size: int = 256, edge_threshold: int = 40) -> Tuple[float, float]:
+    """
+    feature ราคาถูกที่บอกว่ารูปน่าจะมีข้อความหรือไม่
+
+    Args:
+        image: รูปภาพ
+        size (int): ย่อรูปให้ด้านที่ยาวที่สุดไม่เกินนี้ก่อนคำนวณ
+        edge_threshold (int): ความต่างของความสว่างระหว่าง pixel ที่ติดกันที่ถือว่าเป็นขอบคม
+
+    Returns:
+        Tuple[float, float]: (edge_density, background_ratio)
+    """
+    gray = image.convert("L")
+    gray.thumbnail((size, size))
+    pixels = np.asarray(gray, dtype=np.int16)
+    if pixels.shape[0] < 2 or pixels.shape[1] < 2:
+        return 0.0, 1.0
+    dx = np.abs(np.diff(pixels, axis=1)) > edge_threshold
+    dy = np.abs(np.diff(pixels, axis=0)) > edge_threshold
+    edge_density = (dx.sum() + dy.sum()) / (dx.size + dy.size)
+    background_ratio = np.mean(np.abs(pixels - np.median(pixels)) <= 24)
+    return float(edge_density), float(background_ratio)
+
+
+class OCRTriage:
+    """ตัดสินว่ารูปไหนต้อง OCR และนับจำนวนรูปที่ข้าม"""
+
+    def __init__(self, enabled: bool = True, max_text_coverage: float = 0.6,
+                 min_edge_density: float = 0.04, min_background_ratio: float = 0.5):
+        """
+        Args:
+            enabled (bool): False = OCR ทุกรูป (นับสถิติอย่างเดียว)
+            max_text_coverage (float): รูปที่ text blocks ทับมากกว่านี้ถือว่ามีข้อความใน text layer แล้ว
+            min_edge_density (float): รูปที่ขอบคมน้อยกว่านี้ถือว่าไม่มีข้อความ
+            min_background_ratio (float): รูปที่พื้นหลังสีเดียวน้อยกว่านี้ (ภาพถ่าย/ลวดลาย) ถือว่าไม่มีข้อความ
+        """
+        self.enabled = enabled
+        self.max_text_coverage = max_text_coverage
+        self.min_edge_density = min_edge_density
+        self.min_background_ratio = min_background_ratio
+        self._lock = threading.Lock()
+        self.stats = {OCR: 0, TEXT_LAYER: 0, NO_TEXT: 0}
+
+    def classify(self, features: Tuple[float, float], coverage: float = 0.0) -> str:
+        """
+        Args:
+            features: ผลจาก text_features()
+            coverage (float): ผลจาก text_coverage()
+
+        Returns:
+            str: "ocr", "text_layer" (ข้อความอยู่ใน text layer แล้ว) หรือ "no_text" (ไม่น่ามีข้อความ)
+        """
+        edge_density, background_ratio = features
+        decision = OCR
+        if self.enabled:
+            if coverage > self.max_text_coverage:
+                decision = TEXT_LAYER
+            elif edge_density < self.min_edge_density or background_ratio < self.min_background_ratio:
+                decision = NO_TEXT
+        with self._lock:
+            self.stats[decision] += 1
+        return decision
+
+    @property
+    def skipped(self) -> int:
+        """จำนวนรูปที่ไม่ต้อง OCR"""
+        with self._lock:
+            return self.stats[TEXT_LAYER] + self.stats[NO_TEXT]
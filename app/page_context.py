@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Page Context สำหรับดึงข้อมูลของหน้า PDF โดย parse แต่ละหน้าครั้งเดียวต่อ backend
+
+- text blocks, รายการรูป และตำแหน่งรูปจาก PyMuPDF ถูก cache ไว้ใน context ของหน้า
+- ตารางหาด้วย PyMuPDF find_tables ก่อน ใช้ pdfplumber เฉพาะเมื่อ PyMuPDF ทำไม่ได้
+- หน้าที่ไม่มีเส้น (vector drawings) ข้ามการหาตารางทั้งหมด (strategy "lines" ต้องใช้เส้นของตาราง)
+- pdfplumber เปิดไฟล์เมื่อต้องใช้ครั้งแรกเท่านั้น (LazyPdfplumber) และล้าง layout ของหน้าหลังใช้
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+TABLE_EXTRACTORS = ("auto", "pymupdf", "pdfplumber")
+
+
+def table_rows_to_text(rows) -> str:
+    """แปลงแถวของตารางเป็นข้อความ (คั่น cell ด้วย " | " และแถวด้วยขึ้นบรรทัดใหม่)"""
+    table_text = ""
+    for row in rows or []:
+        if row:
+            table_text += " | ".join([cell if cell else "" for cell in row]) + "\n"
+    return table_text.strip()
+
+
+class LazyPdfplumber:
+    """pdfplumber PDF ที่เปิดไฟล์เมื่อเข้าถึง pages ครั้งแรก (หน้าที่ PyMuPDF จัดการได้ไม่ต้องเปิดเลย)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pdf = None
+        self._lock = threading.Lock()
+
+    @property
+    def opened(self) -> bool:
+        return self._pdf is not None
+
+    @property
+    def pages(self):
+        with self._lock:
+            if self._pdf is None:
+                import pdfplumber
+                self._pdf = pdfplumber.open(self.path)
+        return self._pdf.pages
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pdf is not None:
+                self._pdf.close()
+                self._pdf = None
+
+
+class PageContext:
+    """ข้อมูลของหน้าเดียวที่ parse แล้ว (ใช้ร่วมกันทุกขั้นตอนของการดึง elements)"""
+
+    def __init__(self, page_num: int, pymupdf_page, pdfplumber_pdf=None, table_extractor: str = "auto"):
+        """
+        Args:
+            page_num (int): หมายเลขหน้า (0-based)
+            pymupdf_page: หน้า PDF จาก PyMuPDF
+            pdfplumber_pdf: pdfplumber PDF หรือ LazyPdfplumber (None = ไม่ใช้ pdfplumber)
+            table_extractor (str): "auto" (PyMuPDF ก่อน แล้วค่อย pdfplumber), "pymupdf" หรือ "pdfplumber"
+        """
+        if table_extractor not in TABLE_EXTRACTORS:
+            raise ValueError(f"table_extractor ต้องเป็นหนึ่งใน {TABLE_EXTRACTORS}: {table_extractor}")
+        self.page_num = page_num
+        self.pymupdf_page = pymupdf_page
+        self.pdfplumber_pdf = pdfplumber_pdf
+        self.table_extractor = table_extractor
+        self._cache: Dict[str, Any] = {}
+        self._image_rects: Dict[int, list] = {}
+        self.table_backend: Optional[str] = None
+
+    def _cached(self, key: str, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def text_blocks(self) -> list:
+        """[(x0, y0, x1, y1, text, block_no, block_type), ...] จาก PyMuPDF"""
+        return self._cached("text_blocks", lambda: self.pymupdf_page.get_text("blocks"))
+
+    @property
+    def images(self) -> list:
+        """รายการรูปในหน้า (get_images(full=True))"""
+        return self._cached("images", lambda: self.pymupdf_page.get_images(full=True))
+
+    def image_rects(self, xref: int) -> list:
+        """ตำแหน่งของรูป (xref) ในหน้า"""
+        if xref not in self._image_rects:
+            from pymupdf.utils import get_image_rects
+            self._image_rects[xref] = get_image_rects(self.pymupdf_page, xref)
+        return self._image_rects[xref]
+
+    @property
+    def has_rulings(self) -> bool:
+        """หน้ามีเส้นหรือกรอบ (vector drawings) หรือไม่ - ไม่มีแปลว่าไม่มีตารางแบบมีเส้น"""
+        def compute():
+            get_drawings = getattr(self.pymupdf_page, "get_cdrawings", None) or self.pymupdf_page.get_drawings
+            return bool(get_drawings())
+        return self._cached("has_rulings", compute)
+
+    def _pymupdf_tables(self) -> List[dict]:
+        tables = []
+        for table_index, table in enumerate(self.pymupdf_page.find_tables().tables):
+            table_text = table_rows_to_text(table.extract())
+            if table_text:
+                bbox = tuple(table.bbox)
+                tables.append({'table_index': table_index, 'text': table_text, 'bbox': bbox, 'y_pos': bbox[1]})
+        return tables
+
+    def _pdfplumber_tables(self) -> List[dict]:
+        if self.pdfplumber_pdf is None or self.page_num >= len(self.pdfplumber_pdf.pages):
+            return []
+        page = self.pdfplumber_pdf.pages[self.page_num]
+        try:
+            tables = []
+            # find_tables ครั้งเดียว แล้ว extract จากตารางที่เจอ (ไม่ parse layout ซ้ำด้วย extract_tables)
+            for table_index, table in enumerate(page.find_tables()):
+                table_text = table_rows_to_text(table.extract())
+                if table_text:
+                    bbox = tuple(table.bbox)
+                    tables.append({'table_index': table_index, 'text': table_text, 'bbox': bbox, 'y_pos': bbox[1]})
+            return tables
+        finally:
+            # ล้าง layout objects ของหน้านี้ (pdfplumber เก็บไว้ใน PDF object จนกว่าจะปิดไฟล์)
+            page.close()
+
+    def tables(self) -> List[dict]:
+        """
+        ตารางในหน้า
+
+        Returns:
+            List[dict]: [{'table_index', 'text', 'bbox', 'y_pos'}, ...]
+        """
+        if "tables" in self._cache:
+            return self._cache["tables"]
+
+        tables: List[dict] = []
+        if not self.has_rulings:
+            self.table_backend = "skipped"
+        else:
+            if self.table_extractor in ("auto", "pymupdf") and hasattr(self.pymupdf_page, "find_tables"):
+                try:
+                    tables = self._pymupdf_tables()
+                    self.table_backend = "pymupdf"
+                except Exception as e:
+                    if self.table_extractor == "pymupdf":
+                        raise
+                    print(f"⚠️ PyMuPDF find_tables ไม่สำเร็จ: {e}, ใช้ pdfplumber แทน")
+            if self.table_backend is None and self.table_extractor in ("auto", "pdfplumber"):
+                tables = self._pdfplumber_tables()
+                self.table_backend = "pdfplumber"
+        self._cache["tables"] = tables
+        return tables
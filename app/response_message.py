@@ -10,9 +10,9 @@ import re
 # ใช้ฟังก์ชัน Retrieval จาก utils
 from .retrieval_utils import ask_question_to_rag, store_user_response, store_user_question, check_and_update_question_limit
 # ใช้ฟังก์ชัน Birth Date Parser
-from .birth_date_parser import extract_birth_date_from_message, generate_birth_chart_prediction
-# ใช้ฟังก์ชัน Content Filter
-from .content_filter import check_content_safety
+from .birth_date_parser import generate_birth_chart_prediction, get_birth_date_parser
+# วิเคราะห์ข้อความครั้งเดียวต่อข้อความ (วันเกิด เจตนา ผลการกรองเนื้อหา)
+from .message_analysis import MessageAnalysis
 
 load_dotenv()
 
@@ -32,8 +32,8 @@ def log_pretty_answer(user_id: str, title: str, answer_text: str):
         pass
 
 # ฟังก์ชัน extract_birth_date_from_message ถูกย้ายไปที่ birth_date_parser.py แล้ว
-def get_or_create_user_profile(user_id: str, user_message: str = None):
-    """ตรวจสอบ/สร้าง user profile ด้วยวันเกิด"""
+def get_or_create_user_profile(user_id: str, user_message: str = None, analysis: MessageAnalysis = None):
+    """ตรวจสอบ/สร้าง user profile ด้วยวันเกิด (analysis: ผลวิเคราะห์ข้อความที่คำนวณแล้ว ถ้ามี)"""
     mongo_uri = os.getenv("MONGO_URL")
     logger.info(f"🌐 Checking user {user_id}")
 
@@ -45,8 +45,9 @@ def get_or_create_user_profile(user_id: str, user_message: str = None):
         logger.info(f"🔎 User found: {user is not None}")
 
         if user_message:
+            analysis = MessageAnalysis.for_text(user_message, analysis)
             # ใช้ฟังก์ชันแยกวันเกิด (แยกเสมอไม่ว่าจะมีข้อมูลอยู่แล้วหรือไม่)
-            birth_date = extract_birth_date_from_message(user_message)
+            birth_date = analysis.birth_date
             logger.info(f"Extracted birth_date: {birth_date}")
             
             if birth_date:
@@ -78,10 +79,10 @@ def get_or_create_user_profile(user_id: str, user_message: str = None):
                 logger.info(f"Saved profile for {user_id}")
                 
                 # ตรวจสอบว่ามีคำขอทำนายดวงกำเนิดหรือไม่
-                if any(keyword in user_message.lower() for keyword in ['ทำนายดวงกำเนิด', 'ดวงกำเนิด', 'ทำนายดวง', 'ดูดวงกำเนิด', 'ราศีอะไร', 'ราศี', 'ดวงชะตา']):
+                if analysis.mentions_horoscope:
                     try:
                         logger.info(f"กำลังสร้างคำทำนายดวงกำเนิดสำหรับ: {user_message}")
-                        birth_chart_prediction = generate_birth_chart_prediction(user_message, user_id)
+                        birth_chart_prediction = generate_birth_chart_prediction(user_message, user_id, analysis=analysis)
                         if birth_chart_prediction and not birth_chart_prediction.startswith("ไม่สามารถ"):
                             logger.info(f"สร้างคำทำนายดวงกำเนิดสำเร็จ (ความยาว: {len(birth_chart_prediction)} ตัวอักษร)")
                             
@@ -102,15 +103,15 @@ def get_or_create_user_profile(user_id: str, user_message: str = None):
                 # สร้างข้อมูลดวงชะตาเพื่อแสดงข้อมูล Ascendant (ถ้ามีเวลาเกิด)
                 ascendant_info = ""
                 try:
-                    from .birth_date_parser import BirthDateParser
-                    parser = BirthDateParser()
-                    birth_info = parser.extract_birth_info(user_message)
+                    parser = get_birth_date_parser()
+                    birth_info = analysis.birth_info
                     if birth_info and birth_info.get('time'):
                         chart_info = parser.generate_birth_chart_info(
                             birth_info['date'], 
                             birth_info.get('time'), 
                             birth_info.get('latitude', 13.7563), 
-                            birth_info.get('longitude', 100.5018)
+                            birth_info.get('longitude', 100.5018),
+                            user_id=user_id
                         )
                         
                         if chart_info and 'ascendant' in chart_info:
@@ -130,29 +131,29 @@ def get_or_create_user_profile(user_id: str, user_message: str = None):
                 # ตอบคำถามโหราศาสตร์ทันที
                 try:
                     logger.info(f"กำลังตอบคำถามโหราศาสตร์สำหรับ: {user_message}")
-                    from .retrieval_utils import ask_question_to_rag
-                    from .birth_date_parser import BirthDateParser
                     
                     # สร้าง chart_info เพื่อส่งไปยัง ask_question_to_rag
-                    parser = BirthDateParser()
-                    birth_info_extracted = parser.extract_birth_info(user_message)
+                    parser = get_birth_date_parser()
+                    birth_info_extracted = analysis.birth_info
                     chart_info_for_rag = None
                     
                     if birth_info_extracted and birth_info_extracted.get('date'):
+                        # ใช้ chart cache: ถ้าคำนวณไปแล้วในส่วน Ascendant ด้านบนจะไม่คำนวณซ้ำ
                         chart_info_for_rag = parser.generate_birth_chart_info(
                             birth_info_extracted['date'],
                             birth_info_extracted.get('time'),
                             birth_info_extracted.get('latitude', 13.7563),
-                            birth_info_extracted.get('longitude', 100.5018)
+                            birth_info_extracted.get('longitude', 100.5018),
+                            user_id=user_id
                         )
                         if chart_info_for_rag:
                             logger.info(f"สร้าง chart_info สำหรับ RAG สำเร็จ: ราศี{chart_info_for_rag['zodiac_sign']}")
                     
                     # ส่ง chart_info ไปกับคำถามถ้ามี
                     if chart_info_for_rag:
-                        astrology_answer = ask_question_to_rag(user_message, user_id, provided_chart_info=chart_info_for_rag)
+                        astrology_answer = ask_question_to_rag(user_message, user_id, provided_chart_info=chart_info_for_rag, analysis=analysis)
                     else:
-                        astrology_answer = ask_question_to_rag(user_message, user_id)
+                        astrology_answer = ask_question_to_rag(user_message, user_id, analysis=analysis)
                     
                     logger.info(f"ได้รับคำตอบโหราศาสตร์ (ความยาว: {len(astrology_answer)} ตัวอักษร)")
                     
@@ -301,8 +302,11 @@ def generate_reply_message(event):
     user_id = event.source.user_id if event.source and hasattr(event.source, 'user_id') else "unknown"
     logger.info(f"📨 Message from {user_id}: {user_text}")
 
+    # วิเคราะห์ข้อความครั้งเดียว แล้วส่งต่อให้ทุก handler
+    analysis = MessageAnalysis(user_text)
+
     # ตรวจสอบความปลอดภัยของเนื้อหาก่อน
-    is_safe, safety_message = check_content_safety(user_text)
+    is_safe, safety_message = analysis.safety
     if not is_safe:
         logger.warning(f"Content filtered for user {user_id}: {safety_message}")
         
@@ -326,7 +330,7 @@ def generate_reply_message(event):
         return TextMessage(text=safety_message)
 
     # ตรวจสอบ/สร้างโปรไฟล์ก่อนใช้งาน
-    profile_status = get_or_create_user_profile(user_id=user_id, user_message=user_text)
+    profile_status = get_or_create_user_profile(user_id=user_id, user_message=user_text, analysis=analysis)
     if profile_status:
         return TextMessage(text=profile_status)
 
@@ -379,9 +383,9 @@ def generate_reply_message(event):
     # ถ้ามี profile แล้ว ให้ถามตอบได้ผ่าน RAG
     try:
         # ตรวจสอบว่ามีคำขอทำนายดวงกำเนิดหรือไม่
-        if any(keyword in user_text.lower() for keyword in ['ทำนายดวงกำเนิด', 'ดวงกำเนิด', 'ทำนายดวง', 'ดูดวงกำเนิด']):
+        if analysis.is_birth_chart_request:
             logger.info(f"กำลังสร้างคำทำนายดวงกำเนิดสำหรับ: {user_text}")
-            birth_chart_prediction = generate_birth_chart_prediction(user_text, user_id)
+            birth_chart_prediction = generate_birth_chart_prediction(user_text, user_id, analysis=analysis)
             if birth_chart_prediction and not birth_chart_prediction.startswith("ไม่สามารถ"):
                 logger.info(f"สร้างคำทำนายดวงกำเนิดสำเร็จ (ความยาว: {len(birth_chart_prediction)} ตัวอักษร)")
                 reply_text = birth_chart_prediction
@@ -411,7 +415,7 @@ def generate_reply_message(event):
                 )
         else:
             logger.info(f"กำลังประมวลผลคำถาม: {user_text}")
-            reply_text = ask_question_to_rag(user_text, user_id=user_id)
+            reply_text = ask_question_to_rag(user_text, user_id=user_id, analysis=analysis)
             # ป้องกันกรณีที่คำตอบไม่ใช่สตริง หรือเป็น None
             if not isinstance(reply_text, str):
                 logger.warning(f"reply_text is not str (type={type(reply_text)}), coercing to string")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Semantic Chunker สำหรับแบ่งข้อความยาวเป็น chunks ตามความหมาย
+
+- แบ่งประโยคภาษาไทย (เว้นวรรคระหว่างคำไทย) และภาษาอังกฤษ (. ! ? ตามด้วยช่องว่าง) และขึ้นบรรทัดใหม่
+- คำนวณ cosine distance ของประโยคที่ติดกันทีเดียวทั้ง window (vectorized)
+- ตัด chunk ตรงจุดที่ความหมายเปลี่ยน (distance สูงกว่า percentile ของ window) โดยขนาดอยู่ในช่วง min/max
+- encode ทีละ window แล้ว yield chunks ต่อเนื่อง จึงรองรับข้อความยาวเท่าใดก็ได้โดยไม่ตัดทิ้ง
+"""
+
+import re
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# จุดแบ่งประโยค: หลัง . ! ? …, ขึ้นบรรทัดใหม่ หรือช่องว่างระหว่างตัวอักษรไทย
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+|\s*\n\s*|(?<=[ก-๙])\s+(?=[ก-๙])')
+_SOFT_BREAK = re.compile(r'\s')
+
+
+def _split_long(sentence: str, max_chars: int) -> Iterator[str]:
+    """ตัดประโยคที่ยาวเกิน max_chars (เลือกตัดที่ช่องว่างสุดท้ายก่อนถึงขนาด ถ้ามี)"""
+    while len(sentence) > max_chars:
+        cut = max_chars
+        for match in _SOFT_BREAK.finditer(sentence, 0, max_chars):
+            cut = match.start()
+        cut = cut or max_chars
+        yield sentence[:cut].strip()
+        sentence = sentence[cut:].strip()
+    if sentence:
+        yield sentence
+
+
+def iter_sentences(text: str, max_chars: int = 1000) -> Iterator[str]:
+    """
+    แบ่งข้อความเป็นประโยค (ทีละประโยค ไม่สร้าง list ของทั้งข้อความ)
+
+    Args:
+        text (str): ข้อความ
+        max_chars (int): ประโยคที่ยาวกว่านี้ถูกตัดย่อย
+
+    Returns:
+        Iterator[str]: ประโยคที่ไม่ว่าง
+    """
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        sentence = text[start:match.start()].strip()
+        start = match.end()
+        if sentence:
+            yield from _split_long(sentence, max_chars)
+    sentence = text[start:].strip()
+    if sentence:
+        yield from _split_long(sentence, max_chars)
+
+
+def adjacent_distances(embeddings: np.ndarray, previous: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    cosine distance ระหว่างประโยคที่ติดกัน (ตำแหน่ง i = ระยะระหว่างประโยค i-1 กับ i)
+
+    Args:
+        embeddings (np.ndarray): embeddings ที่ normalize แล้ว ขนาด (n, dim)
+        previous (np.ndarray): embedding ของประโยคสุดท้ายใน window ก่อนหน้า (None = ประโยคแรกของข้อความ)
+
+    Returns:
+        np.ndarray: distances ขนาด (n,)
+    """
+    distances = np.zeros(len(embeddings), dtype=np.float32)
+    if len(embeddings) > 1:
+        distances[1:] = 1.0 - np.einsum("ij,ij->i", embeddings[1:], embeddings[:-1])
+    if previous is not None and len(embeddings):
+        distances[0] = 1.0 - float(embeddings[0] @ previous)
+    return distances
+
+
+class SemanticChunker:
+    """แบ่งข้อความตามจุดที่ความหมายของประโยคที่ติดกันเปลี่ยน ภายในขนาด min/max"""
+
+    def __init__(self, encode: Optional[Callable] = None, min_chars: int = 200, max_chars: int = 1000,
+                 window: int = 256, breakpoint_percentile: float = 80.0):
+        """
+        Args:
+            encode: ฟังก์ชันสร้าง embeddings ของ list ประโยค (เช่น SentenceTransformer.encode)
+                    None = แบ่งตามขนาดอย่างเดียว
+            min_chars (int): ขนาดต่ำสุดของ chunk ก่อนจะตัดตามความหมายได้
+            max_chars (int): ขนาดสูงสุดของ chunk
+            window (int): จำนวนประโยคที่ encode ต่อครั้ง
+            breakpoint_percentile (float): distance ที่สูงกว่า percentile นี้ของ window ถือเป็นจุดเปลี่ยนเรื่อง
+        """
+        self.encode = encode
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.window = window
+        self.breakpoint_percentile = breakpoint_percentile
+
+    def _embed(self, sentences: List[str]) -> np.ndarray:
+        embeddings = np.asarray(self.encode(sentences), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def _size(current: List[Tuple[str, float]]) -> int:
+        return sum(len(sentence) for sentence, _ in current) + max(len(current) - 1, 0)
+
+    @staticmethod
+    def _join(current: List[Tuple[str, float]]) -> str:
+        return " ".join(sentence for sentence, _ in current)
+
+    def _best_cut(self, current: List[Tuple[str, float]]) -> int:
+        """ตำแหน่งตัดที่ distance สูงสุด (เท่ากันเลือกตำแหน่งหลังสุด) โดยส่วนแรกมีขนาดอย่างน้อย min_chars (ไม่มี = ตัดทั้งหมด)"""
+        best, best_distance = len(current), -1.0
+        size = -1
+        for index in range(1, len(current)):
+            size += len(current[index - 1][0]) + 1
+            if size >= self.min_chars and current[index][1] >= best_distance:
+                best, best_distance = index, current[index][1]
+        return best
+
+    def iter_chunks(self, sentences: Iterable[str]) -> Iterator[str]:
+        """
+        รวมประโยคเป็น chunks (encode ทีละ window)
+
+        Args:
+            sentences: ประโยคตามลำดับ (iterator ได้)
+
+        Returns:
+            Iterator[str]: ข้อความของแต่ละ chunk
+        """
+        sentences = iter(sentences)
+        current: List[Tuple[str, float]] = []
+        previous = None
+        while True:
+            batch = list(islice(sentences, self.window))
+            if not batch:
+                break
+            if self.encode is not None:
+                embeddings = self._embed(batch)
+                distances = adjacent_distances(embeddings, previous)
+                previous = embeddings[-1]
+                threshold = float(np.percentile(distances, self.breakpoint_percentile))
+            else:
+                distances = np.zeros(len(batch), dtype=np.float32)
+                threshold = np.inf
+
+            for sentence, distance in zip(batch, distances.tolist()):
+                if current and distance > 0 and distance >= threshold and self._size(current) >= self.min_chars:
+                    yield self._join(current)
+                    current = []
+                while current and self._size(current) + 1 + len(sentence) > self.max_chars:
+                    cut = self._best_cut(current)
+                    yield self._join(current[:cut])
+                    current = current[cut:]
+                current.append((sentence, distance))
+        if current:
+            yield self._join(current)
+
+    def chunk(self, text: str) -> Iterator[str]:
+        """แบ่งข้อความเป็น chunks ตามความหมาย"""
+        return self.iter_chunks(iter_sentences(text, self.max_chars))
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Summarization Service สำหรับสรุปเนื้อหาระหว่าง ingestion ด้วย OpenAI
+
+- จำกัดจำนวน request พร้อมกัน และเคารพงบ requests-per-minute / tokens-per-minute
+- ลองใหม่ด้วย exponential backoff แบบสุ่ม (full jitter) และรอตาม Retry-After ที่ server ส่งมา
+- โหมด offline: ส่งทุก chunk เป็นงานเดียวผ่าน Batch API แล้ว poll จนได้ผลลัพธ์
+"""
+
+import io
+import json
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import openai
+from openai import OpenAI
+
+# version ของ prompt สรุป (เปลี่ยนเมื่อแก้ build_summary_prompt เพื่อให้ cache ของ summary เดิมไม่ถูกใช้)
+SUMMARY_PROMPT_VERSION = "v1"
+
+# สถานะของ batch ที่จบแล้ว
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_summary_prompt(text: str, content_type: str) -> str:
+    """สร้าง prompt สำหรับสรุปเนื้อหา (ภาษาไทย ไม่เกิน 3 ประโยค)"""
+    return f"""
+            สรุปเนื้อหาต่อไปนี้ให้กระชับและเข้าใจง่าย (ภาษาไทย):
+
+            ประเภทเนื้อหา: {content_type}
+            เนื้อหา: {text[:2000]}...
+
+            กรุณาสรุปให้ไม่เกิน 3 ประโยค
+            """
+
+
+def fallback_summary(text: str) -> str:
+    """summary สำรองเมื่อสรุปไม่สำเร็จ (ใช้ข้อความต้นฉบับที่ตัดแล้ว)"""
+    return text[:200] + "..." if len(text) > 200 else text
+
+
+def estimate_tokens(text: str) -> int:
+    """ประมาณจำนวน token ของข้อความแบบคร่าวๆ (ภาษาไทยใช้ token ต่อตัวอักษรมากกว่าภาษาอังกฤษ)"""
+    return max(1, len(text) // 2)
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """
+    อ่านเวลาที่ server ขอให้รอจาก header retry-after-ms / retry-after
+
+    Returns:
+        float: จำนวนวินาทีที่ต้องรอ หรือ None ถ้าไม่มี header
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        # รูปแบบ HTTP date
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """error ที่ควรลองใหม่: rate limit, timeout, การเชื่อมต่อ และ 5xx"""
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 409 or error.status_code >= 500
+    return False
+
+
+class RateLimiter:
+    """token bucket สำหรับงบ requests-per-minute และ tokens-per-minute (ใช้ร่วมกันได้หลาย thread)"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            requests_per_minute (int): จำนวน request สูงสุดต่อนาที
+            tokens_per_minute (int): จำนวน token สูงสุดต่อนาที
+            clock, sleep: ฟังก์ชันเวลา (เปลี่ยนได้ในการทดสอบ)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(self.requests_per_minute,
+                                      self._request_allowance + elapsed * self.requests_per_minute / 60)
+        self._token_allowance = min(self.tokens_per_minute,
+                                    self._token_allowance + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens: int) -> float:
+        """
+        รอจนมีงบเพียงพอสำหรับ 1 request และ tokens ที่ประมาณไว้
+
+        Returns:
+            float: เวลาที่รอทั้งหมด (วินาที)
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._request_allowance >= 1 and self._token_allowance >= tokens:
+                    self._request_allowance -= 1
+                    self._token_allowance -= tokens
+                    return waited
+                wait = max(
+                    (1 - self._request_allowance) * 60 / self.requests_per_minute,
+                    (tokens - self._token_allowance) * 60 / self.tokens_per_minute
+                )
+            self._sleep(wait)
+            waited += wait
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """ปรับงบ token ตามจำนวนที่ใช้จริงหลังได้รับคำตอบ"""
+        with self._lock:
+            self._token_allowance -= actual_tokens - estimated_tokens
+
+
+class SummarizationService:
+    """บริการสรุปเนื้อหาแบบ concurrent ที่เคารพ rate limit พร้อมโหมด Batch API"""
+
+    def __init__(self, client: OpenAI = None, api_key: str = None, base_url: str = None,
+                 model: str = "gpt-4o-mini", max_concurrency: int = 8,
+                 requests_per_minute: int = 500, tokens_per_minute: int = 200000,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 max_completion_tokens: int = 150, timeout: float = 30,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            client (OpenAI): OpenAI client (ถ้าไม่ระบุจะสร้างจาก api_key/base_url โดยปิด retry ภายใน SDK)
+            model (str): โมเดลที่ใช้สรุป
+            max_concurrency (int): จำนวน request พร้อมกันสูงสุดของ service (รวมทุก thread/event loop ที่ใช้ instance นี้)
+            requests_per_minute (int), tokens_per_minute (int): งบ rate limit
+            max_retries (int): จำนวนครั้งที่ลองใหม่สูงสุด
+            base_delay (float), max_delay (float): ช่วงเวลา backoff (วินาที)
+            max_completion_tokens (int): ความยาว summary สูงสุด
+            timeout (float): timeout ต่อ request (วินาที)
+        """
+        self.client = client or OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_completion_tokens = max_completion_tokens
+        self.timeout = timeout
+        self._sleep = sleep
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute, sleep=sleep)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+        self._stats_lock = threading.Lock()
+        # จำกัด request ที่ส่งออกไปพร้อมกันจริง แม้หลายเอกสารจะมี semaphore ของตัวเอง
+        self._request_slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    # ------------------------
+    # Online mode
+    # ------------------------
+    def _request_body(self, text: str, content_type: str) -> dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": build_summary_prompt(text, content_type)}],
+            "max_completion_tokens": self.max_completion_tokens,
+            "temperature": 0.7
+        }
+
+    def backoff_delay(self, attempt: int, error: Exception = None) -> float:
+        """เวลารอก่อนลองใหม่: ตาม Retry-After ถ้ามี มิฉะนั้น exponential backoff แบบ full jitter"""
+        retry_after = parse_retry_after(error) if error is not None else None
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def summarize(self, text: str, content_type: str) -> str:
+        """
+        สรุปเนื้อหาหนึ่งรายการ (blocking) พร้อม rate limit และ retry
+
+        Args:
+            text (str): ข้อความที่ต้องการสรุป
+            content_type (str): ประเภทเนื้อหา (text/image/table)
+
+        Returns:
+            str: summary หรือข้อความต้นฉบับที่ตัดแล้วถ้าล้มเหลว
+        """
+        body = self._request_body(text, content_type)
+        estimated = estimate_tokens(body["messages"][0]["content"]) + self.max_completion_tokens
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(estimated)
+            try:
+                self._count("requests")
+                with self._request_slots:
+                    response = self.client.chat.completions.create(timeout=self.timeout, **body)
+                usage = getattr(response, "usage", None)
+                if usage is not None and getattr(usage, "total_tokens", None):
+                    self.rate_limiter.record_usage(estimated, usage.total_tokens)
+                return response.choices[0].message.content.strip()
+            except Exception as e:
+                if attempt < self.max_retries and is_retryable(e):
+                    delay = self.backoff_delay(attempt, e)
+                    self._count("retries")
+                    print(f"   ⚠️ Error in summarization (attempt {attempt + 1}/{self.max_retries + 1}): {str(e)[:100]}")
+                    print(f"   ⏳ รอ {delay:.1f} วินาที แล้วลองใหม่...")
+                    self._sleep(delay)
+                    continue
+                self._count("failures")
+                print(f"   ❗ Error in summarization after {attempt + 1} attempts: {str(e)[:100]}")
+                return fallback_summary(text)
+        return fallback_summary(text)
+
+    async def summarize_async(self, text: str, content_type: str, semaphore: asyncio.Semaphore = None) -> str:
+        """สรุปเนื้อหาแบบ async (รัน summarize ใน thread โดยจำกัดจำนวนพร้อมกันด้วย semaphore)"""
+        if semaphore is None:
+            return await asyncio.to_thread(self.summarize, text, content_type)
+        async with semaphore:
+            return await asyncio.to_thread(self.summarize, text, content_type)
+
+    async def summarize_many(self, items: Iterable[Tuple[str, str, str]],
+                             semaphore: asyncio.Semaphore = None) -> Dict[str, str]:
+        """
+        สรุปหลายรายการพร้อมกัน (ไม่เกิน max_concurrency)
+
+        Args:
+            items: [(custom_id, text, content_type), ...]
+            semaphore: semaphore ที่ใช้ร่วมกับงานอื่น (ถ้าไม่ระบุจะสร้างตาม max_concurrency)
+
+        Returns:
+            dict: {custom_id: summary}
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+
+        async def summarize_one(custom_id, text, content_type):
+            return custom_id, await self.summarize_async(text, content_type, semaphore)
+
+        results = await asyncio.gather(*[summarize_one(*item) for item in items])
+        return dict(results)
+
+    # ------------------------
+    # Batch API mode (offline)
+    # ------------------------
+    def submit_batch(self, items: List[Tuple[str, str, str]]) -> str:
+        """
+        ส่งทุกรายการเป็นงานเดียวผ่าน Batch API
+
+        Args:
+            items: [(custom_id, text, content_type), ...] (custom_id ต้องไม่ซ้ำกัน)
+
+        Returns:
+            str: batch id
+        """
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._request_body(text, content_type)
+            }, ensure_ascii=False)
+            for custom_id, text, content_type in items
+        ]
+        payload = io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+        input_file = self.client.files.create(file=("summaries.jsonl", payload), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"📦 ส่ง Batch API job {batch.id} ({len(items)} รายการ)")
+        return batch.id
+
+    def wait_for_batch(self, batch_id: str, poll_interval: float = 30.0, timeout: float = None):
+        """poll สถานะ batch จนจบ (completed/failed/expired/cancelled)"""
+        started = time.monotonic()
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            counts = getattr(batch, "request_counts", None)
+            progress = f" ({counts.completed}/{counts.total})" if counts is not None else ""
+            print(f"   ⏳ Batch {batch_id}: {batch.status}{progress}")
+            if batch.status in BATCH_TERMINAL_STATUSES:
+                return batch
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise TimeoutError(f"Batch {batch_id} did not finish within {timeout} seconds")
+            self._sleep(poll_interval)
+
+    def _read_batch_output(self, file_id: str) -> Dict[str, str]:
+        summaries = {}
+        content = self.client.files.content(file_id).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                continue
+            try:
+                summaries[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+            except (KeyError, IndexError, TypeError):
+                continue
+        return summaries
+
+    def summarize_batch(self, items: List[Tuple[str, str, str]], poll_interval: float = 30.0,
+                        timeout: float = None) -> Dict[str, str]:
+        """
+        สรุปทุกรายการผ่าน Batch API (ถูกกว่าและไม่ติด rate limit แบบ online แต่ใช้เวลานานกว่า)
+        รายการที่ batch ไม่สำเร็จจะใช้ข้อความต้นฉบับที่ตัดแล้ว
+
+        Returns:
+            dict: {custom_id: summary}
+        """
+        if not items:
+            return {}
+        batch_id = self.submit_batch(items)
+        batch = self.wait_for_batch(batch_id, poll_interval=poll_interval, timeout=timeout)
+
+        summaries = {}
+        if batch.status == "completed" and batch.output_file_id:
+            summaries = self._read_batch_output(batch.output_file_id)
+        else:
+            print(f"   ❗ Batch {batch_id} จบด้วยสถานะ {batch.status}")
+
+        missing = [item for item in items if item[0] not in summaries]
+        if missing:
+            self._count("failures", len(missing))
+            print(f"   ⚠️ {len(missing)} รายการสรุปไม่สำเร็จใน batch ใช้ข้อความต้นฉบับแทน")
+        for custom_id, text, _ in missing:
+            summaries[custom_id] = fallback_summary(text)
+        print(f"✅ Batch {batch_id} เสร็จ: {len(items) - len(missing)}/{len(items)} รายการ")
+        return summaries
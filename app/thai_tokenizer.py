@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Thai Tokenizer สำหรับแบ่งคำข้อความของผู้ใช้ด้วย PyThaiNLP (newmm)
+
+เก็บผลการแบ่งคำไว้ใน cache โดยใช้ hash ของข้อความเป็น key
+เพื่อให้ content filter และการวิเคราะห์ข้อความส่วนอื่นใช้ผลเดียวกันโดยไม่ต้องแบ่งคำซ้ำ
+"""
+
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from config import THAI_TOKEN_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pythainlp import word_tokenize
+    PYTHAINLP_AVAILABLE = True
+except ImportError:
+    PYTHAINLP_AVAILABLE = False
+    logger.warning("⚠️ PyThaiNLP not available, falling back to whitespace/punctuation tokenization")
+
+# ใช้เมื่อไม่มี PyThaiNLP: แยกตามช่องว่างและเครื่องหมาย (ภาษาไทยที่เขียนติดกันจะเป็น token เดียว)
+_FALLBACK_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+class ThaiTokenizer:
+    """ตัวแบ่งคำภาษาไทยพร้อม LRU cache ตาม hash ของข้อความ"""
+
+    def __init__(self, max_size: int = 2048, engine: str = "newmm"):
+        """
+        Args:
+            max_size (int): จำนวนข้อความสูงสุดที่เก็บผลการแบ่งคำไว้
+            engine (str): engine ของ PyThaiNLP ที่ใช้แบ่งคำ
+        """
+        self.max_size = max_size
+        self.engine = engine
+        self._cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def available(self) -> bool:
+        """แบ่งคำด้วย PyThaiNLP ได้หรือไม่"""
+        return PYTHAINLP_AVAILABLE
+
+    @staticmethod
+    def message_hash(text: str) -> str:
+        """สร้าง key ของ cache จากข้อความ"""
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _segment(self, text: str) -> Tuple[str, ...]:
+        if PYTHAINLP_AVAILABLE:
+            return tuple(word_tokenize(text, engine=self.engine, keep_whitespace=False))
+        return tuple(_FALLBACK_TOKEN_PATTERN.findall(text))
+
+    def tokenize(self, text: str) -> Tuple[str, ...]:
+        """
+        แบ่งคำข้อความ (ใช้ผลจาก cache ถ้าเคยแบ่งข้อความนี้แล้ว)
+
+        Args:
+            text (str): ข้อความที่ต้องการแบ่งคำ
+
+        Returns:
+            Tuple[str, ...]: รายการคำ (ไม่รวมช่องว่าง)
+        """
+        if not text:
+            return ()
+
+        key = self.message_hash(text)
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tokens
+
+        tokens = self._segment(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tokens
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+# สร้าง instance สำหรับใช้งาน
+thai_tokenizer = ThaiTokenizer(max_size=THAI_TOKEN_CACHE_SIZE)
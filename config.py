@@ -25,5 +25,32 @@ PROCESSED_IMAGE_COLLECTION = "processed_image_chunks"
 PROCESSED_TABLE_COLLECTION = "processed_table_chunks"
 
 # PDF Paths
-PDF_PATH = "data/attention.pdf"
+PDF_PATH = os.getenv("PDF_PATH", "data/attention.pdf")
+CORPUS_PATH = os.getenv("CORPUS_PATH")  # โฟลเดอร์ของ PDF หรือไฟล์ manifest (.json/.jsonl) สำหรับ ingest หลายเอกสาร
 
+
+# Chart Cache (เก็บผลการคำนวณดวงชะตาที่คำนวณแล้ว)
+CHART_CACHE_MAX_SIZE = int(os.getenv("CHART_CACHE_MAX_SIZE", "1024"))
+CHART_CACHE_PERSIST = os.getenv("CHART_CACHE_PERSIST", "false").lower() == "true"  # บันทึก chart ลง user_profiles
+
+# Content Filter
+# ไฟล์ JSON รายการคำแยกตามหมวด เช่น {"profanity": [...], "violence": [...], "drugs": [...]} (ใช้แทนรายการเริ่มต้นของหมวดนั้น)
+CONTENT_FILTER_WORDS_PATH = os.getenv("CONTENT_FILTER_WORDS_PATH", "data/content_filter_words.json")
+CONTENT_FILTER_MODE = os.getenv("CONTENT_FILTER_MODE", "tokens")  # tokens (PyThaiNLP newmm) | automaton
+THAI_TOKEN_CACHE_SIZE = int(os.getenv("THAI_TOKEN_CACHE_SIZE", "2048"))  # จำนวนข้อความที่เก็บผลการแบ่งคำ
+
+# Retrieval (ค้นหา processed chunks ด้วย vector index ในหน่วยความจำ)
+VECTOR_INDEX_RELOAD_INTERVAL = float(os.getenv("VECTOR_INDEX_RELOAD_INTERVAL", "60"))  # วินาทีขั้นต่ำระหว่างการตรวจว่า collection เปลี่ยน
+CLIP_TEXT_MODEL_NAME = os.getenv("CLIP_TEXT_MODEL_NAME", "sentence-transformers/clip-ViT-B-32-multilingual-v1")  # text tower ที่อยู่ใน vector space เดียวกับ clip-ViT-B-32 (รองรับภาษาไทย)
+CLIP_IMAGE_TOP_K = int(os.getenv("CLIP_IMAGE_TOP_K", "2"))  # จำนวนรูปที่ค้นหาด้วย CLIP image embeddings
+CLIP_SIMILARITY_THRESHOLD = float(os.getenv("CLIP_SIMILARITY_THRESHOLD", "0.2"))  # similarity ระหว่างคำถามกับรูปขั้นต่ำ
+RRF_K = int(os.getenv("RRF_K", "60"))  # ค่าคงที่ของ Reciprocal Rank Fusion
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")  # dense (embeddings อย่างเดียว) | hybrid (embeddings + BM25)
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", "output/bm25_index")  # สร้างตอน ingest (multimodel_rag.py)
+BM25_TOP_K = int(os.getenv("BM25_TOP_K", "4"))  # จำนวนผลลัพธ์จาก BM25 ที่นำไปรวมกับผลจาก embeddings
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "hnsw")  # exact (matrix product ทุก vector) | hnsw (ANN เมื่อมี vectors ถึง ANN_MIN_VECTORS)
+ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "20000"))  # embedding space ที่เล็กกว่านี้ค้นหาแบบ exact
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", "output/ann_index")  # HNSW indexes ที่ ingest บันทึกไว้ (multimodel_rag.py)
+HNSW_M = int(os.getenv("HNSW_M", "16"))  # จำนวน links ต่อ node ของ HNSW graph
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))  # ขนาด candidate list ตอนสร้าง graph
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))  # ขนาด candidate list ตอนค้นหา (มาก = recall สูงขึ้นแต่ช้าลง)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ ANN Index (HNSW สำหรับค้นหา embeddings เมื่อ corpus ใหญ่)
+"""
+
+import os
+import sys
+import tempfile
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from bson import ObjectId
+from app.ann_index import ANNIndex, recall_at_k, sync_ann_index
+from app.vector_index import VectorIndex, VectorIndexRegistry
+
+def _docs(vectors, prefix="v"):
+    return [{"_id": f"{prefix}{i}", "document_id": f"d{i % 5}", "embeddings": vector.tolist()} for i, vector in enumerate(vectors)]
+
+def test_ann_index():
+    """ทดสอบ recall เทียบกับ exact search การกรองเอกสาร การบันทึก/โหลด และการเพิ่ม vectors แบบ incremental"""
+
+    print("=== ทดสอบ ANN Index ===\n")
+
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(600, 32)).astype(np.float32)
+    queries = rng.normal(size=(30, 32))
+    docs = _docs(vectors)
+
+    # ทดสอบ 1: NumPy HNSW มี recall@10 สูงเมื่อ ef มาก และผลเหมือน VectorIndex (exact)
+    index = ANNIndex("embeddings", 32, M=8, ef_construction=64, ef=128, backend="numpy")
+    assert index.add(docs) == 600 and len(index) == 600 and index.backend == "numpy"
+    recall = recall_at_k(index, queries, k=10)
+    assert recall >= 0.95
+    exact = VectorIndex("embeddings", docs)
+    assert [doc["_id"] for _, doc in index.search(queries[0], k=3)] == [doc["_id"] for _, doc in exact.search(queries[0], k=3)]
+    print(f"✅ recall@10 = {recall:.3f}")
+
+    # ทดสอบ 2: ค้นหาเฉพาะเอกสารที่ระบุ (ทั้งแบบกรองจาก graph และแบบ exact เมื่อเอกสารที่เลือกมีน้อย)
+    hits = index.search(queries[1], k=4, document_ids=["d2", "d3"])
+    assert len(hits) == 4 and {doc["document_id"] for _, doc in hits} <= {"d2", "d3"}
+    assert [doc["_id"] for _, doc in hits] == [doc["_id"] for _, doc in exact.search(queries[1], k=4, document_ids=["d2", "d3"])]
+    assert index.search(queries[1], k=2, document_ids=["missing"]) == []
+    assert index.search([1.0, 0.0], k=2) == []
+    print("✅ กรองตาม document_ids")
+
+    # ทดสอบ 3: บันทึก/โหลดแล้วผลเหมือนเดิม (ObjectId ใน payload ยังเป็น ObjectId)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        object_id = ObjectId()
+        index.add([{"_id": object_id, "document_id": "d9", "embeddings": queries[2].tolist()}])
+        path = index.save(os.path.join(tmp_dir, "processed_text_chunks.embeddings.all-MiniLM-L6-v2"))
+        loaded = ANNIndex.load(path, ef=32)
+        assert loaded.ef == 32 and len(loaded) == 601
+        assert loaded.search(queries[2], k=1)[0][1]["_id"] == object_id
+        loaded.ef = index.ef
+        assert [doc["_id"] for _, doc in loaded.search(queries[3], k=5)] == [doc["_id"] for _, doc in index.search(queries[3], k=5)]
+    print("✅ บันทึกและโหลด index")
+
+    # ทดสอบ 4: sync เพิ่มเฉพาะ vectors ใหม่ และสร้าง graph ใหม่เมื่อมี vectors ถูกลบ
+    new_docs = _docs(rng.normal(size=(20, 32)).astype(np.float32), prefix="w")
+    synced, added = sync_ann_index(loaded, "embeddings", docs + new_docs[:10] + [{"_id": object_id, "embeddings": queries[2].tolist()}])
+    assert synced is loaded and added == 10 and len(synced) == 611
+    synced, added = sync_ann_index(synced, "embeddings", docs, backend="numpy", M=8)
+    assert synced is not loaded and added == 600 and len(synced) == 600
+    print("✅ เพิ่ม vectors แบบ incremental")
+
+    # ทดสอบ 5: registry ใช้ ANNIndex กับ space ที่ใหญ่พอ และใช้ index เดิมเมื่อมีเอกสารเพิ่ม
+    class FakeCollection:
+        def __init__(self, docs):
+            self.docs = docs
+
+        def find(self, query=None, projection=None):
+            return [dict(doc) for doc in self.docs]
+
+        def find_one(self, query=None, projection=None, sort=None):
+            return self.docs[-1] if sort[0][0] == "_id" else None
+
+        def estimated_document_count(self):
+            return len(self.docs)
+
+    collection = FakeCollection(list(docs[:200]))
+    registry = VectorIndexRegistry(reload_interval=0, get_collection=lambda name: collection, backend="hnsw",
+                                   ann_min_vectors=100, ann_params={"backend": "numpy", "M": 8})
+    ann = registry.get("processed_text_chunks")
+    assert isinstance(ann, ANNIndex) and len(ann) == 200
+    collection.docs.extend(docs[200:210])
+    assert registry.get("processed_text_chunks") is ann and len(ann) == 210
+    small = VectorIndexRegistry(reload_interval=0, get_collection=lambda name: FakeCollection(docs[:50]), backend="hnsw",
+                                ann_min_vectors=100)
+    assert isinstance(small.get("processed_text_chunks"), VectorIndex)
+    print("✅ registry ใช้ HNSW กับ space ขนาดใหญ่")
+
+    print("\n🎉 ทดสอบ ANN Index ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_ann_index()
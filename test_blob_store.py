@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Blob Store (เก็บรูปภาพแยกจาก chunk documents แบบ content-addressed)
+"""
+
+import os
+import sys
+import tempfile
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.blob_store import LocalBlobStore, blob_sha256, image_ref, store_image
+
+def test_blob_store():
+    """ทดสอบ image_ref และการเขียน/อ่านรูปภาพจากโฟลเดอร์"""
+
+    print("=== ทดสอบ Blob Store ===\n")
+
+    image_bytes = b"\x89PNG fake image bytes"
+
+    # ทดสอบ 1: image_ref เก็บเฉพาะ hash, ขนาด และ dimensions (ไม่มีข้อมูลรูป)
+    ref = image_ref(image_bytes, 120, 80, "png")
+    assert ref == {"store": None, "sha256": blob_sha256(image_bytes), "size": len(image_bytes),
+                   "width": 120, "height": 80, "format": "png"}
+    print("✅ image_ref มีเฉพาะ reference และ metadata ของรูป")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = LocalBlobStore(os.path.join(tmp_dir, "blobs"))
+
+        # ทดสอบ 2: เขียนแล้วอ่านกลับได้ตาม sha256
+        store_image(store, image_bytes, ref)
+        assert ref["store"] == "local"
+        assert store.exists(ref["sha256"]) and store.get(ref["sha256"]) == image_bytes
+        print("✅ เขียนและอ่านรูปภาพตาม sha256")
+
+        # ทดสอบ 3: รูปเดียวกันเก็บไฟล์เดียว (ไม่มีไฟล์ชั่วคราวค้าง)
+        store_image(store, image_bytes, image_ref(image_bytes, 120, 80, "png"))
+        files = [name for _, _, names in os.walk(store.directory) for name in names]
+        assert files == [ref["sha256"]]
+        print("✅ รูปซ้ำไม่ถูกเก็บซ้ำ")
+
+    print("\n🎉 ทดสอบ Blob Store ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_blob_store()
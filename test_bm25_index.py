@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ BM25 Index (ค้นหาด้วยคำภาษาไทยจาก index ที่บันทึกเป็นไฟล์)
+"""
+
+import os
+import sys
+import tempfile
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from app.bm25_index import BM25Index, BM25IndexBuilder, analyze
+
+CHUNKS = [
+    ("a_1_text_0", "a", "ลัคนาคือราศีที่ขึ้นทางขอบฟ้าตะวันออกในเวลาเกิด"),
+    ("a_2_text_0", "a", "ราศีเมษเป็นราศีธาตุไฟ มีความกล้าหาญ"),
+    ("b_1_text_0", "b", "คนเกิดที่เชียงใหม่ลัคนาราศีสิงห์ ลัคนาจะบอกบุคลิกภาพภายนอก"),
+    ("b_2_text_0", "b", "The Sun card means success and joy"),
+]
+
+def _build(path):
+    builder = BM25IndexBuilder()
+    for doc_id, document_id, text in CHUNKS:
+        builder.add({"collection": "processed_text_chunks", "doc_id": doc_id, "document_id": document_id}, text)
+    return builder.save(path)
+
+def test_bm25_index():
+    """ทดสอบการแบ่งคำ การบันทึก/เปิด index และการค้นหา"""
+
+    print("=== ทดสอบ BM25 Index ===\n")
+
+    # ทดสอบ 1: แบ่งคำภาษาไทย ตัดเครื่องหมายและตัวพิมพ์ใหญ่
+    terms = analyze("ลัคนาของคนเกิดที่เชียงใหม่, The SUN!")
+    assert "ลัคนา" in terms and "เชียงใหม่" in terms and "sun" in terms
+    assert "," not in terms and "!" not in terms
+    print(f"✅ แบ่งคำ: {terms}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bm25")
+        _build(path)
+        index = BM25Index(path)
+
+        # ทดสอบ 2: arrays เปิดแบบ memory-mapped
+        assert len(index) == 4
+        assert isinstance(index.postings, np.memmap) and isinstance(index.tfs, np.memmap)
+        print("✅ เปิด index แบบ memory-mapped")
+
+        # ทดสอบ 3: เอกสารที่มีคำค้นหลายครั้งได้อันดับสูงกว่า
+        hits = index.search("ลัคนาคืออะไร", k=2)
+        assert [doc["doc_id"] for _, doc in hits] == ["b_1_text_0", "a_1_text_0"]
+        assert hits[0][0] > hits[1][0] > 0
+        assert index.search("sun", k=3)[0][1]["doc_id"] == "b_2_text_0"
+        print("✅ ค้นหาด้วยคำภาษาไทยและอังกฤษ")
+
+        # ทดสอบ 4: กรองตาม document_ids และคำที่ไม่มีใน index
+        assert [doc["doc_id"] for _, doc in index.search("ลัคนา", k=5, document_ids=["a"])] == ["a_1_text_0"]
+        assert index.search("ดาวพลูโต", k=5) == []
+        print("✅ กรองตาม document_ids")
+
+        # ทดสอบ 5: สร้างใหม่ทับ index เดิมได้ (index ที่เปิดอยู่ยังอ่านได้)
+        version = BM25Index.version(path)
+        _build(path)
+        assert BM25Index.version(path) is not None and not os.path.exists(path + ".tmp")
+        assert index.search("ลัคนา", k=1)[0][1]["doc_id"] == "b_1_text_0"
+        assert BM25Index.version(os.path.join(tmp_dir, "missing")) is None
+        print(f"✅ สร้าง index ใหม่ทับได้ (version เดิม {version:.0f})")
+
+    print("\n🎉 ทดสอบ BM25 Index ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_bm25_index()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Bounded Stream (ต่อ stage ของ pipeline ด้วยคิวขนาดจำกัด)
+"""
+
+import os
+import sys
+import time
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.bounded_stream import prefetch
+
+def test_bounded_stream():
+    """ทดสอบลำดับผลลัพธ์ ขนาดคิว การส่งต่อ exception และการหยุดกลางทาง"""
+
+    print("=== ทดสอบ Bounded Stream ===\n")
+
+    produced = []
+
+    def pages(count):
+        for page_num in range(count):
+            produced.append(page_num)
+            yield {"page_num": page_num}
+
+    # ทดสอบ 1: ผลลัพธ์เรียงตามลำดับเดิม และอ่านล่วงหน้าไม่เกินขนาดคิว
+    stream = prefetch(pages(100), maxsize=2)
+    assert next(stream) == {"page_num": 0}
+    time.sleep(0.3)
+    # หน้าที่อ่านแล้ว 1 + ในคิว 2 + ที่ producer ถือรอคิวว่าง 1
+    assert len(produced) <= 4, produced
+    assert [page["page_num"] for page in stream] == list(range(1, 100))
+    print("✅ เรียงตามลำดับและอ่านล่วงหน้าไม่เกินขนาดคิว")
+
+    # ทดสอบ 2: ต่อหลาย stage และ exception ของ stage ก่อนหน้าถูกส่งต่อ
+    def failing():
+        yield 1
+        raise RuntimeError("extract failed")
+
+    doubled = prefetch((value * 2 for value in prefetch(failing())), maxsize=1)
+    assert next(doubled) == 2
+    try:
+        next(doubled)
+        assert False, "ต้อง raise"
+    except RuntimeError as e:
+        assert str(e) == "extract failed"
+    print("✅ ส่งต่อ exception ข้าม stage")
+
+    # ทดสอบ 3: เลิกอ่านกลางทางแล้ว producer หยุด
+    produced.clear()
+    stream = prefetch(pages(1000), maxsize=2)
+    next(stream)
+    stream.close()
+    count = len(produced)
+    time.sleep(0.3)
+    assert len(produced) == count < 10
+    print("✅ producer หยุดเมื่อเลิกอ่าน")
+
+    print("\n🎉 ทดสอบ Bounded Stream ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_bounded_stream()
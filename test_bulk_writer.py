@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Bulk Writer (เขียน chunks ลง MongoDB เป็นชุดพร้อมลองใหม่เมื่อเจอ error ชั่วคราว)
+"""
+
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pymongo import InsertOne
+from pymongo.errors import AutoReconnect, BulkWriteError
+from app.bulk_writer import BulkWriter
+
+class FakeResult:
+    def __init__(self, operations):
+        self.inserted_count = sum(isinstance(op, InsertOne) for op in operations)
+        self.upserted_count = len(operations) - self.inserted_count
+        self.modified_count = 0
+
+class FakeCollection:
+    """collection จำลองที่บันทึกทุก bulk_write และล้มเหลวตาม errors ที่กำหนด"""
+
+    def __init__(self, errors=None):
+        self.calls = []
+        self.errors = list(errors or [])
+
+    def bulk_write(self, operations, ordered=True, session=None):
+        assert ordered is False
+        self.calls.append(list(operations))
+        if self.errors:
+            raise self.errors.pop(0)
+        return FakeResult(operations)
+
+def test_bulk_writer():
+    """ทดสอบการแบ่ง batch และการลองใหม่"""
+
+    print("=== ทดสอบ Bulk Writer ===\n")
+
+    # ทดสอบ 1: แบ่ง batch ตาม batch_size และเขียนที่เหลือเมื่อออกจาก with
+    collection = FakeCollection()
+    with BulkWriter(collection, batch_size=2, sleep=lambda _: None) as writer:
+        for i in range(5):
+            writer.insert({"doc_id": f"doc_{i}"})
+    assert [len(call) for call in collection.calls] == [2, 2, 1]
+    assert writer.stats["inserted"] == 5 and writer.stats["batches"] == 3
+    assert all("_id" in op._doc for call in collection.calls for op in call)
+    print("✅ เขียนเป็นชุดตาม batch_size")
+
+    # ทดสอบ 2: network error ลองใหม่ทั้ง batch (insert ซ้ำที่เขียนไปแล้วไม่นับเป็น error)
+    duplicate = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "duplicate"}],
+                                "nInserted": 1})
+    collection = FakeCollection([AutoReconnect("primary stepped down"), duplicate])
+    writer = BulkWriter(collection, batch_size=10, sleep=lambda _: None)
+    writer.insert({"doc_id": "a"})
+    writer.insert({"doc_id": "b"})
+    writer.flush()
+    assert len(collection.calls) == 2 and writer.stats["retries"] == 1
+    assert collection.calls[0][0]._doc["_id"] == collection.calls[1][0]._doc["_id"]
+    print("✅ ลองใหม่เมื่อ network error โดยไม่สร้างเอกสารซ้ำ")
+
+    # ทดสอบ 3: ลองใหม่เฉพาะ operation ที่ล้มเหลวด้วย error ชั่วคราว
+    not_primary = BulkWriteError({"writeErrors": [{"index": 1, "code": 10107, "errmsg": "not primary"}],
+                                  "nInserted": 0, "nUpserted": 2})
+    collection = FakeCollection([not_primary])
+    writer = BulkWriter(collection, batch_size=10, sleep=lambda _: None)
+    for i in range(3):
+        writer.replace({"doc_id": f"doc_{i}"}, {"doc_id": f"doc_{i}"})
+    writer.flush()
+    assert [len(call) for call in collection.calls] == [3, 1]
+    assert collection.calls[1][0]._filter == {"doc_id": "doc_1"}
+    assert writer.stats["upserted"] == 3
+    print("✅ ลองใหม่เฉพาะ operation ที่ล้มเหลว")
+
+    # ทดสอบ 4: error ถาวร (เช่น validation) ไม่ลองใหม่
+    invalid = BulkWriteError({"writeErrors": [{"index": 0, "code": 121, "errmsg": "validation failed"}]})
+    collection = FakeCollection([invalid])
+    writer = BulkWriter(collection, sleep=lambda _: None)
+    writer.replace({"doc_id": "x"}, {"doc_id": "x"})
+    try:
+        writer.flush()
+        assert False, "ควร raise BulkWriteError"
+    except BulkWriteError:
+        assert len(collection.calls) == 1
+    print("✅ ไม่ลองใหม่เมื่อเป็น error ถาวร")
+
+    print("\n🎉 ทดสอบ Bulk Writer ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_bulk_writer()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Chart Cache (การเก็บผลการคำนวณดวงชะตาที่คำนวณแล้ว)
+"""
+
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.chart_cache import ChartCache
+
+def test_chart_cache():
+    """ทดสอบการ hit/miss, LRU eviction และการคืนค่าสำเนา"""
+
+    print("=== ทดสอบ Chart Cache ===\n")
+
+    cache = ChartCache(max_size=2)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'zodiac_sign': 'กุมภ์', 'ascendant': {'sign': 'สิงห์'}}
+
+    # ทดสอบ 1: พิกัดที่ต่างกันเล็กน้อย (ทศนิยมตำแหน่งที่ 6) ต้องได้ key เดียวกัน
+    key = cache.make_key("09/02/2004", "10:30", 13.756331, 100.501765)
+    assert key == cache.make_key("09/02/2004", "10:30", 13.7563, 100.5018)
+    print("✅ พิกัดถูกปัดเป็น key เดียวกัน")
+
+    # ทดสอบ 2: คำนวณครั้งเดียว ครั้งที่สองต้องมาจาก cache
+    first = cache.get_or_compute(key, compute)
+    second = cache.get_or_compute(key, compute)
+    assert first == second and len(calls) == 1
+    assert cache.hits == 1 and cache.misses == 1
+    print("✅ คำนวณครั้งเดียวแล้วใช้ cache")
+
+    # ทดสอบ 3: แก้ไขผลลัพธ์แล้วต้องไม่กระทบข้อมูลใน cache
+    second['ascendant']['sign'] = 'แก้ไข'
+    assert cache.get(key)['ascendant']['sign'] == 'สิงห์'
+    print("✅ ผู้เรียกได้สำเนา ไม่กระทบ cache")
+
+    # ทดสอบ 4: LRU eviction เมื่อเกิน max_size
+    cache.put(cache.make_key("01/01/1990"), {'zodiac_sign': 'ธนู'})
+    cache.put(cache.make_key("02/02/1991"), {'zodiac_sign': 'มังกร'})
+    assert cache.get(key) is None
+    print("✅ ลบ chart ที่ใช้นานที่สุดเมื่อ cache เต็ม")
+
+    # ทดสอบ 5: ผลที่คำนวณไม่สำเร็จต้องไม่ถูกเก็บ
+    none_key = cache.make_key("31/02/2000")
+    assert cache.get_or_compute(none_key, lambda: None) is None
+    assert cache.get(none_key) is None
+    print("✅ ไม่เก็บผลที่คำนวณไม่สำเร็จ\n")
+
+if __name__ == "__main__":
+    test_chart_cache()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Content Filter Engine (สแกนทุกหมวดในครั้งเดียว)
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.content_filter import ContentFilter
+from config import CONTENT_FILTER_MODE
+from app.thai_tokenizer import thai_tokenizer
+
+def test_content_filter():
+    """ทดสอบการตรวจหาคำแต่ละหมวดและการโหลดรายการคำจากไฟล์"""
+
+    print("=== ทดสอบ Content Filter Engine ===\n")
+
+    content_filter = ContentFilter(mode="automaton")
+
+    # ทดสอบ 1: ข้อความปกติต้องผ่าน
+    assert content_filter.is_inappropriate("ขอดูดวงวันเกิด 09/02/2004 หน่อยครับ") == (False, "", [])
+    print("✅ ข้อความปกติผ่านการกรอง")
+
+    # ทดสอบ 2: คำหยาบภาษาอังกฤษต้องตรงทั้งคำ
+    assert content_filter.contains_profanity("what the FUCK") == (True, ["fuck"])
+    assert content_filter.contains_profanity("dickens novel") == (False, [])
+    print("✅ คำหยาบภาษาอังกฤษตรวจแบบทั้งคำ")
+
+    # ทดสอบ 3: หมวดความรุนแรงต้องพบคำที่ซ้อนกันทั้งหมด
+    assert content_filter.contains_violence("คิดจะฆ่าตัวตาย") == (True, ["ฆ่า", "ตาย", "ฆ่าตัวตาย"])
+    print("✅ พบคำที่ซ้อนกันในการสแกนครั้งเดียว")
+
+    # ทดสอบ 4: สแกนครั้งเดียวได้ทุกหมวด และเลือกหมวดตามลำดับความสำคัญ
+    text = "shit มีปืนกับยาบ้า"
+    assert content_filter.scan(text) == {"profanity": ["shit"], "violence": ["ปืน"], "drugs": ["ยาบ้า"]}
+    assert content_filter.is_inappropriate(text) == (True, "profanity", ["shit"])
+    print("✅ คืนค่าทุกหมวดและเรียงตามลำดับความสำคัญ")
+
+    # ทดสอบ 5: โหลดรายการคำจากไฟล์ JSON แทนรายการเริ่มต้น
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump({"drugs": ["กระท่อม"], "spam": ["ซื้อหวย"]}, f, ensure_ascii=False)
+        words_path = f.name
+    try:
+        custom_filter = ContentFilter(words_path=words_path, mode="automaton")
+        assert custom_filter.contains_drug_content("ยาบ้า") == (False, [])
+        assert custom_filter.contains_drug_content("ใบกระท่อม") == (True, ["กระท่อม"])
+        is_safe, _ = custom_filter.filter_message("สนใจซื้อหวยไหม")
+        assert not is_safe
+        print("✅ โหลดรายการคำจากไฟล์ได้โดยไม่ต้องแก้โค้ด\n")
+    finally:
+        os.remove(words_path)
+
+def test_token_mode():
+    """ทดสอบโหมด tokens (แบ่งคำด้วย PyThaiNLP) และการใช้ผลการแบ่งคำซ้ำ"""
+
+    print("=== ทดสอบ Content Filter โหมด tokens ===\n")
+
+    content_filter = ContentFilter(mode="tokens")
+    if content_filter.mode != "tokens":
+        print("⚠️ ไม่มี PyThaiNLP ข้ามการทดสอบโหมด tokens\n")
+        return
+
+    # ทดสอบ 0: ไม่ระบุ mode ใช้ค่าเดียวกับ CONTENT_FILTER_MODE ของ config
+    assert ContentFilter().mode == CONTENT_FILTER_MODE
+    print(f"✅ mode เริ่มต้นตาม config: {CONTENT_FILTER_MODE}")
+
+    # ทดสอบ 1: คำไทยที่เป็นส่วนหนึ่งของคำอื่นต้องไม่ถูกจับ
+    assert content_filter.is_inappropriate("อีกไม่นานจะได้ไปเที่ยว") == (False, "", [])
+    assert content_filter.is_inappropriate("ก้นหอยอร่อยมาก") == (False, "", [])
+    print("✅ ไม่จับคำหยาบที่เป็นส่วนหนึ่งของคำปกติ")
+
+    # ทดสอบ 2: คำหยาบที่เป็นคำเดี่ยวต้องถูกจับ
+    assert content_filter.contains_profanity("อีกไม่นานกูจะไป") == (True, ["กู"])
+    assert content_filter.contains_drug_content("มียาบ้าไหม") == (True, ["ยาบ้า"])
+    print("✅ จับคำหยาบที่เป็นคำเดี่ยว")
+
+    # ทดสอบ 3: ข้อความเดิมต้องไม่ถูกแบ่งคำซ้ำ
+    text = "ดวงความรักเดือนนี้เป็นอย่างไร"
+    content_filter.scan(text)
+    misses = thai_tokenizer.misses
+    thai_tokenizer.tokenize(text)
+    assert thai_tokenizer.misses == misses
+    print("✅ ใช้ผลการแบ่งคำจาก cache\n")
+
+if __name__ == "__main__":
+    test_content_filter()
+    test_token_mode()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Corpus Manifest (รายการเอกสารสำหรับ ingest หลายไฟล์)
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.corpus_manifest import CorpusDocument, document_id_for_path, load_corpus
+
+def _touch(path, content=b"%PDF-1.4"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+def test_corpus_manifest():
+    """ทดสอบการโหลด corpus จากโฟลเดอร์และ manifest และ document id ที่คงที่"""
+
+    print("=== ทดสอบ Corpus Manifest ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _touch(os.path.join(tmp_dir, "books", "Thai Astrology.pdf"))
+        _touch(os.path.join(tmp_dir, "books", "tarot", "major.PDF"))
+        _touch(os.path.join(tmp_dir, "books", "notes.txt"))
+
+        # ทดสอบ 1: โฟลเดอร์ = ทุก PDF ในโฟลเดอร์ย่อย, id จาก path สัมพัทธ์
+        documents = load_corpus(os.path.join(tmp_dir, "books"))
+        assert [document.id for document in documents] == ["thai_astrology", "tarot_major"]
+        assert document_id_for_path("/any/where/Thai Astrology.pdf") == "thai_astrology"
+        print("✅ โหลด PDF จากโฟลเดอร์และสร้าง id คงที่")
+
+        # ทดสอบ 2: manifest กำหนด id, title และ metadata ได้ และข้ามไฟล์ที่ไม่มี
+        manifest = os.path.join(tmp_dir, "corpus.json")
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump({"documents": [
+                {"path": "books/Thai Astrology.pdf", "id": "astro", "title": "โหราศาสตร์ไทย", "language": "th"},
+                "books/tarot/major.PDF",
+                {"path": "books/missing.pdf"}
+            ]}, f, ensure_ascii=False)
+        documents = load_corpus(manifest)
+        assert [document.id for document in documents] == ["astro", "books_tarot_major"]
+        source = documents[0].source
+        assert source["title"] == "โหราศาสตร์ไทย" and source["language"] == "th"
+        assert source["sha256"] == CorpusDocument.from_path(documents[0].path).sha256
+        print("✅ manifest กำหนด id/title/metadata ได้และข้ามไฟล์ที่ไม่มี")
+
+        # ทดสอบ 3: id ซ้ำกันต้องแจ้ง error
+        duplicate = os.path.join(tmp_dir, "duplicate.jsonl")
+        with open(duplicate, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"path": "books/Thai Astrology.pdf", "id": "astro"}) + "\n")
+            f.write(json.dumps({"path": "books/tarot/major.PDF", "id": "astro"}) + "\n")
+        try:
+            load_corpus(duplicate)
+            assert False, "ควรแจ้ง error เมื่อ id ซ้ำ"
+        except ValueError:
+            print("✅ แจ้ง error เมื่อ document id ซ้ำ")
+
+    print("\n🎉 ทดสอบ Corpus Manifest ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_corpus_manifest()
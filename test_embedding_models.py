@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Embedding Models (text embeddings แบบมีเวอร์ชัน)
+"""
+
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.embedding_models import EMBEDDING_MODELS, LEGACY_EMBEDDING_MODEL_ID, embedding_model_of, get_embedding_spec
+
+def test_embedding_models():
+    """ทดสอบการค้นหาโมเดล การกำกับ vector และ chunks เก่าที่ไม่มี embedding_model"""
+
+    print("=== ทดสอบ Embedding Models ===\n")
+
+    # ทดสอบ 1: ค้นหาด้วย model id หรือชื่อโมเดล และโมเดลที่ไม่รู้จักใช้ชื่อเป็น model id
+    potion = get_embedding_spec("potion-multilingual-128M")
+    assert potion is EMBEDDING_MODELS["potion-multilingual-128M"]
+    assert get_embedding_spec("minishlab/potion-multilingual-128M") is potion
+    custom = get_embedding_spec("intfloat/multilingual-e5-small")
+    assert custom.model_id == custom.name == "intfloat/multilingual-e5-small" and custom.dimension is None
+    print("✅ ค้นหาโมเดลจาก model id/ชื่อ")
+
+    # ทดสอบ 2: vector ที่บันทึกมี model id และขนาดกำกับ
+    assert potion.stamp([0.1, 0.2]) == {"embeddings": [0.1, 0.2], "embedding_model": "potion-multilingual-128M", "embedding_dim": 2}
+    assert len(EMBEDDING_MODELS[LEGACY_EMBEDDING_MODEL_ID].fallback_vector()) == 384
+    assert len(potion.fallback_vector()) == 256
+    print("✅ stamp และ fallback vector")
+
+    # ทดสอบ 3: chunks เก่าที่ไม่มี embedding_model เป็นโมเดลเดิม
+    assert embedding_model_of({"embeddings": [0.0]}) == LEGACY_EMBEDDING_MODEL_ID
+    assert embedding_model_of({"embedding_model": "potion-multilingual-128M"}) == "potion-multilingual-128M"
+    print("✅ chunks เก่าเป็นโมเดลเดิม")
+
+    print("\n🎉 ทดสอบ Embedding Models ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_embedding_models()
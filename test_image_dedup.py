@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Image Dedup (ใช้ผล OCR ซ้ำสำหรับรูปที่ซ้ำกันตาม xref, sha256 และ perceptual hash)
+"""
+
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image, ImageDraw
+from app.image_dedup import ImageDeduplicator, dhash, hamming_distance
+
+class DictCache:
+    """cache จำลอง (แทน IngestionCache)"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def put_many(self, values):
+        self.values.update(values)
+
+def _zodiac_glyph():
+    image = Image.new("RGB", (200, 120), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20, 20, 120, 90), fill=(10, 10, 10))
+    draw.ellipse((130, 30, 190, 100), fill=(120, 0, 0))
+    return image
+
+def test_image_dedup():
+    """ทดสอบ dHash และการหา OCR ของรูปซ้ำ"""
+
+    print("=== ทดสอบ Image Dedup ===\n")
+
+    glyph = _zodiac_glyph()
+    resized = glyph.resize((150, 90))
+    other = Image.new("RGB", (200, 120), (255, 255, 255))
+    ImageDraw.Draw(other).ellipse((10, 10, 110, 110), fill=(0, 0, 200))
+
+    # ทดสอบ 1: dHash ของรูปที่ย่อขนาดใกล้เคียงกัน แต่รูปอื่นต่างกันมาก
+    assert hamming_distance(dhash(glyph), dhash(resized)) <= 4
+    assert hamming_distance(dhash(glyph), dhash(other)) > 4
+    print("✅ dHash ทนต่อการย่อขนาด")
+
+    cache = DictCache()
+    dedup = ImageDeduplicator(cache=cache, ocr_version="v1")
+    phash = dhash(glyph)
+    dedup.remember("sha-glyph", phash, 200 / 120, "ราศีเมษ", "ราศีเมษ")
+
+    # ทดสอบ 2: ไฟล์เดียวกันและรูปที่หน้าตาเหมือนกันใช้ผล OCR เดิม
+    assert dedup.find("sha-glyph", phash, 200 / 120)["text"] == "ราศีเมษ"
+    similar = dedup.find("sha-resized", dhash(resized), 150 / 90)
+    assert similar["sha256"] == "sha-glyph"
+    assert dedup.find("sha-other", dhash(other), 200 / 120) is None
+    print("✅ ใช้ผล OCR ของรูปที่ซ้ำกัน")
+
+    # ทดสอบ 3: process อื่น (ไม่มีความจำใน memory) ใช้ผลจาก cache ได้
+    fresh = ImageDeduplicator(cache=cache, ocr_version="v1")
+    assert fresh.find("sha-glyph", phash, 200 / 120)["text"] == "ราศีเมษ"
+    assert ImageDeduplicator(cache=cache, ocr_version="v2").find("sha-glyph", phash, 200 / 120) is None
+    print("✅ ผล OCR ใช้ข้าม process ได้และแยกตามค่าตั้ง OCR")
+
+    # ทดสอบ 4: xref ในเอกสารเดียวกัน
+    dedup.remember_xref("thai_astrology", 12, {"skipped": True})
+    assert dedup.lookup_xref("thai_astrology", 12) == {"skipped": True}
+    assert dedup.lookup_xref("other_book", 12) is None
+    assert dedup.stats["xref_hits"] == 1
+    print("✅ จำรูปตาม xref แยกตามเอกสาร")
+
+    print("\n🎉 ทดสอบ Image Dedup ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_image_dedup()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Image Embedder (CLIP image embeddings แบบ batch)
+"""
+
+import io
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image
+from app.image_embedder import CLIP_MEAN, CLIP_STD, ImageEmbedder, clip_pixel_values, load_clip_image
+
+class FakeEncoder:
+    """encoder จำลองที่จำขนาด batch ที่ได้รับ"""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, images, batch_size=32):
+        self.batches.append(len(images))
+        return np.array([[image.width, image.height, float(np.asarray(image).mean())] for image in images])
+
+def _png(size, color):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def test_image_embedder():
+    """ทดสอบการเตรียมรูป การรวม batch และการ encode รูปซ้ำครั้งเดียว"""
+
+    print("=== ทดสอบ Image Embedder ===\n")
+
+    # ทดสอบ 1: ย่อรูปใหญ่ให้ด้านสั้นเท่ากับ 224 ตอน decode
+    image = load_clip_image(_png((1000, 500), (255, 0, 0)))
+    assert image.size == (448, 224) and image.mode == "RGB"
+    assert load_clip_image(_png((100, 80), (0, 0, 0))).size == (100, 80)
+    print("✅ ย่อรูปตอน decode")
+
+    # ทดสอบ 2: pixel values ของ CLIP (center crop + normalize)
+    pixels = clip_pixel_values(Image.new("RGB", (300, 100), (255, 255, 255)))
+    assert pixels.shape == (3, 224, 224) and pixels.dtype == np.float32
+    assert np.allclose(pixels[:, 0, 0], (1.0 - CLIP_MEAN) / CLIP_STD)
+    print("✅ pixel values ขนาด (3, 224, 224)")
+
+    # ทดสอบ 3: รวมเป็น batch และรูปเดียวกัน encode ครั้งเดียว
+    encoder = FakeEncoder()
+    embedder = ImageEmbedder(encoder, batch_size=2, decode_workers=2)
+    red, blue, green = _png((50, 40), (255, 0, 0)), _png((60, 40), (0, 0, 255)), _png((70, 40), (0, 255, 0))
+    embeddings = embedder.embed_many([("red", red), ("blue", blue), ("red", red), ("green", green)])
+    assert encoder.batches == [2, 1]
+    assert embeddings["red"][:2] == [50.0, 40.0] and embeddings["green"][:2] == [70.0, 40.0]
+    print(f"✅ encode {len(embeddings)} รูปใน {len(encoder.batches)} batches")
+
+    # ทดสอบ 4: รูปที่ decode ไม่ได้ได้ None โดยไม่กระทบรูปอื่น
+    embeddings = embedder.embed_many([("broken", b"not an image"), ("blue", blue)])
+    assert embeddings["broken"] is None and embeddings["blue"] is not None
+    stats = embedder.throughput()
+    assert stats["images"] == 4 and stats["batches"] == 3
+    embedder.shutdown()
+    print(f"✅ รูปเสียได้ None ({stats['images_per_second']:.0f} รูป/วินาที)")
+
+    print("\n🎉 ทดสอบ Image Embedder ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_image_embedder()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+ทดสอบการ ingest เอกสาร (checkpoint รายหน้า, การลบ chunks เก่าเมื่อบางหน้าประมวลผลไม่สำเร็จ
+และโหมดขนานที่บันทึกตามลำดับหน้า)
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+import fitz
+import multimodel_rag
+from PIL import Image, ImageDraw
+from blob_store import LocalBlobStore
+from corpus_manifest import CorpusDocument
+from image_dedup import ImageDeduplicator
+from ocr_triage import OCR, NO_TEXT
+
+class FakeCollection:
+    """collection จำลองที่เก็บ chunks ตาม doc_id (รองรับ delete_many ของ remove_stale_chunks)"""
+
+    def __init__(self):
+        self.docs = {}
+        self.writes = 0
+
+    def find(self, query, projection=None, session=None):
+        return [self.docs[doc_id] for doc_id in query["doc_id"]["$in"] if doc_id in self.docs]
+
+    def bulk_write(self, operations, ordered=False, session=None):
+        for operation in operations:
+            self.docs[operation._filter["doc_id"]] = operation._doc
+        self.writes += len(operations)
+        return type("BulkWriteResult", (), {"inserted_count": 0, "upserted_count": 0, "modified_count": len(operations)})()
+
+    def delete_many(self, query):
+        keep = set(query["doc_id"]["$nin"])
+        removed = [doc_id for doc_id, doc in self.docs.items()
+                   if doc["document_id"] == query["document_id"] and doc_id not in keep]
+        for doc_id in removed:
+            del self.docs[doc_id]
+        return type("DeleteResult", (), {"deleted_count": len(removed)})()
+
+class FakeClient:
+    """MongoDB client จำลอง: client[db][collection]"""
+
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, db_name):
+        client = self
+
+        class Database:
+            def __getitem__(self, collection_name):
+                return client.collections.setdefault((db_name, collection_name), FakeCollection())
+        return Database()
+
+    def doc_ids(self):
+        return sorted(doc_id for collection in self.collections.values() for doc_id in collection.docs)
+
+def fake_store_page_results(page_results, client):
+    """บันทึก chunks ของหน้าลง FakeClient (แทน upsert ลง MongoDB)"""
+    for key, db_name, collection_name, _, _ in multimodel_rag.PAGE_CHUNK_COLLECTIONS:
+        for chunk in page_results[key]:
+            client[db_name][collection_name].docs[chunk["doc_id"]] = chunk
+    return True
+
+def make_pdf(path, pages=2, blocks=2):
+    pdf = fitz.open()
+    for page_num in range(pages):
+        page = pdf.new_page()
+        for block in range(blocks):
+            page.insert_text((72, 72 + block * 200), f"page {page_num + 1} block {block + 1}")
+    pdf.save(path)
+    pdf.close()
+
+@contextmanager
+def patched(**attributes):
+    """แทนที่ attributes ของ multimodel_rag ชั่วคราว"""
+    originals = {name: getattr(multimodel_rag, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(multimodel_rag, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(multimodel_rag, name, value)
+
+def fake_pipeline(tmp_dir, **attributes):
+    """ตัดส่วนที่ต้องใช้ OpenAI/โมเดล/MongoDB ออก (ทดสอบเฉพาะการ extract, checkpoint และการลบ chunks เก่า)"""
+    return patched(**{
+        "INGESTION_CHECKPOINT_BACKEND": "file",
+        "INGESTION_CHECKPOINT_DIR": os.path.join(tmp_dir, "checkpoints"),
+        "store_page_results_to_mongodb": fake_store_page_results,
+        "summarize_page_chunks": lambda page_results: {},
+        "embed_image_chunks": lambda image_chunks: {},
+        "embed_processed_chunks": lambda chunks, **kwargs: chunks,
+        **attributes
+    })
+
+def test_failed_page_keeps_old_chunks():
+    """หน้าที่เกิด error ระหว่างประมวลผล (ผลลัพธ์ไม่ครบ) ต้องไม่ถูก checkpoint และ chunks เก่าของหน้านั้นต้องไม่ถูกลบ"""
+
+    print("=== ทดสอบหน้าที่ประมวลผลไม่สำเร็จระหว่าง re-ingest ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir, fake_pipeline(tmp_dir):
+        pdf_path = os.path.join(tmp_dir, "book.pdf")
+        make_pdf(pdf_path)
+        document = CorpusDocument("book", pdf_path)
+        client = FakeClient()
+
+        # รอบแรก: ingest ครบทุกหน้า
+        result = multimodel_rag.ingest_document(document, client, ocr_pool=object())
+        old_doc_ids = client.doc_ids()
+        assert not result['failed_pages'] and "book_2_text_1" in old_doc_ids
+        print(f"✅ รอบแรก: {len(old_doc_ids)} chunks")
+
+        # รอบสอง: OCR ของหน้า 2 ล้มเหลวหลังจากดึง text blocks แล้ว (ผลลัพธ์ของหน้าไม่ครบ)
+        resolve_page_images = multimodel_rag.resolve_page_images
+
+        def failing_resolve_page_images(pymupdf_page, *args, **kwargs):
+            if pymupdf_page.number == 1:
+                raise RuntimeError("OCR service unavailable")
+            return resolve_page_images(pymupdf_page, *args, **kwargs)
+
+        with patched(resolve_page_images=failing_resolve_page_images):
+            result = multimodel_rag.ingest_document(document, client, ocr_pool=object())
+        assert result['failed_pages'] == [1]
+        assert client.doc_ids() == old_doc_ids
+        print("✅ หน้าที่ล้มเหลวไม่ถูก checkpoint และ chunks เก่ายังอยู่ครบ")
+
+        # resume: ประมวลผลเฉพาะหน้าที่ล้มเหลว แล้วลบ chunks เก่าได้ตามปกติ
+        result = multimodel_rag.ingest_document(document, client, ocr_pool=object(), resume=True)
+        assert not result['failed_pages'] and result['totals']['text_chunks'] == 2
+        assert client.doc_ids() == old_doc_ids
+        print("✅ resume ประมวลผลหน้าที่ล้มเหลวใหม่")
+
+    print("\n🎉 ทดสอบการ ingest เอกสารผ่านทั้งหมด")
+
+def write_page_results(page_results, client):
+    """บันทึกด้วย upsert_changed_chunks จริง (ไม่ใช้ transaction/blob store)"""
+    multimodel_rag.write_page_results(page_results, client)
+    return True
+
+def test_degraded_chunks_rewritten():
+    """chunk ที่บันทึกด้วย summary สำรอง (สรุปไม่สำเร็จ) ต้องถูกเขียนใหม่เมื่อสรุปสำเร็จในรอบถัดไป แม้เนื้อหาไม่เปลี่ยน"""
+
+    print("=== ทดสอบการเขียน chunks ที่ได้ผลสำรองใหม่ ===\n")
+
+    def summaries_of(page_results):
+        return {chunk["doc_id"]: f"สรุป: {chunk['text']}" for chunk in page_results['text_chunks']}
+
+    with tempfile.TemporaryDirectory() as tmp_dir, fake_pipeline(tmp_dir, store_page_results_to_mongodb=write_page_results):
+        pdf_path = os.path.join(tmp_dir, "book.pdf")
+        make_pdf(pdf_path, pages=1, blocks=1)
+        document = CorpusDocument("book", pdf_path)
+        client = FakeClient()
+        processed = client[multimodel_rag.SUMMARY_DB_NAME][multimodel_rag.PROCESSED_TEXT_COLLECTION]
+
+        # รอบแรก: OpenAI ล้มเหลว ได้ summary สำรองจากข้อความต้นฉบับ
+        multimodel_rag.ingest_document(document, client, ocr_pool=object())
+        chunk = processed.docs["book_1_text_0"]
+        assert chunk["degraded"] and not chunk["summary"].startswith("สรุป")
+        print("✅ รอบแรก: chunk ที่สรุปไม่สำเร็จถูกทำเครื่องหมาย degraded")
+
+        # รอบสอง: สรุปสำเร็จ chunk ถูกเขียนใหม่แม้ content_hash เท่าเดิม
+        writes = processed.writes
+        with patched(summarize_page_chunks=summaries_of):
+            multimodel_rag.ingest_document(document, client, ocr_pool=object())
+        chunk = processed.docs["book_1_text_0"]
+        assert processed.writes == writes + 1
+        assert chunk["summary"] == "สรุป: page 1 block 1" and "degraded" not in chunk
+        print("✅ รอบสอง: summary จริงแทนที่ summary สำรอง")
+
+        # รอบสาม: ไม่มีอะไรเปลี่ยน ไม่เขียนซ้ำ
+        writes = processed.writes
+        with patched(summarize_page_chunks=summaries_of):
+            multimodel_rag.ingest_document(document, client, ocr_pool=object())
+        assert processed.writes == writes
+        print("✅ รอบสาม: chunk ที่สมบูรณ์แล้วไม่ถูกเขียนซ้ำ")
+
+    print("\n🎉 ทดสอบการเขียน chunks ที่ได้ผลสำรองใหม่ผ่านทั้งหมด")
+
+def test_batch_mode_isolates_failed_pages():
+    """โหมด Batch API: หน้าที่ extract หรือบันทึกไม่สำเร็จถูกนับเป็นหน้าที่ล้มเหลว หน้าอื่นยังได้ summary จาก batch และถูกบันทึก"""
+
+    print("=== ทดสอบโหมด Batch API เมื่อบางหน้าล้มเหลว ===\n")
+
+    batches = []
+
+    def fake_summarize_items_batch(items, poll_interval=None):
+        batches.append([custom_id for custom_id, _, _ in items])
+        return {custom_id: f"สรุป: {text}" for custom_id, text, _ in items}
+
+    extract_page_chunks = multimodel_rag.extract_page_chunks
+    build_processed_chunks = multimodel_rag.build_processed_chunks
+
+    def failing_extract_page_chunks(page_num, *args, **kwargs):
+        if page_num == 1:
+            raise RuntimeError("worker crashed")
+        return extract_page_chunks(page_num, *args, **kwargs)
+
+    def failing_build_processed_chunks(page_results, summaries, embed=True):
+        if page_results['page_num'] == 2:
+            raise RuntimeError("encoder crashed")
+        return build_processed_chunks(page_results, summaries, embed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir, fake_pipeline(
+            tmp_dir, summarize_items_batch=fake_summarize_items_batch, extract_page_chunks=failing_extract_page_chunks,
+            build_processed_chunks=failing_build_processed_chunks):
+        pdf_path = os.path.join(tmp_dir, "book.pdf")
+        make_pdf(pdf_path, pages=4, blocks=1)
+        client = FakeClient()
+        result = multimodel_rag.ingest_document(CorpusDocument("book", pdf_path), client, summary_mode="batch",
+                                                ocr_pool=object())
+
+    assert result['failed_pages'] == [1, 2]
+    assert batches == [["book_1_text_0", "book_3_text_0", "book_4_text_0"]]
+    assert sorted(set(client.doc_ids())) == ["book_1_text_0", "book_4_text_0"]
+    print("✅ extract หน้า 2 และบันทึกหน้า 3 ไม่สำเร็จ: หน้า 1 และ 4 ยังถูกบันทึกจาก batch job เดียว")
+
+    print("\n🎉 ทดสอบโหมด Batch API ผ่านทั้งหมด")
+
+def _png(flipped=False):
+    image = Image.new("RGB", (200, 120), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20, 20, 120, 90), fill=(10, 10, 10))
+    draw.ellipse((130, 30, 190, 100), fill=(120, 0, 0))
+    if flipped:
+        image = image.transpose(Image.FLIP_LEFT_RIGHT).transpose(Image.FLIP_TOP_BOTTOM)
+    data = io.BytesIO()
+    image.save(data, "PNG")
+    return data.getvalue()
+
+def test_standalone_image_ocr_uses_triage_and_dedup():
+    """iter_images_with_ocr ใช้ OCR triage และ image dedup เดียวกับ extract_page_chunks"""
+
+    print("=== ทดสอบ iter_images_with_ocr (triage + dedup) ===\n")
+
+    class CountingReader:
+        calls = 0
+
+        def readtext(self, image):
+            CountingReader.calls += 1
+            return [(None, "ราศีเมษ", 0.9)]
+
+    class SecondImageHasNoText:
+        """triage จำลอง: รูปแรกที่ไม่ซ้ำต้อง OCR รูปถัดไปไม่มีข้อความ"""
+        calls = 0
+
+        def classify(self, features, coverage):
+            SecondImageHasNoText.calls += 1
+            return OCR if SecondImageHasNoText.calls == 1 else NO_TEXT
+
+    with tempfile.TemporaryDirectory() as tmp_dir, patched(
+            get_ocr_reader=CountingReader, get_ocr_triage=SecondImageHasNoText,
+            get_image_deduplicator=(lambda dedup: lambda: dedup)(ImageDeduplicator()),
+            get_blob_store=(lambda store: lambda: store)(LocalBlobStore(os.path.join(tmp_dir, "blobs")))):
+        pdf_path = os.path.join(tmp_dir, "images.pdf")
+        pdf = fitz.open()
+        for page_num in range(3):
+            page = pdf.new_page()
+            page.insert_image(fitz.Rect(72, 100, 272, 220), stream=_png())
+            if page_num == 2:
+                page.insert_image(fitz.Rect(72, 300, 272, 420), stream=_png(flipped=True))
+        pdf.save(pdf_path)
+        pdf.close()
+
+        images = list(multimodel_rag.iter_images_with_ocr(pdf_path))
+
+    # รูปเดียวกัน 3 หน้า OCR ครั้งเดียว, รูปที่ triage บอกว่าไม่มีข้อความไม่ถูก OCR
+    assert [image["page"] for image in images] == [1, 2, 3]
+    assert all(image["text"] for image in images)
+    assert CountingReader.calls == 1 and SecondImageHasNoText.calls == 2
+    print(f"✅ OCR {CountingReader.calls} ครั้งสำหรับ {len(images)} รูปที่มีข้อความ, triage {SecondImageHasNoText.calls} รูป")
+
+    print("\n🎉 ทดสอบ iter_images_with_ocr ผ่านทั้งหมด")
+
+def fake_extract_page(pdf_path, page_num, document_id):
+    """extract จำลอง: หน้าแรกๆ เสร็จช้ากว่า (ผลลัพธ์กลับมาไม่เรียงตามหน้า)"""
+    time.sleep(0.02 * (6 - page_num))
+    return {
+        'page_num': page_num, 'has_content': True,
+        'text_chunks': [{"text": f"page {page_num + 1}", "type": "text", "chunk_id": 0, "page": page_num + 1,
+                         "doc_id": f"{document_id}_{page_num + 1}_text_0"}],
+        'image_chunks': [], 'table_chunks': [],
+        'text_processed_chunks': [], 'image_processed_chunks': [], 'table_processed_chunks': []
+    }
+
+async def no_summaries(page_results, semaphore=None):
+    return {}
+
+def run_parallel(store_page, embed=lambda chunks, **kwargs: chunks, pages=6, max_pages_in_flight=2):
+    """รัน _process_pages_parallel ด้วย thread pool (timeout ถ้าหน้าถัดไปรอ slot ตลอดไป)"""
+    failed_pages = []
+    with tempfile.TemporaryDirectory() as tmp_dir, ThreadPoolExecutor(4) as pool, fake_pipeline(
+            tmp_dir, _extract_page_in_worker=fake_extract_page, summarize_page_chunks_async=no_summaries,
+            embed_processed_chunks=embed):
+        asyncio.run(asyncio.wait_for(multimodel_rag._process_pages_parallel(
+            pool, CorpusDocument("book", "book.pdf"), list(range(pages)), pages, store_page,
+            summary_concurrency=2, max_pages_in_flight=max_pages_in_flight, failed_pages=failed_pages
+        ), timeout=10))
+    return failed_pages
+
+def test_parallel_pages_store_in_order():
+    """โหมดขนาน: บันทึกตามลำดับหน้า และหน้าที่บันทึก/สร้าง embeddings ไม่สำเร็จไม่ทำให้ ingest ค้าง"""
+
+    print("=== ทดสอบโหมดขนาน ===\n")
+
+    # ทดสอบ 1: หน้าเสร็จไม่เรียงลำดับ แต่บันทึกเรียงตามหน้า
+    stored = []
+    assert run_parallel(lambda page_results: stored.append(page_results['page_num'])) == []
+    assert stored == [0, 1, 2, 3, 4, 5]
+    print(f"✅ บันทึกตามลำดับหน้า: {stored}")
+
+    # ทดสอบ 2: บันทึกหน้า 3 ไม่สำเร็จ หน้าอื่นยังบันทึกครบ (slot ถูกคืน ไม่ deadlock)
+    stored = []
+
+    def failing_store(page_results):
+        if page_results['page_num'] == 2:
+            raise RuntimeError("MongoDB unavailable")
+        stored.append(page_results['page_num'])
+
+    assert run_parallel(failing_store) == [2]
+    assert stored == [0, 1, 3, 4, 5]
+    print("✅ บันทึกหน้าไม่สำเร็จ: หน้าอื่นบันทึกต่อได้")
+
+    # ทดสอบ 3: สร้าง embeddings ไม่สำเร็จ หน้าในชุดนั้นไม่ถูกบันทึกและถูกนับเป็นหน้าที่ล้มเหลว
+    stored = []
+
+    def failing_embed(chunks, **kwargs):
+        if any(chunk["page"] == 4 for chunk in chunks):
+            raise RuntimeError("encoder crashed")
+        return chunks
+
+    failed_pages = run_parallel(lambda page_results: stored.append(page_results['page_num']), embed=failing_embed)
+    assert 3 in failed_pages and sorted(stored + failed_pages) == [0, 1, 2, 3, 4, 5]
+    assert not set(stored) & set(failed_pages)
+    print(f"✅ สร้าง embeddings ไม่สำเร็จ: หน้าที่ล้มเหลว {sorted(failed_pages)}")
+
+    print("\n🎉 ทดสอบโหมดขนานผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_failed_page_keeps_old_chunks()
+    test_degraded_chunks_rewritten()
+    test_parallel_pages_store_in_order()
+    test_batch_mode_isolates_failed_pages()
+    test_standalone_image_ocr_uses_triage_and_dedup()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Ingestion Cache (summary/embeddings ตาม fingerprint ของเนื้อหา)
+"""
+
+import os
+import sys
+import tempfile
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ingestion_cache import IngestionCache, fingerprint
+
+def test_ingestion_cache():
+    """ทดสอบ fingerprint และการเก็บ/อ่านค่าจากไฟล์ SQLite"""
+
+    print("=== ทดสอบ Ingestion Cache ===\n")
+
+    # ทดสอบ 1: fingerprint เปลี่ยนเมื่อเนื้อหาหรือโมเดล/prompt เปลี่ยน
+    key = fingerprint("summary", "text", "ดาวพฤหัสย้ายราศี", "gpt-4o-mini", "v1")
+    assert key == fingerprint("summary", "text", "ดาวพฤหัสย้ายราศี", "gpt-4o-mini", "v1")
+    assert key != fingerprint("summary", "text", "ดาวพฤหัสย้ายราศี", "gpt-4o-mini", "v2")
+    assert key != fingerprint("summary", "text", "ดาวเสาร์ย้ายราศี", "gpt-4o-mini", "v1")
+    assert fingerprint("ab", "c") != fingerprint("a", "bc")
+    print("✅ fingerprint ขึ้นกับเนื้อหา โมเดล และ version ของ prompt")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "cache", "ingestion_cache.sqlite3")
+
+        # ทดสอบ 2: เก็บ summary และ embeddings แล้วอ่านกลับได้ (นับ hit/miss)
+        cache = IngestionCache(path=path)
+        assert cache.backend == "sqlite"
+        cache.put_many({"summary-key": "สรุปดวงราศีเมษ", "embedding-key": [0.1, 0.2, 0.3]})
+        found = cache.get_many(["summary-key", "embedding-key", "missing-key"])
+        assert found == {"summary-key": "สรุปดวงราศีเมษ", "embedding-key": [0.1, 0.2, 0.3]}
+        assert (cache.hits, cache.misses) == (2, 1)
+        print("✅ อ่านค่าจาก cache ได้และนับ hit/miss ถูกต้อง")
+
+        # ทดสอบ 3: ค่ายังอยู่หลังเปิดไฟล์ใหม่ (ใช้ข้ามรอบการ ingest ได้)
+        cache.put("summary-key", "สรุปใหม่")
+        cache.close()
+        reopened = IngestionCache(path=path)
+        assert reopened.get("summary-key") == "สรุปใหม่"
+        assert reopened.get("missing-key") is None
+        reopened.close()
+        print("✅ cache ถูกเก็บถาวรในไฟล์ SQLite")
+
+    print("\n🎉 ทดสอบ Ingestion Cache ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_ingestion_cache()
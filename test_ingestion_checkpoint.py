@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Ingestion Checkpoint (manifest สถานะรายหน้าสำหรับ resume)
+"""
+
+import os
+import sys
+import tempfile
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ingestion_checkpoint import IngestionCheckpoint
+
+def test_ingestion_checkpoint():
+    """ทดสอบการบันทึกหน้าที่เสร็จ, resume และการเริ่มรอบใหม่"""
+
+    print("=== ทดสอบ Ingestion Checkpoint ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint = IngestionCheckpoint("run-a", directory=tmp_dir)
+        assert checkpoint.start(total_pages=3, source="data/attention.pdf") == set()
+        checkpoint.mark_page_done(0, ["doc_1_1_text_1", "doc_1_1_img_1"])
+        checkpoint.mark_page_done(1, [])
+
+        # ทดสอบ 1: เขียนแบบ atomic (ไม่มีไฟล์ชั่วคราวค้าง)
+        assert os.listdir(tmp_dir) == ["run-a.json"]
+        print("✅ manifest ถูกเขียนแบบ atomic")
+
+        # ทดสอบ 2: resume ได้หน้าที่เสร็จแล้วและ doc_id ของหน้าเหล่านั้น
+        resumed = IngestionCheckpoint("run-a", directory=tmp_dir)
+        assert resumed.start(total_pages=3, source="data/attention.pdf", resume=True) == {0, 1}
+        assert resumed.is_completed(1) and not resumed.is_completed(2)
+        assert resumed.all_doc_ids() == {"doc_1_1_text_1", "doc_1_1_img_1"}
+        print("✅ resume ข้ามหน้าที่เสร็จแล้ว")
+
+        # ทดสอบ 3: ไม่ resume หรือรอบก่อนเสร็จแล้ว = เริ่มรอบใหม่
+        resumed.mark_page_done(2, ["doc_1_3_text_1"])
+        resumed.mark_finished()
+        again = IngestionCheckpoint("run-a", directory=tmp_dir)
+        assert again.finished
+        assert again.start(total_pages=3, source="data/attention.pdf", resume=True) == set()
+        assert not again.finished and again.all_doc_ids() == set()
+        print("✅ รอบที่เสร็จแล้วจะเริ่มใหม่")
+
+        # ทดสอบ 4: run key ต่างกัน (ไฟล์หรือโมเดลเปลี่ยน) ไม่ใช้ checkpoint เดิม
+        other = IngestionCheckpoint("run-b", directory=tmp_dir)
+        assert not other.exists
+        print("✅ checkpoint แยกตาม run key")
+
+    print("\n🎉 ทดสอบ Ingestion Checkpoint ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_ingestion_checkpoint()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Knowledge Store (ใช้ข้อมูลชุดเดิมซ้ำ และโหลดใหม่ใน thread แยกเมื่อ collection เปลี่ยน)
+"""
+
+import os
+import sys
+import time
+import threading
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from knowledge_store import AstrologyKnowledgeStore
+
+class FakeZodiacCollection:
+    """collection zodiac_personality จำลอง (นับจำนวนครั้งที่ดึงเอกสารทั้งหมด)"""
+
+    def __init__(self):
+        self.docs = [{"_id": 1, "zodiac_sign": "เมษ", "career": "ผู้นำ"}]
+        self.find_calls = 0
+        self.find_gate = threading.Event()
+        self.find_gate.set()
+
+    def find_one(self, query, projection=None, sort=None):
+        field = sort[0][0]
+        matches = [doc for doc in self.docs if field in doc]
+        return max(matches, key=lambda doc: doc[field]) if matches else None
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def find(self, query):
+        self.find_calls += 1
+        self.find_gate.wait(5)
+        return list(self.docs)
+
+def make_store(collection):
+    store = AstrologyKnowledgeStore(reload_interval=0)
+    store._get_zodiac_collection = lambda: collection
+    return store
+
+def wait_for_reload(store):
+    if store._refresh_thread is not None:
+        store._refresh_thread.join(5)
+
+def test_knowledge_store():
+    """ข้อมูลชุดเดิมถูกใช้ซ้ำเมื่อ collection ไม่เปลี่ยน และโหลดใหม่โดยไม่บล็อกคำขอเมื่อ collection เปลี่ยน"""
+
+    print("=== ทดสอบ Knowledge Store ===\n")
+
+    collection = FakeZodiacCollection()
+    store = make_store(collection)
+
+    # ทดสอบ 1: โหลดครั้งแรกแบบ synchronous
+    assert store.get_zodiac_reading("เมษ")["การงาน"] == "ผู้นำ"
+    assert collection.find_calls == 1
+    print("✅ โหลดครั้งแรกสำเร็จ")
+
+    # ทดสอบ 2: collection ไม่เปลี่ยน ใช้ข้อมูลชุดเดิม (ไม่ดึงเอกสารใหม่)
+    for _ in range(3):
+        store.get_zodiac_reading("เมษ")
+        wait_for_reload(store)
+    assert collection.find_calls == 1
+    print("✅ collection ไม่เปลี่ยน: ใช้ข้อมูลชุดเดิม")
+
+    # ทดสอบ 3: collection เปลี่ยน ระหว่างโหลดใหม่คำขอได้ข้อมูลชุดเดิมทันที
+    collection.docs = [{"_id": 2, "zodiac_sign": "เมษ", "career": "นักสำรวจ"}]
+    collection.find_gate.clear()
+    started = time.monotonic()
+    assert store.get_zodiac_reading("เมษ")["การงาน"] == "ผู้นำ"
+    assert store.get_zodiac_reading("เมษ")["การงาน"] == "ผู้นำ"
+    assert time.monotonic() - started < 1
+    print("✅ ระหว่างโหลดใหม่: ได้ข้อมูลชุดเดิมโดยไม่ต้องรอ")
+
+    # ทดสอบ 4: โหลดใหม่เสร็จ (ครั้งเดียว) แล้วได้ข้อมูลชุดใหม่
+    collection.find_gate.set()
+    wait_for_reload(store)
+    assert collection.find_calls == 2
+    assert store.get_zodiac_reading("เมษ")["การงาน"] == "นักสำรวจ"
+    print("✅ โหลดใหม่ใน thread แยกเมื่อ collection เปลี่ยน")
+
+    print("\n🎉 ทดสอบ Knowledge Store ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_knowledge_store()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Message Analysis (แต่ละส่วนวิเคราะห์ครั้งเดียวต่อข้อความ และ handler ถัดไปใช้ผลเดิมซ้ำ)
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.content_filter as content_filter_module
+import app.message_analysis as message_analysis_module
+import app.retrieval_utils as retrieval_utils
+from app.content_filter import ContentFilter
+from app.message_analysis import MessageAnalysis
+from app.thai_tokenizer import ThaiTokenizer
+
+class StopAfterAnalysis(Exception):
+    """หยุด ask_question_to_rag หลังใช้ผลวิเคราะห์ข้อความแล้ว (ไม่ต้องค้นหา/เรียก LLM จริง)"""
+
+class CountingParser:
+    """birth date parser จำลองที่นับจำนวนครั้งที่แยกข้อมูลวันเกิด"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def extract_birth_info(self, text):
+        self.calls["birth_info"] += 1
+        return None
+
+@contextmanager
+def patched(module, **attributes):
+    """แทนที่ attributes ของ module ชั่วคราว"""
+    originals = {name: getattr(module, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(module, name, value)
+
+def counting(calls, name, result):
+    def analyzer(*args, **kwargs):
+        calls[name] += 1
+        return result
+    return analyzer
+
+def test_message_analysis():
+    """แต่ละ field คำนวณครั้งเดียว และ content filter/ask_question_to_rag ใช้ analysis เดียวกัน"""
+
+    print("=== ทดสอบ Message Analysis ===\n")
+
+    calls = {"birth_info": 0, "intent": 0, "segment": 0}
+    tokenizer = ThaiTokenizer()
+    segment = tokenizer._segment
+
+    def counting_segment(text):
+        calls["segment"] += 1
+        return segment(text)
+    tokenizer._segment = counting_segment
+
+    parser = CountingParser(calls)
+    intent = {"type": "love"}
+    with patched(content_filter_module, thai_tokenizer=tokenizer), \
+            patched(message_analysis_module, thai_tokenizer=tokenizer, get_birth_date_parser=lambda: parser), \
+            patched(retrieval_utils, analyze_question_intent=counting(calls, "intent", intent)):
+        with patched(content_filter_module, content_filter=ContentFilter(mode="tokens")):
+            # ตัวกรองแบ่งคำในรายการคำไปแล้วตอนสร้าง engine จึงเริ่มนับใหม่เฉพาะข้อความของผู้ใช้
+            calls["segment"] = tokenizer.misses = tokenizer.hits = 0
+            question = "ความรักเดือนนี้ของฉันจะเป็นอย่างไร"
+            analysis = MessageAnalysis(question)
+
+            # ทดสอบ 1: แต่ละ field คำนวณครั้งเดียวแม้ถูกอ่านหลายครั้ง
+            for _ in range(3):
+                assert analysis.birth_info is None and analysis.birth_date is None
+                assert analysis.intent is intent
+            assert calls["birth_info"] == 1 and calls["intent"] == 1
+            print("✅ birth_info และ intent คำนวณครั้งเดียว")
+
+            # ทดสอบ 2: content filter ใช้ผลการแบ่งคำเดียวกับ analysis.tokens (ไม่แบ่งคำซ้ำ)
+            tokens = analysis.tokens
+            assert analysis.safety == (True, question)
+            assert analysis.safety is analysis.safety
+            assert analysis.tokens is tokens
+            assert calls["segment"] == 1 and tokenizer.misses == 1 and tokenizer.hits >= 1
+            print(f"✅ content filter ใช้ผลแบ่งคำเดิม: {len(tokens)} คำ, แบ่งคำ {calls['segment']} ครั้ง")
+
+            # ทดสอบ 3: for_text คืน analysis เดิมเฉพาะข้อความเดียวกัน
+            assert MessageAnalysis.for_text(question, analysis) is analysis
+            assert MessageAnalysis.for_text("ข้อความอื่น", analysis) is not analysis
+            print("✅ for_text ใช้ analysis เดิมเมื่อข้อความตรงกัน")
+
+        # ทดสอบ 4: ask_question_to_rag ใช้ analysis ที่ส่งมา (ไม่แยกวันเกิด/วิเคราะห์เจตนาซ้ำ)
+        received = {}
+
+        def stop_at_refine(refine_question, user_context=None):
+            received["intent"] = analysis.intent
+            raise StopAfterAnalysis()
+
+        with patched(retrieval_utils,
+                     check_and_update_question_limit=lambda user_id: (True, 1, ""),
+                     get_user_context=lambda user_id: {"zodiac_sign": "เมษ", "birth_date": "01/04/2000"},
+                     check_follow_up_question_with_llm=lambda question, user_context=None: True,
+                     refine_follow_up_question_with_llm=stop_at_refine):
+            try:
+                retrieval_utils.ask_question_to_rag(question, "test_user", analysis=analysis)
+                assert False, "ask_question_to_rag ควรหยุดที่ refine_follow_up_question_with_llm"
+            except StopAfterAnalysis:
+                pass
+        assert received["intent"] is intent
+        assert calls["birth_info"] == 1 and calls["intent"] == 1 and calls["segment"] == 1
+        print("✅ ask_question_to_rag ใช้ analysis เดิม ไม่วิเคราะห์ข้อความซ้ำ")
+
+    print("\n🎉 ทดสอบ Message Analysis ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_message_analysis()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ OCR Pool (OCR หลายรูปพร้อมกันด้วย worker processes)
+"""
+
+import io
+import os
+import sys
+import time
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+from app.ocr_pool import OCRPool, prepare_ocr_image
+
+class FakeReader:
+    """reader จำลอง: คืนขนาดของรูปที่ได้รับ (ใช้ตรวจการย่อ/แปลงรูป) และใช้เวลาเหมือน OCR จริง"""
+
+    def readtext(self, image):
+        time.sleep(0.2)
+        return [(None, f"{image.shape[1]}x{image.shape[0]}:{image.ndim}", 0.9)]
+
+def fake_reader_factory(languages):
+    return FakeReader()
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def test_ocr_pool():
+    """ทดสอบการเตรียมรูปและการ OCR พร้อมกันหลาย worker"""
+
+    print("=== ทดสอบ OCR Pool ===\n")
+
+    # ทดสอบ 1: ย่อรูปและแปลงเป็น grayscale ก่อน OCR
+    image_bytes = _png(1200, 600)
+    assert prepare_ocr_image(image_bytes) is image_bytes
+    prepared = prepare_ocr_image(image_bytes, max_side=600, grayscale=True)
+    assert prepared.shape == (300, 600)
+    print("✅ ย่อรูปและแปลงเป็น grayscale")
+
+    # ทดสอบ 2: ส่งหลายรูปพร้อมกันแล้วรอผลทีหลัง (2 workers ใช้เวลาประมาณครึ่งหนึ่ง)
+    with OCRPool(workers=2, max_side=600, grayscale=True, reader_factory=fake_reader_factory) as pool:
+        pool.readtext(_png(100, 100))  # รอให้ worker พร้อม
+        started = time.perf_counter()
+        futures = [pool.submit(image_bytes) for _ in range(4)]
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+        assert all(result[0][1] == "600x300:2" for result in results)
+        assert elapsed < 0.7, elapsed
+        print(f"✅ OCR 4 รูปด้วย 2 workers ใน {elapsed:.2f} วินาที")
+
+        # ทดสอบ 3: สถิติต่อ worker
+        stats = pool.stats()
+        assert stats["images"] == 5
+        assert sum(worker["images"] for worker in stats["workers"].values()) == 5
+        assert all(worker["images_per_second"] > 0 for worker in stats["workers"].values())
+        print(f"✅ สถิติต่อ worker: {len(stats['workers'])} workers")
+
+    print("\n🎉 ทดสอบ OCR Pool ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_ocr_pool()
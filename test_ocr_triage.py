@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ OCR Triage (OCR เฉพาะรูปที่น่าจะมีข้อความ)
+"""
+
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from app.ocr_triage import OCRTriage, text_coverage, text_features
+
+def _text_image():
+    image = Image.new("RGB", (600, 300), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=20)
+    for y in range(10, 270, 30):
+        draw.text((10, y), "The Fool card means new beginnings 2567", font=font, fill=(0, 0, 0))
+    return image
+
+def _illustration():
+    image = Image.new("RGB", (400, 300), (240, 230, 200))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((50, 50, 250, 250), fill=(200, 30, 30))
+    draw.rectangle((260, 80, 380, 200), fill=(30, 30, 200))
+    return image
+
+def _photo():
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.uniform(0, 255, (30, 40, 3)).astype("uint8")).resize((400, 300), Image.BICUBIC)
+
+def test_ocr_triage():
+    """ทดสอบ heuristic ของข้อความในรูป การตรวจ text layer และสถิติ"""
+
+    print("=== ทดสอบ OCR Triage ===\n")
+
+    triage = OCRTriage()
+
+    # ทดสอบ 1: รูปที่มีข้อความต้อง OCR แต่ภาพประกอบและภาพถ่ายไม่ต้อง
+    assert triage.classify(text_features(_text_image())) == "ocr"
+    assert triage.classify(text_features(_illustration())) == "no_text"
+    assert triage.classify(text_features(_photo())) == "no_text"
+    print("✅ แยกรูปที่มีข้อความออกจากภาพประกอบ/ภาพถ่าย")
+
+    # ทดสอบ 2: รูปที่ text blocks ทับอยู่แล้วไม่ต้อง OCR
+    image_rect = (100, 100, 300, 200)
+    assert text_coverage(image_rect, [(90, 90, 310, 190)]) == 0.9
+    assert text_coverage(image_rect, [(0, 0, 50, 50)]) == 0.0
+    assert text_coverage(None, [(0, 0, 50, 50)]) == 0.0
+    assert triage.classify(text_features(_text_image()), coverage=0.9) == "text_layer"
+    print("✅ ข้าม OCR เมื่อ text layer ครอบคลุมรูปแล้ว")
+
+    # ทดสอบ 3: สถิติจำนวนรูปที่ข้าม
+    assert triage.stats == {"ocr": 1, "text_layer": 1, "no_text": 2}
+    assert triage.skipped == 3
+    print(f"✅ นับรูปที่ข้าม OCR: {triage.skipped} รูป")
+
+    # ทดสอบ 4: ปิด triage แล้ว OCR ทุกรูป
+    assert OCRTriage(enabled=False).classify(text_features(_photo())) == "ocr"
+    print("✅ ปิด triage ได้")
+
+    print("\n🎉 ทดสอบ OCR Triage ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_ocr_triage()
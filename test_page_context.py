@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Page Context (parse หน้าครั้งเดียวต่อ backend และหาตารางด้วย PyMuPDF ก่อน pdfplumber)
+"""
+
+import os
+import sys
+import tempfile
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import fitz
+from app.page_context import LazyPdfplumber, PageContext
+
+TABLE_TEXT = "Sign | Element\nAries | Fire\nTaurus | Earth"
+
+def _create_pdf(path):
+    """สร้าง PDF 2 หน้า: หน้าแรกมีตารางแบบมีเส้น หน้าที่สองมีแต่ข้อความ"""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), "Zodiac elements")
+    x0, y0, width, height = 72, 100, 120, 24
+    rows = [["Sign", "Element"], ["Aries", "Fire"], ["Taurus", "Earth"]]
+    for row in range(len(rows) + 1):
+        page.draw_line((x0, y0 + row * height), (x0 + 2 * width, y0 + row * height))
+    for col in range(3):
+        page.draw_line((x0 + col * width, y0), (x0 + col * width, y0 + len(rows) * height))
+    for row, cells in enumerate(rows):
+        for col, cell in enumerate(cells):
+            page.insert_text((x0 + col * width + 5, y0 + row * height + 16), cell)
+    doc.new_page().insert_text((72, 72), "Only text on this page")
+    doc.save(path)
+    doc.close()
+
+def test_page_context():
+    """ทดสอบการหาตารางและการ cache ข้อมูลของหน้า"""
+
+    print("=== ทดสอบ Page Context ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "zodiac.pdf")
+        _create_pdf(path)
+        doc = fitz.open(path)
+        pdfplumber_pdf = LazyPdfplumber(path)
+
+        try:
+            # ทดสอบ 1: ตารางหาด้วย PyMuPDF โดยไม่เปิด pdfplumber
+            context = PageContext(0, doc[0], pdfplumber_pdf)
+            tables = context.tables()
+            assert [table["text"] for table in tables] == [TABLE_TEXT]
+            assert tables[0]["y_pos"] == 100
+            assert context.table_backend == "pymupdf" and not pdfplumber_pdf.opened
+            print("✅ หาตารางด้วย PyMuPDF โดยไม่เปิด pdfplumber")
+
+            # ทดสอบ 2: หน้าที่ไม่มีเส้นข้ามการหาตาราง
+            text_only = PageContext(1, doc[1], pdfplumber_pdf)
+            assert text_only.tables() == [] and text_only.table_backend == "skipped"
+            print("✅ หน้าที่มีแต่ข้อความข้ามการหาตาราง")
+
+            # ทดสอบ 3: text blocks ถูก cache ไว้ใน context
+            assert context.text_blocks is context.text_blocks
+            print("✅ text blocks ถูก parse ครั้งเดียว")
+
+            # ทดสอบ 4: pdfplumber ให้ผลเดียวกันเมื่อเลือกใช้ (เปิดไฟล์ตอนใช้ครั้งแรก)
+            plumber = PageContext(0, doc[0], pdfplumber_pdf, table_extractor="pdfplumber")
+            assert [table["text"] for table in plumber.tables()] == [TABLE_TEXT]
+            assert plumber.table_backend == "pdfplumber" and pdfplumber_pdf.opened
+            print("✅ pdfplumber ใช้เป็นทางเลือกได้")
+        finally:
+            pdfplumber_pdf.close()
+            doc.close()
+
+    print("\n🎉 ทดสอบ Page Context ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_page_context()
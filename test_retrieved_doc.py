@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+ทดสอบการสร้างข้อมูลเอกสารที่ค้นหาได้ (ใช้ payload ของ vector index และ MongoClient ตัวเดียวกับ registry)
+"""
+
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.retrieval_utils as retrieval_utils
+from app.vector_index import VectorIndexRegistry
+
+class FakeSummaryCollection:
+    """processed collection จำลองที่นับจำนวนครั้งที่ค้นเอกสาร"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.lookups = 0
+
+    def find_one(self, query):
+        self.lookups += 1
+        (field, value), = query.items()
+        return next((doc for doc in self.docs if doc.get(field) == value), None)
+
+def no_new_clients(*args, **kwargs):
+    raise AssertionError("ไม่ควรเปิด MongoClient ใหม่ต่อผลการค้นหา")
+
+def test_retrieved_doc():
+    """ผลจาก vector index ใช้ payload โดยไม่ค้น MongoDB ส่วนผลจาก BM25 ค้นผ่าน collection ของ registry"""
+
+    print("=== ทดสอบการสร้าง retrieved doc ===\n")
+
+    collection = FakeSummaryCollection([
+        {"_id": "oid-2", "doc_id": "book_2_text_0", "text": "ดาวอังคารเป็นดาวเจ้าเรือน", "summary": "ดาวเจ้าเรือนของราศีเมษ"}
+    ])
+    requested = []
+
+    def get_collection(collection_name):
+        requested.append(collection_name)
+        return collection
+
+    original_indexes, original_client = retrieval_utils.vector_indexes, retrieval_utils.MongoClient
+    retrieval_utils.vector_indexes = VectorIndexRegistry(get_collection=get_collection)
+    retrieval_utils.MongoClient = no_new_clients
+    try:
+        # ทดสอบ 1: payload ของ vector index มี text และ summary ไม่ต้องค้น MongoDB
+        payload = {"_id": "oid-1", "doc_id": "book_1_text_0", "text": "ราศีเมษเป็นราศีธาตุไฟ",
+                   "summary": "ราศีเมษ ธาตุไฟ", "page": 1, "chunk_id": 0, "type": "text"}
+        doc = retrieval_utils._build_retrieved_doc(payload, "processed_text_chunks", 0.9, False)
+        assert doc["text"] == payload["text"] and doc["summary"] == payload["summary"]
+        assert doc["summary_content"]["text"] == payload["text"] and doc["doc_id"] == "oid-1"
+        assert collection.lookups == 0
+        print("✅ ผลจาก vector index ใช้ payload โดยไม่ค้น MongoDB")
+
+        # ทดสอบ 2: ผลจาก BM25 (มีเฉพาะ doc_id) ค้นผ่าน collection ของ registry ครั้งเดียวต่อผล
+        doc = retrieval_utils._build_retrieved_doc({"doc_id": "book_2_text_0"}, "processed_text_chunks", None, False)
+        assert doc["summary"] == "ดาวเจ้าเรือนของราศีเมษ" and doc["doc_id"] == "oid-2"
+        assert collection.lookups == 1 and requested == ["processed_text_chunks"]
+        print("✅ ผลจาก BM25 ค้นด้วย client ของ registry")
+    finally:
+        retrieval_utils.vector_indexes, retrieval_utils.MongoClient = original_indexes, original_client
+
+    print("\n🎉 ทดสอบการสร้าง retrieved doc ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_retrieved_doc()
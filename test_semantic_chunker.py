@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Semantic Chunker (แบ่ง chunk ตามจุดที่ความหมายเปลี่ยน ภายในขนาด min/max)
+"""
+
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from app.semantic_chunker import SemanticChunker, iter_sentences
+
+TOPICS = {"ราศี": 0, "tarot": 1, "ฮวงจุ้ย": 2}
+
+class TopicEncoder:
+    """encoder จำลอง: embedding ตามหัวข้อที่ประโยคพูดถึง และนับจำนวนประโยคต่อครั้ง"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, sentences):
+        self.batches.append(len(sentences))
+        embeddings = np.zeros((len(sentences), len(TOPICS)))
+        for row, sentence in enumerate(sentences):
+            for topic, column in TOPICS.items():
+                if topic in sentence:
+                    embeddings[row, column] = 1.0
+        return embeddings
+
+def test_semantic_chunker():
+    """ทดสอบการแบ่งประโยคและการตัด chunk ตามความหมาย"""
+
+    print("=== ทดสอบ Semantic Chunker ===\n")
+
+    # ทดสอบ 1: แบ่งประโยคไทยและอังกฤษ
+    text = "ราศีเมษเป็นราศีแรก ราศีพฤษภเป็นราศีที่สอง\nThe Fool card. The Magician card! อ่านต่อ"
+    assert list(iter_sentences(text)) == [
+        "ราศีเมษเป็นราศีแรก", "ราศีพฤษภเป็นราศีที่สอง", "The Fool card.", "The Magician card!", "อ่านต่อ"
+    ]
+    assert all(len(sentence) <= 10 for sentence in iter_sentences("ก" * 25, max_chars=10))
+    print("✅ แบ่งประโยคไทยและอังกฤษ")
+
+    # ทดสอบ 2: ตัด chunk ตรงจุดเปลี่ยนหัวข้อ
+    sentences = [f"ราศี{i}" for i in range(6)] + [f"tarot{i}" for i in range(6)] + [f"ฮวงจุ้ย{i}" for i in range(6)]
+    encoder = TopicEncoder()
+    chunker = SemanticChunker(encode=encoder, min_chars=10, max_chars=200)
+    chunks = list(chunker.iter_chunks(sentences))
+    assert chunks == [" ".join(sentences[0:6]), " ".join(sentences[6:12]), " ".join(sentences[12:18])]
+    print(f"✅ ตัด chunk ตามหัวข้อ: {len(chunks)} chunks")
+
+    # ทดสอบ 3: ข้อความยาวถูก encode ทีละ window และไม่มีประโยคหาย
+    long_sentences = [f"ราศี ประโยคที่{i}" for i in range(1000)]
+    encoder = TopicEncoder()
+    chunker = SemanticChunker(encode=encoder, min_chars=100, max_chars=300, window=128)
+    chunks = list(chunker.iter_chunks(long_sentences))
+    assert max(encoder.batches) == 128 and sum(encoder.batches) == 1000
+    assert " ".join(chunks) == " ".join(long_sentences)
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    print(f"✅ ข้อความ 1000 ประโยค → {len(chunks)} chunks ไม่มีประโยคหาย")
+
+    # ทดสอบ 4: ไม่มี encoder ก็แบ่งตามขนาดได้
+    chunks = list(SemanticChunker(min_chars=10, max_chars=50).chunk(" ".join(long_sentences[:20])))
+    assert all(len(chunk) <= 50 for chunk in chunks) and len(chunks) > 1
+    print("✅ แบ่งตามขนาดเมื่อไม่มี encoder")
+
+    print("\n🎉 ทดสอบ Semantic Chunker ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_semantic_chunker()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Summarization Service (rate limit, backoff ตาม Retry-After และโหมด Batch API)
+โดยใช้ fake server ที่ compatible กับ OpenAI บนเครื่อง (ไม่เรียก OpenAI จริง)
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.summarization_service import RateLimiter, SummarizationService
+
+
+def chat_completion(content):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """จำลอง endpoint ของ OpenAI ที่ใช้: chat completions, files และ batches"""
+
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        state = self.state
+        body = self._read_body()
+
+        if self.path == "/v1/chat/completions":
+            with state["lock"]:
+                state["chat_calls"] += 1
+                calls = state["chat_calls"]
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            try:
+                if calls <= state["rate_limited_calls"]:
+                    self._send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                    headers={"retry-after-ms": "50"})
+                    return
+                time.sleep(0.05)
+                prompt = json.loads(body)["messages"][0]["content"]
+                self._send_json(200, chat_completion(f"สรุป: {len(prompt)}"))
+            finally:
+                with state["lock"]:
+                    state["in_flight"] -= 1
+            return
+
+        if self.path == "/v1/files":
+            # multipart body: เก็บเฉพาะบรรทัดที่เป็น request ของ batch
+            lines = [line for line in body.decode("utf-8").splitlines() if line.startswith('{"custom_id"')]
+            state["files"]["file-input"] = lines
+            self._send_json(200, {"id": "file-input", "object": "file", "bytes": len(body),
+                                  "created_at": int(time.time()), "filename": "summaries.jsonl",
+                                  "purpose": "batch", "status": "processed"})
+            return
+
+        if self.path == "/v1/batches":
+            request = json.loads(body)
+            state["batch_polls"] = 0
+            self._send_json(200, self._batch("in_progress", request["input_file_id"]))
+            return
+
+        self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_GET(self):
+        state = self.state
+        if self.path == "/v1/batches/batch-1":
+            state["batch_polls"] += 1
+            if state["batch_polls"] < 2:
+                self._send_json(200, self._batch("in_progress", "file-input"))
+                return
+            output = []
+            for line in state["files"]["file-input"]:
+                request = json.loads(line)
+                custom_id = request["custom_id"]
+                if custom_id.endswith("fail"):
+                    output.append({"id": "req", "custom_id": custom_id, "response": {"status_code": 500, "body": {}}, "error": None})
+                else:
+                    output.append({"id": "req", "custom_id": custom_id, "error": None,
+                                   "response": {"status_code": 200, "body": chat_completion(f"batch:{custom_id}")}})
+            state["files"]["file-output"] = [json.dumps(record) for record in output]
+            self._send_json(200, self._batch("completed", "file-input", output_file_id="file-output"))
+            return
+
+        if self.path == "/v1/files/file-output/content":
+            body = ("\n".join(state["files"]["file-output"]) + "\n").encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self._send_json(404, {"error": {"message": "not found"}})
+
+    def _batch(self, status, input_file_id, output_file_id=None):
+        total = len(self.state["files"].get("file-input", []))
+        return {
+            "id": "batch-1", "object": "batch", "endpoint": "/v1/chat/completions",
+            "input_file_id": input_file_id, "completion_window": "24h", "status": status,
+            "output_file_id": output_file_id, "created_at": int(time.time()),
+            "request_counts": {"total": total, "completed": total if status == "completed" else 0, "failed": 0}
+        }
+
+
+def start_fake_server(rate_limited_calls=0):
+    """เปิด fake server บน port ว่าง คืนค่า (server, base_url, state)"""
+    state = {"lock": threading.Lock(), "chat_calls": 0, "rate_limited_calls": rate_limited_calls,
+             "in_flight": 0, "max_in_flight": 0, "files": {}, "batch_polls": 0}
+    handler = type("Handler", (FakeOpenAIHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", state
+
+
+def test_rate_limiter():
+    """ทดสอบงบ requests-per-minute และ tokens-per-minute ด้วยนาฬิกาจำลอง"""
+
+    print("=== ทดสอบ Rate Limiter ===\n")
+
+    now = [0.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=6000, clock=lambda: now[0], sleep=fake_sleep)
+
+    # ทดสอบ 1: ใช้งบ request ครบ 60 ครั้งได้ทันที ครั้งที่ 61 ต้องรอ 1 วินาที
+    for _ in range(60):
+        assert limiter.acquire(10) == 0
+    waited = limiter.acquire(10)
+    assert abs(waited - 1.0) < 1e-6, waited
+    print("✅ เกินงบ requests-per-minute ต้องรอ refill")
+
+    # ทดสอบ 2: งบ token ไม่พอต้องรอตามจำนวน token ที่ขาด (100 tokens/วินาที)
+    now[0] += 60
+    assert limiter.acquire(6000) == 0
+    waited = limiter.acquire(500)
+    assert abs(waited - 5.0) < 1e-6, waited
+    print("✅ เกินงบ tokens-per-minute ต้องรอตาม token ที่ขาด")
+
+
+def test_online_summarization():
+    """ทดสอบ retry ตาม Retry-After และจำนวน request พร้อมกันสูงสุด"""
+
+    print("\n=== ทดสอบ Online Summarization ===\n")
+
+    server, base_url, state = start_fake_server(rate_limited_calls=2)
+    try:
+        sleeps = []
+
+        def record_sleep(seconds):
+            sleeps.append(seconds)
+            time.sleep(seconds)
+
+        service = SummarizationService(api_key="test", base_url=base_url, max_concurrency=3,
+                                       base_delay=0.01, sleep=record_sleep)
+
+        # ทดสอบ 1: 429 สองครั้งแรกต้องรอตาม retry-after-ms แล้วสำเร็จ
+        summary = service.summarize("ดวงชะตาราศีมังกร", "text")
+        assert summary.startswith("สรุป:"), summary
+        assert service.stats["retries"] == 2
+        assert all(0.05 <= seconds <= 0.07 for seconds in sleeps), sleeps
+        print("✅ retry ตาม Retry-After แล้วได้ summary")
+
+        # ทดสอบ 2: สรุปหลายรายการพร้อมกันไม่เกิน max_concurrency
+        items = [(f"chunk_{i}", f"เนื้อหา {i}", "text") for i in range(9)]
+        summaries = asyncio.run(service.summarize_many(items))
+        assert set(summaries) == {f"chunk_{i}" for i in range(9)}
+        assert 1 < state["max_in_flight"] <= 3, state["max_in_flight"]
+        print(f"✅ สรุป {len(summaries)} รายการ (พร้อมกันสูงสุด {state['max_in_flight']} requests)")
+    finally:
+        server.shutdown()
+
+
+def test_batch_summarization():
+    """ทดสอบโหมด Batch API: ส่งไฟล์ → สร้าง batch → poll → อ่านผลลัพธ์"""
+
+    print("\n=== ทดสอบ Batch API ===\n")
+
+    server, base_url, state = start_fake_server()
+    try:
+        service = SummarizationService(api_key="test", base_url=base_url, sleep=lambda seconds: None)
+        items = [("doc_1_1_text_1", "ข้อความหน้า 1", "text"),
+                 ("doc_1_1_table_1", "ตารางดาว", "table"),
+                 ("doc_1_2_text_fail", "ข้อความที่สรุปไม่สำเร็จ", "text")]
+
+        summaries = service.summarize_batch(items, poll_interval=0)
+        assert summaries["doc_1_1_text_1"] == "batch:doc_1_1_text_1"
+        assert summaries["doc_1_1_table_1"] == "batch:doc_1_1_table_1"
+        assert summaries["doc_1_2_text_fail"] == "ข้อความที่สรุปไม่สำเร็จ"
+        assert state["batch_polls"] == 2
+        assert state["chat_calls"] == 0
+        print("✅ ได้ summary จาก batch และใช้ข้อความต้นฉบับแทนรายการที่ล้มเหลว")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_rate_limiter()
+    test_online_summarization()
+    test_batch_summarization()
+    print("\n🎉 ทดสอบ Summarization Service ผ่านทั้งหมด")
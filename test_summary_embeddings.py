@@ -87,6 +87,81 @@ def test_summary_embeddings():
         import traceback
         traceback.print_exc()
 
+def test_embed_processed_chunks():
+    """ทดสอบ embed_processed_chunks (batch ข้ามหน้า) ด้วย encoder จำลอง"""
+    print("\n🔢 ทดสอบ Batched Summary Embeddings")
+    print("=" * 50)
+    
+    import tempfile
+    import numpy as np
+    import multimodel_rag
+    from embedding_models import EmbeddingModelSpec
+    from ingestion_cache import IngestionCache
+    
+    def vector_of(text):
+        return [float(len(text)), float(ord(text[0])), 1.0]
+    
+    class StubEncoder:
+        """encoder จำลอง: vector มาจากข้อความ และ encode ข้อความ 'boom' ไม่สำเร็จ"""
+        
+        def __init__(self):
+            self.batches = []
+        
+        def encode(self, texts, batch_size=None):
+            if isinstance(texts, str):
+                if texts == "boom":
+                    raise RuntimeError("encoder crashed")
+                return np.array(vector_of(texts))
+            self.batches.append(list(texts))
+            if "boom" in texts:
+                raise RuntimeError("encoder crashed")
+            return np.array([vector_of(text) for text in texts])
+    
+    def make_chunks(summaries):
+        return [{"doc_id": f"book_{page}_text_{i}", "page": page, "summary": summary}
+                for i, (page, summary) in enumerate(summaries)]
+    
+    spec = EmbeddingModelSpec("stub-v1", "stub-encoder", dimension=3)
+    encoder = StubEncoder()
+    originals = (multimodel_rag.get_text_embedding_model, multimodel_rag.get_ingestion_cache)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = IngestionCache(path=os.path.join(tmp_dir, "cache.sqlite3"))
+        multimodel_rag.get_text_embedding_model = lambda model_spec: encoder
+        multimodel_rag.get_ingestion_cache = lambda: cache
+        try:
+            # ทดสอบ 1: chunks จากหลายหน้า encode ใน batch เดียว และ vector กลับไปที่ chunk ของตัวเอง
+            chunks = make_chunks([(1, "ราศีเมษ"), (1, "   "), (2, "ธาตุไฟ"), (3, "ราศีเมษ"), (3, "ดาวอังคาร")])
+            embedded = multimodel_rag.embed_processed_chunks(chunks, batch_size=8, spec=spec)
+            assert encoder.batches == [["ราศีเมษ", "ธาตุไฟ", "ดาวอังคาร"]]
+            assert [chunk["doc_id"] for chunk in embedded] == ["book_1_text_0", "book_2_text_2", "book_3_text_3", "book_3_text_4"]
+            for chunk in embedded:
+                assert chunk["embeddings"] == vector_of(chunk["summary"])
+                assert chunk["embedding_model"] == "stub-v1" and chunk["embedding_dim"] == 3
+            print(f"✅ encode {len(encoder.batches[0])} ข้อความใน batch เดียว และ vector ตรงกับ chunk ข้ามหน้า")
+            
+            # ทดสอบ 2: summary ว่าง (รูปที่ไม่มีข้อความ) ไม่มี text embeddings
+            assert "embeddings" not in chunks[1]
+            print("✅ summary ว่างไม่ถูก encode")
+            
+            # ทดสอบ 3: encode ไม่สำเร็จได้ fallback vector (ศูนย์) และไม่ถูกเก็บใน cache
+            encoder.batches = []
+            chunks = make_chunks([(4, "ราศีเมษ"), (4, "boom"), (5, "ราศีสิงห์")])
+            embedded = multimodel_rag.embed_processed_chunks(chunks, batch_size=8, spec=spec)
+            assert encoder.batches == [["boom", "ราศีสิงห์"]]
+            assert embedded[0]["embeddings"] == vector_of("ราศีเมษ")
+            assert embedded[1]["embeddings"] == spec.fallback_vector() == [0.0, 0.0, 0.0]
+            assert embedded[1]["embedding_model"] == "stub-v1" and embedded[1]["embedding_dim"] == 3
+            assert embedded[1]["degraded"] and "degraded" not in embedded[0]
+            assert embedded[2]["embeddings"] == vector_of("ราศีสิงห์")
+            assert multimodel_rag.embedding_cache_key("boom", "stub-v1") not in cache.get_many(
+                [multimodel_rag.embedding_cache_key("boom", "stub-v1")])
+            print("✅ encode ไม่สำเร็จได้ fallback vector (degraded) และไม่ถูก cache")
+        finally:
+            multimodel_rag.get_text_embedding_model, multimodel_rag.get_ingestion_cache = originals
+            cache.close()
+    
+    print("\n✅ ทดสอบ Batched Summary Embeddings ผ่านทั้งหมด")
+
 def test_database_structure():
     """ทดสอบโครงสร้างฐานข้อมูล"""
     print("\n🗄️ ทดสอบโครงสร้างฐานข้อมูล")
@@ -155,6 +230,9 @@ if __name__ == "__main__":
     # ทดสอบการสร้าง embeddings
     test_summary_embeddings()
     
+    # ทดสอบการสร้าง embeddings แบบ batch ข้ามหน้า
+    test_embed_processed_chunks()
+    
     # ทดสอบโครงสร้างฐานข้อมูล
     test_database_structure()
     
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+ทดสอบ Vector Index (ค้นหา processed chunks ในหน่วยความจำ และรวมผลด้วย Reciprocal Rank Fusion)
+"""
+
+import os
+import sys
+
+# เพิ่ม path สำหรับ import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.vector_index import VectorIndex, VectorIndexRegistry, reciprocal_rank_fusion
+
+class FakeCollection:
+    """collection จำลองที่นับจำนวนครั้งที่ดึงเอกสาร"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.loads = 0
+
+    def find(self, query=None, projection=None):
+        self.loads += 1
+        return [dict(doc) for doc in self.docs]
+
+    def find_one(self, query=None, projection=None, sort=None):
+        field = sort[0][0]
+        docs = sorted((doc for doc in self.docs if field in doc), key=lambda doc: doc[field])
+        return docs[-1] if docs else None
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+DOCS = [
+    {"_id": "a_1_img_1", "document_id": "a", "image_embeddings": [1.0, 0.0, 0.0], "summary": "ไพ่ The Sun"},
+    {"_id": "a_2_img_1", "document_id": "a", "image_embeddings": [0.6, 0.8, 0.0], "summary": "ไพ่ The Moon"},
+    {"_id": "b_1_img_1", "document_id": "b", "image_embeddings": [0.0, 0.0, 2.0], "summary": "ไพ่ The Star"},
+    {"_id": "b_2_img_1", "document_id": "b", "summary": "ไม่มี vector"},
+]
+
+def test_vector_index():
+    """ทดสอบการค้นหา การกรองเอกสาร การโหลดใหม่ และ RRF"""
+
+    print("=== ทดสอบ Vector Index ===\n")
+
+    # ทดสอบ 1: ค้นหาด้วย cosine similarity และไม่เก็บ vector ซ้ำใน payload
+    index = VectorIndex("image_embeddings", DOCS)
+    assert len(index) == 3 and index.dimension == 3
+    hits = index.search([2.0, 0.0, 0.0], k=2)
+    assert [doc["_id"] for _, doc in hits] == ["a_1_img_1", "a_2_img_1"]
+    assert abs(hits[0][0] - 1.0) < 1e-6 and abs(hits[1][0] - 0.6) < 1e-6
+    assert "image_embeddings" not in hits[0][1]
+    print("✅ ค้นหาด้วย cosine similarity")
+
+    # ทดสอบ 2: ค้นหาเฉพาะเอกสารที่ระบุ และ query ที่ขนาดไม่ตรงไม่มีผลลัพธ์
+    assert [doc["_id"] for _, doc in index.search([1.0, 0.0, 0.0], k=5, document_ids=["b"])] == ["b_1_img_1"]
+    assert index.search([1.0, 0.0], k=2) == []
+    print("✅ กรองตาม document_ids")
+
+    # ทดสอบ 3: registry โหลด collection ครั้งเดียว และโหลดใหม่เมื่อ collection เปลี่ยน
+    collection = FakeCollection(list(DOCS))
+    registry = VectorIndexRegistry(reload_interval=0, get_collection=lambda name: collection)
+    assert len(registry.get("processed_image_chunks", "image_embeddings")) == 3
+    assert registry.get("processed_image_chunks", "image_embeddings") is registry.get("processed_image_chunks", "image_embeddings")
+    assert collection.loads == 1
+    collection.docs.append({"_id": "c_1_img_1", "document_id": "c", "image_embeddings": [0.0, 1.0, 0.0]})
+    assert len(registry.get("processed_image_chunks", "image_embeddings")) == 4 and collection.loads == 2
+    assert VectorIndexRegistry(get_collection=lambda name: None).get("processed_image_chunks") is None
+    print("✅ โหลด index ใหม่เมื่อ collection เปลี่ยน")
+
+    # ทดสอบ 4: RRF ให้อันดับสูงกับผลที่พบในหลายชุด
+    text_hits = [{"id": "t1"}, {"id": "img"}, {"id": "t2"}]
+    image_hits = [{"id": "img"}, {"id": "img2"}]
+    fused = reciprocal_rank_fusion([text_hits, image_hits], key=lambda hit: hit["id"], k=60)
+    assert [hit["id"] for _, hit in fused] == ["img", "t1", "img2", "t2"]
+    assert abs(fused[0][0] - (1 / 62 + 1 / 61)) < 1e-12
+    print("✅ Reciprocal Rank Fusion")
+
+    # ทดสอบ 5: ระหว่าง migration vectors แยกตาม embedding space (chunks เก่าไม่มี embedding_model)
+    collection = FakeCollection([
+        {"_id": "t1", "document_id": "a", "embeddings": [1.0, 0.0, 0.0]},
+        {"_id": "t2", "document_id": "a", "embeddings": [0.0, 1.0], "embedding_model": "potion-multilingual-128M"},
+        {"_id": "t3", "document_id": "b", "embeddings": [1.0, 1.0], "embedding_model": "potion-multilingual-128M"},
+    ])
+    registry = VectorIndexRegistry(reload_interval=0, get_collection=lambda name: collection)
+    spaces = registry.spaces("processed_text_chunks")
+    assert {model_id: len(index) for model_id, index in spaces.items()} == {"all-MiniLM-L6-v2": 1, "potion-multilingual-128M": 2}
+    assert [doc["_id"] for _, doc in spaces["potion-multilingual-128M"].search([0.0, 1.0], k=1)] == ["t2"]
+    assert registry.get("processed_text_chunks").dimension == 2 and collection.loads == 1
+    assert VectorIndexRegistry(get_collection=lambda name: None).spaces("processed_text_chunks") == {}
+    collection.docs[0]["image_embeddings"] = collection.docs[1]["image_embeddings"] = [1.0, 0.0]
+    assert list(registry.spaces("processed_text_chunks", "image_embeddings")) == ["image_embeddings"]
+    print("✅ แยก embedding spaces ตาม embedding_model")
+
+    print("\n🎉 ทดสอบ Vector Index ผ่านทั้งหมด")
+
+if __name__ == "__main__":
+    test_vector_index()